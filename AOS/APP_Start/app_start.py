@@ -1,11 +1,18 @@
 import time
-import csv
 import os
-import statistics
+import sys
 from datetime import datetime
-from appium import webdriver
-from appium.options.android import UiAutomator2Options
-from appium.webdriver.common.appiumby import AppiumBy
+
+# 공통 모듈(common) 경로 추가 (저장소 루트)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from common import calibration, device_env, speed_index, stats
+from common import readiness
+from common.checkpoint import ResultLog
+from common.detectors import app_state, uiautomator
+from common.driver_pool import DriverPool, android_options
+from common.logcat import AdbLaunchTimer
+from common.result_store import APP_ALIASES, STATUS_FAIL, STATUS_OK, ResultStore
+from common.waiter import wait_until
 
 # ==========================================
 # [설정] 앱 및 타겟 정보 (UiSelector 사용)
@@ -32,45 +39,88 @@ APPS = [
 ]
 
 DEVICE_NAME = "Galaxy S25"
-APPIUM_SERVER_URL = "http://127.0.0.1:4723"
-REPEAT_COUNT = 10
+APPIUM_SERVER_URL = device_env.server_url("http://127.0.0.1:4723")
+REPEAT_COUNT = device_env.repeat_count(10)
+
+# 실행 측정 엔진
+#  - "appium" : activate_app 반환 ~ UiSelector 첫 감지 (호스트 시각, 기존 방식)
+#  - "logcat" : am start -W 로 실행하고 logcat Displayed / Fully drawn (기기 시각)을
+#               UiSelector 감지(호스트 시각)와 함께 기록
+LAUNCH_ENGINE = "appium"
+# adb 기기 시리얼 (병렬 러너는 DEVICE_UDID 로 넘김, 단독 실행 시 한 대만 연결되어 있으면 None)
+ADB_SERIAL = device_env.udid()
 
 # 파일 저장 경로 (.py 파일과 같은 위치)
 SAVE_DIR = os.path.dirname(os.path.abspath(__file__))
 
+# logcat 엔진 추가 컬럼
+DEVICE_COLUMNS = ["Displayed(초)", "FullyDrawn(초)", "am_TotalTime(초)", "LaunchState", "감지지연(초)"]
+
+
+def device_columns(device, end_time):
+    """
+    기기 측 측정값 -> CSV 추가 컬럼 값
+    감지지연: 기기가 Displayed 를 기록한 시각 ~ UiSelector 가 요소를 감지한 시각 (호스트 시계로 환산)
+    """
+    if device is None:
+        return [""] * len(DEVICE_COLUMNS)
+    displayed, fully_drawn, am = device.displayed, device.fully_drawn, device.am
+    return [
+        f"{displayed.elapsed:.4f}" if displayed else "",
+        f"{fully_drawn.elapsed:.4f}" if fully_drawn else "",
+        f"{am['TotalTime']:.4f}" if "TotalTime" in am else "",
+        am.get("LaunchState", ""),
+        f"{end_time - displayed.host_time:.4f}" if displayed and end_time else "",
+    ]
+
+
 def measure_3apps_detail_save():
-    
+
+    launch_timer = None
+    if LAUNCH_ENGINE == "logcat":
+        launch_timer = AdbLaunchTimer(ADB_SERIAL).start()
+
+    # ⚡ 앱마다 세션을 새로 만들지 않고 warm 세션 1개를 재사용 (앱 전환은 terminate/activate)
+    driver_pool = DriverPool(APPIUM_SERVER_URL)
+    # 회차별 원본 기록은 통합 결과 저장소에 바로 적재 (CSV 는 아래에서 저장소로부터 기존 형식으로 저장)
+    store = ResultStore()
+    # 감지 비용 보정 (CALIBRATE=1 이면 앱마다 첫 성공 회차 직후 측정)
+    calibrator = calibration.Calibrator(store, "android", device=DEVICE_NAME)
+
     for app in APPS:
         print(f"\n" + "="*60)
         print(f"🚀 [{app['name']}] 앱 실행 측정 시작 ({REPEAT_COUNT}회)")
         print(f"="*60)
 
-        options = UiAutomator2Options()
-        options.device_name = DEVICE_NAME
-        options.app_package = app['package']
-        if app['activity']:
-            options.app_activity = app['activity']
-        options.app_wait_activity = "*"
-        options.automation_name = "UiAutomator2"
-        options.no_reset = True 
-        
-        # ⚡ [속도 최적화]
-        options.set_capability("waitForIdleTimeout", 0)
-        options.set_capability("ignoreUnimportantViews", True)
-
-        driver = webdriver.Remote(APPIUM_SERVER_URL, options=options)
+        # 세션 상태 확인 후 꺼냄 (응답이 없으면 새로 생성)
+        # ⚡ [속도 최적화] waitForIdleTimeout=0 / ignoreUnimportantViews 는 풀에서 설정
+        driver = driver_pool.acquire("android", options=android_options(DEVICE_NAME))
+        # 시각적 완성도 타임라인 (VISUAL_TIMELINE=1 일 때만, 아니면 None)
+        timeline = speed_index.from_env(driver)
         
         # [초기화] 이전 실행 앱 종료
         try: driver.terminate_app(app['package'])
         except: pass
         time.sleep(1)
         
+        # 파일명: android_앱이름_launch_result.csv
+        file_name = f"android_{app['name']}_launch_result.csv"
         # 결과 담을 리스트: [회차, 상태, 측정시간, 소요시간]
-        test_results = []
+        # 앱마다 체크포인트에 바로 기록 (중단 후 다시 실행하면 그 앱의 다음 회차부터 이어서 측정)
+        checkpoint = ResultLog(os.path.splitext(file_name)[0], SAVE_DIR)
+        test_results = checkpoint.rows
+        repeats = stats.AdaptiveRepeat(test_results, REPEAT_COUNT, checkpoint.next_iteration)
+        # 회차 -> 기기측정(LaunchTiming, logcat 엔진만) / 시각적 완성도 (이번 실행 회차만)
+        devices = {}
+        visual_rows = {}
+        record = store.start_run(
+            app=APP_ALIASES.get(app['name'], app['name']), platform="android", scenario="app_start",
+            metric="앱실행반응속도(초)", device=DEVICE_NAME, script=__file__, resume=bool(test_results),
+        )
 
         try:
-            for i in range(1, REPEAT_COUNT + 1):
-                print(f"🔄 [ {i}/{REPEAT_COUNT} ] 측정 중...")
+            for i in repeats:
+                print(f"🔄 [ {i}/{repeats.limit} ] 측정 중...")
                 
                 # 측정 시간 기록
                 measured_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -78,34 +128,59 @@ def measure_3apps_detail_save():
                 try:
                     # 1. 앱 종료 (Cold Start)
                     driver.terminate_app(app['package'])
-                    time.sleep(2)
-
-                    # 2. 앱 실행
-                    driver.activate_app(app['package'])
-
-                    # 3. 측정 시작
-                    start_time = time.time()
+                    # 고정 2초 대신 프로세스가 실제로 내려갈 때까지만 대기
+                    readiness.ready(app_state(driver, app['package']), static=2, label="앱 종료 확인")
+
+                    # 2. 앱 실행 + 3. 측정 시작
+                    if timeline:
+                        timeline.start()
+                    if launch_timer:
+                        # am start -W 는 화면 표시까지 블로킹되므로 비동기로 띄우고 바로 감지 시작
+                        start_time = time.time()
+                        proc = launch_timer.launch(app['package'], app['activity'])
+                    else:
+                        driver.activate_app(app['package'])
+                        start_time = time.time()
 
                     # 4. [초광속 인식] Raw Loop + UiSelector
                     target = app['target_selector']
                     
-                    while True:
-                        res = driver.find_elements(AppiumBy.ANDROID_UIAUTOMATOR, target)
-                        if res:
-                            break
-                        
-                        if time.time() - start_time > 20:
-                            raise Exception("Timeout")
-
-                    end_time = time.time()
+                    detector = uiautomator(driver, target)
+                    result = wait_until(detector, start_time, timeout=20)
+                    device = launch_timer.collect(proc, app['package'], start_time) if launch_timer else None
+                    if not result.matched:
+                        raise Exception("Timeout")
+
+                    end_time = result.end_time
                     duration = end_time - start_time
                     
                     print(f"   ✅ 성공: {duration:.4f} 초")
-                    test_results.append([i, "성공", measured_at, duration])
+                    print(f"   📈 샘플링 속도: {result.sample_rate:.1f}Hz")
+                    if device:
+                        displayed, fully_drawn, _, launch_state, lag = device_columns(device, end_time)
+                        print(f"   📱 기기 측정: Displayed {displayed or '-'}초 / Fully drawn {fully_drawn or '-'}초 "
+                              f"/ {launch_state or '?'} / 감지지연 {lag or '-'}초")
+                    # 감지 후에도 그려지는 콘텐츠까지 화면이 멈출 때까지 기록
+                    visual = timeline.finish(start_time, end_time) if timeline else None
+                    speed_index.report(visual)
+                    devices[i] = device
+                    visual_rows[i] = visual
+                    checkpoint.append([i, "성공", measured_at, duration])
+                    correction = calibrator.correct(detector, start_time, result)
+                    record.add(
+                        i, STATUS_OK, measured_at, duration, start_time=start_time, end_time=end_time,
+                        detector=target, launch_engine=LAUNCH_ENGINE, prev_time=result.prev_time,
+                        **calibration.fields(correction), **speed_index.fields(visual),
+                        **(dict(zip(DEVICE_COLUMNS, device_columns(device, end_time))) if device else {}),
+                    )
 
                 except Exception as e:
                     print(f"   ❌ 실패: {e}")
-                    test_results.append([i, "실패", measured_at, 0])
+                    if timeline:
+                        timeline.cancel()
+                    checkpoint.append([i, "실패", measured_at, 0])
+                    record.add(i, STATUS_FAIL, measured_at, None, detector=app['target_selector'],
+                               launch_engine=LAUNCH_ENGINE, error=str(e))
 
                 time.sleep(1)
 
@@ -116,63 +191,47 @@ def measure_3apps_detail_save():
             # 앱 종료 (Cleanup)
             try:
                 print(f"   🧹 [Cleanup] {app['name']} 종료")
+                if timeline:
+                    timeline.close()
                 driver.terminate_app(app['package'])
                 time.sleep(1)
             except: pass
 
-            if driver:
-                driver.quit()
-
-        # ==========================================
-        # 4. 저장 (앱 별로 개별 파일 저장)
-        # ==========================================
-        durations = [row[3] for row in test_results if row[1] == "성공" and row[3] > 0]
-
-        if durations:
-            avg_val = statistics.mean(durations)
-            max_val = max(durations)
-            min_val = min(durations)
-            std_val = statistics.pstdev(durations) if len(durations) > 1 else 0.0
-        else:
-            avg_val = max_val = min_val = std_val = 0.0
-
-        # 파일명: android_앱이름_launch_result.csv
-        file_name = f"android_{app['name']}_launch_result.csv"
-        output_path = os.path.join(SAVE_DIR, file_name)
-        
-        print(f"\n💾 CSV 저장 경로: {output_path}")
-
-        try:
-            with open(output_path, mode='w', newline='', encoding='utf-8-sig') as file:
-                writer = csv.writer(file)
-                # 헤더
-                writer.writerow([
-                    "회차", "상태", "측정시간", "앱실행반응속도(초)",
-                    "평균(초)", "최소(초)", "최대(초)", "표준편차(초)"
-                ])
-
-                # 데이터 행
-                for iteration, status, measured_at, duration in test_results:
-                    writer.writerow([
-                        iteration,
-                        status,
-                        measured_at,
-                        f"{duration:.4f}" if duration > 0 else "",
-                        "", "", "", "" # 통계 칸 비움
-                    ])
-
-                # 통계 행
-                writer.writerow([
-                    "통계", "", "", "",
-                    f"{avg_val:.4f}" if durations else "",
-                    f"{min_val:.4f}" if durations else "",
-                    f"{max_val:.4f}" if durations else "",
-                    f"{std_val:.4f}" if durations else ""
-                ])
-            print("✅ 저장 완료")
-            
-        except Exception as e:
-            print(f"❌ 파일 저장 실패: {e}")
+            # ==========================================
+            # 4. 저장 (앱 별로 개별 파일 저장)
+            # ==========================================
+            summary = stats.from_rows(test_results)
+            stats.report(summary, app['name'])
+            if timeline:
+                speed_index.summarize([visual_rows.get(row[0]) for row in test_results[summary.warmup:]], app['name'])
+            device_summary = stats.summarize([
+                devices[row[0]].displayed.elapsed for row in test_results[summary.warmup:]
+                if row[1] == "성공" and devices.get(row[0]) and devices[row[0]].displayed
+            ])
+
+            output_path = device_env.result_path(os.path.join(SAVE_DIR, file_name))
+
+            print(f"\n💾 CSV 저장 경로: {output_path}")
+
+            # 부가 컬럼: logcat 기기 측정 / 시각적 완성도 (record.add 의 extra 키)
+            columns = {column: column for column in DEVICE_COLUMNS} if launch_timer else {}
+            if timeline:
+                columns.update(speed_index.CSV_FIELDS)
+            try:
+                # 기기 시각(Displayed) 기준 통계 행을 통계 행 아래에 추가
+                store.export_csv(record.run_id, output_path, columns=columns, summaries={"통계(기기)": device_summary})
+                print("✅ 저장 완료")
+                if checkpoint.finish(repeats.total):
+                    record.finish(repeats.reason)
+
+            except Exception as e:
+                print(f"❌ 파일 저장 실패: {e}")
+
+    driver_pool.close()
+    store.close()
+    readiness.report()
+    if launch_timer:
+        launch_timer.stop()
 
     print("\n✅ 모든 앱 측정 완료.")
 
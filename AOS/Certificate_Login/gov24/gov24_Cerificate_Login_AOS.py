@@ -5,23 +5,31 @@ from selenium.webdriver.support import expected_conditions as EC
 from appium.options.android import UiAutomator2Options
 from appium import webdriver
 import os
+import sys
 
-import pandas as pd
 from datetime import datetime
 import time
 
+# 공통 모듈(common) 경로 추가 (저장소 루트)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from common import device_env, profiler, stats
+from common.checkpoint import ResultLog
+from common.detectors import uiautomator
+from common.result_store import STATUS_FAIL, STATUS_OK, ResultStore
+from common.waiter import wait_until
+
 # ===================== 설정 =====================
 APP_PACKAGE = "kr.go.minwon.m"
 APP_ACTIVITY = "kr.go.minwon.m.BrowserActivity"
 
-APPIUM_SERVER_URL = "http://127.0.0.1:4723"
+APPIUM_SERVER_URL = device_env.server_url("http://127.0.0.1:4723")
 DEVICE_NAME = "Android"
 
 # 🔐 금융인증서 6자리 비밀번호
 CERT_PW = "123456" 
 
 # 반복 횟수
-REPEAT_COUNT = 10
+REPEAT_COUNT = device_env.repeat_count(10)
 
 # 메인화면 기준 로그인 버튼 좌표
 LOGIN_BTN_X = 813
@@ -142,22 +150,16 @@ def enter_cert_pw_and_wait_menu(driver, wait, attempt_idx=None):
         # -> UiSelector로 변경 (훨씬 빠름)
         target_selector = 'new UiSelector().descriptionContains("혜택알림")'
         
-        while True:
-            # find_elements는 에러 없이 빈 리스트 반환 (try-catch 오버헤드 제거)
-            res = driver.find_elements(AppiumBy.ANDROID_UIAUTOMATOR, target_selector)
-            
-            if res:
-                break # 찾았으면 즉시 탈출
-            
-            # 안전장치: 30초 타임아웃
-            if time.time() - start_time > 30:
-                raise TimeoutException("메인화면 로딩 타임아웃 (30초)")
+        result = wait_until(uiautomator(driver, target_selector), start_time, timeout=30)
+        if not result.matched:
+            raise TimeoutException("메인화면 로딩 타임아웃 (30초)")
 
-        end_time = time.time()
+        end_time = result.end_time
         elapsed = end_time - start_time
 
         print("🎉 메인화면 로드 확인 (UiSelector 인식)")
         print(f"⏱ 측정 시간: {elapsed:.4f} 초")
+        print(f"   📈 샘플링 속도: {result.sample_rate:.1f}Hz")
 
         # 측정이 끝난 뒤 전체메뉴를 실제로 한 번 열어 둔다.
         try:
@@ -239,29 +241,45 @@ def test_login_minwon(repeat_count=REPEAT_COUNT):
     options.set_capability("ignoreUnimportantViews", True) # DOM 경량화
 
     print("--- [정부24] 금융인증서 로그인 성능 테스트 (초고속 인식) ---")
-    driver = webdriver.Remote(APPIUM_SERVER_URL, options=options)
+    device_env.apply_capabilities(options)
+    driver = profiler.instrument(webdriver.Remote(APPIUM_SERVER_URL, options=options))
     wait = WebDriverWait(driver, 20)
 
-    results = []
+    # 회차마다 체크포인트에 바로 기록 (중단 후 다시 실행하면 이어서 측정)
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    checkpoint = ResultLog("gov24_certficate_login", current_dir)
+    results = checkpoint.rows
+    repeats = stats.AdaptiveRepeat(
+        results, repeat_count, checkpoint.next_iteration, status_idx="팝업메시지", duration_idx="로그인반응속도(초)",
+    )
+    # 회차별 원본 기록은 통합 결과 저장소에 바로 적재 (CSV 는 저장소에서 내보냄)
+    store = ResultStore()
+    record = store.start_run(
+        app="gov24", platform="android", scenario="certificate_login", metric="로그인반응속도(초)",
+        device=device_env.device_label(DEVICE_NAME), script=__file__, resume=bool(results),
+    )
 
     try:
-        for i in range(1, repeat_count + 1):
+        for i in repeats:
             print("\n" + "=" * 60)
-            print(f"🔁 로그인 시도 {i}/{repeat_count}")
+            print(f"🔁 로그인 시도 {i}/{repeats.limit}")
             print("=" * 60)
 
             elapsed, status_msg = perform_login_once(driver, wait, attempt_idx=i)
+            measured_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-            results.append(
+            checkpoint.append(
                 {
                     "회차": i,
-                    "측정시각": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "측정시각": measured_at,
                     "로그인반응속도(초)": round(elapsed, 4),
                     "팝업메시지": status_msg,
                 }
             )
+            ok = status_msg == STATUS_OK
+            record.add(i, STATUS_OK if ok else STATUS_FAIL, measured_at, elapsed if ok else None, popup=status_msg)
 
-            if i < repeat_count:
+            if repeats.has_next(i):
                 print("\n📴 [다음 회차 준비] 로그아웃 진행")
                 try:
                     logout_to_main(driver)
@@ -273,52 +291,27 @@ def test_login_minwon(repeat_count=REPEAT_COUNT):
         print("\n🧹 드라이버 종료")
         driver.quit()
 
-    # ===================== CSV 저장 =====================
-    if results:
-        df = pd.DataFrame(results)
-
-        # 요약 행 추가 (평균, 최소, 최대, 표준편차)
-        valid_elapsed = [row["로그인반응속도(초)"] for row in results if row["팝업메시지"] == "성공"]
-        
-        if valid_elapsed:
-            mean_val = sum(valid_elapsed) / len(valid_elapsed)
-            min_val = min(valid_elapsed)
-            max_val = max(valid_elapsed)
-            std_val = (sum((x - mean_val) ** 2 for x in valid_elapsed) / len(valid_elapsed)) ** 0.5
-        else:
-            mean_val = min_val = max_val = std_val = 0.0
-
-        summary_row = {
-            "회차": "통계",
-            "측정시각": "-",
-            "로그인반응속도(초)": "",
-            "평균(초)": round(mean_val, 4),
-            "최소(초)": round(min_val, 4),
-            "최대(초)": round(max_val, 4),
-            "표준편차(초)": round(std_val, 4),
-        }
-        
-        if "팝업메시지" in df.columns:
-            df = df.drop(columns=["팝업메시지"])
-
-        df = pd.concat([df, pd.DataFrame([summary_row])], ignore_index=True)
+        # ===================== CSV 저장 =====================
+        if results:
+            # 통계 (평균, 최소, 최대, 표준편차 - 타임아웃 회차 제외)
+            result_stats = stats.from_rows(results, status_idx="팝업메시지", duration_idx="로그인반응속도(초)")
+            stats.report(result_stats, "정부24 인증서 로그인")
 
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        file_name = f"gov24_certficate_login_{repeat_count}runs_{timestamp}.csv"
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            file_name = f"gov24_certficate_login_{repeat_count}runs_{timestamp}.csv"
 
-        # 🔥 [핵심 수정] 현재 파일(.py)이 있는 폴더 경로 가져오기
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        
-        # 🔥 폴더 경로 + 파일 이름 합치기
-        save_path = os.path.join(current_dir, file_name)
+            # 🔥 폴더 경로 + 파일 이름 합치기
+            save_path = device_env.result_path(os.path.join(current_dir, file_name))
 
-        # 합친 경로(save_path)로 저장
-        df.to_csv(save_path, index=False, encoding="utf-8-sig")
+            # 합친 경로(save_path)로 저장 (결과 저장소에서 기존 형식으로 내보냄)
+            store.export_csv(record.run_id, save_path)
+            if checkpoint.finish(repeats.total):
+                record.finish(repeats.reason)
 
-        print(f"\n✅ CSV 저장 완료! 경로: {save_path}")
-        print(df)
-    else:
-        print("ℹ️ 저장할 데이터가 없습니다.")
+            print(f"\n✅ CSV 저장 완료! 경로: {save_path}")
+        else:
+            print("ℹ️ 저장할 데이터가 없습니다.")
+        store.close()
 
 if __name__ == "__main__":
 
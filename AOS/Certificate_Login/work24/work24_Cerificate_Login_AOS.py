@@ -5,11 +5,19 @@ from selenium.webdriver.support import expected_conditions as EC
 from appium.options.android import UiAutomator2Options
 from appium import webdriver
 
-import pandas as pd
 from datetime import datetime
 import time
-import statistics
 import os  # ✅ [3] 경로 저장을 위해 추가
+import sys
+
+# 공통 모듈(common) 경로 추가 (저장소 루트)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from common import device_env, profiler, stats
+from common import readiness
+from common.checkpoint import ResultLog
+from common.detectors import AnyOf, accessibility_id, uiautomator
+from common.result_store import STATUS_FAIL, STATUS_OK, ResultStore
+from common.waiter import wait_until
 
 # ===================== 설정 =====================
 APP_PACKAGE = "kr.or.keis.mo"
@@ -17,14 +25,22 @@ APP_PACKAGE = "kr.or.keis.mo"
 # 금융인증서 비밀번호 6자리
 CERT_PASSWORD = "123456"
 
-APPIUM_SERVER_URL = "http://127.0.0.1:4723"
+APPIUM_SERVER_URL = device_env.server_url("http://127.0.0.1:4723")
 DEVICE_NAME = "Android"
 
 # 반복 횟수
-REPEAT_COUNT = 10   # 필요하면 숫자만 바꿔서 사용
+REPEAT_COUNT = device_env.repeat_count(10)   # 필요하면 숫자만 바꿔서 사용
 
 
 # ===================== 공통 유틸 함수 =====================
+def login_entry(driver):
+    """로그인 진입점('로그인을 해 주세요' 또는 '전체메뉴')이 보이면 다음 회차를 시작할 수 있는 상태"""
+    return AnyOf(
+        accessibility_id(driver, "로그인을 해 주세요"),
+        uiautomator(driver, 'new UiSelector().className("android.widget.Button").text("전체메뉴")'),
+    )
+
+
 def tap_by_coordinates(driver, x, y):
     """좌표(x, y)를 탭 - Appium 2 방식"""
     try:
@@ -113,22 +129,22 @@ def open_login_section(driver, wait):
 def tap_certificate_menu(driver, wait):
     """
     로그인 수단 화면에서:
-    1) 4초 대기 후 좌표 (540, 1800) 탭 → '금융인증서' 버튼 클릭
-    2) 금융인증서 화면 로딩을 위해 3초 대기
+    1) 화면이 안정될 때까지 대기 후 좌표 (540, 1800) 탭 → '금융인증서' 버튼 클릭
+    2) 금융인증서 화면 로딩이 끝날 때까지 대기 (기존 고정 3초)
     3) 좌표 (509, 1246) 탭 → '000님의 금융인증서' 카드 선택
     이후 비밀번호 입력 단계로 넘어감.
     """
     print("💳 [2단계] '금융인증서' 버튼 및 인증서 카드 선택 (좌표)")
 
     # 1) 로그인 수단 화면 로딩 대기 후 금융인증서 버튼 클릭
-    print("⏳ 로그인수단 화면 로딩을 위해 3초 대기...")
-    time.sleep(3)
+    print("⏳ 로그인수단 화면 로딩 대기...")
+    readiness.settle(driver, static=3, label="로그인수단 화면")
     tap_by_coordinates(driver, 540, 1800)
     print("   ✅ '금융인증서' 버튼 클릭")
 
     # 2) 금융인증서 앱 화면 로딩 대기
-    print("⏳ 금융인증서 선택 화면 로딩을 위해 3초 대기...")
-    time.sleep(3)
+    print("⏳ 금융인증서 선택 화면 로딩 대기...")
+    readiness.settle(driver, static=3, label="금융인증서 선택 화면")
 
     # 3) 인증서 카드(이은화님의 금융인증서) 클릭
     tap_by_coordinates(driver, 509, 1246)
@@ -224,7 +240,7 @@ def logout_for_next_run(driver, wait):
     if not closed:
         print("   ℹ️ 별도 로그아웃 확인 팝업 없음")
 
-    time.sleep(2)
+    readiness.ready(login_entry(driver), static=2, label="로그아웃 후 로그인 진입점")
 
 
 # ===================== 로그인 시도 1회 =====================
@@ -254,18 +270,11 @@ def perform_login_once(driver, wait):
     target_selector = 'new UiSelector().resourceId("android:id/message")'
     
     try:
-        while True:
-            # find_elements는 에러 없이 빈 리스트 반환 (가장 빠른 방식)
-            res = driver.find_elements(AppiumBy.ANDROID_UIAUTOMATOR, target_selector)
-            
-            if res:
-                break # 찾았으면 즉시 루프 탈출
-            
-            # 안전장치: 30초 타임아웃
-            if time.time() - start_time > 30:
-                raise TimeoutException("로그인 팝업 대기 타임아웃 (30초)")
-
-        end_time = time.time()
+        result = wait_until(uiautomator(driver, target_selector), start_time, timeout=30)
+        if not result.matched:
+            raise TimeoutException("로그인 팝업 대기 타임아웃 (30초)")
+
+        end_time = result.end_time
         
     except TimeoutException as e:
         print("   ❌ 로그인 결과 팝업을 찾지 못했습니다.")
@@ -273,6 +282,7 @@ def perform_login_once(driver, wait):
 
     elapsed = end_time - start_time
     print(f"\n🎉 로그인 응답 수신! 반응 속도: {elapsed:.4f} 초")
+    print(f"   📈 샘플링 속도: {result.sample_rate:.1f}Hz")
 
     # 팝업 정리
     close_one_popup_if_exists(driver, wait_sec=1)
@@ -281,7 +291,7 @@ def perform_login_once(driver, wait):
     # 로그아웃
     logout_for_next_run(driver, wait)
 
-    time.sleep(2)
+    readiness.settle(driver, static=2, label="로그아웃 후 화면 안정")
     return elapsed
 
 
@@ -303,16 +313,28 @@ def test_login_security_safe(repeat_count=REPEAT_COUNT):
     options.set_capability("ignoreUnimportantViews", True)
 
     print("--- [금융인증서] 로그인 성능 테스트 (반복) ---")
-    driver = webdriver.Remote(APPIUM_SERVER_URL, options=options)
+    device_env.apply_capabilities(options)
+    driver = profiler.instrument(webdriver.Remote(APPIUM_SERVER_URL, options=options))
     wait = WebDriverWait(driver, 20)
 
-    results = []
-    valid_times = []
+    # 회차마다 체크포인트에 바로 기록 (중단 후 다시 실행하면 이어서 측정)
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    checkpoint = ResultLog("work24_cert_login_perf", current_dir)
+    results = checkpoint.rows
+    repeats = stats.AdaptiveRepeat(
+        results, repeat_count, checkpoint.next_iteration, status_idx=None, duration_idx="로그인반응속도(초)",
+    )
+    # 회차별 원본 기록은 통합 결과 저장소에 바로 적재 (CSV 는 저장소에서 내보냄)
+    store = ResultStore()
+    record = store.start_run(
+        app="work24", platform="android", scenario="certificate_login", metric="로그인반응속도(초)",
+        device=device_env.device_label(DEVICE_NAME), script=__file__, resume=bool(results),
+    )
 
     try:
-        for i in range(1, repeat_count + 1):
+        for i in repeats:
             print("\n==============================")
-            print(f"🔁 로그인 시도 {i}/{repeat_count}")
+            print(f"🔁 로그인 시도 {i}/{repeats.limit}")
             print("==============================")
 
             measured_at = datetime.now().strftime("%Y-%m-%d %H:%M")
@@ -320,9 +342,8 @@ def test_login_security_safe(repeat_count=REPEAT_COUNT):
             try:
                 elapsed = perform_login_once(driver, wait)
                 elapsed_rounded = round(elapsed, 4)
-                valid_times.append(elapsed)
 
-                results.append(
+                checkpoint.append(
                     {
                         "회차": i,
                         "측정시각": measured_at,
@@ -333,9 +354,11 @@ def test_login_security_safe(repeat_count=REPEAT_COUNT):
                         "표준편차(초)": "",
                     }
                 )
+                record.add(i, STATUS_OK, measured_at, elapsed)
             except Exception as e:
                 print(f"   ❌ 로그인 시도 {i} 중 오류 발생: {e}")
-                results.append(
+                record.add(i, STATUS_FAIL, measured_at, None, error=str(e))
+                checkpoint.append(
                     {
                         "회차": i,
                         "측정시각": measured_at,
@@ -347,56 +370,35 @@ def test_login_security_safe(repeat_count=REPEAT_COUNT):
                     }
                 )
 
-            time.sleep(3)
+            readiness.ready(login_entry(driver), static=3, label="다음 회차 시작 화면")
 
     finally:
         driver.quit()
         print("\n📴 드라이버 종료")
-
-    # ----- CSV + 통계 -----
-    if results:
-        df = pd.DataFrame(
-            results,
-            columns=["회차", "측정시각", "로그인반응속도(초)",
-                     "평균(초)", "최소(초)", "최대(초)", "표준편차(초)"]
-        )
-
-        if valid_times:
-            avg_time = statistics.mean(valid_times)
-            min_time = min(valid_times)
-            max_time = max(valid_times)
-            std_time = statistics.stdev(valid_times) if len(valid_times) >= 2 else 0.0
-
-            summary_row = {
-                "회차": "요약",
-                "측정시각": "",
-                "로그인반응속도(초)": "",
-                "평균(초)": round(avg_time, 4),
-                "최소(초)": round(min_time, 4),
-                "최대(초)": round(max_time, 4),
-                "표준편차(초)": round(std_time, 4),
-            }
-            df = pd.concat([df, pd.DataFrame([summary_row])], ignore_index=True)
-
-            print("\n📊 통계 요약")
-            print(f"   - 평균  : {avg_time:.4f} 초")
-            print(f"   - 최소  : {min_time:.4f} 초")
-            print(f"   - 최대  : {max_time:.4f} 초")
-            print(f"   - 표준편차: {std_time:.4f} 초")
-
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        file_name = f"work24_cert_login_perf_{repeat_count}runs_{timestamp}.csv"
-        
-        # ✅ [3] 현재 폴더에 저장 (os.path 사용)
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        save_path = os.path.join(current_dir, file_name)
-        
-        df.to_csv(save_path, index=False, encoding="utf-8-sig")
-
-        print(f"\n✅ CSV 저장 완료! 경로: {save_path}")
-        print(df)
-    else:
-        print("\nℹ️ 저장할 측정 결과가 없어 CSV는 생성되지 않았습니다.")
+        readiness.report()
+
+        # ----- CSV + 통계 -----
+        if results:
+            # 실패 회차는 반응속도가 빈 칸
+            result_stats = stats.from_rows(results, status_idx=None, duration_idx="로그인반응속도(초)")
+            if result_stats.count:
+                print()
+                stats.report(result_stats, "고용24 금융인증서 로그인")
+
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            file_name = f"work24_cert_login_perf_{repeat_count}runs_{timestamp}.csv"
+
+            # ✅ [3] 현재 폴더에 저장 (os.path 사용)
+            save_path = device_env.result_path(os.path.join(current_dir, file_name))
+
+            store.export_csv(record.run_id, save_path)
+            if checkpoint.finish(repeats.total):
+                record.finish(repeats.reason)
+
+            print(f"\n✅ CSV 저장 완료! 경로: {save_path}")
+        else:
+            print("\nℹ️ 저장할 측정 결과가 없어 CSV는 생성되지 않았습니다.")
+        store.close()
 
     print("\n✅ 금융인증서 로그인 반복 테스트 및 CSV 저장까지 모두 완료되었습니다.")
 
@@ -5,17 +5,26 @@ from selenium.webdriver.support import expected_conditions as EC
 from appium.options.android import UiAutomator2Options
 from appium import webdriver
 
-import pandas as pd
 from datetime import datetime
 import time
 import os  # [추가] 파일 경로 설정을 위해 필요
+import sys
+
+# 공통 모듈(common) 경로 추가 (저장소 루트)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from common import device_env, profiler, stats
+from common import page_source, readiness
+from common.checkpoint import ResultLog
+from common.detectors import ANDROID_UIAUTOMATOR, ElementDetector, snapshot
+from common.result_store import STATUS_FAIL, STATUS_OK, ResultStore
+from common.waiter import wait_until
 
 # ===================== 설정 =====================
 # 정부24 패키지 / 액티비티
 APP_PACKAGE = "kr.go.minwon.m"
 APP_ACTIVITY = "kr.go.minwon.m.BrowserActivity"
 
-APPIUM_SERVER_URL = "http://127.0.0.1:4723"
+APPIUM_SERVER_URL = device_env.server_url("http://127.0.0.1:4723")
 DEVICE_NAME = "Android"
 
 # 테스트에 사용할 아이디 / 비밀번호
@@ -23,12 +32,23 @@ LOGIN_ID = "------"       # ← 정부24 아이디
 LOGIN_PW = "------"       # ← 정부24 비밀번호
 
 # 반복 횟수
-REPEAT_COUNT = 10
+REPEAT_COUNT = device_env.repeat_count(10)
 
 # 메인화면 기준 로그인 버튼 좌표
 LOGIN_BTN_X = 813
 LOGIN_BTN_Y = 216
 
+# SNAPSHOT_DETECT=1 이면 폴링마다 page_source 1회로 메인화면 / 로그인 오류 팝업을 함께 판정
+# (기본은 find_elements 1회 - 웹뷰가 큰 화면이라 page_source 는 폴링당 지연이 커서 측정값에 더해짐)
+SNAPSHOT = device_env.snapshot_detect()
+
+# 로그인 오류 팝업 = 아이디·비밀번호·보안숫자 오류 문구가 있는 대화상자만
+# (android:id/message 만으로는 권한 요청 / 업데이트 안내 같은 다른 대화상자도 실패로 잡힘)
+LOGIN_ERROR_SELECTOR = (
+    'new UiSelector().resourceId("android:id/message")'
+    '.textMatches("(?s).*(아이디|비밀번호|보안숫자|보안문자).*(일치|잘못|틀|오류|확인).*")'
+)
+
 # ===================== 공통 유틸 함수 =====================
 def tap_by_coordinates(driver, x, y, duration_ms=200):
     """좌표 탭: swipe를 start=end로 주면 탭처럼 동작"""
@@ -63,7 +83,7 @@ def open_login_section(driver):
         print(f"   ❌ 로그인 버튼 좌표 탭 실패: {e}")
         raise
 
-    time.sleep(2)
+    readiness.settle(driver, static=2, label="로그인 화면 전환")
 
 
 def tap_id_login(driver, wait):
@@ -74,7 +94,7 @@ def tap_id_login(driver, wait):
     try:
         print("   ↕ 화면 스크롤 (1041, 1822) → (1041, 446)")
         driver.swipe(1041, 1822, 1041, 446, 500)   # 휴대폰 기종에 따라 좌표 수정 필요
-        time.sleep(1)
+        readiness.settle(driver, static=1, label="로그인 화면 스크롤")
     except Exception as e:
         print(f"   ⚠️ 스크롤 중 오류 발생: {e}")
 
@@ -91,7 +111,10 @@ def tap_id_login(driver, wait):
         print("   ❌ '아이디 로그인' 버튼을 찾지 못했습니다.")
         raise RuntimeError("'아이디 로그인' 진입에 실패했습니다.") from e
 
-    time.sleep(1)
+    readiness.ready(
+        ElementDetector(driver, AppiumBy.XPATH, '//android.widget.EditText[@resource-id="input_id"]'),
+        static=1, label="아이디 입력창",
+    )
 
 
 def fill_id(driver, wait):
@@ -125,7 +148,10 @@ def fill_id(driver, wait):
         print("   ❌ '다음' 버튼을 찾지 못했습니다.")
         raise RuntimeError("'다음' 버튼을 찾지 못했습니다.") from e
 
-    time.sleep(1)
+    readiness.ready(
+        ElementDetector(driver, AppiumBy.XPATH, '//android.widget.EditText[@resource-id="input_pwd"]'),
+        static=1, label="비밀번호 입력창",
+    )
 
 
 def fill_pwd_and_security(driver, wait, attempt_idx=None):
@@ -246,34 +272,44 @@ def click_login_and_wait_main(driver, wait):
     # ---------------------------------------------------------
     # 목표: '혜택알림' 설명이 포함된 요소 (메인화면 상징)
     target_selector = 'new UiSelector().descriptionContains("혜택알림")'
+    if SNAPSHOT:
+        # page_source 1회로 메인화면 / 로그인 오류 팝업(아이디·비밀번호·보안숫자 오류)을 함께 판정
+        detector = snapshot(
+            driver,
+            done={"메인화면": (ANDROID_UIAUTOMATOR, target_selector)},
+            fail={"오류 팝업": (ANDROID_UIAUTOMATOR, LOGIN_ERROR_SELECTOR)},
+        )
+    else:
+        detector = ElementDetector(driver, ANDROID_UIAUTOMATOR, target_selector)
     
     try:
-        while True:
-            # find_elements는 에러 없이 빈 리스트 반환 (가장 빠름)
-            res = driver.find_elements(AppiumBy.ANDROID_UIAUTOMATOR, target_selector)
-            
-            if res:
-                break # 찾았으면 즉시 탈출
-            
-            # 안전장치: 30초 타임아웃
-            if time.time() - start_time > 30:
-                raise TimeoutException("메인화면 로딩 타임아웃")
-
-        end_time = time.time()
+        result = wait_until(detector, start_time, timeout=30)
+        if not result.matched:
+            raise TimeoutException("메인화면 로딩 타임아웃")
+
+        if SNAPSHOT and result.detail.outcome == "fail":
+            # 오류 팝업은 측정값이 아니므로 소요 시간 없이 실패로 기록 (통계에서 제외) 하고 팝업을 닫음
+            message = page_source.text(result.detail.fired["fail"]["오류 팝업"][0])
+            print(f"   ❌ 로그인 오류 팝업: {message}")
+            for button in driver.find_elements(AppiumBy.ID, "android:id/button1"):
+                button.click()
+            return None, f"로그인 실패 팝업: {message}"
+
+        end_time = result.end_time
         elapsed = end_time - start_time
 
         print("🎉 메인화면 로드 확인 (UiSelector 인식)")
         print(f"⏱ 측정 시간: {elapsed:.4f} 초")
+        print(f"   📈 샘플링 속도: {result.sample_rate:.1f}Hz")
 
         status_msg = "메인화면 로드 완료"
         return elapsed, status_msg
 
     except TimeoutException:
-        end_time = time.time()
-        elapsed = end_time - start_time
+        # 타임아웃까지 걸린 시간은 측정값이 아님 (소요 시간 없이 실패로 기록 -> 통계에서 제외)
         print("   ⚠️ 메인화면 확인용 요소를 찾지 못했습니다.(타임아웃)")
         status_msg = "메인화면 미확인(타임아웃)"
-        return elapsed, status_msg
+        return None, status_msg
 
 
 def perform_login_once(driver, wait, attempt_idx=None):
@@ -301,16 +337,16 @@ def logout_to_main(driver):
         # 1) 전체 메뉴 탭
         print("   📍 (955, 274) 좌표 탭 (전체메뉴)")
         tap_by_coordinates(driver, 955, 274)
-        time.sleep(2)
+        readiness.settle(driver, static=2, label="전체메뉴 열림")
 
         # 2) 스크롤 두 번
         print("   ↕ 스크롤 1회")
         driver.swipe(1040, 1825, 1040, 242, 500)
-        time.sleep(2)
+        readiness.settle(driver, static=2, label="전체메뉴 스크롤")
 
         print("   ↕ 스크롤 2회")
         driver.swipe(1040, 1825, 1040, 242, 500)
-        time.sleep(2)
+        readiness.settle(driver, static=2, label="전체메뉴 스크롤")
 
         # 3) 로그아웃 버튼 좌표 탭
         print("   📍 로그아웃 좌표 탭 (502, 1811)")
@@ -347,29 +383,47 @@ def test_login_minwon(repeat_count=REPEAT_COUNT):
     options.set_capability("ignoreUnimportantViews", True)
 
     print("--- [정부24] ID/PW 로그인 성능 테스트 (초고속 인식) ---")
-    driver = webdriver.Remote(APPIUM_SERVER_URL, options=options)
+    device_env.apply_capabilities(options)
+    driver = profiler.instrument(webdriver.Remote(APPIUM_SERVER_URL, options=options))
     wait = WebDriverWait(driver, 20)
 
-    results = []
+    # 회차마다 체크포인트에 바로 기록 (보안숫자 입력 중 중단되어도 다시 실행하면 이어서 측정)
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    checkpoint = ResultLog("minwon24_idpw_login_perf", current_dir)
+    results = checkpoint.rows
+    repeats = stats.AdaptiveRepeat(
+        results, repeat_count, checkpoint.next_iteration,
+        status_idx="상태", duration_idx="로그인반응속도(초)",
+    )
+    # 회차별 원본 기록은 통합 결과 저장소에도 적재 (CSV 는 저장소에서 내보냄)
+    store = ResultStore()
+    record = store.start_run(
+        app="gov24", platform="android", scenario="idpw_login", metric="로그인반응속도(초)",
+        device=device_env.device_label(DEVICE_NAME), script=__file__, resume=bool(results),
+    )
 
     try:
-        for i in range(1, repeat_count + 1):
+        for i in repeats:
             print("\n" + "=" * 60)
-            print(f"🔁 로그인 시도 {i}/{repeat_count}")
+            print(f"🔁 로그인 시도 {i}/{repeats.limit}")
             print("=" * 60)
 
             elapsed, status_msg = perform_login_once(driver, wait, attempt_idx=i)
+            measured_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-            results.append(
+            checkpoint.append(
                 {
                     "회차": i,
-                    "측정시각": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "로그인반응속도(초)": round(elapsed, 4),
+                    "상태": "성공" if elapsed is not None else "실패",
+                    "측정시각": measured_at,
+                    "로그인반응속도(초)": round(elapsed, 4) if elapsed is not None else "",
                     "팝업메시지": status_msg,
                 }
             )
+            record.add(i, STATUS_OK if elapsed is not None else STATUS_FAIL, measured_at, elapsed,
+                       popup=status_msg)
 
-            if i < repeat_count:
+            if repeats.has_next(i):
                 print("\n📴 [다음 회차 준비] 로그아웃 진행")
                 try:
                     logout_to_main(driver)
@@ -384,61 +438,33 @@ def test_login_minwon(repeat_count=REPEAT_COUNT):
     finally:
         driver.quit()
         print("\n✅ 드라이버 종료 완료")
+        readiness.report()
 
-    # ===================== CSV + 통계 저장 =====================
-    print("\n" + "=" * 50)
-    print("💾 로그인 성능 결과 CSV 저장 중...")
+        # ===================== CSV + 통계 저장 =====================
+        # finally 안에서 저장: 보안숫자 input() 중 Ctrl+C(KeyboardInterrupt)로 끝나도 그때까지의 회차는 남김
+        print("\n" + "=" * 50)
+        print("💾 로그인 성능 결과 CSV 저장 중...")
 
-    if results:
-        df = pd.DataFrame(results)
+        if results:
+            # 통계 계산 (성공 회차만 - 타임아웃 / 오류 팝업 회차는 실패로 셈)
+            result_stats = stats.from_rows(results, status_idx="상태", duration_idx="로그인반응속도(초)")
+            print()
+            stats.report(result_stats, "정부24 ID/PW 로그인")
 
-        # 통계 계산
-        speeds = df["로그인반응속도(초)"].dropna()
-        if len(speeds) > 0:
-            mean_val = round(speeds.mean(), 4)
-            min_val = round(speeds.min(), 4)
-            max_val = round(speeds.max(), 4)
-            std_val = round(speeds.std(ddof=1), 4) if len(speeds) >= 2 else 0.0
-        else:
-            mean_val = min_val = max_val = std_val = 0.0
-
-        print("\n📊 통계 요약")
-        print(f"   평균: {mean_val} 초")
-        print(f"   최소: {min_val} 초")
-        print(f"   최대: {max_val} 초")
-        print(f"   표준편차: {std_val} 초")
-
-        summary_row = {
-            "회차": "요약",
-            "측정시각": "",
-            "로그인반응속도(초)": "",
-            "팝업메시지": "",
-            "평균(초)": mean_val,
-            "최소(초)": min_val,
-            "최대(초)": max_val,
-            "표준편차(초)": std_val,
-        }
-
-        # 팝업메시지 컬럼 제거 (선택사항)
-        if "팝업메시지" in df.columns:
-            df = df.drop(columns=["팝업메시지"])
-            del summary_row["팝업메시지"]
-
-        df = pd.concat([df, pd.DataFrame([summary_row])], ignore_index=True)
-
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        file_name = f"minwon24_idpw_login_perf_{repeat_count}runs_{timestamp}.csv"
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            file_name = f"minwon24_idpw_login_perf_{repeat_count}runs_{timestamp}.csv"
         
-        # 🔥 [핵심 수정] 현재 폴더에 저장
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        save_path = os.path.join(current_dir, file_name)
+            # 🔥 [핵심 수정] 현재 폴더에 저장
+            save_path = device_env.result_path(os.path.join(current_dir, file_name))
         
-        df.to_csv(save_path, index=False, encoding="utf-8-sig")
+            store.export_csv(record.run_id, save_path)
+            if checkpoint.finish(repeats.total):
+                record.finish(repeats.reason)
 
-        print(f"\n✅ CSV 저장 완료! 경로: {save_path}")
-        print(df)
-    else:
-        print("ℹ️ 저장할 측정 결과가 없어 CSV는 생성되지 않습니다.")
+            print(f"\n✅ CSV 저장 완료! 경로: {save_path}")
+        else:
+            print("ℹ️ 저장할 측정 결과가 없어 CSV는 생성되지 않습니다.")
+        store.close()
 
 if __name__ == "__main__":
 
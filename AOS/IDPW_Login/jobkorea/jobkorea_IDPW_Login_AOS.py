@@ -1,7 +1,6 @@
 import time
 import os
-import csv
-import statistics
+import sys
 from datetime import datetime
 from appium import webdriver
 from appium.options.android import UiAutomator2Options
@@ -10,18 +9,26 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 
+# 공통 모듈(common) 경로 추가 (저장소 루트)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from common import device_env, profiler, stats
+from common.checkpoint import ResultLog
+from common.detectors import uiautomator
+from common.result_store import STATUS_FAIL, STATUS_OK, ResultStore
+from common.waiter import wait_until
+
 # ===================== [설정 영역] =====================
 APP_PACKAGE = "com.jobkorea.app"
 APP_ACTIVITY = None  # 자동 감지
 DEVICE_NAME = "Galaxy S25"
-APPIUM_SERVER_URL = "http://127.0.0.1:4723"
+APPIUM_SERVER_URL = device_env.server_url("http://127.0.0.1:4723")
 
 # [계정 정보]
 LOGIN_ID = "------"  # 아이디
 LOGIN_PW = "-------"  # 비밀번호
 
 # 반복 횟수
-REPEAT_COUNT = 10
+REPEAT_COUNT = device_env.repeat_count(10)
 
 # [좌표 및 스크롤 설정]
 POPUP_CLOSE_X = 957
@@ -48,15 +55,25 @@ def run_jobkorea_test():
 
     print(f"--- 잡코리아 로그인 성능 측정 (초고속 인식) ---")
     
-    driver = webdriver.Remote(APPIUM_SERVER_URL, options=options)
+    device_env.apply_capabilities(options)
+    driver = profiler.instrument(webdriver.Remote(APPIUM_SERVER_URL, options=options))
     wait = WebDriverWait(driver, 20)
     
     # ✅ [회차, 상태("성공"/"실패"), 측정시간, 로그인반응속도(초)]
-    test_results = []
+    # 회차마다 체크포인트에 바로 기록 (중단 후 다시 실행하면 이어서 측정)
+    checkpoint = ResultLog("jobkorea_login_result", SCRIPT_DIR)
+    test_results = checkpoint.rows
+    repeats = stats.AdaptiveRepeat(test_results, REPEAT_COUNT, checkpoint.next_iteration)
+    # 회차별 원본 기록은 통합 결과 저장소에 바로 적재 (CSV 는 저장소에서 내보냄)
+    store = ResultStore()
+    record = store.start_run(
+        app="jobkorea", platform="android", scenario="idpw_login", metric="로그인반응속도(초)",
+        device=device_env.device_label(DEVICE_NAME), script=__file__, resume=bool(test_results),
+    )
 
     try:
-        for i in range(1, REPEAT_COUNT + 1):
-            print(f"\n🔄 [ {i} / {REPEAT_COUNT} ] 회차 수행 중...")
+        for i in repeats:
+            print(f"\n🔄 [ {i} / {repeats.limit} ] 회차 수행 중...")
             measured_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
             try:
@@ -81,7 +98,8 @@ def run_jobkorea_test():
                     print("   ✅ MY 버튼 클릭 완료")
                 except:
                     print("   ❌ MY 버튼 찾기 실패")
-                    test_results.append([i, "실패", measured_at, 0])
+                    checkpoint.append([i, "실패", measured_at, 0])
+                    record.add(i, STATUS_FAIL, measured_at, None)
                     continue
 
                 # ---------------------------------------------------------
@@ -116,7 +134,8 @@ def run_jobkorea_test():
                     pw_field.send_keys(LOGIN_PW)
                 except:
                     print("   ❌ 입력창 찾기 실패")
-                    test_results.append([i, "실패", measured_at, 0])
+                    checkpoint.append([i, "실패", measured_at, 0])
+                    record.add(i, STATUS_FAIL, measured_at, None)
                     continue
 
                 try:
@@ -134,7 +153,8 @@ def run_jobkorea_test():
                     )
                 except:
                     print("   ❌ 로그인 버튼을 찾지 못했습니다.")
-                    test_results.append([i, "실패", measured_at, 0])
+                    checkpoint.append([i, "실패", measured_at, 0])
+                    record.add(i, STATUS_FAIL, measured_at, None)
                     continue
 
                 
@@ -148,26 +168,23 @@ def run_jobkorea_test():
                 target_selector = 'new UiSelector().textContains("이력서 관리")'
                 
                 try:
-                    while True:
-                        # find_elements는 에러 없이 빈 리스트 반환 (가장 빠름)
-                        res = driver.find_elements(AppiumBy.ANDROID_UIAUTOMATOR, target_selector)
-                        
-                        if res:
-                            break # 찾았으면 즉시 루프 탈출
-                        
-                        # 안전장치: 30초 타임아웃
-                        if time.time() - start_time > 30:
-                            raise TimeoutException("로그인 완료 화면 대기 타임아웃")
-
-                    end_time = time.time()
+                    result = wait_until(uiautomator(driver, target_selector), start_time, timeout=30)
+                    if not result.matched:
+                        raise TimeoutException("로그인 완료 화면 대기 타임아웃")
+
+                    end_time = result.end_time
                     elapsed = end_time - start_time
                     
                     print(f"   🎉 로그인 성공! ({elapsed:.4f}초)")
-                    test_results.append([i, "성공", measured_at, elapsed])
+                    print(f"   📈 샘플링 속도: {result.sample_rate:.1f}Hz")
+                    checkpoint.append([i, "성공", measured_at, elapsed])
+                    record.add(i, STATUS_OK, measured_at, elapsed, start_time=start_time, end_time=end_time,
+                               detector=target_selector, prev_time=result.prev_time)
                     
                 except TimeoutException:
                     print("   ❌ 로그인 시간 초과")
-                    test_results.append([i, "실패", measured_at, 0])
+                    checkpoint.append([i, "실패", measured_at, 0])
+                    record.add(i, STATUS_FAIL, measured_at, None)
                     continue
 
                 # ---------------------------------------------------------
@@ -214,7 +231,8 @@ def run_jobkorea_test():
 
             except Exception as e:
                 print(f"   ❌ 예외 발생: {e}")
-                test_results.append([i, "실패", measured_at, 0])
+                checkpoint.append([i, "실패", measured_at, 0])
+                record.add(i, STATUS_FAIL, measured_at, None)
                 continue
 
     except Exception as e:
@@ -224,59 +242,26 @@ def run_jobkorea_test():
         if driver:
             driver.quit()
 
-    # ===================== CSV + 통계 저장 (통일 포맷) =====================
-    print("\n" + "=" * 50)
-    print("💾 로그인 성능 결과 CSV 저장 중...")
+        # ===================== CSV + 통계 저장 (통일 포맷) =====================
+        print("\n" + "=" * 50)
+        print("💾 로그인 성능 결과 CSV 저장 중...")
 
-    # 성공 케이스만 통계 계산
-    durations = [row[3] for row in test_results if row[1] == "성공" and row[3] > 0]
+        # 성공 케이스만 통계 계산
+        result_stats = stats.from_rows(test_results)
+        stats.report(result_stats, "잡코리아 ID/PW 로그인")
 
-    if durations:
-        avg = statistics.mean(durations)
-        mn = min(durations)
-        mx = max(durations)
-        std = statistics.pstdev(durations) if len(durations) > 1 else 0.0
-    else:
-        avg = mn = mx = std = 0.0
+        # ✅ 실행 파일과 같은 위치에 고정 파일명으로 저장 (결과 저장소에서 기존 형식으로 내보냄)
+        output_path = device_env.result_path(os.path.join(SCRIPT_DIR, "jobkorea_login_result.csv"))
 
-    # ✅ 실행 파일과 같은 위치에 고정 파일명으로 저장
-    output_path = os.path.join(SCRIPT_DIR, "jobkorea_login_result.csv")
+        try:
+            store.export_csv(record.run_id, output_path)
+            print(f"\n✅ CSV 저장 완료! 파일: {output_path}")
+            if checkpoint.finish(repeats.total):
+                record.finish(repeats.reason)
 
-    try:
-        with open(output_path, mode='w', newline='', encoding='utf-8-sig') as f:
-            writer = csv.writer(f)
-            # 공통 헤더
-            writer.writerow([
-                "회차", "상태", "측정시간", "로그인반응속도(초)",
-                "평균(초)", "최소(초)", "최대(초)", "표준편차(초)"
-            ])
-
-            # 회차별 데이터
-            for iteration, status, measured_at, duration in test_results:
-                writer.writerow([
-                    iteration,
-                    status,
-                    measured_at,
-                    f"{duration:.4f}" if duration > 0 else "",
-                    "", "", "", ""
-                ])
-
-            # 마지막 통계 행
-            writer.writerow([
-                "통계",
-                "",
-                "",
-                "",
-                f"{avg:.4f}" if durations else "",
-                f"{mn:.4f}" if durations else "",
-                f"{mx:.4f}" if durations else "",
-                f"{std:.4f}" if durations else ""
-            ])
-
-        print(f"\n✅ CSV 저장 완료! 파일: {output_path}")
-
-    except Exception as e:
-        print(f"CSV 저장 중 오류: {e}")
+        except Exception as e:
+            print(f"CSV 저장 중 오류: {e}")
+        store.close()
 
     print("\n✅ 모든 테스트가 완료되었습니다.")
 
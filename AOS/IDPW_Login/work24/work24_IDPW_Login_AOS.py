@@ -4,10 +4,18 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from appium.options.android import UiAutomator2Options
 from appium import webdriver
-import pandas as pd
 from datetime import datetime
 import time
 import os  # [추가] 경로 저장을 위해
+import sys
+
+# 공통 모듈(common) 경로 추가 (저장소 루트)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from common import device_env, profiler, stats
+from common.checkpoint import ResultLog
+from common.detectors import uiautomator
+from common.result_store import STATUS_FAIL, STATUS_OK, ResultStore
+from common.waiter import wait_until
 
 # ===================== 설정 =====================
 APP_PACKAGE = "kr.or.keis.mo"
@@ -15,11 +23,11 @@ APP_PACKAGE = "kr.or.keis.mo"
 LOGIN_ID = "------" # 아이디 입력
 LOGIN_PW = "-------" # 비밀번호 입력
 
-APPIUM_SERVER_URL = "http://127.0.0.1:4723"
+APPIUM_SERVER_URL = device_env.server_url("http://127.0.0.1:4723")
 DEVICE_NAME = "Android"
 
 # 반복 횟수
-REPEAT_COUNT = 10
+REPEAT_COUNT = device_env.repeat_count(10)
 
 
 # ===================== 동작 함수 =====================
@@ -180,20 +188,12 @@ def perform_login_once(driver, wait):
     target_selector = 'new UiSelector().resourceId("android:id/message")'
     
     try:
-        while True:
-            # find_elements는 에러 없이 빈 리스트 반환 (가장 빠름)
-            res = driver.find_elements(AppiumBy.ANDROID_UIAUTOMATOR, target_selector)
-            
-            if res:
-                # 찾았으면 텍스트(popup content) 저장 후 탈출
-                popup_text = res[0].text
-                break 
-            
-            # 안전장치: 30초 타임아웃
-            if time.time() - start_time > 30:
-                raise TimeoutException("로그인 팝업 대기 타임아웃")
+        result = wait_until(uiautomator(driver, target_selector), start_time, timeout=30)
+        if not result.matched:
+            raise TimeoutException("로그인 팝업 대기 타임아웃")
+        popup_text = result.detail[0].text
 
-        end_time = time.time()
+        end_time = result.end_time
         
     except TimeoutException:
         print("   ❌ 로그인 결과 팝업을 찾지 못했습니다.")
@@ -204,6 +204,7 @@ def perform_login_once(driver, wait):
 
     print("\n🎉 로그인 응답 수신!")
     print(f"🚀 로그인 반응 속도: {elapsed:.4f} 초")
+    print(f"   📈 샘플링 속도: {result.sample_rate:.1f}Hz")
     print(f"📄 팝업 내용: {popup_first_line}")
 
     # 팝업 확인 버튼 닫기
@@ -233,38 +234,55 @@ def test_login_security_safe(repeat_count=REPEAT_COUNT):
     options.set_capability("ignoreUnimportantViews", True)
 
     print("--- 로그인 성능 테스트 (반복) ---")
-    driver = webdriver.Remote(APPIUM_SERVER_URL, options=options)
+    device_env.apply_capabilities(options)
+    driver = profiler.instrument(webdriver.Remote(APPIUM_SERVER_URL, options=options))
     wait = WebDriverWait(driver, 20)
 
-    results = []  # 각 회차 결과를 저장
+    # 회차마다 체크포인트에 바로 기록 (중단 후 다시 실행하면 이어서 측정)
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    checkpoint = ResultLog("work24_idpw_login_perf", current_dir)
+    results = checkpoint.rows  # 각 회차 결과를 저장
+    repeats = stats.AdaptiveRepeat(
+        results, repeat_count, checkpoint.next_iteration, status_idx=None, duration_idx="로그인반응속도(초)",
+    )
+    # 회차별 원본 기록은 통합 결과 저장소에 바로 적재 (CSV 는 저장소에서 내보냄)
+    store = ResultStore()
+    record = store.start_run(
+        app="work24", platform="android", scenario="idpw_login", metric="로그인반응속도(초)",
+        device=device_env.device_label(DEVICE_NAME), script=__file__, resume=bool(results),
+    )
     try:
-        for i in range(1, repeat_count + 1):
+        for i in repeats:
             print("\n" + "=" * 60)
-            print(f"🔁 로그인 시도 {i}/{repeat_count}")
+            print(f"🔁 로그인 시도 {i}/{repeats.limit}")
             print("=" * 60)
 
-            # 2번째 시도부터는 로그아웃 먼저 수행
-            if i >= 2:
+            # (이어서 측정할 때도) 이번 실행의 2번째 시도부터는 로그아웃 먼저 수행
+            if i > repeats.first:
                 logout_from_all_menu(driver, wait)
 
             # 로그인 1회 수행 + 시간 측정
             try:
                 elapsed, popup_first_line = perform_login_once(driver, wait)
+                measured_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-                results.append({
+                checkpoint.append({
                     "회차": i,
-                    "측정시각": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "측정시각": measured_at,
                     "로그인반응속도(초)": round(elapsed, 4),
                     "팝업메시지": popup_first_line,
                 })
+                record.add(i, STATUS_OK, measured_at, elapsed, popup=popup_first_line)
             except Exception as e:
                 print(f"   ❌ 오류 발생: {e}")
-                results.append({
+                measured_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                checkpoint.append({
                     "회차": i,
-                    "측정시각": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "측정시각": measured_at,
                     "로그인반응속도(초)": "",
                     "팝업메시지": "실패",
                 })
+                record.add(i, STATUS_FAIL, measured_at, None, error=str(e))
 
             # 회차 사이 약간의 대기
             time.sleep(2)
@@ -279,64 +297,32 @@ def test_login_security_safe(repeat_count=REPEAT_COUNT):
         driver.quit()
         print("\n✅ 드라이버 종료 완료")
 
-    # ===================== CSV + 통계 저장 =====================
-    print("\n" + "=" * 50)
-    print("💾 로그인 성능 결과 CSV 저장 중...")
+        # ===================== CSV + 통계 저장 =====================
+        print("\n" + "=" * 50)
+        print("💾 로그인 성능 결과 CSV 저장 중...")
 
-    if results:
-        df = pd.DataFrame(results)
+        if results:
+            # ---- 통계 계산 ----
+            # 성공한 값(숫자)만 추려내기 (실패 회차는 반응속도가 빈 칸)
+            result_stats = stats.from_rows(results, status_idx=None, duration_idx="로그인반응속도(초)")
+            print()
+            stats.report(result_stats, "고용24 ID/PW 로그인")
 
-        # ---- 통계 계산 ----
-        # 성공한 값(숫자)만 추려내기
-        speeds = pd.to_numeric(df["로그인반응속도(초)"], errors='coerce').dropna()
+            # ---- CSV 저장 (현재 폴더, 결과 저장소에서 기존 형식으로 내보냄) ----
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            file_name = f"work24_idpw_login_perf_{repeat_count}runs_{timestamp}.csv"
 
-        if not speeds.empty:
-            mean_val = speeds.mean()
-            min_val = speeds.min()
-            max_val = speeds.max()
-            std_val = speeds.std(ddof=1) if len(speeds) >= 2 else 0.0
-        else:
-            mean_val = min_val = max_val = std_val = 0.0
-
-        print("\n📊 통계 요약")
-        print(f"   평균: {mean_val:.4f} 초")
-        print(f"   최소: {min_val:.4f} 초")
-        print(f"   최대: {max_val:.4f} 초")
-        print(f"   표준편차: {std_val:.4f} 초")
-
-        # ---- 요약 행 추가 ----
-        summary_row = {
-            "회차": "요약",
-            "측정시각": "",
-            "로그인반응속도(초)": "",
-            "팝업메시지": "",
-            "평균(초)": round(mean_val, 4),
-            "최소(초)": round(min_val, 4),
-            "최대(초)": round(max_val, 4),
-            "표준편차(초)": round(std_val, 4),
-        }
-        
-        # 팝업메시지 컬럼 제거 (선택사항 - 요청하신 포맷에 맞춤)
-        if "팝업메시지" in df.columns:
-            df = df.drop(columns=["팝업메시지"])
-            del summary_row["팝업메시지"]
+            # 🔥 [핵심 수정] 현재 폴더 경로
+            save_path = device_env.result_path(os.path.join(current_dir, file_name))
 
-        df = pd.concat([df, pd.DataFrame([summary_row])], ignore_index=True)
+            store.export_csv(record.run_id, save_path)
+            if checkpoint.finish(repeats.total):
+                record.finish(repeats.reason)
 
-        # ---- CSV 저장 (현재 폴더) ----
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        file_name = f"work24_idpw_login_perf_{repeat_count}runs_{timestamp}.csv"
-        
-        # 🔥 [핵심 수정] 현재 폴더 경로
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        save_path = os.path.join(current_dir, file_name)
-        
-        df.to_csv(save_path, index=False, encoding="utf-8-sig")
-
-        print(f"\n✅ CSV 저장 완료! 경로: {save_path}")
-        print(df)
-    else:
-        print("ℹ️ 저장할 측정 결과가 없어 CSV는 생성하지 않습니다.")
+            print(f"\n✅ CSV 저장 완료! 경로: {save_path}")
+        else:
+            print("ℹ️ 저장할 측정 결과가 없어 CSV는 생성하지 않습니다.")
+        store.close()
 
 if __name__ == "__main__":
     test_login_security_safe()
\ No newline at end of file
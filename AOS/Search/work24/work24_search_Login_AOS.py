@@ -1,7 +1,6 @@
 import time
-import pandas as pd
 import os
-import statistics
+import sys
 from datetime import datetime
 from appium import webdriver
 from appium.options.android import UiAutomator2Options
@@ -9,14 +8,22 @@ from appium.webdriver.common.appiumby import AppiumBy
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+# 공통 모듈(common) 경로 추가 (저장소 루트)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from common import device_env, profiler, speed_index, stats
+from common.checkpoint import ResultLog
+from common.detectors import uiautomator
+from common.result_store import STATUS_FAIL, STATUS_OK, ResultStore
+from common.waiter import wait_until
+
 # ===================== [설정 영역: 고용24] =====================
 APP_PACKAGE = "kr.or.keis.mo"
 APP_ACTIVITY = "kr.or.keis.mo.MainActivity"
 DEVICE_NAME = "Galaxy S25"
-APPIUM_SERVER_URL = "http://127.0.0.1:4723"
+APPIUM_SERVER_URL = device_env.server_url("http://127.0.0.1:4723")
 
 # 반복횟수
-REPEAT_COUNT = 10
+REPEAT_COUNT = device_env.repeat_count(10)
 
 # 검색어 입력값
 KEYWORD = "청년"
@@ -44,10 +51,24 @@ def run_work24_search_test():
     print(f"--- 고용24(Work24) 검색 성능 측정 ({REPEAT_COUNT}회) 시작 ---")
     
     driver = None
-    test_results = []
+    timeline = None
+    store = ResultStore()
+    # 회차마다 체크포인트에 바로 기록 (중단 후 다시 실행하면 이어서 측정)
+    checkpoint = ResultLog("work24_search_perf", SCRIPT_DIR)
+    test_results = checkpoint.rows
+    repeats = stats.AdaptiveRepeat(test_results, REPEAT_COUNT, checkpoint.next_iteration)
+    # 회차 -> 시각적 완성도 (VISUAL_TIMELINE=1 일 때만)
+    visual_rows = {}
+    # 회차별 원본 기록은 통합 결과 저장소에 바로 적재 (CSV 는 저장소에서 내보냄)
+    record = store.start_run(
+        app="work24", platform="android", scenario="search", metric="검색반응속도(초)",
+        device=device_env.device_label(DEVICE_NAME), script=__file__, resume=bool(test_results),
+    )
 
     try:
-        driver = webdriver.Remote(APPIUM_SERVER_URL, options=options)
+        device_env.apply_capabilities(options)
+        driver = profiler.instrument(webdriver.Remote(APPIUM_SERVER_URL, options=options))
+        timeline = speed_index.from_env(driver)
         wait = WebDriverWait(driver, 20)
 
         print("📱 앱 실행 및 메인 화면 대기 중...")
@@ -57,10 +78,10 @@ def run_work24_search_test():
         ))
 
         # ===================== 반복 측정 루프 =====================
-        for i in range(1, REPEAT_COUNT + 1):
+        for i in repeats:
             measured_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             try:
-                print(f"\n[Running] {i}/{REPEAT_COUNT}회차 측정 진행 중...")
+                print(f"\n[Running] {i}/{repeats.limit}회차 측정 진행 중...")
 
                 # ---------------------------------------------------------
                 # Step 1. 검색어 입력 (메인화면 검색창)
@@ -81,6 +102,9 @@ def run_work24_search_test():
                     (AppiumBy.ANDROID_UIAUTOMATOR, 'new UiSelector().resourceId("top-findSearchDataMain")')
                 ))
                 
+                if timeline:
+                    timeline.start()
+
                 # [Time Start] 클릭 직전
                 search_btn.click()
                 start_time = time.time() 
@@ -91,24 +115,24 @@ def run_work24_search_test():
                 # "검색 결과" 텍스트가 포함된 뷰가 뜰 때까지 대기
                 target_selector = 'new UiSelector().textContains("검색 결과")'
                 
-                while True:
-                    # find_elements는 에러 없이 빈 리스트 반환 (가장 빠름)
-                    res = driver.find_elements(AppiumBy.ANDROID_UIAUTOMATOR, target_selector)
-                    
-                    if res:
-                        break # 찾았으면 즉시 탈출
-                    
-                    # 안전장치: 20초 타임아웃
-                    if time.time() - start_time > 20:
-                        raise Exception("Timeout: 검색 결과 미표시")
+                result = wait_until(uiautomator(driver, target_selector), start_time, timeout=20)
+                if not result.matched:
+                    raise Exception("Timeout: 검색 결과 미표시")
                 
                 # [Time End]
-                end_time = time.time()
+                end_time = result.end_time
                 
                 duration = end_time - start_time
                 print(f"⏱️ {i}회차 소요 시간: {duration:.4f}초")
+                print(f"   📈 샘플링 속도: {result.sample_rate:.1f}Hz")
 
-                test_results.append([i, "성공", measured_at, duration])
+                checkpoint.append([i, "성공", measured_at, duration])
+                # 검색 결과가 다 그려져 화면이 멈출 때까지 기록
+                visual_rows[i] = timeline.finish(start_time, end_time) if timeline else None
+                speed_index.report(visual_rows[i])
+                record.add(i, STATUS_OK, measured_at, duration, start_time=start_time, end_time=end_time,
+                           detector=target_selector, prev_time=result.prev_time,
+                           **speed_index.fields(visual_rows[i]))
 
                 # ---------------------------------------------------------
                 # Step 4. 메인 화면 복귀 (뒤로 가기)
@@ -125,69 +149,50 @@ def run_work24_search_test():
 
             except Exception as e:
                 print(f"❌ {i}회차 실행 중 에러 발생: {e}")
-                test_results.append([i, "실패", measured_at, 0])
+                checkpoint.append([i, "실패", measured_at, 0])
+                record.add(i, STATUS_FAIL, measured_at, None, error=str(e))
+                if timeline:
+                    timeline.cancel()
                 try:
                     driver.press_keycode(4) # 에러 시 뒤로가기 시도
                 except:
                     pass
 
+    except Exception as e:
+        print(f"⛔ 치명적 오류: {e}")
+
+    finally:
+        if timeline:
+            timeline.close()
+        if driver:
+            driver.quit()
+
         # ===================== CSV 저장 로직 (통일된 포맷) =====================
         print("\n" + "=" * 50)
         print("💾 결과 저장 중...")
 
         # 성공한 케이스만 통계 계산
-        durations = [row[3] for row in test_results if row[1] == "성공" and row[3] > 0]
-
-        if durations:
-            avg = statistics.mean(durations)
-            mn = min(durations)
-            mx = max(durations)
-            std = statistics.pstdev(durations) if len(durations) > 1 else 0.0
-        else:
-            avg = mn = mx = std = 0.0
+        result_stats = stats.from_rows(test_results)
+        stats.report(result_stats, "고용24 검색")
+        if timeline:
+            speed_index.summarize(visual_rows.values(), "고용24 검색")
 
         # 파일명 생성
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         file_name = f"work24_search_perf_{REPEAT_COUNT}runs_{timestamp}.csv"
         
-        # ✅ [핵심] 현재 폴더에 저장
-        output_path = os.path.join(SCRIPT_DIR, file_name)
+        # ✅ [핵심] 현재 폴더에 저장 (결과 저장소에서 기존 형식으로 내보냄)
+        output_path = device_env.result_path(os.path.join(SCRIPT_DIR, file_name))
 
         if test_results:
-            df = pd.DataFrame(test_results, columns=["회차", "상태", "측정시간", "검색반응속도(초)"])
-            
-            # 통계용 컬럼 추가
-            df["평균(초)"] = ""
-            df["최소(초)"] = ""
-            df["최대(초)"] = ""
-            df["표준편차(초)"] = ""
-
-            # 요약 행 추가
-            summary = {
-                "회차": "요약",
-                "상태": "",
-                "측정시간": "",
-                "검색반응속도(초)": "",
-                "평균(초)": round(avg, 4),
-                "최소(초)": round(mn, 4),
-                "최대(초)": round(mx, 4),
-                "표준편차(초)": round(std, 4)
-            }
-            
-            df = pd.concat([df, pd.DataFrame([summary])], ignore_index=True)
-            df.to_csv(output_path, index=False, encoding="utf-8-sig")
-
+            # 시각적 완성도 컬럼 (첫 변화 / Speed Index / 85% / 마지막 변화)
+            store.export_csv(record.run_id, output_path, columns=speed_index.CSV_FIELDS if timeline else None)
             print(f"✅ 저장 완료: {output_path}")
-            print(df)
+            if checkpoint.finish(repeats.total):
+                record.finish(repeats.reason)
         else:
             print("ℹ️ 저장할 데이터가 없습니다.")
-
-    except Exception as e:
-        print(f"⛔ 치명적 오류: {e}")
-
-    finally:
-        if driver:
-            driver.quit()
+        store.close()
 
 # 테스트 실행
 if __name__ == "__main__":
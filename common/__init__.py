@@ -0,0 +1,7 @@
+"""
+AOS/iOS 성능 측정 스크립트들이 함께 쓰는 공통 모듈 모음.
+
+각 시나리오 스크립트는 저장소 루트를 sys.path 에 추가한 뒤
+`from common.image_match import RoiMatcher` 처럼 필요한 모듈만 가져다 쓴다.
+(OpenCV/NumPy 가 없는 AOS 환경에서도 import 에러가 나지 않도록 여기서 일괄 import 하지 않음)
+"""
@@ -0,0 +1,241 @@
+"""
+감지 비용 보정 (Calibration)
+
+모든 측정값에는 마지막 감지 1회의 비용이 들어 있다.
+AOS UiSelector 는 find_elements 응답을 받은 시각, iOS 이미지 매칭은 프레임 캡처 시각을 완료 시각으로 쓰므로
+같은 화면이라도 감지 방식에 따라 완료 시각이 늦게 찍히는 정도가 다르고, 그대로는 플랫폼끼리 비교할 수 없다.
+
+이미 화면에 떠 있는 요소 / 프레임을 samples 회 연속 감지해서 감지기별로 두 가지를 잰다.
+    lag    : 화면 상태를 확인한 순간 ~ observed_at 사이 지연
+             (폴링: 요청 중간 시점 기준, observed_at 이 응답 시각인 find_elements 는 왕복의 절반 정도.
+              MJPEG: captured_at 이 프레임 수신 시각이라 0 으로 봄, 기기 -> 호스트 전송 지연은 호스트에서 잴 수 없음)
+    period : 연속 감지 간격 (완료 시점이 두 확인 사이 어디에 있는지 모르는 구간의 기본 폭)
+
+보정값 = 구간 (max(start, 직전 확인 - lag), 첫 감지 - lag] 의 중앙 - start
+오차   = sqrt(lag 표준편차^2 + 구간 폭^2 / 12)   (1σ, 구간 안에서 완료 시점이 균등하다고 가정)
+
+보정 결과는 기기 / 플랫폼 / 감지 방식(드라이버) / 감지기 이름별로 결과 저장소(calibrations 표)에 남기고 재사용한다.
+
+    CALIBRATE=1 python -m common.scenario scenarios/ios/gov24_search.yaml   # 첫 성공 회차 직후 보정 측정
+    python -m common.calibration list                                     # 저장된 보정값
+
+    calibrator = Calibrator(store, "android", device="Galaxy S25")
+    correction = calibrator.correct(detector, start_time, result)       # 보정값 없으면 None
+    record.add(..., **fields(correction))
+"""
+
+import argparse
+import math
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from common import device_env
+from common.detectors import ElementDetector, ImageDetector, VisualChange, VisualStable
+from common.result_store import ResultStore
+
+
+DEFAULT_SAMPLES = 30
+DEFAULT_WARMUP = 3
+
+# MAD -> 표준편차 환산 계수 (정규분포)
+MAD_SCALE = 1.4826
+
+# kind: 감지 방식 (find_elements 전략 / image:mjpeg / image:screenshot ...)
+# samples: 보정에 쓴 감지 횟수, found: 그중 감지된 비율 (대상이 화면에 있었는지 확인용)
+# cost: 감지 1회 왕복(초, 중앙값), lag / lag_sd: 확인 ~ observed_at 지연(초, 중앙값 / 표준편차), period: 감지 간격(초, 중앙값)
+Calibration = namedtuple("Calibration", [
+    "device", "platform", "kind", "detector", "samples", "found", "cost", "lag", "lag_sd", "period", "measured_at",
+])
+
+# duration: 보정한 소요 시간(초), error: 오차(1σ, 초), overhead: 원래 측정값 - 보정값
+Correction = namedtuple("Correction", ["duration", "error", "overhead", "calibration"])
+
+
+def detector_kind(detector):
+    """감지기 -> 감지 방식 문자열 (같은 이름이라도 방식이 다르면 따로 보정)"""
+    if isinstance(detector, ElementDetector):
+        return detector.by
+    if isinstance(detector, ImageDetector):
+        return f"image:{detector.frames.kind}"
+    if isinstance(detector, (VisualStable, VisualChange)):
+        return f"visual:{detector.frames.kind}"
+    if hasattr(detector, "detectors"):
+        return f" {detector.joiner} ".join(detector_kind(d) for d in detector.detectors)
+    return detector.__class__.__name__
+
+
+def _robust_sd(values):
+    if len(values) < 2:
+        return 0.0
+    values = np.asarray(values, dtype=float)
+    return float(MAD_SCALE * np.median(np.abs(values - np.median(values))))
+
+
+# ---- [함수] 보정 측정 ----
+def calibrate(detector, samples=DEFAULT_SAMPLES, warmup=DEFAULT_WARMUP, device=None, platform=None,
+              timeout=30.0):
+    """
+    이미 떠 있는 대상을 samples 회 연속 감지 -> Calibration
+
+    대기 엔진(common.waiter)의 촘촘한 구간처럼 쉬지 않고 확인한다.
+    앞쪽 warmup 회는 버림 (첫 find_elements 의 캐시 미스 / 첫 프레임 디코딩)
+    """
+    detector.reset(time.time())
+    blocking = detector.blocking
+    lags, costs, observed = [], [], []
+    found = polls = 0
+    deadline = time.time() + timeout
+    while polls < warmup + samples and time.time() < deadline:
+        requested_at = time.time()
+        detection = detector.poll()
+        returned_at = time.time()
+        if detection is None:
+            continue
+        polls += 1
+        if polls <= warmup:
+            continue
+        found += bool(detection.found)
+        costs.append(returned_at - requested_at)
+        observed.append(detection.observed_at)
+        # MJPEG 프레임 시각은 이미 수신 시각이라 감지 호출과 무관
+        lags.append(0.0 if blocking else max(0.0, detection.observed_at - (requested_at + returned_at) / 2))
+
+    count = len(lags)
+    if not count:
+        raise RuntimeError(f"보정 실패: {detector.name} 감지 결과 없음")
+    return Calibration(
+        device=device_env.device_label("") if device is None else device,
+        platform=platform,
+        kind=detector_kind(detector),
+        detector=detector.name,
+        samples=count,
+        found=found / count,
+        cost=float(np.median(costs)),
+        lag=float(np.median(lags)),
+        lag_sd=_robust_sd(lags),
+        period=float(np.median(np.diff(observed))) if count > 1 else float(np.median(costs)),
+        measured_at=time.strftime("%Y-%m-%d %H:%M:%S"),
+    )
+
+
+# ---- [함수] 보정 적용 ----
+def correct(calibration, start_time, end_time, prev_time=None):
+    """
+    측정 1회 -> Correction
+
+    prev_time: 직전 미감지 확인 시각 (WaitResult / MatchResult.prev_time). 없으면 보정 때 잰 감지 간격 사용
+    """
+    hi = end_time - calibration.lag
+    if prev_time is None:
+        lo = hi - calibration.period
+    else:
+        lo = prev_time - calibration.lag
+    lo = min(max(lo, start_time), hi)
+    duration = (lo + hi) / 2 - start_time
+    error = math.sqrt(calibration.lag_sd ** 2 + (hi - lo) ** 2 / 12)
+    return Correction(duration, error, end_time - start_time - duration, calibration)
+
+
+def fields(correction):
+    """결과 저장소 record.add 부가 값 (보정이 없으면 빈 dict)"""
+    if correction is None:
+        return {}
+    return {
+        "corrected": round(correction.duration, 4),
+        "correction_error": round(correction.error, 4),
+        "correction_kind": correction.calibration.kind,
+    }
+
+
+class Calibrator:
+    """
+    기기 / 플랫폼 1개의 감지기별 보정값 관리
+
+    CALIBRATE=1 : 감지기마다 이번 실행에서 처음 보정할 때 새로 측정해 저장소에 저장
+    CALIBRATE=0 : 보정 끔 (correct 가 항상 None)
+    없음        : 저장소에 있는 최근 보정값만 사용 (없으면 보정하지 않음)
+    """
+
+    def __init__(self, store, platform, device=None, mode=None, samples=DEFAULT_SAMPLES):
+        self.store = store
+        self.platform = platform
+        self.device = device_env.device_label("") if device is None else device
+        self.mode = device_env.calibrate_mode() if mode is None else mode
+        self.samples = samples
+        self._cache = {}
+
+    def calibration(self, detector):
+        """
+        detector 의 보정값 (없으면 None)
+
+        측정 모드면 대상이 화면에 떠 있을 때(완료 감지 직후) 호출해야 한다
+        """
+        if self.mode == "off":
+            return None
+        key = (detector_kind(detector), detector.name)
+        if key in self._cache:
+            return self._cache[key]
+
+        calibration = None
+        if self.mode == "measure":
+            print(f"   🎯 감지 비용 보정 측정: {detector.name} ({self.samples}회)")
+            try:
+                calibration = calibrate(detector, self.samples, device=self.device, platform=self.platform)
+            except Exception as e:
+                print(f"   ⚠️ 보정 실패 ({detector.name}): {e}")
+            else:
+                if calibration.found < 1:
+                    print(f"   ⚠️ 보정 중 대상이 {100 * (1 - calibration.found):.0f}% 회 감지되지 않음 (화면 전환 중이었는지 확인)")
+                report(calibration)
+                self.store.add_calibration(calibration)
+        else:
+            row = self.store.latest_calibration(self.device, self.platform, key[0], key[1])
+            if row:
+                calibration = Calibration(**{k: row[k] for k in Calibration._fields})
+        self._cache[key] = calibration
+        return calibration
+
+    def correct(self, detector, start_time, result):
+        """대기 결과(WaitResult / MatchResult) -> Correction (보정값 없으면 None)"""
+        calibration = self.calibration(detector)
+        if calibration is None or not result.end_time:
+            return None
+        correction = correct(calibration, start_time, result.end_time, result.prev_time)
+        print(f"   🎯 보정: {correction.duration:.4f} ± {correction.error:.4f}초 (감지 비용 {correction.overhead:.4f}초)")
+        return correction
+
+
+def report(calibration):
+    print(f"   🎯 {calibration.detector} [{calibration.kind}] {calibration.samples}회: "
+          f"왕복 {1000 * calibration.cost:.1f}ms / 지연 {1000 * calibration.lag:.1f}±{1000 * calibration.lag_sd:.1f}ms"
+          f" / 간격 {1000 * calibration.period:.1f}ms")
+
+
+# ---- [함수] 메인 ----
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="감지 비용 보정값 조회")
+    parser.add_argument("--db", default=None, help="SQLite 파일 (기본: results/results.sqlite3)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_list = sub.add_parser("list", help="저장된 보정값")
+    p_list.add_argument("--device", default=None)
+    p_list.add_argument("--platform", default=None)
+    args = parser.parse_args(argv)
+
+    with ResultStore(args.db) as store:
+        rows = store.calibrations(args.device, args.platform)
+    if not rows:
+        print("저장된 보정값이 없습니다 (CALIBRATE=1 로 측정)")
+        return 1
+    print(f"{'측정시각':<19} {'기기':<14} {'플랫폼':<8} {'방식':<22} {'왕복(ms)':>9} {'지연(ms)':>9} {'±(ms)':>7}"
+          f" {'간격(ms)':>9}  감지기")
+    for r in rows:
+        print(f"{r['measured_at']:<19} {(r['device'] or '-')[:14]:<14} {(r['platform'] or '-'):<8} {r['kind'][:22]:<22}"
+              f" {1000 * r['cost']:>9.1f} {1000 * r['lag']:>9.1f} {1000 * r['lag_sd']:>7.1f} {1000 * r['period']:>9.1f}"
+              f"  {r['detector']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,114 @@
+"""
+회차별 체크포인트 (중단 후 이어서 측정)
+
+test_results 를 메모리에만 모아 두었다가 마지막에 CSV 를 쓰면
+크래시 / 보안숫자 입력 중 Ctrl+C / WDA 멈춤이 나는 순간 그때까지의 회차가 모두 사라진다.
+
+ResultLog 는 회차가 끝날 때마다 한 줄(JSON)을 체크포인트 파일에 append + fsync 하고,
+같은 스크립트를 다시 실행하면 남아 있는 회차를 불러와 마지막 완료 회차 다음부터 이어서 측정한다.
+중단되더라도 그때까지의 CSV 는 저장하고, 모든 회차가 끝난 경우에만 finish() 가 체크포인트를 지운다.
+(RESUME=0 이면 이어서 하지 않고 새로 시작)
+
+    checkpoint = ResultLog("ios_gov24_launch_result", SAVE_DIR)
+    test_results = checkpoint.rows
+    repeats = stats.AdaptiveRepeat(test_results, ITERATIONS, checkpoint.next_iteration)
+    try:
+        for i in repeats:
+            ...
+            checkpoint.append([i, "성공", measured_at, duration])
+    finally:                                  # Ctrl+C 로 끝나도 저장
+        store.export_csv(record.run_id, output_path)   # CSV 는 atomic_open 으로 다 쓴 다음에만 교체
+        if checkpoint.finish(repeats.total):  # 남은 회차가 있으면 체크포인트 유지
+            record.finish(repeats.reason)
+"""
+
+import json
+import os
+from contextlib import contextmanager
+
+from common import device_env
+
+
+class ResultLog:
+    """
+    name: 체크포인트 이름 (보통 결과 CSV 파일명에서 확장자 / 실행 시각을 뺀 것)
+    directory: 저장 폴더 (RESULT_DIR 이 있으면 그 폴더)
+    resume: None 이면 RESUME 환경 변수 (기본: 이어서 함)
+    """
+
+    def __init__(self, name, directory, resume=None):
+        self.path = device_env.result_path(os.path.join(directory, f".{name}.checkpoint.jsonl"))
+        self.rows = []
+        resume = device_env.resume_enabled() if resume is None else resume
+        if resume:
+            self.rows = self._load()
+            if self.rows:
+                print(f"♻️ 이전 실행 이어서 측정: {len(self.rows)}회 완료분 불러옴 ({self.path})")
+        elif os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return []
+        rows = []
+        torn = False
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    torn = True
+                    break
+        if torn:
+            # 기록 도중 끊긴 마지막 줄은 버리고, 이어 쓸 수 있도록 온전한 줄만 남김
+            with atomic_open(self.path, encoding="utf-8") as f:
+                f.writelines(json.dumps(row, ensure_ascii=False, default=str) + "\n" for row in rows)
+        return rows
+
+    @staticmethod
+    def _iteration(row):
+        # 리스트 행은 첫 칸, dict 행(pandas 스크립트)은 첫 항목이 회차 번호
+        return next(iter(row.values())) if isinstance(row, dict) else row[0]
+
+    @property
+    def next_iteration(self):
+        """이어서 측정할 회차 번호"""
+        return max((self._iteration(row) for row in self.rows), default=0) + 1
+
+    def append(self, row):
+        """회차 1개를 메모리와 파일에 동시에 기록 (fsync 까지 끝난 뒤 반환)"""
+        self.rows.append(row)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def finish(self, total=None):
+        """
+        결과 저장이 끝난 뒤 호출 -> 모든 회차가 끝났으면 체크포인트 삭제
+
+        total: 전체 반복 횟수. 아직 남은 회차가 있으면(중단) 체크포인트를 남겨 두어 다음 실행이 이어받음
+        """
+        if total is not None and self.next_iteration <= total:
+            print(f"⏸ {self.next_iteration - 1}/{total}회에서 중단됨 -> 다시 실행하면 {self.next_iteration}회차부터 이어서 측정")
+            return False
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        return True
+
+
+@contextmanager
+def atomic_open(path, encoding="utf-8-sig"):
+    """
+    임시 파일에 모두 쓴 뒤 fsync + 교체 (쓰는 도중 죽어도 기존 파일이 반쯤 덮어써지지 않음)
+    """
+    tmp = f"{path}.tmp"
+    try:
+        with open(tmp, "w", newline="", encoding=encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
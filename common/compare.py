@@ -0,0 +1,381 @@
+"""
+전년 대비 / 앱 간 비교 리포트
+
+결과 저장소(common.result_store)의 실행 기록을 (플랫폼, 시나리오, 앱) 별로 모아
+    1) 전년 대비: 같은 앱의 기준 기간(예: 2024) vs 현재 기간(예: 2025)
+    2) 앱 간 비교: 현재 기간의 대상 앱(기본 고용24) vs 나머지 앱(정부24 / 잡코리아)
+을 비교하고, 악화(느려짐) -> 차이 없음 -> 개선 순으로 정렬한 리포트(Markdown / HTML)와 분포 그림(SVG)을 만든다.
+
+유의성은 두 가지를 모두 만족할 때만 '악화 / 개선'으로 판정한다.
+    - Mann-Whitney U 검정 p < ALPHA (순위 기반, 튀는 회차에 강함)
+    - 평균 차이의 부트스트랩 95% 신뢰구간이 0 을 포함하지 않음
+통계 규칙(워밍업 제외 / 실패 제외)은 common.stats 와 같다.
+--corrected 를 주면 감지 비용을 뺀 보정값(common.calibration)으로 비교하고, 보정값이 없는 회차는 제외한다
+(AOS UiSelector 와 iOS 이미지 매칭처럼 감지 방식이 다른 결과를 비교할 때).
+
+    python -m common.compare --import AOS iOS --baseline 2024 --current 2025 --out results/compare.md
+    python -m common.compare --current 2025-03-01..2025-03-31 --target work24 --out results/compare.html
+    python -m common.compare --current 2025 --corrected --out results/compare_corrected.md
+
+기간 형식: 2025 / 2025-03 / 2025-03-01 (앞부분 일치), 2025-01-01..2025-06-30 (범위, 양 끝 포함)
+"""
+
+import argparse
+import html
+import json
+import os
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from common import stats
+from common.result_store import STATUS_OK, ResultStore, import_paths
+
+
+ALPHA = 0.05
+TARGET_APP = "work24"
+
+APP_LABELS = {"work24": "고용24", "gov24": "정부24", "jobkorea": "잡코리아"}
+SCENARIO_LABELS = {
+    "app_start": "앱 실행",
+    "idpw_login": "ID/PW 로그인",
+    "certificate_login": "인증서 로그인",
+    "search": "검색",
+}
+PLATFORM_LABELS = {"android": "AOS", "ios": "iOS"}
+
+# 판정 -> 정렬 순서 (느려진 것부터)
+VERDICT_ORDER = {"악화": 0, "느림": 0, "차이 없음": 1, "판단 불가": 2, "개선": 3, "빠름": 3}
+VERDICT_MARKS = {"악화": "🔴", "느림": "🔴", "차이 없음": "➖", "판단 불가": "❔", "개선": "🟢", "빠름": "🟢"}
+
+# 실행들에서 모은 성공 회차 (values), 실행 수, 실패 회차 수
+Sample = namedtuple("Sample", ["values", "runs", "failures"])
+
+# kind: "yoy" / "cross", a: 기준(기준 기간 / 비교 앱), b: 대상(현재 기간 / 대상 앱), diff = b 평균 - a 평균
+Finding = namedtuple("Finding", [
+    "kind", "platform", "scenario", "app", "label_a", "label_b", "a", "b",
+    "diff", "change", "ci_low", "ci_high", "p_boot", "p_mw", "effect", "verdict",
+])
+
+
+def app_label(app):
+    return APP_LABELS.get(app, app or "-")
+
+
+def scenario_label(scenario):
+    return SCENARIO_LABELS.get(scenario, scenario or "-")
+
+
+def platform_label(platform):
+    return PLATFORM_LABELS.get(platform, platform or "-")
+
+
+# ---- [함수] 데이터 모으기 ----
+def period_clause(period):
+    """기간 문자열 -> (SQL 조건, 파라미터)"""
+    if not period:
+        return "", []
+    if ".." in period:
+        start, end = period.split("..", 1)
+        return " AND started_at >= ? AND substr(started_at, 1, ?) <= ?", [start, len(end), end]
+    return " AND started_at LIKE ?", [period + "%"]
+
+
+def _corrected(row):
+    """회차 기록의 보정값 (없으면 None -> 실패처럼 통계에서 빠짐)"""
+    extra = json.loads(row["extra"]) if row["extra"] else {}
+    return extra.get("corrected")
+
+
+def load_samples(store, period=None, warmup=None, corrected=False):
+    """
+    기간 안의 실행 -> {(플랫폼, 시나리오, 앱): Sample}
+
+    워밍업은 실행마다 앞쪽 회차를 제외 (common.stats.split_rows)
+    corrected: 소요 시간 대신 감지 비용 보정값 사용 (보정값이 없는 성공 회차는 제외, 실패로 세지 않음)
+    """
+    clause, params = period_clause(period)
+    runs = store.query(
+        "SELECT run_id, app, platform, scenario FROM runs"
+        " WHERE app IS NOT NULL AND platform IS NOT NULL AND scenario IS NOT NULL" + clause,
+        params,
+    )
+    samples = {}
+    for run in runs:
+        records = store.rows(run["run_id"])
+        if corrected:
+            records = [dict(r, duration=_corrected(r)) for r in records
+                       if r["status"] != STATUS_OK or _corrected(r) is not None]
+        rows = [(r["iteration"], r["status"], r["measured_at"], r["duration"]) for r in records]
+        values, _, failures, _ = stats.split_rows(rows, warmup=warmup)
+        key = (run["platform"], run["scenario"], run["app"])
+        sample = samples.get(key, Sample([], 0, 0))
+        samples[key] = Sample(sample.values + values, sample.runs + 1, sample.failures + failures)
+    return samples
+
+
+# ---- [함수] 비교 ----
+def compare_samples(kind, platform, scenario, app, label_a, label_b, a, b, worse="악화", better="개선"):
+    """두 Sample 비교 -> Finding (그룹마다 성공 회차 2개 미만이면 '판단 불가')"""
+    summary_a = stats.summarize(a.values, failures=a.failures)
+    summary_b = stats.summarize(b.values, failures=b.failures)
+    if summary_a.count < 2 or summary_b.count < 2:
+        return Finding(kind, platform, scenario, app, label_a, label_b, summary_a, summary_b,
+                       0.0, 0.0, 0.0, 0.0, 1.0, 1.0, 0.0, "판단 불가")
+
+    boot = stats.compare(b.values, a.values)
+    mw = stats.mann_whitney(b.values, a.values)
+    change = boot.diff / summary_a.mean * 100 if summary_a.mean else 0.0
+    if boot.significant and mw.p_value < ALPHA:
+        verdict = worse if boot.diff > 0 else better
+    else:
+        verdict = "차이 없음"
+    return Finding(kind, platform, scenario, app, label_a, label_b, summary_a, summary_b,
+                   boot.diff, change, boot.ci_low, boot.ci_high, boot.p_value, mw.p_value, mw.effect, verdict)
+
+
+def year_over_year(baseline, current, baseline_label, current_label):
+    """같은 (플랫폼, 시나리오, 앱) 의 기준 기간 vs 현재 기간 -> [Finding]"""
+    findings = []
+    for key in sorted(set(baseline) & set(current)):
+        platform, scenario, app = key
+        findings.append(compare_samples(
+            "yoy", platform, scenario, app, baseline_label, current_label, baseline[key], current[key],
+        ))
+    return findings
+
+
+def cross_app(current, target=TARGET_APP):
+    """같은 (플랫폼, 시나리오) 에서 대상 앱 vs 나머지 앱 -> [Finding] (diff > 0 이면 대상 앱이 느림)"""
+    findings = []
+    for (platform, scenario, app), sample in sorted(current.items()):
+        if app == target or (platform, scenario, target) not in current:
+            continue
+        findings.append(compare_samples(
+            "cross", platform, scenario, app, app_label(app), app_label(target),
+            sample, current[(platform, scenario, target)], worse="느림", better="빠름",
+        ))
+    return findings
+
+
+def rank(findings):
+    """악화(느림) -> 차이 없음 -> 판단 불가 -> 개선(빠름), 같은 판정 안에서는 변화율이 큰 순"""
+    return sorted(findings, key=lambda f: (VERDICT_ORDER[f.verdict], -abs(f.change)))
+
+
+# ---- [함수] 분포 그림 (SVG) ----
+def distribution_svg(series, unit="초", width=640, row_height=34):
+    """
+    series: [(이름, 값 목록)] -> 가로 상자 그림 + 회차 점 (SVG 문자열, 외부 라이브러리 없이)
+    """
+    series = [(label, np.asarray(values, dtype=float)) for label, values in series if len(values)]
+    if not series:
+        return ""
+    left, right, top = 150, 20, 10
+    height = top + row_height * len(series) + 30
+    lo = min(v.min() for _, v in series)
+    hi = max(v.max() for _, v in series)
+    pad = (hi - lo) * 0.05 or 0.05
+    lo, hi = max(lo - pad, 0.0), hi + pad
+
+    def x(value):
+        return left + (value - lo) / (hi - lo) * (width - left - right)
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'font-family="sans-serif" font-size="12">',
+        f'<rect width="{width}" height="{height}" fill="white"/>',
+    ]
+    axis_y = top + row_height * len(series) + 4
+    for tick in np.linspace(lo, hi, 5):
+        tx = x(tick)
+        parts.append(f'<line x1="{tx:.1f}" y1="{top}" x2="{tx:.1f}" y2="{axis_y}" stroke="#eee"/>')
+        parts.append(f'<text x="{tx:.1f}" y="{axis_y + 14}" text-anchor="middle" fill="#555">'
+                     f'{tick:.2f}{unit}</text>')
+    for i, (label, values) in enumerate(series):
+        cy = top + row_height * i + row_height / 2
+        q1, median, q3 = np.percentile(values, [25, 50, 75])
+        parts.append(f'<text x="{left - 8}" y="{cy + 4:.1f}" text-anchor="end">{html.escape(label)}</text>')
+        parts.append(f'<line x1="{x(values.min()):.1f}" y1="{cy:.1f}" x2="{x(values.max()):.1f}" y2="{cy:.1f}" '
+                     f'stroke="#888"/>')
+        parts.append(f'<rect x="{x(q1):.1f}" y="{cy - 9:.1f}" width="{max(x(q3) - x(q1), 1):.1f}" height="18" '
+                     f'fill="#cfe2ff" stroke="#3d6fb6"/>')
+        parts.append(f'<line x1="{x(median):.1f}" y1="{cy - 9:.1f}" x2="{x(median):.1f}" y2="{cy + 9:.1f}" '
+                     f'stroke="#1f3f73" stroke-width="2"/>')
+        # 회차 점 (세로 위치는 회차 순서로 고정해 겹침만 피함)
+        for j, value in enumerate(values):
+            jitter = ((j * 7) % 11 - 5) * 1.2
+            parts.append(f'<circle cx="{x(value):.1f}" cy="{cy + jitter:.1f}" r="2.5" fill="#d9534f" '
+                         f'fill-opacity="0.7"/>')
+    parts.append("</svg>")
+    return "\n".join(parts)
+
+
+def plot_series(platform, scenario, baseline, current, baseline_label, current_label):
+    """(플랫폼, 시나리오) 1개의 분포 그림에 넣을 [(이름, 값)] (앱별 기준 기간 / 현재 기간)"""
+    series = []
+    apps = sorted({k[2] for k in list(baseline) + list(current) if k[:2] == (platform, scenario)})
+    for app in apps:
+        key = (platform, scenario, app)
+        if key in baseline:
+            series.append((f"{app_label(app)} {baseline_label}", baseline[key].values))
+        if key in current:
+            series.append((f"{app_label(app)} {current_label}", current[key].values))
+    return series
+
+
+# ---- [함수] 리포트 ----
+def _row(rank_no, f):
+    ci = f"{f.ci_low:+.3f} ~ {f.ci_high:+.3f}" if f.verdict != "판단 불가" else "-"
+    subject = app_label(f.app) if f.kind == "yoy" else f"{f.label_b} vs {f.label_a}"
+    return [
+        str(rank_no), f"{VERDICT_MARKS[f.verdict]} {f.verdict}", platform_label(f.platform),
+        scenario_label(f.scenario), subject,
+        f"{f.a.mean:.3f} / {f.a.p50:.3f} (n={f.a.count})",
+        f"{f.b.mean:.3f} / {f.b.p50:.3f} (n={f.b.count})",
+        f"{f.diff:+.3f}초 ({f.change:+.1f}%)" if f.verdict != "판단 불가" else "-",
+        ci, f"{f.p_mw:.4f}" if f.verdict != "판단 불가" else "-",
+    ]
+
+
+def build_sections(yoy, cross, baseline_label, current_label, target):
+    """리포트 표 -> [(제목, 헤더, 행)]"""
+    sections = []
+    if yoy is not None:
+        sections.append((
+            f"전년 대비 ({baseline_label} → {current_label})",
+            ["순위", "판정", "플랫폼", "시나리오", "앱", f"{baseline_label} 평균 / 중앙값",
+             f"{current_label} 평균 / 중앙값", "변화", "차이 95% CI", "MW p"],
+            [_row(i, f) for i, f in enumerate(rank(yoy), 1)],
+        ))
+    sections.append((
+        f"앱 간 비교 ({app_label(target)} 기준, {current_label})",
+        ["순위", "판정", "플랫폼", "시나리오", "비교", "상대 앱 평균 / 중앙값",
+         f"{app_label(target)} 평균 / 중앙값", "차이", "차이 95% CI", "MW p"],
+        [_row(i, f) for i, f in enumerate(rank(cross), 1)],
+    ))
+    return sections
+
+
+def render_markdown(title, meta, sections, plots, plot_dir):
+    lines = [f"# {title}", ""] + [f"- {m}" for m in meta] + [""]
+    for n, (heading, header, rows) in enumerate(sections, 1):
+        lines += [f"## {n}. {heading}", ""]
+        if not rows:
+            lines += ["비교할 데이터가 없습니다.", ""]
+            continue
+        lines.append("| " + " | ".join(header) + " |")
+        lines.append("|" + "---|" * len(header))
+        lines += ["| " + " | ".join(row) + " |" for row in rows]
+        lines.append("")
+    if plots:
+        lines += [f"## {len(sections) + 1}. 분포 (상자: 사분위, 굵은 선: 중앙값, 점: 회차)", ""]
+        for name, (heading, _) in plots.items():
+            lines += [f"### {heading}", "", f"![{heading}]({plot_dir}/{name}.svg)", ""]
+    return "\n".join(lines)
+
+
+def render_html(title, meta, sections, plots):
+    out = [
+        "<!DOCTYPE html>", '<html lang="ko"><head><meta charset="utf-8">',
+        f"<title>{html.escape(title)}</title>",
+        "<style>body{font-family:sans-serif;margin:24px}table{border-collapse:collapse;margin-bottom:24px}"
+        "th,td{border:1px solid #ccc;padding:4px 8px;font-size:13px}th{background:#f4f4f4}</style>",
+        "</head><body>", f"<h1>{html.escape(title)}</h1>", "<ul>",
+    ]
+    out += [f"<li>{html.escape(m)}</li>" for m in meta] + ["</ul>"]
+    for n, (heading, header, rows) in enumerate(sections, 1):
+        out.append(f"<h2>{n}. {html.escape(heading)}</h2>")
+        if not rows:
+            out.append("<p>비교할 데이터가 없습니다.</p>")
+            continue
+        out.append("<table><tr>" + "".join(f"<th>{html.escape(h)}</th>" for h in header) + "</tr>")
+        out += ["<tr>" + "".join(f"<td>{html.escape(c)}</td>" for c in row) + "</tr>" for row in rows]
+        out.append("</table>")
+    if plots:
+        out.append(f"<h2>{len(sections) + 1}. 분포 (상자: 사분위, 굵은 선: 중앙값, 점: 회차)</h2>")
+        for heading, svg in plots.values():
+            out += [f"<h3>{html.escape(heading)}</h3>", svg]
+    out.append("</body></html>")
+    return "\n".join(out)
+
+
+def write_report(path, store, baseline=None, current=None, target=TARGET_APP, warmup=None, corrected=False):
+    """
+    비교 리포트 저장 -> path (.html 이면 HTML, 그 밖은 Markdown + <이름>_plots/*.svg)
+
+    baseline 이 없으면 앱 간 비교만
+    corrected: 감지 비용 보정값으로 비교 (load_samples)
+    """
+    warmup = stats.warmup_count() if warmup is None else warmup
+    baseline_label = baseline or "기준"
+    current_label = current or "전체"
+    current_samples = load_samples(store, current, warmup, corrected)
+    baseline_samples = load_samples(store, baseline, warmup, corrected) if baseline else {}
+    yoy = year_over_year(baseline_samples, current_samples, baseline_label, current_label) if baseline else None
+    cross = cross_app(current_samples, target)
+    sections = build_sections(yoy, cross, baseline_label, current_label, target)
+
+    plots = {}
+    for platform, scenario in sorted({k[:2] for k in current_samples}):
+        series = plot_series(platform, scenario, baseline_samples, current_samples, baseline_label, current_label)
+        svg = distribution_svg(series)
+        if svg:
+            plots[f"{platform}_{scenario}"] = (f"{platform_label(platform)} / {scenario_label(scenario)}", svg)
+
+    title = "성능 비교 리포트"
+    meta = [
+        f"생성: {time.strftime('%Y-%m-%d %H:%M:%S')}",
+        f"기간: {baseline_label + ' → ' if baseline else ''}{current_label}, 대상 앱: {app_label(target)}",
+        f"판정: Mann-Whitney p < {ALPHA} 이고 평균 차이의 부트스트랩 95% 신뢰구간이 0 을 포함하지 않을 때만 악화 / 개선",
+        ("값: 감지 비용을 뺀 보정 소요 시간(초), 보정값이 없는 회차 / 실패 회차 제외" if corrected
+         else "값: 성공 회차 소요 시간(초), 실패 회차 제외") + (f", 실행마다 앞 {warmup}회 워밍업 제외" if warmup else ""),
+    ]
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if path.lower().endswith((".html", ".htm")):
+        content = render_html(title, meta, sections, plots)
+    else:
+        plot_dir = os.path.splitext(os.path.basename(path))[0] + "_plots"
+        os.makedirs(os.path.join(os.path.dirname(os.path.abspath(path)), plot_dir), exist_ok=True)
+        for name, (_, svg) in plots.items():
+            with open(os.path.join(os.path.dirname(os.path.abspath(path)), plot_dir, f"{name}.svg"), "w",
+                      encoding="utf-8") as f:
+                f.write(svg)
+        content = render_markdown(title, meta, sections, plots, plot_dir)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+    for heading, _, rows in sections:
+        flagged = [r for r in rows if r[1].split(" ", 1)[1] in ("악화", "느림")]
+        print(f"📋 {heading}: {len(rows)}건" + (f", 🔴 {len(flagged)}건" if flagged else ""))
+    return path
+
+
+# ---- [함수] 메인 ----
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="전년 대비 / 앱 간 비교 리포트")
+    parser.add_argument("--db", default=None, help="SQLite 파일 (기본: results/results.sqlite3)")
+    parser.add_argument("--import", dest="imports", nargs="*", default=[],
+                        help="비교 전에 적재할 기존 CSV 파일 / 폴더 (예: AOS iOS)")
+    parser.add_argument("--baseline", default=None, help="기준 기간 (예: 2024). 생략하면 앱 간 비교만")
+    parser.add_argument("--current", default=None, help="현재 기간 (예: 2025, 기본: 전체)")
+    parser.add_argument("--target", default=TARGET_APP, help="대상 앱 키 (기본: work24)")
+    parser.add_argument("--warmup", type=int, default=None, help="실행마다 제외할 앞쪽 회차 수 (기본: WARMUP 환경 변수)")
+    parser.add_argument("--corrected", action="store_true",
+                        help="감지 비용 보정값으로 비교 (common.calibration, 보정값이 없는 회차 제외)")
+    parser.add_argument("--out", default=os.path.join("results", "compare.md"), help="리포트 (.md / .html)")
+    args = parser.parse_args(argv)
+
+    with ResultStore(args.db) as store:
+        if args.imports:
+            import_paths(store, args.imports, verbose=False)
+        path = write_report(args.out, store, args.baseline, args.current, args.target, args.warmup,
+                            args.corrected)
+    print(f"✅ 리포트 저장: {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
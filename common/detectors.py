@@ -0,0 +1,508 @@
+"""
+완료 감지기(Detector)
+
+스크립트마다 따로 돌던 `while True: driver.find_elements(...)` 루프와 이미지 매칭 루프를
+'한 번 확인(poll)'하는 감지기 객체로 통일한다.
+폴링 주기 / 타임아웃 / 시각 기록은 common.waiter.wait_until 한 곳에서 담당한다.
+
+    detector = uiautomator(driver, 'new UiSelector().text("전체메뉴")')
+    detector = ios_predicate(driver, "type == 'XCUIElementTypeStaticText' AND name == '검색 결과'")
+    detector = ios_class_chain(driver, '**/XCUIElementTypeButton[`name == "로그인"`]')
+    detector = ImageDetector(frames, matcher)
+    detector = visual_stable(frames, settle=1.0)                       # 기준 이미지 없이 화면 변화가 멈추면 완료
+    detector = AnyOf(uiautomator(...), ImageDetector(...))   # 하나라도 감지되면 완료
+    detector = AllOf(uiautomator(...), uiautomator(...))     # 모두 감지되어야 완료
+    detector = snapshot(driver, done=[(ANDROID_UIAUTOMATOR, '...')],   # page_source 1회로 완료 / 오류 / 팝업 판정
+                        fail={"오류 팝업": ("id", "android:id/message")})
+
+poll() 의 반환값
+    Detection  : 이번 확인 결과 (found, observed_at, detail)
+    None       : 새로 확인할 화면이 없음 (예: MJPEG 새 프레임 없음, 시작 이전 프레임)
+"""
+
+import time
+from collections import namedtuple
+
+
+# AppiumBy 와 같은 값 (common 은 appium 없이도 import 가능하도록 문자열로 둠)
+ANDROID_UIAUTOMATOR = "-android uiautomator"
+IOS_PREDICATE = "-ios predicate string"
+IOS_CLASS_CHAIN = "-ios class chain"
+ACCESSIBILITY_ID = "accessibility id"
+
+# found: 감지 여부
+# observed_at: 화면 상태를 확인한 시각 (epoch 초)
+# detail: 감지기별 부가 정보 (요소 목록 / 일치율 등)
+Detection = namedtuple("Detection", ["found", "observed_at", "detail"])
+
+
+class Detector:
+    """
+    감지기 공통 인터페이스
+
+    blocking: poll() 이 스스로 새 화면을 기다리는 방식인지 (True 면 대기 엔진이 sleep 하지 않음)
+    """
+
+    name = "detector"
+    blocking = False
+
+    def reset(self, start_time):
+        """측정 시작 시 호출 (start_time 이전 화면은 판정에서 제외)"""
+        self.start_time = start_time
+
+    def poll(self):
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.name}>"
+
+
+# ---- [감지기] UI 요소 ----
+class ElementDetector(Detector):
+    """
+    find_elements 1회 호출로 요소 존재 여부 확인
+
+    find_elements 는 요소가 없으면 예외 없이 빈 리스트를 돌려주므로 try/except 오버헤드가 없다.
+    observed_at 은 응답을 받은 시각 (기존 Raw Loop 의 end_time 과 같은 기준)
+    """
+
+    def __init__(self, driver, by, value, name=None):
+        self.driver = driver
+        self.by = by
+        self.value = value
+        self.name = name or value
+        self.start_time = None
+
+    def poll(self):
+        elements = self.driver.find_elements(self.by, self.value)
+        return Detection(bool(elements), time.time(), elements)
+
+
+def uiautomator(driver, selector, name=None):
+    """Android UiSelector 감지기"""
+    return ElementDetector(driver, ANDROID_UIAUTOMATOR, selector, name)
+
+
+def ios_predicate(driver, predicate, name=None):
+    """iOS NSPredicate 감지기"""
+    return ElementDetector(driver, IOS_PREDICATE, predicate, name)
+
+
+def ios_class_chain(driver, chain, name=None):
+    """iOS Class Chain 감지기"""
+    return ElementDetector(driver, IOS_CLASS_CHAIN, chain, name)
+
+
+def accessibility_id(driver, value, name=None):
+    """접근성 ID 감지기"""
+    return ElementDetector(driver, ACCESSIBILITY_ID, value, name)
+
+
+# ---- [감지기] 화면 안정 / 앱 상태 ----
+# query_app_state 반환값
+APP_NOT_RUNNING = 1
+APP_RUNNING_FOREGROUND = 4
+
+
+class PageSourceStable(Detector):
+    """
+    page_source 가 quiet 초 동안 바뀌지 않으면 감지 (스크롤 / 화면 전환이 끝났다는 idle 신호)
+
+    기다릴 요소를 특정하기 어려운 좌표 탭 / 스와이프 뒤의 고정 sleep 대용
+    observed_at 은 변화가 멈춘 뒤 같은 화면을 다시 확인한 시각
+    """
+
+    def __init__(self, driver, quiet=0.3, name=None):
+        self.driver = driver
+        self.quiet = quiet
+        self.name = name or "page_source 안정"
+        self.start_time = None
+        self._last = None
+        self._since = None
+
+    def reset(self, start_time):
+        self.start_time = start_time
+        self._last = None
+        self._since = None
+
+    def poll(self):
+        digest = hash(self.driver.page_source)
+        now = time.time()
+        if digest != self._last:
+            self._last = digest
+            self._since = now
+            return Detection(False, now, None)
+        return Detection(now - self._since >= self.quiet, now, None)
+
+
+class AppStateDetector(Detector):
+    """query_app_state 가 state 가 되면 감지 (예: terminate 후 프로세스 종료 확인)"""
+
+    def __init__(self, driver, app_id, state, name=None):
+        self.driver = driver
+        self.app_id = app_id
+        self.state = state
+        self.name = name or f"{app_id} 상태 {state}"
+        self.start_time = None
+
+    def poll(self):
+        current = self.driver.query_app_state(self.app_id)
+        return Detection(current == self.state, time.time(), current)
+
+
+def page_source_stable(driver, quiet=0.3, name=None):
+    """화면 변화가 quiet 초 동안 없으면 감지"""
+    return PageSourceStable(driver, quiet, name)
+
+
+def app_state(driver, app_id, state=APP_NOT_RUNNING, name=None):
+    """앱 상태 감지기 (기본: 실행 중 아님)"""
+    return AppStateDetector(driver, app_id, state, name)
+
+
+# ---- [감지기] page_source 스냅샷 ----
+# 판정 우선순위 (오류 팝업이 완료 화면 위에 뜨는 경우가 있어 실패가 먼저)
+OUTCOMES = ("fail", "done", "popup")
+
+# outcome: "fail" / "done" / "popup" / None(아직 로딩 중)
+# fired: {"done" / "fail" / "popup": {이름: [Element]}} (감지된 로케이터만)
+# root: 스냅샷 루트 Element (common.page_source.rect / text 로 좌표 / 문구 확인)
+Snapshot = namedtuple("Snapshot", ["outcome", "fired", "root"])
+
+
+def _named_locators(locators):
+    """{이름: (by, value)} 또는 [(by, value), ...] -> [(이름, by, value)]"""
+    if not locators:
+        return []
+    if isinstance(locators, dict):
+        return [(name, by, value) for name, (by, value) in locators.items()]
+    return [(value, by, value) for by, value in locators]
+
+
+class SnapshotDetector(Detector):
+    """
+    page_source 1회 왕복으로 등록한 로케이터 전부를 호스트에서 평가 (common.source_index 속성 색인)
+
+    완료(done) / 실패(fail) / 팝업(popup) 로케이터를 감지기 1개에 등록해 두면
+    폴링마다 로케이터 수만큼 find_elements 를 보내는 대신 page_source 1회로
+    "완료 / 오류 팝업 / 아직 로딩 중" 을 한 번에 판정한다.
+
+    stop_on: 감지로 볼 판정 (기본: 완료 또는 실패 -> 실패 팝업이 뜨면 타임아웃까지 기다리지 않음)
+    json_source: iOS 에서 XML 변환 없이 `mobile: source` JSON 으로 받음 (WDA 응답을 그대로 파싱)
+    observed_at 은 page_source 응답 시각 (ElementDetector 와 같은 기준), detail 은 Snapshot
+    로케이터 해석은 common.page_source 지원 범위 (해석할 수 없으면 생성할 때 SelectorError)
+    """
+
+    def __init__(self, driver, done=None, fail=None, popup=None, stop_on=("done", "fail"), name=None,
+                 json_source=False):
+        from common import page_source, source_index
+
+        self.driver = driver
+        self.groups = {"done": _named_locators(done), "fail": _named_locators(fail), "popup": _named_locators(popup)}
+        if not any(self.groups.values()):
+            raise ValueError("로케이터가 최소 1개 필요합니다")
+        for locators in self.groups.values():
+            for _, by, value in locators:
+                page_source.compile_locator(by, value)
+        self.stop_on = tuple(stop_on)
+        self.name = name or " | ".join(n for n, _, _ in self.groups["done"] or self.groups["fail"] or self.groups["popup"])
+        self.json_source = json_source
+        self.start_time = None
+        self._source_index = source_index
+
+    def evaluate(self, source):
+        """page_source (XML 문자열 / XCUITest JSON) -> Snapshot (드라이버 없이 녹화된 화면에도 사용)"""
+        index = self._source_index.SourceIndex.from_source(source)
+        keys = [(group, name) for group, locators in self.groups.items() for name, _, _ in locators]
+        found = index.find_many([(by, value) for locators in self.groups.values() for _, by, value in locators])
+        fired = {}
+        for (group, name), elements in zip(keys, found):
+            if elements:
+                fired.setdefault(group, {})[name] = elements
+        outcome = next((o for o in OUTCOMES if o in fired), None)
+        return Snapshot(outcome, fired, index.root)
+
+    def poll(self):
+        if self.json_source:
+            source = self.driver.execute_script("mobile: source", {"format": "json"})
+        else:
+            source = self.driver.page_source
+        observed_at = time.time()
+        snapshot = self.evaluate(source)
+        return Detection(snapshot.outcome in self.stop_on, observed_at, snapshot)
+
+
+def snapshot(driver, done=None, fail=None, popup=None, stop_on=("done", "fail"), name=None, json_source=False):
+    """page_source 스냅샷 감지기 (완료 / 실패 / 팝업 로케이터를 한 번에 평가)"""
+    return SnapshotDetector(driver, done, fail, popup, stop_on, name, json_source)
+
+
+# ---- [감지기] 이미지 ----
+class _FrameDetector(Detector):
+    """프레임 공급원(common.frame_source)의 새 프레임을 하나씩 확인하는 감지기 공통부"""
+
+    def __init__(self, frames, frame_timeout=1.0, name=None):
+        self.frames = frames
+        self.frame_timeout = frame_timeout
+        self.name = name
+        self.start_time = None
+        self.last_seq = 0
+
+    @property
+    def blocking(self):
+        # MJPEG 는 next_frame 이 새 프레임을 기다려 주므로 따로 쉴 필요가 없음
+        return self.frames.kind != "screenshot"
+
+    def reset(self, start_time):
+        self.start_time = start_time
+        self.last_seq = self.frames.current_seq()
+
+    def _fetch(self):
+        """새 프레임 1장 (timeout 안에 없으면 None)"""
+        try:
+            frame = self.frames.next_frame(after_seq=self.last_seq, timeout=self.frame_timeout)
+        except TimeoutError:
+            return None
+        self.last_seq = frame.seq
+        return frame
+
+    def _early(self, frame):
+        """클릭 이전에 찍힌 프레임인지"""
+        return self.start_time is not None and frame.captured_at < self.start_time
+
+
+class ImageDetector(_FrameDetector):
+    """
+    프레임 공급원(common.frame_source)의 새 프레임을 ROI 매처로 비교
+
+    observed_at 은 프레임 캡처 시각, detail 은 일치율
+    """
+
+    def __init__(self, frames, matcher, frame_timeout=1.0, name=None):
+        super().__init__(frames, frame_timeout, name or matcher.template_path)
+        self.matcher = matcher
+        self.score = 0.0
+
+    def reset(self, start_time):
+        super().reset(start_time)
+        self.score = 0.0
+
+    def poll(self):
+        frame = self._fetch()
+        # 클릭 이전에 찍힌 프레임은 판정에서 제외
+        if frame is None or self._early(frame):
+            return None
+
+        self.score = self.matcher.score(frame.image)
+        return Detection(self.score >= self.matcher.threshold, frame.captured_at, self.score)
+
+
+# distance: 기준 프레임과의 평균 절대 차이 (0~255, common.visual)
+# changes: start_time 이후 화면 변화 횟수
+# first_change: 처음 바뀐 프레임의 캡처 시각 (없으면 None, "첫 화면 변화" 시작 표시)
+# stable_since: 지금 화면 상태가 시작된 프레임의 캡처 시각
+# frames: 비교한 프레임 수
+VisualState = namedtuple("VisualState", ["distance", "changes", "first_change", "stable_since", "frames"])
+
+
+class VisualChange(_FrameDetector):
+    """
+    기준 프레임(클릭 직전 / 직후 첫 프레임)과 ROI 가 달라지면 감지 (첫 화면 변화 = 시작 표시)
+
+    observed_at 은 처음 달라진 프레임의 캡처 시각, detail 은 VisualState
+    """
+
+    def __init__(self, frames, diff, frame_timeout=1.0, name=None):
+        super().__init__(frames, frame_timeout, name or "첫 화면 변화")
+        self.diff = diff
+        self._base = None
+        self._count = 0
+
+    def reset(self, start_time):
+        super().reset(start_time)
+        self._base = None
+        self._count = 0
+
+    def poll(self):
+        frame = self._fetch()
+        if frame is None:
+            return None
+        signature = self.diff.signature(frame.image)
+        self._count += 1
+        if self._base is None:
+            # 클릭 이전 프레임도 기준으로는 사용 (판정은 하지 않음)
+            self._base = signature
+            if self._early(frame):
+                return None
+            return Detection(False, frame.captured_at, VisualState(0.0, 0, None, frame.captured_at, self._count))
+        if self._early(frame):
+            self._base = signature
+            return None
+        changed, distance = self.diff.compare(self._base, signature)
+        first = frame.captured_at if changed else None
+        state = VisualState(distance, int(changed), first, first, self._count)
+        return Detection(changed, frame.captured_at, state)
+
+
+class VisualStable(_FrameDetector):
+    """
+    ROI 가 settle 초 이상(최소 min_frames 장) 바뀌지 않으면 감지 (기준 이미지 없는 완료 판정)
+
+    연속 프레임을 지금 화면 상태의 첫 프레임(기준)과 비교하고, 달라지면 그 프레임이 새 기준이 된다.
+    완료 시각(observed_at)은 안정을 확인한 시각이 아니라 마지막 변화 후 첫 프레임의 캡처 시각이고,
+    미감지일 때 observed_at 은 그 직전 프레임의 캡처 시각이라
+    대기 결과의 prev_time ~ end_time 이 마지막 화면 변화가 일어난 구간이 된다.
+    (settle 을 늘려도 대기 시간만 길어지고 측정값은 그대로)
+
+    require_change: start_time 이후 화면이 한 번도 바뀌지 않았으면 안정으로 보지 않음 (탭 직후 아직 반응 전)
+    settle 은 스플래시처럼 중간에 멈춰 있는 화면보다 길게 잡아야 한다.
+    detail 은 VisualState (first_change 는 첫 화면 변화 시각)
+    """
+
+    def __init__(self, frames, diff, settle=1.0, min_frames=3, require_change=True, frame_timeout=1.0,
+                 name=None):
+        super().__init__(frames, frame_timeout, name or "화면 안정")
+        self.diff = diff
+        self.settle = settle
+        self.min_frames = min_frames
+        self.require_change = require_change
+        self._clear(None)
+
+    def reset(self, start_time):
+        super().reset(start_time)
+        self._clear(start_time)
+
+    def _clear(self, start_time):
+        self._anchor = None
+        self._since = None
+        self._run = 0
+        self._before = start_time
+        self._last = None
+        self._changes = 0
+        self._first_change = None
+        self._count = 0
+
+    def poll(self):
+        frame = self._fetch()
+        if frame is None:
+            return None
+        signature = self.diff.signature(frame.image)
+        captured_at = frame.captured_at
+        self._count += 1
+        distance = 0.0
+        if self._anchor is None:
+            self._anchor, self._since, self._run = signature, captured_at, 1
+        else:
+            changed, distance = self.diff.compare(self._anchor, signature)
+            if changed and not self._early(frame):
+                self._changes += 1
+                if self._first_change is None:
+                    self._first_change = captured_at
+                self._before = self._last
+                self._anchor, self._since, self._run = signature, captured_at, 1
+            elif changed:
+                # 클릭 이전 화면끼리의 변화는 기준만 갱신
+                self._anchor, self._since, self._run = signature, captured_at, 1
+            else:
+                self._run += 1
+        self._last = captured_at
+        if self._early(frame):
+            return None
+
+        start = self.start_time if self.start_time is not None else self._since
+        since = max(self._since, start)
+        state = VisualState(distance, self._changes, self._first_change, since, self._count)
+        stable = (
+            (self._changes or not self.require_change)
+            and self._run >= self.min_frames
+            and captured_at - since >= self.settle
+        )
+        if stable:
+            return Detection(True, since, state)
+        return Detection(False, max(self._before if self._before is not None else start, start), state)
+
+
+def visual_change(frames, roi=None, name=None, **options):
+    """첫 화면 변화 감지기 (options: common.visual.VisualDiff 인자 width / mad_threshold / hash_distance)"""
+    from common.visual import VisualDiff
+
+    return VisualChange(frames, VisualDiff(roi, **options), name=name)
+
+
+def visual_stable(frames, roi=None, settle=1.0, min_frames=3, name=None, **options):
+    """화면 안정 감지기 (options: common.visual.VisualDiff 인자 width / mad_threshold / hash_distance)"""
+    from common.visual import VisualDiff
+
+    return VisualStable(frames, VisualDiff(roi, **options), settle, min_frames, name=name)
+
+
+# ---- [감지기] 조합 ----
+class _Composite(Detector):
+    def __init__(self, *detectors, name=None):
+        if not detectors:
+            raise ValueError("감지기가 최소 1개 필요합니다")
+        self.detectors = list(detectors)
+        self.name = name or f" {self.joiner} ".join(d.name for d in self.detectors)
+        self.start_time = None
+
+    @property
+    def blocking(self):
+        return any(d.blocking for d in self.detectors)
+
+    def reset(self, start_time):
+        self.start_time = start_time
+        for d in self.detectors:
+            d.reset(start_time)
+
+
+class AnyOf(_Composite):
+    """하나라도 감지되면 완료 (OR). observed_at 은 감지된 것 중 가장 이른 시각"""
+
+    joiner = "OR"
+
+    def poll(self):
+        results = [d.poll() for d in self.detectors]
+        seen = [r for r in results if r is not None]
+        if not seen:
+            return None
+        found = [r for r in seen if r.found]
+        if found:
+            return Detection(True, min(r.observed_at for r in found), results)
+        return Detection(False, max(r.observed_at for r in seen), results)
+
+
+class AllOf(_Composite):
+    """
+    모두 감지되어야 완료 (AND)
+
+    각 감지기가 한 번이라도 감지한 시각을 기억해 두고, 마지막 조건이 충족된 시각을 완료 시각으로 사용
+    """
+
+    joiner = "AND"
+
+    def __init__(self, *detectors, name=None):
+        super().__init__(*detectors, name=name)
+        self._found_at = [None] * len(self.detectors)
+
+    def reset(self, start_time):
+        super().reset(start_time)
+        self._found_at = [None] * len(self.detectors)
+
+    def poll(self):
+        results = []
+        for idx, d in enumerate(self.detectors):
+            # 이미 감지된 조건은 다시 묻지 않음 (왕복 비용 절약)
+            if self._found_at[idx] is not None:
+                results.append(None)
+                continue
+            r = d.poll()
+            results.append(r)
+            if r is not None and r.found:
+                self._found_at[idx] = r.observed_at
+
+        seen = [r for r in results if r is not None]
+        if all(t is not None for t in self._found_at):
+            return Detection(True, max(self._found_at), results)
+        if not seen:
+            return None
+        return Detection(False, max(r.observed_at for r in seen), results)
@@ -0,0 +1,179 @@
+"""
+기기 / 포트 설정 (환경 변수)
+
+각 측정 스크립트는 단독 실행 시 파일 안의 기본값(127.0.0.1:4723, REPEAT_COUNT=10 ...)을 그대로 쓰고,
+병렬 러너(common.runner)로 실행될 때만 아래 환경 변수로 기기 / 포트 / 반복 횟수 / 저장 위치를 넘겨받는다.
+
+    APPIUM_SERVER_URL   Appium 서버 주소
+    DEVICE_UDID         기기 UDID (AOS: adb 시리얼)
+    DEVICE_LABEL        결과에 남길 기기 이름
+    REPEAT_COUNT        반복 횟수
+    RESULT_DIR          CSV 저장 폴더
+    SYSTEM_PORT         UiAutomator2 systemPort (AOS 병렬 실행 시 기기마다 달라야 함)
+    WDA_LOCAL_PORT      WebDriverAgent 로컬 포트 (iOS)
+    MJPEG_SERVER_PORT   MJPEG 스트림 포트 (mjpegServerPort, 기본 iOS WDA 9100 / AOS UiAutomator2 7810 -> common.frame_source)
+    RESUME              0 이면 중단된 이전 실행을 이어서 하지 않고 새로 시작 (기본 1)
+    WARMUP              통계에서 제외할 앞쪽 워밍업 회차 수 (기본 0, common.stats)
+    CI_TARGET           적응형 반복: 신뢰구간 반폭 목표 (0.05 = 초, 3% = 추정값 대비). 없으면 REPEAT_COUNT 고정
+    CI_METRIC           적응형 반복: 수렴 기준 통계 (mean / p90, 기본 mean)
+    MIN_REPEAT          적응형 반복: 수렴 판정을 시작할 최소 성공 회차 수 (기본 5)
+    MAX_REPEAT          적응형 반복: 최대 회차 (기본 반복 횟수의 3배)
+    PROFILE             드라이버 명령 계측 (1 = results/profiles, 또는 저장 폴더, common.profiler)
+    CALIBRATE           감지 비용 보정 (1 = 새로 측정, 0 = 끔, 없으면 저장된 보정값만 사용, common.calibration)
+    VISUAL_STABLE       1 이면 iOS 이미지 매칭 스크립트가 기준 이미지 대신 화면 안정(픽셀 변화 멈춤)으로 완료 판정 (common.visual)
+    VISUAL_TIMELINE     1 이면 회차마다 시각적 완성도(첫 변화 / Speed Index / 85% / 마지막 변화) 기록 (common.speed_index)
+    SNAPSHOT_DETECT     1 이면 AOS 로그인 스크립트가 find_elements 대신 page_source 1회로 완료 / 로그인 오류 팝업 판정 (common.detectors)
+    DENSE_POLL          1 이면 측정 대기도 예상 완료 구간 전부터 쉬지 않고 확인 (기본: 구간 전에는 드문드문, common.scheduler)
+    MULTI_SCALE         1 이면 iOS 이미지 매칭이 기기 배율(DPR)에 맞춰 여러 배율로 기준 이미지를 찾음 (common.image_match)
+"""
+
+import os
+
+
+ENV_SERVER_URL = "APPIUM_SERVER_URL"
+ENV_UDID = "DEVICE_UDID"
+ENV_LABEL = "DEVICE_LABEL"
+ENV_REPEAT = "REPEAT_COUNT"
+ENV_RESULT_DIR = "RESULT_DIR"
+ENV_SYSTEM_PORT = "SYSTEM_PORT"
+ENV_WDA_PORT = "WDA_LOCAL_PORT"
+ENV_MJPEG_PORT = "MJPEG_SERVER_PORT"
+ENV_RESUME = "RESUME"
+ENV_WARMUP = "WARMUP"
+ENV_CI_TARGET = "CI_TARGET"
+ENV_CI_METRIC = "CI_METRIC"
+ENV_MIN_REPEAT = "MIN_REPEAT"
+ENV_MAX_REPEAT = "MAX_REPEAT"
+ENV_PROFILE = "PROFILE"
+ENV_CALIBRATE = "CALIBRATE"
+ENV_VISUAL_STABLE = "VISUAL_STABLE"
+ENV_VISUAL_TIMELINE = "VISUAL_TIMELINE"
+ENV_MULTI_SCALE = "MULTI_SCALE"
+ENV_SNAPSHOT_DETECT = "SNAPSHOT_DETECT"
+ENV_DENSE_POLL = "DENSE_POLL"
+
+# 환경 변수 -> Appium capability
+# 플랫폼별 MJPEG 스트림 기본 포트 (iOS: WDA 가 항상 띄움, AOS: mjpegServerPort capability 를 줘야 포워딩)
+MJPEG_DEFAULT_PORTS = {"ios": 9100, "android": 7810}
+
+_PORT_CAPS = {
+    ENV_SYSTEM_PORT: "systemPort",
+    ENV_WDA_PORT: "wdaLocalPort",
+    ENV_MJPEG_PORT: "mjpegServerPort",
+}
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def server_url(default="http://127.0.0.1:4723"):
+    return os.environ.get(ENV_SERVER_URL) or default
+
+
+def repeat_count(default):
+    return _env_int(ENV_REPEAT, default)
+
+
+def udid(default=None):
+    return os.environ.get(ENV_UDID) or default
+
+
+def device_label(default=""):
+    return os.environ.get(ENV_LABEL) or default
+
+
+def mjpeg_port(platform="ios"):
+    return _env_int(ENV_MJPEG_PORT, MJPEG_DEFAULT_PORTS[platform])
+
+
+def resume_enabled():
+    return os.environ.get(ENV_RESUME, "1").strip().lower() not in ("0", "false", "no")
+
+
+def warmup_count(default=0):
+    return _env_int(ENV_WARMUP, default)
+
+
+def ci_target(default=None):
+    return os.environ.get(ENV_CI_TARGET) or default
+
+
+def ci_metric(default="mean"):
+    return os.environ.get(ENV_CI_METRIC) or default
+
+
+def min_repeat(default):
+    return _env_int(ENV_MIN_REPEAT, default)
+
+
+def max_repeat(default):
+    return _env_int(ENV_MAX_REPEAT, default)
+
+
+def profile_target(default=None):
+    return os.environ.get(ENV_PROFILE) or default
+
+
+def calibrate_mode():
+    """CALIBRATE 환경 변수 -> "measure"(새로 측정) / "off"(끔) / "stored"(저장된 보정값만)"""
+    value = os.environ.get(ENV_CALIBRATE, "").strip().lower()
+    if not value:
+        return "stored"
+    return "off" if value in ("0", "false", "no") else "measure"
+
+
+def visual_stable():
+    return os.environ.get(ENV_VISUAL_STABLE, "").strip().lower() in ("1", "true", "yes")
+
+
+def visual_timeline():
+    return os.environ.get(ENV_VISUAL_TIMELINE, "").strip().lower() in ("1", "true", "yes")
+
+
+def multi_scale():
+    return os.environ.get(ENV_MULTI_SCALE, "").strip().lower() in ("1", "true", "yes")
+
+
+def snapshot_detect():
+    return os.environ.get(ENV_SNAPSHOT_DETECT, "").strip().lower() in ("1", "true", "yes")
+
+
+def dense_poll():
+    return os.environ.get(ENV_DENSE_POLL, "").strip().lower() in ("1", "true", "yes")
+
+
+def result_path(path):
+    """스크립트가 정한 CSV 경로 -> RESULT_DIR 이 있으면 그 폴더 아래 같은 파일명으로"""
+    result_dir = os.environ.get(ENV_RESULT_DIR)
+    if not result_dir:
+        return path
+    os.makedirs(result_dir, exist_ok=True)
+    return os.path.join(result_dir, os.path.basename(path))
+
+
+def _is_android(options):
+    caps = options.to_capabilities()
+    return (str(caps.get("platformName", "")).lower() == "android"
+            or str(caps.get("appium:automationName", "")).lower() == "uiautomator2")
+
+
+def apply_capabilities(options):
+    """
+    러너가 넘겨준 UDID / 포트를 capability 에 반영 (단독 실행 시에는 아무것도 바꾸지 않음)
+
+    AOS 의 mjpegServerPort 는 VISUAL_TIMELINE=1 일 때만 켠다 (MJPEG_SERVER_PORT, 없으면 7810).
+    UiAutomator2 는 이 capability 가 있어야 화면 스트림을 띄우고 포워딩한다.
+    """
+    value = udid()
+    if value:
+        options.set_capability("udid", value)
+    android = _is_android(options)
+    for env, cap in _PORT_CAPS.items():
+        port = _env_int(env, None)
+        if port is not None and not (android and env == ENV_MJPEG_PORT):
+            options.set_capability(cap, port)
+    if android and visual_timeline():
+        options.set_capability("mjpegServerPort", mjpeg_port("android"))
+    return options
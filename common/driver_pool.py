@@ -0,0 +1,200 @@
+"""
+Appium 세션 풀 (기기당 warm 세션 1개)
+
+UiAutomator2 / WDA 세션 생성은 회당 5~20초가 걸리고 가끔 wdaLaunchTimeout 으로 실패한다.
+앱마다 webdriver.Remote 를 새로 만들고 quit 하는 대신, 기기당 세션 하나를 살려 두고
+대상 앱은 terminate_app / activate_app 과 설정(update_settings) 변경으로만 바꾼다.
+
+세션을 꺼낼 때마다 가벼운 명령으로 상태를 확인하고, 응답이 없거나
+사용 횟수 / 수명 한도를 넘긴 세션은 버리고 새로 만든다.
+
+    driver = pool.acquire("android", settings={"waitForIdleTimeout": 0})
+    pool.switch_app(driver, "kr.or.keis.mo")
+    ...
+    pool.close()
+"""
+
+import threading
+import time
+
+from appium import webdriver
+from appium.options.android import UiAutomator2Options
+from appium.options.ios import XCUITestOptions
+
+from common import device_env, profiler
+
+
+# 스크립트들이 공통으로 쓰던 속도 최적화 설정
+ANDROID_SETTINGS = {"waitForIdleTimeout": 0, "ignoreUnimportantViews": True}
+IOS_SETTINGS = {"waitForIdleTimeout": 0}
+
+
+def android_options(device_name="Android"):
+    """앱을 지정하지 않은 UiAutomator2 세션 옵션 (앱은 activate_app 으로 전환)"""
+    options = UiAutomator2Options()
+    options.device_name = device_name
+    options.automation_name = "UiAutomator2"
+    options.no_reset = True
+    options.new_command_timeout = 300
+    options.set_capability("waitForIdleTimeout", 0)
+    options.set_capability("ignoreUnimportantViews", True)
+    return device_env.apply_capabilities(options)
+
+
+def ios_options(udid=None):
+    """앱을 지정하지 않은 XCUITest 세션 옵션"""
+    options = XCUITestOptions()
+    options.platform_name = "iOS"
+    options.automation_name = "XCUITest"
+    options.no_reset = True
+    options.new_command_timeout = 300
+    options.set_capability("waitForQuiescence", False)
+    options.set_capability("waitForIdleTimeout", 0)
+    if udid:
+        options.udid = udid
+    return device_env.apply_capabilities(options)
+
+
+class _Session:
+    def __init__(self, driver, platform):
+        self.driver = driver
+        self.platform = platform
+        self.created_at = time.time()
+        self.uses = 0
+        self.current_app = None
+        self.settings = {}
+
+
+class DriverPool:
+    """
+    server_url: Appium 서버 (기본: APPIUM_SERVER_URL 환경 변수 또는 127.0.0.1:4723)
+    max_uses: 이 횟수만큼 꺼내 쓴 세션은 새로 만듦
+    max_age: 세션 최대 수명(초)
+    create_retries: 세션 생성 실패(wdaLaunchTimeout 등) 시 재시도 횟수
+    """
+
+    def __init__(self, server_url=None, max_uses=200, max_age=3600, create_retries=2):
+        self.server_url = server_url
+        self.max_uses = max_uses
+        self.max_age = max_age
+        self.create_retries = create_retries
+        self._lock = threading.Lock()
+        self._sessions = {}
+
+    def _url(self):
+        return self.server_url or device_env.server_url()
+
+    def _key(self, platform):
+        return (self._url(), platform, device_env.udid(""))
+
+    def _create(self, platform, options):
+        last_error = None
+        for attempt in range(1, self.create_retries + 2):
+            started = time.time()
+            try:
+                driver = profiler.instrument(webdriver.Remote(self._url(), options=options))
+                print(f"   🔌 새 세션 생성 ({platform}, {time.time() - started:.1f}초)")
+                return _Session(driver, platform)
+            except Exception as e:
+                last_error = e
+                print(f"   ⚠️ 세션 생성 실패 ({attempt}회차): {e}")
+                time.sleep(2)
+        raise RuntimeError(f"세션을 만들 수 없습니다: {last_error}")
+
+    @staticmethod
+    def healthy(driver):
+        """가벼운 명령 1회로 세션이 살아 있는지 확인"""
+        try:
+            driver.get_window_size()
+            return True
+        except Exception:
+            return False
+
+    def _expired(self, session):
+        return session.uses >= self.max_uses or time.time() - session.created_at > self.max_age
+
+    def _quit(self, session):
+        try:
+            session.driver.quit()
+        except Exception:
+            pass
+
+    def acquire(self, platform, options=None, settings=None):
+        """
+        기기의 warm 세션 -> driver
+
+        platform: "android" / "ios"
+        options: 새로 만들 때 쓸 옵션 (기본: android_options() / ios_options())
+        settings: update_settings 로 반영할 설정 (바뀐 값만 전송)
+        """
+        key = self._key(platform)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is not None and (self._expired(session) or not self.healthy(session.driver)):
+                reason = "사용 한도 초과" if self._expired(session) else "응답 없음"
+                print(f"   ♻️ 세션 교체 ({reason})")
+                self._quit(session)
+                session = None
+            if session is None:
+                if options is None:
+                    options = android_options() if platform == "android" else ios_options(device_env.udid())
+                session = self._create(platform, options)
+                self._sessions[key] = session
+
+            defaults = ANDROID_SETTINGS if platform == "android" else IOS_SETTINGS
+            wanted = dict(defaults, **(settings or {}))
+            changed = {k: v for k, v in wanted.items() if session.settings.get(k) != v}
+            if changed:
+                session.driver.update_settings(changed)
+                session.settings.update(changed)
+
+            session.uses += 1
+            return session.driver
+
+    def _session_of(self, driver):
+        for session in self._sessions.values():
+            if session.driver is driver:
+                return session
+        return None
+
+    def switch_app(self, driver, app_id, terminate_previous=True, restart=False):
+        """
+        대상 앱 전환 (새 세션 없이)
+
+        terminate_previous: 직전에 쓰던 다른 앱을 종료
+        restart: 대상 앱을 종료 후 다시 실행 (Cold Start)
+        """
+        session = self._session_of(driver)
+        previous = session.current_app if session else None
+        if terminate_previous and previous and previous != app_id:
+            try:
+                driver.terminate_app(previous)
+            except Exception:
+                pass
+        if restart:
+            try:
+                driver.terminate_app(app_id)
+            except Exception:
+                pass
+        driver.activate_app(app_id)
+        if session:
+            session.current_app = app_id
+        return driver
+
+    def recycle(self, driver):
+        """세션을 강제로 버림 (다음 acquire 때 새로 생성)"""
+        with self._lock:
+            for key, session in list(self._sessions.items()):
+                if session.driver is driver:
+                    self._quit(session)
+                    del self._sessions[key]
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                self._quit(session)
+            self._sessions.clear()
+
+
+# 프로세스 전역 기본 풀
+pool = DriverPool()
@@ -0,0 +1,312 @@
+"""
+화면 프레임 공급원 (MJPEG 스트림 / 스크린샷)
+
+iOS(WDA)는 MJPEG 화면 스트림(기본 포트 9100)을 제공하고,
+AOS(UiAutomator2)는 mjpegServerPort capability(기본 7810, common.device_env.apply_capabilities)를 줘야 스트림을 포워딩한다.
+폴링마다 `get_screenshot_as_base64()` 로 전체 PNG 를 HTTP 로 받아오는 대신,
+백그라운드 스레드가 스트림을 계속 읽고 디코딩해 두고
+매처는 항상 '가장 최근 프레임'만 보도록 한다.
+스트림에 연결할 수 없으면 기존 스크린샷 방식으로 자동 대체한다.
+
+모든 프레임에는 캡처 시각(captured_at, time.time() 기준)이 붙는다.
+완료 시각은 '매칭이 끝난 시각'이 아니라 '처음 일치한 프레임의 캡처 시각'으로 잡고,
+바로 앞의 불일치 프레임 캡처 시각을 함께 남겨 실제 완료 시점의 구간을 표시한다.
+    직전 불일치 프레임 < 실제 완료 시점 <= 첫 일치 프레임
+
+사용 예)
+    frames = open_frame_source(driver)
+    result = wait_for_match(frames, matcher, start_time, timeout=20)
+    if result.matched:
+        duration = result.end_time - start_time
+    frames.close()
+
+감지 비용 보정(common.calibration)이 필요하면 감지기를 직접 만들어 wait_for 로 기다린다.
+    detector = ImageDetector(frames, matcher)
+    result = wait_for(detector, start_time, timeout=20)
+    correction = calibrator.correct(detector, start_time, result)
+
+기준 이미지가 없는 화면은 wait_for_stable (ROI 픽셀 변화가 멈추면 완료, common.visual) 로 같은 MatchResult 를 받는다.
+"""
+
+import threading
+import time
+import urllib.request
+from collections import namedtuple
+
+from common import device_env
+from common.detectors import ImageDetector, visual_change, visual_stable
+from common.image_match import decode_screenshot
+from common.waiter import wait_until
+
+
+MJPEG_DEFAULT_PORT = device_env.MJPEG_DEFAULT_PORTS["ios"]
+
+# 결과 저장소 CSV 부가 컬럼 {헤더: record.add 의 extra 키} (직전 불일치 프레임까지의 시간)
+CSV_FIELDS = {"직전프레임(초)": "prev_duration"}
+
+# JPEG 시작/끝 마커 (multipart 헤더 형식에 의존하지 않고 프레임 경계를 찾음)
+JPEG_SOI = b"\xff\xd8"
+JPEG_EOI = b"\xff\xd9"
+
+# seq: 프레임 번호, image: BGR 배열, captured_at: 캡처 시각 추정치 (epoch 초)
+Frame = namedtuple("Frame", ["seq", "image", "captured_at"])
+
+# matched: 성공 여부, score: 마지막 일치율
+# end_time: 첫 일치 프레임 캡처 시각 (실패 시 None)
+# prev_time: 직전 불일치 프레임 캡처 시각 (없으면 start_time)
+# detected_at: 매칭 판정이 끝난 시각 (파이프라인 지연 확인용)
+# frame_count: 검사한 프레임 수
+# sample_rate: 초당 검사한 프레임 수 (Hz)
+MatchResult = namedtuple(
+    "MatchResult",
+    ["matched", "score", "end_time", "prev_time", "detected_at", "frame_count", "sample_rate"],
+)
+
+
+class ScreenshotFrameSource:
+    """폴링마다 스크린샷을 직접 찍는 방식 (대체 경로)"""
+
+    kind = "screenshot"
+
+    def __init__(self, driver):
+        self.driver = driver
+        self._seq = 0
+
+    def current_seq(self):
+        return self._seq
+
+    def next_frame(self, after_seq=None, timeout=None):
+        """
+        새 스크린샷 1장 -> Frame
+
+        화면은 요청~응답 사이 어딘가에서 캡처되므로 그 중간 시각을 캡처 시각으로 사용
+        """
+        requested_at = time.time()
+        png = self.driver.get_screenshot_as_png()
+        received_at = time.time()
+        image = decode_screenshot(png)
+        self._seq += 1
+        return Frame(self._seq, image, (requested_at + received_at) / 2)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class MjpegFrameSource:
+    """
+    MJPEG 스트림을 백그라운드 스레드로 읽어 최신 프레임만 보관
+
+    밀린 프레임은 디코딩하지 않고 버린다 (매처는 항상 최신 화면만 필요).
+    fallback: 스트림이 도중에 끊겼을 때 대신 사용할 프레임 공급원 (예: ScreenshotFrameSource)
+    """
+
+    def __init__(self, url, connect_timeout=3.0, chunk_size=16384, fallback=None):
+        self.url = url
+        self.connect_timeout = connect_timeout
+        self.chunk_size = chunk_size
+        self.fallback = fallback
+        self._use_fallback = False
+
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._frame = None
+        self._error = None
+        self._stop = threading.Event()
+        self._response = None
+        self._thread = threading.Thread(target=self._run, name="mjpeg-reader", daemon=True)
+
+    def start(self):
+        self._response = urllib.request.urlopen(self.url, timeout=self.connect_timeout)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        buf = b""
+        try:
+            while not self._stop.is_set():
+                chunk = self._response.read1(self.chunk_size)
+                if not chunk:
+                    raise ConnectionError("MJPEG 스트림이 종료되었습니다")
+                buf += chunk
+
+                # 버퍼 안의 완성된 JPEG 중 마지막 것만 디코딩
+                end = buf.rfind(JPEG_EOI)
+                if end < 0:
+                    continue
+                start = buf.rfind(JPEG_SOI, 0, end)
+                if start < 0:
+                    buf = buf[end + 2:]
+                    continue
+
+                # 캡처 시각 = 프레임 수신 완료 시각 (디코딩 시간은 제외)
+                received_at = time.time()
+                jpeg = buf[start:end + 2]
+                buf = buf[end + 2:]
+                try:
+                    image = decode_screenshot(jpeg)
+                except ValueError:
+                    continue
+
+                with self._cond:
+                    self._seq += 1
+                    self._frame = Frame(self._seq, image, received_at)
+                    self._cond.notify_all()
+        except Exception as e:
+            if not self._stop.is_set():
+                with self._cond:
+                    self._error = e
+                    self._cond.notify_all()
+
+    @property
+    def kind(self):
+        return "screenshot" if self._use_fallback else "mjpeg"
+
+    def current_seq(self):
+        with self._cond:
+            return self._seq
+
+    def _next_fallback_frame(self):
+        frame = self.fallback.next_frame()
+        with self._cond:
+            self._seq += 1
+            return frame._replace(seq=self._seq)
+
+    def next_frame(self, after_seq=None, timeout=1.0):
+        """
+        after_seq 보다 새로운 프레임이 올 때까지 대기 -> Frame
+        timeout 안에 새 프레임이 없으면 TimeoutError
+        """
+        if self._use_fallback:
+            return self._next_fallback_frame()
+
+        with self._cond:
+            if after_seq is None:
+                after_seq = self._seq - 1
+            ok = self._cond.wait_for(
+                lambda: self._seq > after_seq or self._error is not None,
+                timeout=timeout,
+            )
+            error = self._error
+            if error is None:
+                if not ok:
+                    raise TimeoutError("MJPEG 새 프레임 대기 시간 초과")
+                return self._frame
+
+        if self.fallback is None:
+            raise ConnectionError(f"MJPEG 스트림 오류: {error}")
+        print(f"   ⚠️ MJPEG 스트림 끊김 ({error}) -> 스크린샷 방식으로 전환")
+        self._use_fallback = True
+        return self._next_fallback_frame()
+
+    def close(self):
+        self._stop.set()
+        if self._response is not None:
+            try:
+                self._response.close()
+            except Exception:
+                pass
+        if self._thread.is_alive():
+            self._thread.join(timeout=1.0)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def platform_of(driver):
+    """세션 capability -> 'android' / 'ios'"""
+    name = str((getattr(driver, "capabilities", None) or {}).get("platformName", "")).lower()
+    return "android" if name == "android" else "ios"
+
+
+def open_frame_source(driver, url=None, port=None, first_frame_timeout=3.0, framerate=None):
+    """
+    MJPEG 스트림 연결을 시도하고, 실패하면 스크린샷 방식으로 대체
+
+    url: MJPEG 주소 (기본 http://127.0.0.1:<port>, Appium 이 mjpegServerPort 를 포워딩)
+    port: 기본값은 MJPEG_SERVER_PORT 환경 변수(병렬 러너가 기기별로 할당), 없으면 iOS 9100 / AOS 7810
+    framerate: mjpegServerFramerate 설정값 (None 이면 기본값 유지)
+    """
+    port = port or device_env.mjpeg_port(platform_of(driver))
+    url = url or f"http://127.0.0.1:{port}"
+
+    if framerate is not None:
+        try:
+            driver.update_settings({"mjpegServerFramerate": framerate})
+        except Exception:
+            pass
+
+    source = MjpegFrameSource(url)
+    try:
+        source.start()
+        source.next_frame(after_seq=0, timeout=first_frame_timeout)
+    except Exception as e:
+        source.close()
+        print(f"   ⚠️ MJPEG 스트림 사용 불가 ({e}) -> 스크린샷 방식으로 대체")
+        return ScreenshotFrameSource(driver)
+
+    # 첫 프레임을 받은 뒤부터는 도중에 끊겨도 스크린샷으로 이어서 측정
+    source.fallback = ScreenshotFrameSource(driver)
+    print(f"   🎥 MJPEG 스트림 사용: {url}")
+    return source
+
+
+def wait_for_match(frames, matcher, start_time, timeout=20, interval=0.01, scheduler=None):
+    """
+    start_time 이후의 새 프레임만 대상으로 매칭될 때까지 대기 -> MatchResult
+
+    end_time 은 첫 일치 프레임의 캡처 시각이라 캡처/전송/디코딩/매칭 지연이 빠진 값이고,
+    prev_time ~ end_time 이 실제 완료 시점의 불확실 구간이 된다.
+    (대기 루프 자체는 common.waiter.wait_until + ImageDetector 가 담당)
+    """
+    return wait_for(ImageDetector(frames, matcher), start_time, timeout=timeout, interval=interval, scheduler=scheduler)
+
+
+def wait_for(detector, start_time, timeout=20, interval=0.01, scheduler=None):
+    """
+    이미 만든 감지기(ImageDetector / visual_stable / visual_change)로 대기 -> MatchResult
+
+    감지기를 스크립트가 들고 있어야 common.calibration.Calibrator.correct 로
+    같은 감지기의 감지 비용을 재서 보정할 수 있다.
+    """
+    result = wait_until(detector, start_time, timeout=timeout, interval=interval, scheduler=scheduler)
+    if isinstance(detector, ImageDetector):
+        return MatchResult(
+            result.matched, detector.score, result.end_time, result.prev_time,
+            result.detected_at, result.polls, result.sample_rate,
+        )
+    return _visual_result(result)
+
+
+def _visual_result(result):
+    # score: 마지막으로 비교한 두 프레임의 유사도 (1 - 평균 절대 차이 / 255)
+    state = result.detail
+    score = 1.0 - state.distance / 255 if state is not None else 0.0
+    return MatchResult(
+        result.matched, score, result.end_time, result.prev_time,
+        result.detected_at, result.polls, result.sample_rate,
+    )
+
+
+def wait_for_stable(frames, start_time, timeout=20, roi=None, settle=1.0, interval=0.01, scheduler=None, **options):
+    """
+    start_time 이후 화면이 바뀌었다가 settle 초 동안 멈출 때까지 대기 -> MatchResult (기준 이미지 불필요)
+
+    end_time 은 마지막 화면 변화 후 첫 프레임의 캡처 시각, prev_time 은 그 직전 프레임의 캡처 시각
+    roi: 비교 영역 (None 이면 상태 표시줄 / 홈 인디케이터를 뺀 화면, common.visual.DEFAULT_ROI)
+    options: common.visual.VisualDiff 인자 (mad_threshold / hash_distance / width)
+    """
+    return wait_for(visual_stable(frames, roi, settle, **options), start_time, timeout=timeout, interval=interval, scheduler=scheduler)
+
+
+def wait_for_change(frames, start_time, timeout=20, roi=None, interval=0.01, scheduler=None, **options):
+    """start_time 직전 / 직후 화면에서 ROI 가 처음 달라질 때까지 대기 -> MatchResult (end_time = 첫 화면 변화)"""
+    return wait_for(visual_change(frames, roi, **options), start_time, timeout=timeout, interval=interval, scheduler=scheduler)
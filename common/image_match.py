@@ -0,0 +1,446 @@
+"""
+ROI 템플릿 매칭 공통 엔진
+
+스크린샷(PNG/JPEG 바이트 또는 base64 문자열)을 PIL 을 거치지 않고
+`cv2.imdecode` 로 바로 numpy 배열(BGR)로 디코딩한 뒤,
+배열 슬라이싱으로 ROI 를 잘라 기준 이미지와 `cv2.matchTemplate` 로 비교한다.
+
+기준(템플릿) 이미지는 common.templates 레지스트리에서 한 번만 읽어 두고,
+폴링 루프에서는 디코딩 -> 슬라이싱 -> 매칭만 수행한다.
+
+RoiMatcher 는 ROI 와 템플릿 중 한쪽을 다른 쪽 크기로 늘리거나 줄여서 비교하므로
+기준 이미지를 캡처한 기기와 해상도 / 배율 / 화면 방향이 다르면 점수가 떨어진다 (에러 없이 시간 초과).
+MultiScaleMatcher 는 기기 배율(DPR)로 템플릿 크기를 맞추고 주변 배율 / ROI 주변까지 찾아서
+같은 기준 이미지를 다른 기기에서도 그대로 쓴다. (MULTI_SCALE=1 이면 create_matcher 가 이쪽을 만듦)
+
+    python -m common.image_match bench iOS/App_Start_iOS/gov24/gov24_test.png frame_*.png --roi 0,0.88,1,0.1 --dpr 3
+    (화면 캡처마다 RoiMatcher / MultiScaleMatcher 의 점수와 1회 매칭 시간 비교)
+"""
+
+import argparse
+import base64
+import math
+import os
+import time
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from common import device_env
+from common.templates import registry as default_registry
+
+
+# 크기 보정 방식
+#  - "roi"      : 잘라낸 ROI 를 템플릿 크기에 맞춤 (실행/검색 스크립트 방식)
+#  - "template" : 템플릿을 ROI 크기에 맞춤 (로그인 스크립트 방식)
+RESIZE_ROI = "roi"
+RESIZE_TEMPLATE = "template"
+
+# 기준 이미지를 캡처한 기기의 DPR (iPhone 15 = 3.0)
+DEFAULT_REFERENCE_DPR = 3.0
+
+# 정규화 배율 주변에서 찾아볼 배율 (기기마다 글꼴 / 여백이 조금씩 다름)
+DEFAULT_SCALES = (0.85, 0.925, 1.0, 1.075, 1.15)
+
+# ROI 를 상하좌우로 넓힐 폭 (화면 비율). 노치 / 상태 표시줄 높이 차이로 요소가 밀리는 정도
+DEFAULT_BAND = 0.05
+
+# 1차 탐색 축소 비율, 1차 점수가 threshold - coarse_margin 미만이면 2차 없이 불일치
+DEFAULT_COARSE = 0.25
+DEFAULT_COARSE_MARGIN = 0.15
+
+# 1차 탐색에서 템플릿의 짧은 변 최소 / 긴 변 최대 픽셀 (축소 비율을 이 범위에 맞춤, 짧은 변 우선)
+MIN_COARSE_SIDE = 12
+MAX_COARSE_SIDE = 160
+
+
+def decode_screenshot(data):
+    """스크린샷 데이터(bytes 또는 base64 str) -> BGR numpy 배열"""
+    if isinstance(data, str):
+        data = base64.b64decode(data)
+    buf = np.frombuffer(data, dtype=np.uint8)
+    frame = cv2.imdecode(buf, cv2.IMREAD_COLOR)
+    if frame is None:
+        raise ValueError("스크린샷 디코딩 실패")
+    return frame
+
+
+def roi_bounds(frame_shape, roi):
+    """ROI 비율 설정 -> (top, bottom, left, right) 픽셀 좌표"""
+    img_h, img_w = frame_shape[:2]
+    left = int(img_w * roi['x'])
+    top = int(img_h * roi['y'])
+    right = int(left + (img_w * roi['w']))
+    bottom = int(top + (img_h * roi['h']))
+    return top, bottom, left, right
+
+
+def crop_roi(frame, roi):
+    """배열 슬라이싱으로 ROI 영역 잘라내기 (복사 없음, view 반환)"""
+    top, bottom, left, right = roi_bounds(frame.shape, roi)
+    return frame[top:bottom, left:right]
+
+
+class RoiMatcher:
+    """
+    시나리오별 ROI / 임계값을 가진 템플릿 매처
+
+    사용 예)
+        matcher = RoiMatcher(TARGET_IMAGE_PATH, ROI_CONFIG, threshold=0.9)
+        if matcher.matches_screenshot(driver.get_screenshot_as_base64()):
+            ...
+    """
+
+    def __init__(self, template_path, roi, threshold=0.8, resize=RESIZE_ROI, registry=None):
+        if resize not in (RESIZE_ROI, RESIZE_TEMPLATE):
+            raise ValueError(f"알 수 없는 크기 보정 방식: {resize}")
+
+        self.template_path = template_path
+        self.roi = dict(roi)
+        self.threshold = threshold
+        self.resize = resize
+        self.registry = registry or default_registry
+        # 파일이 없으면 생성 시점에 바로 에러 (측정 도중이 아니라)
+        self.registry.get(template_path)
+
+    @property
+    def template(self):
+        return self.registry.get(self.template_path)
+
+    def _template_for(self, roi_shape):
+        return self.registry.get(self.template_path, size=(roi_shape[1], roi_shape[0]))
+
+    def score(self, frame):
+        """전체 프레임(BGR 배열) -> 일치율 (0.0 ~ 1.0)"""
+        roi_cv = crop_roi(frame, self.roi)
+        if roi_cv.size == 0:
+            return 0.0
+
+        if self.resize == RESIZE_ROI:
+            template = self.template
+            if roi_cv.shape != template.shape:
+                roi_cv = cv2.resize(roi_cv, (template.shape[1], template.shape[0]))
+        else:
+            template = self._template_for(roi_cv.shape)
+
+        res = cv2.matchTemplate(roi_cv, template, cv2.TM_CCOEFF_NORMED)
+        _, max_val, _, _ = cv2.minMaxLoc(res)
+        return float(max_val)
+
+    def matches(self, frame):
+        return self.score(frame) >= self.threshold
+
+    def score_screenshot(self, data):
+        """스크린샷 데이터(bytes/base64) -> 일치율"""
+        return self.score(decode_screenshot(data))
+
+    def matches_screenshot(self, data):
+        return self.score_screenshot(data) >= self.threshold
+
+    def attach(self, driver):
+        """세션이 열린 뒤 기기 정보 반영 (RoiMatcher 는 쓰지 않음)"""
+        return self
+
+
+# ---- [함수] 기기 배율 ----
+def device_pixel_ratio(driver, frame_width=None):
+    """
+    기기 DPR (화면 픽셀 / 논리 좌표). 알 수 없으면 None
+
+    iOS    : mobile: deviceScreenInfo 의 scale (없으면 스크린샷 폭 / 창 폭)
+    Android: 화면 밀도(dpi) / 160
+    """
+    platform = str((driver.capabilities or {}).get("platformName", "")).lower()
+    try:
+        if platform == "android":
+            return driver.get_display_density() / 160
+        try:
+            scale = driver.execute_script("mobile: deviceScreenInfo").get("scale")
+            if scale:
+                return float(scale)
+        except Exception:
+            pass
+        if frame_width is None:
+            frame_width = decode_screenshot(driver.get_screenshot_as_png()).shape[1]
+        return frame_width / driver.get_window_size()["width"]
+    except Exception as e:
+        print(f"   ⚠️ 기기 배율(DPR) 확인 실패 -> 화면 폭 기준으로 맞춤: {e}")
+        return None
+
+
+def band_bounds(frame_shape, roi, band):
+    """
+    ROI 를 화면 비율 band 만큼 넓힌 (top, bottom, left, right) 픽셀 좌표 (화면 밖은 잘라냄)
+
+    끝 좌표도 비율에서 바로 계산한다 (top + 높이 로 더하면 소수점 버림이 두 번 되어 화면 끝 1줄이 빠짐)
+    """
+    img_h, img_w = frame_shape[:2]
+    return (
+        int(img_h * max(0.0, roi['y'] - band)),
+        min(img_h, int(img_h * min(1.0, roi['y'] + roi['h'] + band))),
+        int(img_w * max(0.0, roi['x'] - band)),
+        min(img_w, int(img_w * min(1.0, roi['x'] + roi['w'] + band))),
+    )
+
+
+def ccoeff_normed(image, template):
+    """
+    같은 크기 두 이미지의 TM_CCOEFF_NORMED 값 (matchTemplate 결과 1칸과 같음)
+
+    결과가 1칸뿐이어도 matchTemplate 은 큰 템플릿에서 DFT 를 써서 화면 폭 템플릿 1장에 수십 ms 가 걸린다.
+    채널별 평균 / 분산 / 곱의 합으로 직접 계산 (단색이면 matchTemplate 과 같게 템플릿 1.0 / 화면 0.0)
+    """
+    n = image.shape[0] * image.shape[1]
+    channels = 1 if image.ndim == 2 else image.shape[2]
+    mean_a, sd_a = cv2.meanStdDev(image)
+    mean_b, sd_b = cv2.meanStdDev(template)
+    var_a, var_b = float((sd_a.ravel() ** 2).sum()), float((sd_b.ravel() ** 2).sum())
+    if var_b < 1e-12:
+        return 1.0
+    if var_a < 1e-12:
+        return 0.0
+    products = np.array(cv2.sumElems(cv2.multiply(image, template, dtype=cv2.CV_32F))[:channels])
+    numerator = float((products - n * mean_a.ravel() * mean_b.ravel()).sum())
+    return numerator / (n * math.sqrt(var_a * var_b))
+
+
+# score: 일치율, scale: 기준 이미지에 곱한 배율 (없으면 None)
+# loc: 일치 위치 (x, y) 프레임 픽셀 좌상단 (1차에서 끝났으면 None), coarse: 1차(저해상도) 최고 점수
+ScaleMatch = namedtuple("ScaleMatch", ["score", "scale", "loc", "coarse"])
+
+
+# ---- [클래스] 다중 배율 매처 ----
+class MultiScaleMatcher(RoiMatcher):
+    """
+    해상도 / 배율 / 화면 방향이 달라도 같은 기준 이미지를 쓰는 매처 (RoiMatcher 와 같은 인터페이스)
+
+    0. 하한: RoiMatcher 와 같은 ROI 1회 비교 점수 (직접 계산이라 수 ms) 보다 낮은 값은 돌려주지 않음
+    1. 배율 정규화: ROI 크기 그대로(RoiMatcher 배율) + 기준 이미지에 곱할 기본 배율 2가지
+       - 현재 기기 DPR / 기준 기기 DPR   (고정 크기 요소: 버튼 / 아이콘 / 글자)
+       - 현재 화면 폭 / 기준 화면 폭     (화면 폭에 맞춰 늘어나는 배치, 기준 화면 폭 = 템플릿 폭 / ROI 폭 비율)
+       DPR 을 모르면 화면 폭 기준만
+    2. 배율 피라미드: 기본 배율 x scales 중 가장 잘 맞는 배율
+    3. 허용 구간: ROI 를 band 만큼 넓혀서 찾음 (화면 방향이 기준(세로)과 다르면 화면 전체)
+    4. 2단계 탐색: coarse 배율로 줄인 흑백 이미지에서 모든 배율을 먼저 비교하고,
+       최고 점수가 threshold - coarse_margin 미만이면 바로 불일치 (로딩 중 프레임 대부분)
+       넘으면 최고 배율 하나만 원본 해상도로, 1차 위치 주변에서만 다시 비교 (위치는 흑백, 점수는 컬러 1곳)
+
+    dpr 은 생성 시 넘기거나 세션을 연 뒤 attach(driver) 로 잰다.
+    last: 마지막 비교 결과 (ScaleMatch)
+    """
+
+    def __init__(self, template_path, roi, threshold=0.8, dpr=None, reference_dpr=DEFAULT_REFERENCE_DPR,
+                 scales=DEFAULT_SCALES, band=DEFAULT_BAND, coarse=DEFAULT_COARSE,
+                 coarse_margin=DEFAULT_COARSE_MARGIN, registry=None):
+        super().__init__(template_path, roi, threshold, RESIZE_ROI, registry)
+        if not scales:
+            raise ValueError("scales 가 비어 있습니다")
+        if not 0 < coarse <= 1:
+            raise ValueError(f"coarse 는 0 ~ 1 사이여야 합니다: {coarse}")
+        self.dpr = dpr
+        self.reference_dpr = reference_dpr
+        self.scales = tuple(sorted(scales))
+        self.band = band
+        self.coarse = coarse
+        self.coarse_margin = coarse_margin
+        self.last = None
+        # (mtime, 크기) -> 1차 탐색용 축소 흑백 템플릿 (INTER_AREA)
+        self._coarse_templates = {}
+
+    def attach(self, driver):
+        if self.dpr is None:
+            self.dpr = device_pixel_ratio(driver)
+            if self.dpr:
+                print(f"   📐 기기 배율 {self.dpr:g}x (기준 {self.reference_dpr:g}x) -> 기준 이미지 {self.dpr / self.reference_dpr:.3f}배")
+        return self
+
+    def base_scales(self, frame_shape, template_shape):
+        """기준 이미지에 곱할 정규화 배율 (DPR 기준, 화면 폭 기준)"""
+        reference_width = template_shape[1] / self.roi['w']
+        bases = [min(frame_shape[:2]) / reference_width]
+        if self.dpr and self.reference_dpr:
+            bases.insert(0, self.dpr / self.reference_dpr)
+        return bases
+
+    def fit_size(self, frame_shape):
+        """RoiMatcher 와 같은 배율: 현재 ROI 픽셀 크기 (폭, 높이)"""
+        top, bottom, left, right = roi_bounds(frame_shape, self.roi)
+        return right - left, bottom - top
+
+    def candidate_sizes(self, frame_shape, template_shape, region_shape):
+        """
+        피라미드 후보 [(배율, (폭, 높이))]
+
+        첫 항목은 ROI 크기 그대로 (RoiMatcher 와 같은 배율). 영역보다 큰 후보는 버리지 않고 영역 크기로 자르고
+        (화면 폭 전체 템플릿은 정규화 배율이 조금만 커도 영역을 넘음), 같은 크기가 된 후보는 합친다.
+        """
+        th, tw = template_shape[:2]
+        rh, rw = region_shape[:2]
+        fit = self.fit_size(frame_shape)
+        candidates = [(fit[0] / tw, fit)]
+        for base in self.base_scales(frame_shape, template_shape):
+            for s in self.scales:
+                candidates.append((base * s, (round(tw * base * s), round(th * base * s))))
+        sizes, seen = [], set()
+        for scale, (w, h) in candidates:
+            size = (min(rw, max(1, w)), min(rh, max(1, h)))
+            if size not in seen:
+                seen.add(size)
+                sizes.append((scale, size))
+        return sizes
+
+    def _coarse_template(self, template, size):
+        key = (self.registry.mtime(self.template_path), size)
+        small = self._coarse_templates.get(key)
+        if small is None:
+            if len(self._coarse_templates) > 32:
+                self._coarse_templates.clear()
+            small = cv2.resize(template, size, interpolation=cv2.INTER_AREA)
+            if small.ndim == 3:
+                small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+            self._coarse_templates[key] = small
+        return small
+
+    def roi_score(self, frame):
+        """RoiMatcher.score 와 같은 값 (ROI 를 템플릿 크기로 맞춰 1회 비교, matchTemplate 대신 직접 계산)"""
+        roi_cv = crop_roi(frame, self.roi)
+        if roi_cv.size == 0:
+            return 0.0
+        template = self.template
+        if roi_cv.shape != template.shape:
+            roi_cv = cv2.resize(roi_cv, (template.shape[1], template.shape[0]))
+        return ccoeff_normed(roi_cv, template)
+
+    def score(self, frame):
+        """
+        전체 프레임(BGR 배열) -> 일치율
+
+        RoiMatcher 점수(roi_score)를 항상 하한으로 쓰므로 같은 ROI 에서 RoiMatcher 보다 낮게 나오지 않는다.
+        1차에서 끝나면 1차 점수와 하한 중 큰 값
+        """
+        floor = self.roi_score(frame)
+        h, w = frame.shape[:2]
+        if w > h:
+            top, bottom, left, right = 0, h, 0, w
+        else:
+            top, bottom, left, right = band_bounds(frame.shape, self.roi, self.band)
+        region = frame[top:bottom, left:right]
+        if region.size == 0:
+            self.last = ScaleMatch(floor, None, None, 0.0)
+            return floor
+
+        template = self.template
+        rh, rw = region.shape[:2]
+        sizes = self.candidate_sizes(frame.shape, template.shape, region.shape)
+
+        # 1차: 축소 흑백 이미지에서 모든 배율 비교
+        coarse = min(self.coarse, MAX_COARSE_SIDE / max(max(size) for _, size in sizes))
+        coarse = min(1.0, max(coarse, MIN_COARSE_SIDE / min(min(size) for _, size in sizes)))
+        small_region = region
+        if coarse < 1.0:
+            small_region = cv2.resize(region, (max(1, round(rw * coarse)), max(1, round(rh * coarse))),
+                                      interpolation=cv2.INTER_AREA)
+        if small_region.ndim == 3:
+            small_region = cv2.cvtColor(small_region, cv2.COLOR_BGR2GRAY)
+        best = (-1.0, None, None)
+        for scale, size in sizes:
+            small_size = (min(small_region.shape[1], max(1, round(size[0] * coarse))),
+                          min(small_region.shape[0], max(1, round(size[1] * coarse))))
+            small = self._coarse_template(template, small_size)
+            res = cv2.matchTemplate(small_region, small, cv2.TM_CCOEFF_NORMED)
+            _, max_val, _, max_loc = cv2.minMaxLoc(res)
+            if math.isfinite(max_val) and max_val > best[0]:
+                best = (max_val, (scale, size), max_loc)
+        coarse_score = max(0.0, float(best[0]))
+        if best[1] is None or coarse_score < self.threshold - self.coarse_margin:
+            self.last = ScaleMatch(max(floor, coarse_score), best[1] and best[1][0], None, coarse_score)
+            return max(floor, coarse_score)
+
+        # 2차: 최고 배율 하나만 원본 해상도로, 1차 위치 주변에서 위치를 찾고 (흑백) 그 위치 1곳만 컬러로 점수 계산
+        (scale, size), (cx, cy) = best[1], best[2]
+        fine = self.registry.get(self.template_path, size=size)
+        pad = math.ceil(1 / coarse) + 2
+        x0, y0 = max(0, int(cx / coarse) - pad), max(0, int(cy / coarse) - pad)
+        x1, y1 = min(rw, int(cx / coarse) + size[0] + pad), min(rh, int(cy / coarse) + size[1] + pad)
+        if x1 - x0 < size[0] or y1 - y0 < size[1]:
+            x0, y0, x1, y1 = 0, 0, rw, rh
+        window, fine_gray = region[y0:y1, x0:x1], fine
+        if window.ndim == 3:
+            window = cv2.cvtColor(window, cv2.COLOR_BGR2GRAY)
+            fine_gray = cv2.cvtColor(fine, cv2.COLOR_BGR2GRAY)
+        res = cv2.matchTemplate(window, fine_gray, cv2.TM_CCOEFF_NORMED)
+        _, _, _, (fx, fy) = cv2.minMaxLoc(res)
+        x, y = x0 + fx, y0 + fy
+        fine_score = ccoeff_normed(region[y:y + size[1], x:x + size[0]], fine)
+        if fine_score < floor:
+            self.last = ScaleMatch(floor, scale, None, coarse_score)
+            return floor
+        self.last = ScaleMatch(fine_score, scale, (left + x, top + y), coarse_score)
+        return fine_score
+
+
+def create_matcher(template_path, roi, threshold=0.8, resize=RESIZE_ROI, multi_scale=None, **options):
+    """
+    스크립트용 매처 생성: MULTI_SCALE=1 (또는 multi_scale=True) 이면 MultiScaleMatcher, 아니면 RoiMatcher
+
+    options: MultiScaleMatcher 설정 (dpr / reference_dpr / scales / band / coarse / coarse_margin)
+    """
+    if multi_scale is None:
+        multi_scale = device_env.multi_scale()
+    if multi_scale:
+        return MultiScaleMatcher(template_path, roi, threshold=threshold, **options)
+    return RoiMatcher(template_path, roi, threshold=threshold, resize=resize)
+
+
+# ---- [함수] 벤치마크 ----
+def benchmark(template_path, frame, roi, dpr=None, repeat=5, registry=None):
+    """
+    화면 1장 -> {"roi": (점수, 초), "multi": (점수, 초)}
+
+    시간은 repeat 회 중 최소값 (첫 호출의 템플릿 로드 / 리사이즈 캐시는 제외)
+    """
+    registry = registry or default_registry
+    matchers = {
+        "roi": RoiMatcher(template_path, roi, registry=registry),
+        "multi": MultiScaleMatcher(template_path, roi, dpr=dpr, registry=registry),
+    }
+    results = {}
+    for name, matcher in matchers.items():
+        score = matcher.score(frame)
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            matcher.score(frame)
+            best = min(best, time.perf_counter() - started)
+        results[name] = (score, best)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="다중 배율 템플릿 매칭 벤치마크")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_bench = sub.add_parser("bench", help="화면 캡처별 RoiMatcher / MultiScaleMatcher 점수와 매칭 시간")
+    p_bench.add_argument("template", help="기준 이미지")
+    p_bench.add_argument("frames", nargs="+", help="화면 캡처 이미지")
+    p_bench.add_argument("--roi", default="0,0,1,1", help="x,y,w,h (화면 비율)")
+    p_bench.add_argument("--dpr", type=float, default=None, help="화면 캡처 기기의 DPR (모르면 생략)")
+    p_bench.add_argument("--repeat", type=int, default=5, help="측정 반복 횟수 (최소 시간 사용)")
+    args = parser.parse_args(argv)
+
+    roi = dict(zip("xywh", (float(v) for v in args.roi.split(","))))
+    print(f"{'화면':<32} {'크기':>11} {'Roi 점수':>9} {'Roi ms':>8} {'Multi 점수':>10} {'Multi ms':>9}")
+    for path in args.frames:
+        frame = cv2.imread(path, cv2.IMREAD_COLOR)
+        if frame is None:
+            print(f"⏭ 건너뜀: {path} (이미지를 읽을 수 없음)")
+            continue
+        r = benchmark(args.template, frame, roi, args.dpr, args.repeat)
+        size = f"{frame.shape[1]}x{frame.shape[0]}"
+        print(f"{os.path.basename(path)[-32:]:<32} {size:>11} {r['roi'][0]:>9.3f} {1000 * r['roi'][1]:>8.1f}"
+              f" {r['multi'][0]:>10.3f} {1000 * r['multi'][1]:>9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,230 @@
+"""
+AOS 기기 시각 기준 앱 실행 측정 (adb logcat / am start -W)
+
+Appium 측정값(activate_app ~ 첫 find_elements 성공)에는 HTTP 왕복 지연이 섞인다.
+여기서는 기기가 직접 남기는 실행 시간을 함께 수집해서
+'기기 시각 기준 소요 시간'과 '호스트 시각 기준 소요 시간'을 나란히 기록한다.
+
+  - am start -W       : TotalTime / WaitTime / LaunchState (COLD / WARM / HOT)
+  - logcat Displayed  : ActivityTaskManager 의 첫 화면 표시 시간 (+1s234ms)
+  - logcat Fully drawn: 앱이 reportFullyDrawn() 을 호출한 경우의 완전 표시 시간
+
+    timer = AdbLaunchTimer(serial)
+    timer.start()
+    start_time = time.time()
+    proc = timer.launch(package, activity)          # am start -W (비동기)
+    result = wait_until(uiautomator(driver, selector), start_time)
+    launch = timer.collect(proc, package, start_time)
+    timer.stop()
+"""
+
+import re
+import shlex
+import subprocess
+import threading
+import time
+from collections import namedtuple
+
+
+ADB = "adb"
+
+# ActivityTaskManager: Displayed com.pkg/.MainActivity for user 0: +1s234ms (total +2s10ms)
+# ActivityTaskManager: Fully drawn com.pkg/.MainActivity: +3s456ms
+EVENT_RE = re.compile(
+    r"(?P<kind>Displayed|Fully drawn) (?P<package>[\w.]+)/(?P<activity>[\w.$]+)"
+    r"(?: for user \d+)?: \+(?P<elapsed>[\dms]+)"
+)
+ELAPSED_RE = re.compile(r"^(?:(\d+)m(?!s))?(?:(\d+)s)?(?:(\d+)ms)?$")
+
+# logcat -v epoch 형식:  1718000000.123  1234  1250 I ActivityTaskManager: ...
+EPOCH_LINE_RE = re.compile(r"^\s*(?P<ts>\d+\.\d+)\s+\d+\s+\d+\s+\w\s+(?P<tag>[^:]+):\s?(?P<msg>.*)$")
+
+# kind: "Displayed" / "Fully drawn"
+# elapsed: 기기가 계산한 소요 시간(초), device_time: 로그 기록 시각(기기 시계, epoch 초)
+# host_time: device_time 을 호스트 시계로 환산한 값
+LaunchEvent = namedtuple("LaunchEvent", ["kind", "package", "activity", "elapsed", "device_time", "host_time"])
+
+# am: am start -W 결과 dict (TotalTime/WaitTime 은 초 단위로 변환)
+# displayed / fully_drawn: LaunchEvent 또는 None
+LaunchTiming = namedtuple("LaunchTiming", ["am", "displayed", "fully_drawn"])
+
+
+def parse_elapsed(text):
+    """'1s234ms' / '234ms' / '1m2s3ms' -> 초"""
+    m = ELAPSED_RE.match(text)
+    if not m or not any(m.groups()):
+        raise ValueError(f"알 수 없는 시간 형식: {text}")
+    minutes, seconds, millis = (int(g) if g else 0 for g in m.groups())
+    return minutes * 60 + seconds + millis / 1000.0
+
+
+def parse_event(line, clock_offset=0.0):
+    """logcat(-v epoch) 한 줄 -> LaunchEvent (해당 없으면 None)"""
+    m = EPOCH_LINE_RE.match(line)
+    if not m:
+        return None
+    e = EVENT_RE.search(m.group("msg"))
+    if not e:
+        return None
+    device_time = float(m.group("ts"))
+    return LaunchEvent(
+        e.group("kind"), e.group("package"), e.group("activity"),
+        parse_elapsed(e.group("elapsed")), device_time, device_time + clock_offset,
+    )
+
+
+def parse_am_start(output):
+    """
+    am start -W 출력 -> dict
+
+        Status: ok
+        LaunchState: COLD
+        Activity: com.pkg/.MainActivity
+        TotalTime: 1234
+        WaitTime: 1300
+    """
+    info = {}
+    for line in output.splitlines():
+        if ":" not in line:
+            continue
+        key, value = line.split(":", 1)
+        key, value = key.strip(), value.strip()
+        if key in ("TotalTime", "WaitTime", "ThisTime"):
+            info[key] = int(value) / 1000.0
+        elif key in ("Status", "LaunchState", "Activity"):
+            info[key] = value
+    return info
+
+
+class AdbLaunchTimer:
+    """
+    adb logcat 을 백그라운드로 읽으면서 Displayed / Fully drawn 이벤트를 모은다
+
+    serial: adb 기기 시리얼 (None 이면 연결된 기기 1대)
+    """
+
+    def __init__(self, serial=None, adb=ADB):
+        self.serial = serial
+        self.adb = adb
+        self.clock_offset = 0.0
+        self._cond = threading.Condition()
+        self._events = []
+        self._proc = None
+        self._thread = None
+
+    def _cmd(self, *args):
+        cmd = [self.adb]
+        if self.serial:
+            cmd += ["-s", self.serial]
+        return cmd + list(args)
+
+    def sync_clock(self, samples=3):
+        """
+        호스트 시계 - 기기 시계 차이(초) 추정
+
+        adb shell 왕복 시간의 중간 시각을 기기 시각과 짝지어, 왕복이 가장 짧았던 표본을 사용
+        """
+        best = None
+        for _ in range(samples):
+            sent = time.time()
+            out = subprocess.run(
+                self._cmd("shell", "date", "+%s.%N"),
+                capture_output=True, text=True, timeout=5,
+            ).stdout.strip()
+            received = time.time()
+            try:
+                device_now = float(out)
+            except ValueError:
+                continue
+            rtt = received - sent
+            if best is None or rtt < best[0]:
+                best = (rtt, (sent + received) / 2 - device_now)
+        if best is None:
+            raise RuntimeError("기기 시각을 읽을 수 없습니다 (adb shell date)")
+        self.clock_offset = best[1]
+        return self.clock_offset
+
+    def start(self):
+        """시계 동기화 후 logcat 리더 시작 (시작 이후 로그만 읽음)"""
+        self.sync_clock()
+        self._proc = subprocess.Popen(
+            self._cmd("logcat", "-v", "epoch", "-T", "1",
+                      "ActivityTaskManager:I", "ActivityManager:I", "*:S"),
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True, encoding="utf-8", errors="replace",
+        )
+        self._thread = threading.Thread(target=self._run, name="logcat-reader", daemon=True)
+        self._thread.start()
+        print(f"   📜 logcat 수집 시작 (기기-호스트 시계 차이 {self.clock_offset:+.3f}초)")
+        return self
+
+    def _run(self):
+        for line in self._proc.stdout:
+            event = parse_event(line, self.clock_offset)
+            if event is None:
+                continue
+            with self._cond:
+                self._events.append(event)
+                self._cond.notify_all()
+
+    def launch(self, package, activity=None):
+        """
+        am start -W 실행 (끝날 때까지 기다리지 않고 Popen 반환)
+
+        activity 가 없으면 런처 인텐트로 실행
+        """
+        if activity:
+            target = ["-n", f"{package}/{activity}"]
+        else:
+            target = ["-a", "android.intent.action.MAIN",
+                      "-c", "android.intent.category.LAUNCHER", "-p", package]
+        cmd = "am start -W " + " ".join(shlex.quote(t) for t in target)
+        return subprocess.Popen(
+            self._cmd("shell", cmd),
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+        )
+
+    def wait_event(self, kind, package, after, timeout=5.0):
+        """after(호스트 시각) 이후에 기록된 package 의 kind 이벤트 대기 -> LaunchEvent 또는 None"""
+        def _find():
+            for event in self._events:
+                if event.kind == kind and event.package == package and event.host_time >= after:
+                    return event
+            return None
+
+        with self._cond:
+            self._cond.wait_for(lambda: _find() is not None, timeout=timeout)
+            return _find()
+
+    def collect(self, proc, package, start_time, am_timeout=30, fully_drawn_timeout=0.5):
+        """
+        실행 1회의 기기 측 결과 수집 -> LaunchTiming
+
+        start_time: 실행 명령 직전 호스트 시각 (이보다 앞선 로그는 무시)
+        fully_drawn_timeout: reportFullyDrawn() 을 쓰지 않는 앱이 많아 짧게만 기다림
+        """
+        try:
+            output, _ = proc.communicate(timeout=am_timeout)
+            am = parse_am_start(output)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            am = {}
+        # 시계 차이 추정 오차만큼 여유를 두고, 다음 회차를 위해 수집된 이벤트는 비움
+        after = start_time - 0.5
+        displayed = self.wait_event("Displayed", package, after)
+        fully_drawn = self.wait_event("Fully drawn", package, after, timeout=fully_drawn_timeout)
+        self.clear()
+        return LaunchTiming(am, displayed, fully_drawn)
+
+    def clear(self):
+        with self._cond:
+            self._events.clear()
+
+    def stop(self):
+        if self._proc is not None:
+            self._proc.terminate()
+            try:
+                self._proc.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                self._proc.kill()
+            self._proc = None
@@ -0,0 +1,434 @@
+"""
+page_source XML 에서 로케이터로 요소 찾기 (서버 왕복 없이)
+
+UiAutomator2 / XCUITest 의 page_source 스냅샷 하나에 대해
+find_elements 와 같은 로케이터(UiSelector / NSPredicate / Class Chain / XPath / ID ...)를
+로컬에서 평가한다. 재생 서버(common.replay_server)가 녹화된 화면에 대한
+요소 찾기 응답을 만들 때 사용한다.
+
+    root = parse(driver.page_source)
+    elements = find_all(root, "-android uiautomator", 'new UiSelector().text("전체메뉴")')
+    done, popup = find_many(root, [(ANDROID_UIAUTOMATOR, ...), ("id", "android:id/button1")])   # 한 번에 평가
+    rect(elements[0])   # {"x": .., "y": .., "width": .., "height": ..}
+
+지원 범위는 이 저장소의 스크립트 / 시나리오가 쓰는 형태 위주
+    UiSelector : text / textContains / textStartsWith / textMatches / description* / resourceId* /
+                 className* / packageName / clickable 등 bool 속성 / index / instance
+    NSPredicate: ==, !=, CONTAINS, BEGINSWITH, ENDSWITH, LIKE, MATCHES ([c] 지원), AND / OR
+    Class Chain: **/Type[`predicate`][n]/Type ...
+    XPath      : //tag[@a='v' and contains(@b, 'v')][n]/tag ... (@a / starts-with / 위치 인덱스)
+지원하지 않는 형태는 SelectorError (WebDriver 의 invalid selector)
+"""
+
+import fnmatch
+import re
+import xml.etree.ElementTree as ET
+from functools import lru_cache
+
+from common.detectors import ACCESSIBILITY_ID, ANDROID_UIAUTOMATOR, IOS_CLASS_CHAIN, IOS_PREDICATE
+
+
+XPATH = "xpath"
+ID = "id"
+CLASS_NAME = "class name"
+NAME = "name"
+CSS_SELECTOR = "css selector"
+
+# iOS page_source 의 bool 속성 / NSPredicate bool 값
+TRUE_VALUES = ("1", "true", "yes")
+
+_BOUNDS = re.compile(r"\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]")
+
+
+class SelectorError(ValueError):
+    """해석할 수 없는 로케이터"""
+
+
+# ---- [함수] 스냅샷 ----
+def parse(xml):
+    """page_source 문자열(또는 bytes) -> 루트 Element"""
+    if isinstance(xml, str):
+        xml = xml.encode("utf-8")
+    return ET.fromstring(xml)
+
+
+def rect(element):
+    """요소 영역 -> {"x", "y", "width", "height"} (Android bounds / iOS x,y,width,height)"""
+    m = _BOUNDS.match(element.get("bounds", ""))
+    if m:
+        x1, y1, x2, y2 = map(int, m.groups())
+        return {"x": x1, "y": y1, "width": x2 - x1, "height": y2 - y1}
+    return {key: int(float(element.get(key, 0) or 0)) for key in ("x", "y", "width", "height")}
+
+
+def text(element):
+    """getText 응답 (Android text, iOS value -> label -> name 순)"""
+    for key in ("text", "value", "label", "name"):
+        value = element.get(key)
+        if value:
+            return value
+    return ""
+
+
+def attribute(element, name):
+    """getAttribute 응답 (없으면 None). iOS 의 type 은 태그 이름"""
+    if name in ("type", "class", "className") and element.get(name) is None:
+        return element.tag
+    return element.get(name)
+
+
+def _type(element):
+    return element.get("class") or element.get("type") or element.tag
+
+
+# ---- [함수] 조건 ----
+def _cond(name, op, value, ignore_case=False):
+    """속성 조건 1개 -> element 를 받아 bool 을 돌려주는 함수"""
+    if ignore_case:
+        value = value.lower()
+    if op == "matches":
+        pattern = re.compile(value, re.IGNORECASE if ignore_case else 0)
+
+    def check(element):
+        actual = _type(element) if name in ("type", "class", "className") else element.get(name)
+        if op == "exists":
+            return actual is not None
+        if actual is None:
+            return op == "!="
+        if ignore_case:
+            actual = actual.lower()
+        if op == "==":
+            return actual == value
+        if op == "!=":
+            return actual != value
+        if op == "contains":
+            return value in actual
+        if op == "startswith":
+            return actual.startswith(value)
+        if op == "endswith":
+            return actual.endswith(value)
+        if op == "like":
+            return fnmatch.fnmatchcase(actual, value)
+        if op == "matches":
+            return pattern.fullmatch(actual) is not None
+        if op == "bool":
+            return (actual.lower() in TRUE_VALUES) == (value.lower() in TRUE_VALUES)
+        raise SelectorError(f"지원하지 않는 연산자: {op}")
+
+    # 속성 색인(common.source_index)이 후보 요소를 고를 때 사용
+    check.spec = (name, op, value, ignore_case)
+    return check
+
+
+def _any_of(groups):
+    """[[조건, ...], ...] -> OR(AND(...)) 로 묶은 함수"""
+    def check(element):
+        return any(all(c(element) for c in group) for group in groups)
+
+    check.groups = groups
+    return check
+
+
+def _unquote(token):
+    if len(token) >= 2 and token[0] == token[-1] and token[0] in "'\"":
+        return re.sub(r"\\(.)", r"\1", token[1:-1])
+    return token
+
+
+# 단계(step): (axis, 이름, 필터 목록). 필터는 조건 함수 또는 위치 인덱스(int, 1부터 / 음수는 뒤에서)
+def _select(root, steps):
+    context = [root]
+    for axis, name, filters in steps:
+        found = []
+        seen = set()
+        for parent in context:
+            candidates = parent.iter() if axis == "descendant" else iter(parent)
+            matched = [
+                el for el in candidates
+                if el is not parent and (name == "*" or el.tag == name or _type(el) == name)
+            ]
+            for f in filters:
+                if isinstance(f, int):
+                    index = f - 1 if f > 0 else len(matched) + f
+                    matched = [matched[index]] if 0 <= index < len(matched) else []
+                else:
+                    matched = [el for el in matched if f(el)]
+            for el in matched:
+                if id(el) not in seen:
+                    seen.add(id(el))
+                    found.append(el)
+        context = found
+    return context
+
+
+# ---- [로케이터] UiSelector ----
+_UI_CALL = re.compile(r'\.(\w+)\(\s*("(?:[^"\\]|\\.)*"|[^)]*?)\s*\)')
+_UI_ATTR = {
+    "text": "text", "description": "content-desc", "resourceId": "resource-id",
+    "className": "class", "packageName": "package",
+}
+_UI_SUFFIX = {"": "==", "Contains": "contains", "StartsWith": "startswith", "Matches": "matches"}
+_UI_BOOL = (
+    "checkable", "checked", "clickable", "enabled", "focusable", "focused",
+    "longClickable", "scrollable", "selected",
+)
+
+
+def _uiautomator(value):
+    body = value.strip().rstrip(";")
+    if "UiScrollable" in body or "childSelector" in body or "fromParent" in body:
+        raise SelectorError(f"지원하지 않는 UiSelector: {value}")
+    body = re.sub(r"^new\s+UiSelector\(\)", "", body)
+    conds = []
+    instance = None
+    pos = 0
+    for m in _UI_CALL.finditer(body):
+        if body[pos:m.start()].strip():
+            raise SelectorError(f"UiSelector 해석 실패: {value}")
+        pos = m.end()
+        method, arg = m.group(1), _unquote(m.group(2))
+        if method == "instance":
+            instance = int(arg) + 1
+        elif method == "index":
+            conds.append(_cond("index", "==", arg))
+        elif method in _UI_BOOL:
+            conds.append(_cond(re.sub(r"(?<!^)(?=[A-Z])", "-", method).lower(), "bool", arg or "true"))
+        else:
+            for prefix, attr in _UI_ATTR.items():
+                suffix = method[len(prefix):]
+                if method.startswith(prefix) and suffix in _UI_SUFFIX:
+                    conds.append(_cond(attr, _UI_SUFFIX[suffix], arg))
+                    break
+            else:
+                raise SelectorError(f"지원하지 않는 UiSelector 메서드: {method}")
+    if body[pos:].strip():
+        raise SelectorError(f"UiSelector 해석 실패: {value}")
+    filters = [_any_of([conds])]
+    if instance is not None:
+        filters.append(instance)
+    return [("descendant", "*", filters)]
+
+
+# ---- [로케이터] NSPredicate ----
+_PREDICATE = re.compile(
+    r"""\s*(\w+)\s*(==|!=|=|CONTAINS|BEGINSWITH|ENDSWITH|LIKE|MATCHES)(\[[cd]+\])?\s*
+        ('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|[\w.]+)\s*""",
+    re.IGNORECASE | re.VERBOSE,
+)
+_CONNECTOR = re.compile(r"\s*(AND|OR|&&|\|\|)\s*", re.IGNORECASE)
+_PREDICATE_OPS = {
+    "=": "==", "==": "==", "!=": "!=", "contains": "contains", "beginswith": "startswith",
+    "endswith": "endswith", "like": "like", "matches": "matches",
+}
+_BOOL_ATTRS = ("visible", "enabled", "accessible", "selected", "hittable")
+
+
+def _predicate_groups(value):
+    """NSPredicate -> [[조건, ...], ...] (AND 가 OR 보다 먼저 묶임)"""
+    groups = [[]]
+    pos = 0
+    while True:
+        m = _PREDICATE.match(value, pos)
+        if not m:
+            raise SelectorError(f"NSPredicate 해석 실패: {value}")
+        name, op, flags, raw = m.groups()
+        op = _PREDICATE_OPS[op.lower()]
+        if name in _BOOL_ATTRS and op in ("==", "!="):
+            check = _cond(name, "bool", _unquote(raw))
+            groups[-1].append(check if op == "==" else (lambda el, c=check: not c(el)))
+        else:
+            groups[-1].append(_cond(name, op, _unquote(raw), ignore_case=bool(flags and "c" in flags)))
+        pos = m.end()
+        if pos >= len(value):
+            return groups
+        c = _CONNECTOR.match(value, pos)
+        if not c:
+            raise SelectorError(f"NSPredicate 해석 실패: {value}")
+        if c.group(1).upper() in ("OR", "||"):
+            groups.append([])
+        pos = c.end()
+
+
+def _ios_predicate(value):
+    return [("descendant", "*", [_any_of(_predicate_groups(value))])]
+
+
+# ---- [로케이터] Class Chain ----
+_CHAIN_STEP = re.compile(r"(\*\*/)?([\w*]+)((?:\[(?:`[^`]*`|\$[^$]*\$|-?\d+)\])*)(/|$)")
+_CHAIN_FILTER = re.compile(r"\[(?:`([^`]*)`|(\$[^$]*\$)|(-?\d+))\]")
+
+
+def _class_chain(value):
+    steps = []
+    pos = 0
+    while pos < len(value):
+        m = _CHAIN_STEP.match(value, pos)
+        if not m or m.end() == pos:
+            raise SelectorError(f"Class Chain 해석 실패: {value}")
+        filters = []
+        for predicate, descendant, index in _CHAIN_FILTER.findall(m.group(3)):
+            if descendant:
+                raise SelectorError(f"지원하지 않는 Class Chain 조건: {descendant}")
+            filters.append(int(index) if index else _any_of(_predicate_groups(predicate)))
+        steps.append(("descendant" if m.group(1) else "child", m.group(2), filters))
+        pos = m.end()
+    return steps
+
+
+# ---- [로케이터] XPath ----
+_XPATH_STEP = re.compile(r"(//|/)([\w.*-]+)((?:\[(?:'[^']*'|\"[^\"]*\"|[^\]'\"])*\])*)")
+_XPATH_FILTER = re.compile(r"\[((?:'[^']*'|\"[^\"]*\"|[^\]'\"])*)\]")
+_XPATH_COND = re.compile(
+    r"""\s*(?:
+        @([\w:-]+)\s*(=|!=)\s*('[^']*'|"[^"]*")
+      | (contains|starts-with)\(\s*@([\w:-]+)\s*,\s*('[^']*'|"[^"]*")\s*\)
+      | @([\w:-]+)
+    )\s*""",
+    re.VERBOSE,
+)
+_XPATH_CONNECTOR = re.compile(r"\s*(and|or)\s+")
+
+
+def _xpath_filter(expr, value):
+    expr = expr.strip()
+    if re.fullmatch(r"-?\d+", expr):
+        return int(expr)
+    if expr == "last()":
+        return -1
+    groups = [[]]
+    pos = 0
+    while True:
+        m = _XPATH_COND.match(expr, pos)
+        if not m:
+            raise SelectorError(f"지원하지 않는 XPath: {value}")
+        attr, op, raw, func, func_attr, func_raw, exists = m.groups()
+        if attr:
+            groups[-1].append(_cond(attr, "==" if op == "=" else op, _unquote(raw)))
+        elif func:
+            groups[-1].append(_cond(func_attr, "contains" if func == "contains" else "startswith", _unquote(func_raw)))
+        else:
+            groups[-1].append(_cond(exists, "exists", ""))
+        pos = m.end()
+        if pos >= len(expr):
+            return _any_of(groups)
+        c = _XPATH_CONNECTOR.match(expr, pos)
+        if not c:
+            raise SelectorError(f"지원하지 않는 XPath: {value}")
+        if c.group(1) == "or":
+            groups.append([])
+        pos = c.end()
+
+
+def _xpath(value):
+    steps = []
+    pos = 0
+    value = value.strip()
+    while pos < len(value):
+        m = _XPATH_STEP.match(value, pos)
+        if not m:
+            raise SelectorError(f"지원하지 않는 XPath: {value}")
+        filters = [_xpath_filter(expr, value) for expr in _XPATH_FILTER.findall(m.group(3))]
+        steps.append(("descendant" if m.group(1) == "//" else "child", m.group(2), filters))
+        pos = m.end()
+    if not steps:
+        raise SelectorError(f"지원하지 않는 XPath: {value}")
+    return steps
+
+
+# ---- [로케이터] 단순 속성 ----
+def _simple(*conds):
+    return [("descendant", "*", [_any_of([[c] for c in conds])])]
+
+
+def _resource_id(value):
+    exact = _cond("resource-id", "==", value)
+    short = _cond("resource-id", "endswith", f":id/{value}")
+    return _simple(exact, short, _cond("name", "==", value))
+
+
+def _css(value):
+    m = re.fullmatch(r"\[(id|name)=\"((?:[^\"\\]|\\.)*)\"\]", value.strip())
+    if m:
+        name = _unquote(f'"{m.group(2)}"')
+        return _resource_id(name) if m.group(1) == "id" else _simple(_cond("name", "==", name))
+    m = re.fullmatch(r"\.([\w.\\-]+)", value.strip())
+    if m:
+        return [("descendant", m.group(1).replace("\\", ""), [])]
+    raise SelectorError(f"지원하지 않는 CSS 선택자: {value}")
+
+
+_COMPILERS = {
+    ANDROID_UIAUTOMATOR: _uiautomator,
+    IOS_PREDICATE: _ios_predicate,
+    IOS_CLASS_CHAIN: _class_chain,
+    XPATH: _xpath,
+    ID: _resource_id,
+    ACCESSIBILITY_ID: lambda v: _simple(_cond("content-desc", "==", v), _cond("name", "==", v)),
+    CLASS_NAME: lambda v: [("descendant", v, [])],
+    NAME: lambda v: _simple(_cond("name", "==", v), _cond("text", "==", v)),
+    CSS_SELECTOR: _css,
+}
+
+
+@lru_cache(maxsize=1024)
+def compile_locator(using, value):
+    """(using, value) -> 단계 목록 (같은 로케이터는 한 번만 해석)"""
+    compiler = _COMPILERS.get(using)
+    if compiler is None:
+        raise SelectorError(f"지원하지 않는 로케이터 방식: {using}")
+    return compiler(value)
+
+
+def _single_pass(steps):
+    """하위 요소 1단계 + (조건들 뒤에 위치 인덱스) 형태인지 -> (이름, 조건 목록, 인덱스 목록) 또는 None"""
+    if len(steps) != 1 or steps[0][0] != "descendant":
+        return None
+    _, name, filters = steps[0]
+    conds = [f for f in filters if not isinstance(f, int)]
+    indexes = [f for f in filters if isinstance(f, int)]
+    if filters[:len(conds)] != conds:
+        return None
+    return name, conds, indexes
+
+
+def find_many(root, locators):
+    """
+    [(using, value), ...] -> 같은 순서의 요소 목록들
+
+    단순 로케이터(하위 요소 1단계 + 조건, UiSelector / NSPredicate / 접근성 ID 대부분)는
+    트리를 한 번만 훑으면서 한꺼번에 평가하고, 여러 단계 XPath / Class Chain 은 find_all 로 따로 평가
+    """
+    results = [None] * len(locators)
+    simple = []
+    for idx, (using, value) in enumerate(locators):
+        plan = _single_pass(compile_locator(using, value)) if using != IOS_CLASS_CHAIN else None
+        if plan is None:
+            results[idx] = find_all(root, using, value)
+        else:
+            simple.append((idx, plan))
+            results[idx] = []
+
+    if simple:
+        for el in root.iter():
+            for idx, (name, conds, _) in simple:
+                if (name == "*" or el.tag == name or _type(el) == name) and all(c(el) for c in conds):
+                    results[idx].append(el)
+        for idx, (_, _, indexes) in simple:
+            for f in indexes:
+                matched = results[idx]
+                index = f - 1 if f > 0 else len(matched) + f
+                results[idx] = [matched[index]] if 0 <= index < len(matched) else []
+    return results
+
+
+def find_all(root, using, value):
+    """스냅샷 루트에서 로케이터에 맞는 요소 목록 (문서 순서)"""
+    steps = compile_locator(using, value)
+    if using == IOS_CLASS_CHAIN:
+        # Class Chain 은 XCUIElementTypeApplication 기준 (page_source 루트는 AppiumAUT)
+        context = root if root.tag != "AppiumAUT" else next(iter(root), root)
+    else:
+        # XPath 의 /hierarchy 처럼 루트 자신도 자식 단계로 찾을 수 있도록 문서 노드로 감쌈
+        context = ET.Element("#document")
+        context.append(root)
+    return _select(context, steps)
@@ -0,0 +1,260 @@
+"""
+드라이버 명령별 지연 계측 (Chrome trace / flamegraph 내보내기)
+
+측정값 0.5초 중 얼마가 find_elements 왕복 같은 감지 비용인지 알 수 없어서,
+드라이버의 command_executor.execute 를 감싸 명령마다 시작 / 끝 시각을 기록하고
+시나리오 / 회차 / 단계 / 감지 구간(span) 태그를 함께 남긴다.
+
+PROFILE 환경 변수가 있을 때만 켜지고, 없으면 instrument / span 은 아무것도 하지 않는다.
+
+    PROFILE=1 python AOS/Search/jobkorea/jobkorea_search_AOS.py          # results/profiles/ 아래
+    PROFILE=results/prof python -m common.scenario scenarios/ios/gov24_search.yaml
+
+    driver = webdriver.Remote(...)
+    profiler.instrument(driver)
+    with profiler.span("로그인 버튼 탭", kind="step"):
+        ...
+
+종료할 때 저장하는 파일
+    <이름>.trace.json : Chrome trace-event (chrome://tracing / Perfetto / speedscope)
+    <이름>.folded     : flamegraph 접힌 스택 (flamegraph.pl / speedscope), 가중치는 마이크로초
+구간 자동 태그: 회차(common.stats.AdaptiveRepeat), 감지(common.waiter.wait_until), 시나리오 단계(common.scenario)
+"""
+
+import atexit
+import contextlib
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, namedtuple
+
+from common import device_env
+
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_PROFILE_DIR = os.path.join(REPO_ROOT, "results", "profiles")
+
+# kind: "command"(드라이버 명령) / "scenario" / "iteration" / "step" / "detect" 등 구간 종류
+# start / end: epoch 초 (스크립트의 start_time / end_time 과 같은 기준)
+# parent: 바깥 구간의 id (없으면 None), tid: 스레드 id
+Event = namedtuple("Event", ["id", "parent", "kind", "name", "start", "end", "tid", "args"])
+
+
+def _command_args(command, params):
+    """기록할 명령 인자 (입력값 / 이미지 등 큰 값은 제외)"""
+    params = params or {}
+    if "using" in params:
+        return {"using": params["using"], "value": params.get("value")}
+    if "script" in params:
+        return {"script": params["script"]}
+    if "appId" in params or "bundleId" in params:
+        return {"app": params.get("appId") or params.get("bundleId")}
+    return {}
+
+
+class CommandProfiler:
+    """
+    명령 / 구간 기록기
+
+    name: 흐름도의 최상위 이름 (기본: 실행한 스크립트 파일 이름)
+    output: 저장 경로 앞부분 (None 이면 내보내지 않음)
+    """
+
+    def __init__(self, name=None, output=None, enabled=True):
+        self.name = name or os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0]
+        self.output = output
+        self.enabled = enabled
+        self.events = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # 고해상도 시계를 epoch 로 환산 (time.time() 은 해상도가 낮은 OS 가 있음)
+        self._epoch = time.time()
+        self._perf = time.perf_counter()
+
+    @classmethod
+    def from_env(cls):
+        """PROFILE=1 -> results/profiles/<스크립트>_<시각>, PROFILE=<폴더> -> 그 폴더 아래"""
+        target = device_env.profile_target()
+        if not target:
+            return cls(enabled=False)
+        profiler = cls()
+        folder = DEFAULT_PROFILE_DIR if target.strip().lower() in ("1", "true", "yes") else target
+        profiler.output = os.path.join(folder, f"{profiler.name}_{time.strftime('%Y%m%d_%H%M%S')}")
+        atexit.register(profiler.save)
+        return profiler
+
+    def now(self):
+        return self._epoch + (time.perf_counter() - self._perf)
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _add(self, event):
+        with self._lock:
+            self.events.append(event)
+
+    # -- 계측 --
+    def instrument(self, driver):
+        """driver.command_executor.execute 를 감싸 명령마다 기록 (같은 드라이버는 한 번만)"""
+        if not self.enabled:
+            return driver
+        executor = driver.command_executor
+        if getattr(executor, "_profiled_by", None) is self:
+            return driver
+        original = executor.execute
+
+        def execute(command, params):
+            stack = self._stack()
+            start = self.now()
+            try:
+                return original(command, params)
+            finally:
+                self._add(Event(
+                    next(self._ids), stack[-1][0] if stack else None, "command", command,
+                    start, self.now(), threading.get_ident(), _command_args(command, params),
+                ))
+
+        executor.execute = execute
+        executor._profiled_by = self
+        return driver
+
+    @contextlib.contextmanager
+    def _span(self, name, kind, args):
+        stack = self._stack()
+        span_id = next(self._ids)
+        parent = stack[-1][0] if stack else None
+        stack.append((span_id, name))
+        start = self.now()
+        try:
+            yield
+        finally:
+            # 안쪽 구간이 닫히지 않고 끝난 경우(예: 생성기 중단)에도 자기 자리까지 정리
+            while stack and stack[-1][0] != span_id:
+                stack.pop()
+            if stack:
+                stack.pop()
+            self._add(Event(span_id, parent, kind, name, start, self.now(), threading.get_ident(), args))
+
+    def span(self, name, kind="span", **args):
+        """이 구간 안에서 실행된 명령에 name 태그를 붙임 (중첩 가능)"""
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self._span(name, kind, args)
+
+    # -- 내보내기 --
+    def _events(self):
+        with self._lock:
+            return sorted(self.events, key=lambda e: (e.start, -e.end))
+
+    def chrome_trace(self):
+        """Chrome trace-event 형식 dict (ts / dur 는 마이크로초)"""
+        events = self._events()
+        origin = min((e.start for e in events), default=self._epoch)
+        trace = [{"name": self.name, "ph": "M", "pid": 1, "tid": 0, "cat": "__metadata",
+                  "args": {"name": self.name}}]
+        for e in events:
+            trace.append({
+                "name": e.name, "cat": e.kind, "ph": "X", "pid": 1, "tid": e.tid,
+                "ts": round((e.start - origin) * 1e6, 1), "dur": round((e.end - e.start) * 1e6, 1),
+                "args": {**e.args, "epoch": round(e.start, 6)},
+            })
+        return {"traceEvents": trace, "displayTimeUnit": "ms", "otherData": {"epoch_origin": origin}}
+
+    def folded(self):
+        """flamegraph 접힌 스택 {"이름;구간;명령": 마이크로초} (구간의 자기 시간 = 호스트 쪽 시간)"""
+        events = self._events()
+        by_id = {e.id: e for e in events}
+        child_time = defaultdict(float)
+        for e in events:
+            if e.parent in by_id:
+                child_time[e.parent] += e.end - e.start
+
+        stacks = defaultdict(int)
+        for e in events:
+            names = []
+            node = e
+            while node is not None:
+                names.append(node.name.replace(";", ":"))
+                node = by_id.get(node.parent)
+            weight = round(max(0.0, e.end - e.start - child_time[e.id]) * 1e6)
+            if weight:
+                stacks[";".join([self.name] + names[::-1])] += weight
+        return dict(stacks)
+
+    def summary(self):
+        """
+        명령별 왕복 시간 목록 / 완료 감지 횟수 / 감지 구간 합계 / 그중 명령 왕복 합계
+
+        준비 대기(common.readiness, kind="ready") 안의 감지는 측정 구간이 아니므로 제외
+        """
+        events = self._events()
+        by_id = {e.id: e for e in events}
+
+        def ancestor(e, kinds):
+            node = by_id.get(e.parent)
+            while node is not None and node.kind not in kinds:
+                node = by_id.get(node.parent)
+            return node
+
+        commands = defaultdict(list)
+        detect_total = detect_commands = 0.0
+        detect_count = 0
+        for e in events:
+            if e.kind == "detect" and ancestor(e, ("ready",)) is None:
+                detect_total += e.end - e.start
+                detect_count += 1
+            if e.kind != "command":
+                continue
+            commands[e.name].append(e.end - e.start)
+            owner = ancestor(e, ("detect", "ready"))
+            if owner is not None and owner.kind == "detect" and ancestor(owner, ("ready",)) is None:
+                detect_commands += e.end - e.start
+        return commands, detect_count, detect_total, detect_commands
+
+    def report(self):
+        commands, detect_count, detect_total, detect_commands = self.summary()
+        if not commands:
+            return
+        print(f"\n🔬 드라이버 명령 계측 ({self.name})")
+        print(f"   {'명령':<28} {'횟수':>6} {'합계(초)':>9} {'평균(ms)':>9} {'최대(ms)':>9}")
+        for name, values in sorted(commands.items(), key=lambda kv: -sum(kv[1])):
+            print(f"   {name[:28]:<28} {len(values):>6} {sum(values):>9.3f}"
+                  f" {1000 * sum(values) / len(values):>9.1f} {1000 * max(values):>9.1f}")
+        if detect_count:
+            share = 100 * detect_commands / detect_total if detect_total else 0.0
+            print(f"   감지 {detect_count}회 / 감지 구간 {detect_total:.3f}초 중 드라이버 명령 왕복 "
+                  f"{detect_commands:.3f}초 ({share:.1f}%)")
+
+    def save(self, output=None):
+        """<output>.trace.json + <output>.folded 저장 -> (trace 경로, folded 경로)"""
+        output = output or self.output
+        if not output or not self.events:
+            return None
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        trace_path, folded_path = f"{output}.trace.json", f"{output}.folded"
+        with open(trace_path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f, ensure_ascii=False)
+        with open(folded_path, "w", encoding="utf-8") as f:
+            f.writelines(f"{stack} {weight}\n" for stack, weight in self.folded().items())
+        self.report()
+        print(f"   💾 {trace_path}\n   💾 {folded_path}")
+        return trace_path, folded_path
+
+
+# 프로세스 기본 기록기 (PROFILE 환경 변수가 있을 때만 켜짐)
+default = CommandProfiler.from_env()
+
+
+def instrument(driver):
+    return default.instrument(driver)
+
+
+def span(name, kind="span", **args):
+    return default.span(name, kind, **args)
@@ -0,0 +1,106 @@
+"""
+준비 대기 (고정 sleep 대체)
+
+측정 구간 밖의 '화면이 뜰 때까지 잠깐 쉬기'용 time.sleep(N) 을
+구체적인 화면 조건(요소 / 화면 안정 / 앱 상태) 대기로 바꾼다.
+조건이 먼저 충족되면 바로 다음 단계로 넘어가고, 예산(budget)을 다 쓰면 기존 sleep 처럼 그냥 진행한다.
+
+단계마다 실제로 걸린 시간과 기존 고정 대기 시간을 기록해 두었다가,
+스크립트 끝에서 report() 로 얼마나 줄었는지 출력한다.
+
+    from common import readiness
+    readiness.ready(uiautomator(driver, '...'), static=3, label="로그인 수단 화면")   # 기존 time.sleep(3)
+    readiness.settle(driver, static=2, label="스크롤")                               # 기존 time.sleep(2)
+    ...
+    readiness.report()
+"""
+
+import time
+from collections import namedtuple
+
+from common import profiler
+from common.detectors import page_source_stable
+from common.scheduler import PollScheduler
+from common.waiter import wait_until
+
+
+# static 만 주고 budget 을 생략하면 기존 고정 대기의 몇 배까지 기다릴지
+BUDGET_RATIO = 2.0
+
+# label: 단계 이름, static: 기존 고정 대기(초), used: 실제 대기(초), ready: 예산 안에 조건 충족 여부
+ReadyRecord = namedtuple("ReadyRecord", ["label", "static", "used", "ready"])
+
+
+class ReadinessLedger:
+    """준비 대기 기록 (단계별 실제 대기 시간 vs 기존 고정 대기 시간)"""
+
+    def __init__(self):
+        self.records = []
+
+    def add(self, label, static, used, ready):
+        self.records.append(ReadyRecord(label, static, used, ready))
+
+    def clear(self):
+        self.records.clear()
+
+    def summary(self):
+        """단계별 {label: (횟수, 기존 합계, 실제 합계, 예산 초과 횟수)}"""
+        result = {}
+        for r in self.records:
+            count, static, used, missed = result.get(r.label, (0, 0.0, 0.0, 0))
+            result[r.label] = (count + 1, static + r.static, used + r.used, missed + (0 if r.ready else 1))
+        return result
+
+    def saved(self):
+        """기존 고정 대기 대비 줄어든 시간(초, 음수면 더 오래 기다림)"""
+        return sum(r.static - r.used for r in self.records)
+
+    def report(self):
+        if not self.records:
+            return
+        print("\n⏳ 준비 대기 리포트 (기존 고정 sleep 대비)")
+        for label, (count, static, used, missed) in self.summary().items():
+            extra = f", 예산 초과 {missed}회" if missed else ""
+            print(f"   - {label}: {count}회, 기존 {static:.1f}초 -> 실제 {used:.2f}초 (평균 {used / count:.2f}초{extra})")
+        total_static = sum(r.static for r in self.records)
+        total_used = sum(r.used for r in self.records)
+        print(f"   ✅ 합계: 기존 {total_static:.1f}초 -> 실제 {total_used:.2f}초 (절약 {self.saved():.1f}초)")
+
+
+# 프로세스 전역 기록
+ledger = ReadinessLedger()
+
+# 준비 대기 전용 스케줄러 (측정 구간 밖이라 예상 구간 전에는 드문드문 확인, 측정 대기와 학습을 섞지 않음)
+scheduler = PollScheduler()
+
+
+def ready(detector, static, budget=None, label=None, record=None):
+    """
+    기존 time.sleep(static) 대신 detector 가 감지될 때까지 대기 -> WaitResult
+
+    static: 대체하는 기존 고정 대기(초). 절약 시간 계산에만 사용
+    budget: 이 단계에서 기다릴 최대 시간(초). 생략 시 static * BUDGET_RATIO
+    예산을 넘겨도 예외 없이 진행 (기존 sleep 과 같은 동작). 필요하면 result.matched 로 확인
+    """
+    record = record or ledger
+    label = label or detector.name
+    budget = budget if budget is not None else static * BUDGET_RATIO
+    started = time.time()
+    with profiler.span(f"준비 {label}", kind="ready"):
+        result = wait_until(detector, started, timeout=budget, scheduler=scheduler, label=f"준비 {label}")
+    used = time.time() - started
+    record.add(label, static, used, result.matched)
+    if result.matched:
+        print(f"   ⏳ [{label}] 준비 완료 {used:.2f}초 (기존 {static}초)")
+    else:
+        print(f"   ⚠️ [{label}] 예산 {budget:.1f}초 안에 준비 신호 없음 -> 그대로 진행")
+    return result
+
+
+def settle(driver, static, budget=None, label=None, quiet=0.3, record=None):
+    """기존 time.sleep(static) 대신 화면 변화가 멈출 때까지 대기 (대기할 요소를 특정하기 어려운 경우)"""
+    return ready(page_source_stable(driver, quiet), static, budget, label or "화면 안정", record)
+
+
+def report():
+    ledger.report()
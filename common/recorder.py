@@ -0,0 +1,538 @@
+"""
+세션 녹화 프록시 (실제 측정을 기록해 두었다가 재생 / 분석)
+
+스크립트와 Appium 서버 사이에 끼워 넣는 WebDriver 프록시.
+모든 명령의 요청 / 응답 / 왕복 시간 / 스크린샷을 트레이스 폴더에 기록하고,
+종료할 때 재생 서버(common.replay_server)용 session.json 을 만들어 둔다.
+
+    python -m common.recorder record --upstream http://127.0.0.1:4723 --port 4724 --name jobkorea_search
+    APPIUM_SERVER_URL=http://127.0.0.1:4724 python AOS/Search/jobkorea/jobkorea_search_AOS.py
+    (Ctrl+C 로 녹화 종료)
+
+    python -m common.replay_server results/traces/jobkorea_search_20250101_120000 --speed 4
+    python -m common.recorder report results/traces/jobkorea_search_20250101_120000
+
+트레이스 폴더
+    meta.json              업스트림 / 시작 시각 / 세션 capability / 화면 크기
+    trace-00001.jsonl.gz   기록 (CHUNK_RECORDS 줄마다 새 청크, 다 찬 청크는 gzip 압축)
+    frames/<sha1>.png      스크린샷 / MJPEG 프레임 (같은 화면은 한 번만 저장)
+    sources/<sha1>.xml     page_source (같은 내용은 한 번만 저장)
+    session.json           재생용 매니페스트 (convert 로 다시 만들 수 있음)
+
+기록 1줄 (명령)
+    {"seq": 12, "t": 요청 시각(epoch), "dt": 왕복(초), "method": "POST", "path": "/session/{sid}/elements",
+     "req": {...}, "status": 200, "res": [...]}
+    스크린샷 / page_source 응답은 {"$frame": "frames/<sha1>.png"} / {"$source": "sources/<sha1>.xml"} 로 바꿔 저장하고,
+    send_keys 로 입력한 값(비밀번호 / 보안숫자)은 기본적으로 가린다 (--keep-input 으로 유지)
+기록 1줄 (MJPEG, --mjpeg 지정 시 화면이 바뀐 프레임만)
+    {"seq": 13, "t": 수신 시각, "mjpeg": "frames/<sha1>.jpg"}
+"""
+
+import argparse
+import base64
+import glob
+import gzip
+import hashlib
+import http.client
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from common import device_env
+from common.replay_server import MOBILE_COMMANDS, SESSION_FILE
+
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_TRACE_DIR = os.path.join(REPO_ROOT, "results", "traces")
+META_FILE = "meta.json"
+CHUNK_RECORDS = 5000
+MASK = "***"
+
+# 재생 구간을 나누는 명령 (화면을 바꾸는 동작)
+TRIGGER_DEVICE_COMMANDS = ("activate_app", "terminate_app", "press_keycode", "hide_keyboard")
+TRIGGER_ELEMENT_COMMANDS = {"click": "click", "value": "send_keys", "clear": "clear"}
+
+_SESSION_PATH = re.compile(r"^/session/[^/]+")
+_ELEMENT_ID = re.compile(r"/element/[^/]+")
+
+
+# ---- [기록] ----
+class TraceWriter:
+    """
+    트레이스 폴더에 기록 (여러 스레드에서 호출해도 안전)
+
+    chunk_records: 청크 1개의 최대 줄 수. 다 찬 청크는 gzip 으로 압축하고,
+                   쓰는 중인 청크는 평문이라 중간에 죽어도 마지막 줄 전까지 읽을 수 있다.
+    keep_input: send_keys 입력값을 가리지 않고 그대로 기록
+    """
+
+    def __init__(self, directory, upstream=None, chunk_records=CHUNK_RECORDS, keep_input=False):
+        self.directory = directory
+        self.chunk_records = chunk_records
+        self.keep_input = keep_input
+        os.makedirs(os.path.join(directory, "frames"), exist_ok=True)
+        os.makedirs(os.path.join(directory, "sources"), exist_ok=True)
+
+        self.meta = {"upstream": upstream, "started_at": time.time(), "capabilities": {}, "window": None}
+        self._lock = threading.Lock()
+        self._blobs = set()
+        self._seq = 0
+        self._chunk = 0
+        self._lines = 0
+        self._file = None
+        self._last_mjpeg = None
+        self._write_meta()
+
+    def _write_meta(self):
+        with open(os.path.join(self.directory, META_FILE), "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, ensure_ascii=False, indent=2)
+
+    def _blob(self, folder, data, ext):
+        """내용 해시로 한 번만 저장 -> 트레이스 폴더 기준 상대 경로"""
+        name = f"{folder}/{hashlib.sha1(data).hexdigest()}{ext}"
+        if name not in self._blobs:
+            path = os.path.join(self.directory, name)
+            if not os.path.exists(path):
+                with open(f"{path}.tmp", "wb") as f:
+                    f.write(data)
+                os.replace(f"{path}.tmp", path)
+            self._blobs.add(name)
+        return name
+
+    def _frame(self, data):
+        return self._blob("frames", data, ".jpg" if data.startswith(b"\xff\xd8") else ".png")
+
+    def _rotate(self):
+        if self._file is not None:
+            self._file.close()
+            _compress(self._file.name)
+        self._chunk += 1
+        self._lines = 0
+        self._file = open(os.path.join(self.directory, f"trace-{self._chunk:05d}.jsonl"), "w", encoding="utf-8")
+
+    def _append(self, record):
+        if self._file is None or self._lines >= self.chunk_records:
+            self._rotate()
+        self._seq += 1
+        self._file.write(json.dumps({"seq": self._seq, **record}, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._file.flush()
+        self._lines += 1
+
+    def command(self, started, dt, method, path, body, status, data):
+        """WebDriver 명령 1개 (요청 본문 / 응답 본문은 bytes)"""
+        path = _SESSION_PATH.sub("/session/{sid}", path.split("?")[0].rstrip("/"))
+        req = _json(body) if body else None
+        if isinstance(req, dict) and path.endswith("/value") and not self.keep_input:
+            req = {key: MASK if key in ("text", "value") else value for key, value in req.items()}
+
+        res = _json(data)
+        value = res.get("value") if isinstance(res, dict) else res
+        with self._lock:
+            if status == 200 and method == "GET" and isinstance(value, str):
+                if path.endswith("/screenshot"):
+                    value = {"$frame": self._frame(base64.b64decode(value))}
+                elif path.endswith("/source"):
+                    value = {"$source": self._blob("sources", value.encode("utf-8"), ".xml")}
+            if status == 200 and isinstance(value, dict):
+                if path == "/session":
+                    self.meta["capabilities"] = value.get("capabilities", {})
+                    self._write_meta()
+                elif path.endswith(("/window/rect", "/window/size")) and self.meta["window"] is None:
+                    self.meta["window"] = value
+                    self._write_meta()
+            self._append({
+                "t": round(started, 6), "dt": round(dt, 6), "method": method, "path": path,
+                **({"req": req} if req is not None else {}), "status": status, "res": value,
+            })
+
+    def mjpeg(self, received_at, jpeg):
+        """MJPEG 프레임 1장 (바로 앞 프레임과 같으면 기록하지 않음)"""
+        with self._lock:
+            name = self._frame(jpeg)
+            if name != self._last_mjpeg:
+                self._last_mjpeg = name
+                self._append({"t": round(received_at, 6), "mjpeg": name})
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                _compress(self._file.name)
+                self._file = None
+            self.meta["finished_at"] = time.time()
+            self._write_meta()
+
+
+def _json(data):
+    try:
+        return json.loads(data)
+    except (ValueError, TypeError):
+        return None
+
+
+def _compress(path):
+    with open(path, "rb") as src, gzip.open(f"{path}.gz", "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(path)
+
+
+def read_trace(directory):
+    """트레이스 폴더의 기록을 순서대로 (압축 / 쓰는 중이던 청크 모두, 잘린 마지막 줄은 무시)"""
+    paths = sorted(glob.glob(os.path.join(directory, "trace-*.jsonl*")))
+    for path in paths:
+        opener = gzip.open if path.endswith(".gz") else open
+        try:
+            with opener(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        break
+        except EOFError:
+            continue
+
+
+def read_meta(directory):
+    with open(os.path.join(directory, META_FILE), encoding="utf-8") as f:
+        return json.load(f)
+
+
+# ---- [프록시] ----
+class _ProxyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _forward(self, method):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        started = time.time()
+        t0 = time.perf_counter()
+        try:
+            conn = self.server.connection()
+            conn.request(method, self.server.prefix + self.path, body=body or None,
+                         headers={"Content-Type": "application/json; charset=utf-8"})
+            response = conn.getresponse()
+            data = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException) as e:
+            self.server.reset_connection()
+            status = 502
+            data = json.dumps({"value": {"error": "unknown error", "message": f"Appium 서버 연결 실패: {e}",
+                                         "stacktrace": ""}}, ensure_ascii=False).encode("utf-8")
+        dt = time.perf_counter() - t0
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        self.wfile.flush()
+        # 응답을 먼저 돌려준 뒤 기록 (기록 시간이 측정에 끼어들지 않도록)
+        self.server.trace.command(started, dt, method, self.path, body, status, data)
+
+    def do_GET(self):
+        self._forward("GET")
+
+    def do_POST(self):
+        self._forward("POST")
+
+    def do_DELETE(self):
+        self._forward("DELETE")
+
+
+class _ProxyServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, upstream, trace):
+        super().__init__(address, _ProxyHandler)
+        parsed = urllib.parse.urlparse(upstream)
+        self.upstream_host = parsed.hostname
+        self.upstream_port = parsed.port or 80
+        self.prefix = parsed.path.rstrip("/")
+        self.trace = trace
+        self._local = threading.local()
+
+    def connection(self):
+        """스레드마다 keep-alive 연결 1개"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.upstream_host, self.upstream_port, timeout=600)
+        return conn
+
+    def reset_connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class MjpegTap:
+    """업스트림 MJPEG 스트림을 함께 읽어 프레임을 기록 (연결될 때까지 1초마다 재시도)"""
+
+    def __init__(self, url, trace):
+        self.url = url
+        self.trace = trace
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="mjpeg-tap", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                with urllib.request.urlopen(self.url, timeout=3) as response:
+                    buf = b""
+                    while not self._stop.is_set():
+                        chunk = response.read1(65536)
+                        if not chunk:
+                            break
+                        buf += chunk
+                        while True:
+                            start = buf.find(b"\xff\xd8")
+                            end = buf.find(b"\xff\xd9", start + 2) if start >= 0 else -1
+                            if end < 0:
+                                break
+                            self.trace.mjpeg(time.time(), buf[start:end + 2])
+                            buf = buf[end + 2:]
+            except OSError:
+                self._stop.wait(1.0)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=2.0)
+
+
+# ---- [재생 매니페스트] ----
+def _rest(path):
+    return path[len("/session/{sid}"):] if path.startswith("/session/{sid}") else None
+
+
+def _trigger(record):
+    """화면을 바꾸는 명령이면 재생 구간 이름 (예: activate_app:kr.or.keis.mo / click), 아니면 None"""
+    rest = _rest(record.get("path", ""))
+    if rest is None or record.get("method") != "POST":
+        return None
+    req = record.get("req") if isinstance(record.get("req"), dict) else {}
+    m = re.fullmatch(r"/appium/device/(\w+)", rest)
+    if m and m.group(1) in TRIGGER_DEVICE_COMMANDS:
+        target = req.get("appId") or req.get("bundleId")
+        return f"{m.group(1)}:{target}" if target else m.group(1)
+    m = re.fullmatch(r"/element/[^/]+/(\w+)", rest)
+    if m and m.group(1) in TRIGGER_ELEMENT_COMMANDS:
+        return TRIGGER_ELEMENT_COMMANDS[m.group(1)]
+    if rest in ("/actions", "/touch/perform", "/touch/multi/perform"):
+        return "actions"
+    if rest == "/back":
+        return "back"
+    if re.fullmatch(r"/execute(?:/sync|/async)?", rest):
+        script = req.get("script", "")
+        if script in MOBILE_COMMANDS:
+            if MOBILE_COMMANDS[script] == "app_state":
+                return None
+            args = (req.get("args") or [{}])[0]
+            target = (args.get("appId") or args.get("bundleId")) if isinstance(args, dict) else None
+            return f"{MOBILE_COMMANDS[script]}:{target}" if target else MOBILE_COMMANDS[script]
+        return script if script.startswith("mobile:") else None
+    return None
+
+
+def _observation(record):
+    """화면 상태를 관측한 기록 -> (관측 시각, 프레임 항목) / 아니면 None"""
+    if "mjpeg" in record:
+        return record["t"], {"screenshot": record["mjpeg"]}
+    rest = _rest(record.get("path", ""))
+    if rest is None:
+        return None
+    # 서버가 화면을 본 시점은 요청 ~ 응답 사이 어딘가 -> 중간 시각
+    when = record["t"] + record.get("dt", 0) / 2
+    res = record.get("res")
+    if record["method"] == "GET" and isinstance(res, dict):
+        if rest == "/screenshot" and "$frame" in res:
+            return when, {"screenshot": res["$frame"]}
+        if rest == "/source" and "$source" in res:
+            return when, {"source": res["$source"]}
+    req = record.get("req")
+    if record["method"] == "POST" and rest in ("/element", "/elements") and isinstance(req, dict):
+        key = f"{req.get('using')}={req.get('value')}"
+        if rest == "/element":
+            return when, {"finds": {key: 1 if record.get("status") == 200 else 0}}
+        if isinstance(res, list):
+            return when, {"finds": {key: len(res)}}
+    return None
+
+
+def build_manifest(directory):
+    """
+    트레이스 -> 재생 매니페스트(session.json)
+
+    화면을 바꾸는 명령마다 새 구간을 시작하고, 그 뒤에 관측된 스크린샷 / page_source /
+    요소 찾기 결과를 구간 시작 기준 시각의 프레임으로 넣는다.
+    요소 찾기 결과는 같은 구간 안에서 최신 값을 이어 받는다 (구간 시작 직후 ~ 첫 관측 전은 이전 화면).
+    """
+    meta = read_meta(directory)
+    capabilities = meta.get("capabilities") or {}
+    platform = str(capabilities.get("platformName", "android")).lower()
+    segments = [{"on": None, "frames": [{"t": 0.0}]}]
+    seg_start = meta.get("started_at", 0)
+    finds = {}
+    for record in read_trace(directory):
+        trigger = _trigger(record)
+        if trigger:
+            seg_start = record["t"]
+            finds = {}
+            segments.append({"on": trigger, "frames": [{"t": 0.0, "finds": {}}]})
+            continue
+        observed = _observation(record)
+        if observed is None:
+            continue
+        when, frame = observed
+        finds.update(frame.get("finds", {}))
+        frame["finds"] = dict(finds)
+        segments[-1]["frames"].append({"t": round(max(0.0, when - seg_start), 4), **frame})
+
+    manifest = {
+        "platform": "ios" if platform == "ios" else "android",
+        "capabilities": {key: value for key, value in capabilities.items()
+                         if key in ("appPackage", "bundleId", "platformName", "deviceName")},
+        "segments": segments,
+    }
+    if meta.get("window"):
+        manifest["window"] = meta["window"]
+    path = os.path.join(directory, SESSION_FILE)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    return path
+
+
+# ---- [분석] 시간이 어디에 쓰였는지 ----
+def command_label(record):
+    """명령 종류 이름 (요소 ID 는 {id} 로, execute 는 스크립트 이름까지)"""
+    rest = _rest(record["path"])
+    if rest is None:
+        return f"{record['method']} {record['path']}"
+    rest = _ELEMENT_ID.sub("/element/{id}", rest)
+    if rest.startswith("/execute") and isinstance(record.get("req"), dict):
+        return f"execute {record['req'].get('script', '')}"
+    return f"{record['method']} {rest or '/session'}"
+
+
+def iterations(records, split):
+    """split 명령(_trigger 이름의 앞부분)이 나올 때마다 새 회차로 나눔"""
+    groups = [[]]
+    for record in records:
+        trigger = _trigger(record) or ""
+        if trigger.split(":")[0] == split and groups[-1]:
+            groups.append([])
+        groups[-1].append(record)
+    return groups
+
+
+def _timing(records):
+    """(서버 왕복 합계, 호스트 합계) - 호스트 = 응답을 받은 뒤 다음 요청까지 (스크립트 처리 / sleep)"""
+    server = sum(r["dt"] for r in records)
+    host = sum(max(0.0, b["t"] - (a["t"] + a["dt"])) for a, b in zip(records, records[1:]))
+    return server, host
+
+
+def report(directory, split=None):
+    records = [r for r in read_trace(directory) if "method" in r]
+    if not records:
+        print("⚠️ 기록된 명령이 없습니다")
+        return
+    frames = sum(1 for r in read_trace(directory) if "mjpeg" in r)
+    server, host = _timing(records)
+    print(f"📼 {directory}")
+    print(f"   명령 {len(records)}개 / MJPEG 프레임 {frames}장 / 서버 왕복 {server:.2f}초 / 호스트 {host:.2f}초")
+
+    by_label = defaultdict(list)
+    for r in records:
+        by_label[command_label(r)].append(r["dt"])
+    print(f"\n   {'명령':<44} {'횟수':>6} {'합계(초)':>9} {'평균(ms)':>9} {'p90(ms)':>9} {'비율':>6}")
+    for label, values in sorted(by_label.items(), key=lambda kv: -sum(kv[1])):
+        total = sum(values)
+        print(f"   {label[:44]:<44} {len(values):>6} {total:>9.3f} {1000 * total / len(values):>9.1f}"
+              f" {1000 * np.percentile(values, 90):>9.1f} {100 * total / server if server else 0:>5.1f}%")
+
+    if split is None:
+        names = [(_trigger(r) or "").split(":")[0] for r in records]
+        split = next((name for name in ("terminate_app", "activate_app") if name in names), None)
+    if split:
+        print(f"\n   회차 구분: {split}")
+        print(f"   {'회차':>4} {'명령':>6} {'서버(초)':>9} {'호스트(초)':>10} {'합계(초)':>9}")
+        groups = iterations(records, split)
+        if (_trigger(groups[0][0]) or "").split(":")[0] != split:
+            # 첫 split 명령 전(세션 생성 / 설정)은 회차가 아닌 준비 구간
+            s, h = _timing(groups.pop(0))
+            print(f"   {'준비':>4} {'':>6} {s:>9.3f} {h:>10.3f} {s + h:>9.3f}")
+        for i, group in enumerate(groups, start=1):
+            s, h = _timing(group)
+            print(f"   {i:>4} {len(group):>6} {s:>9.3f} {h:>10.3f} {s + h:>9.3f}")
+
+
+# ---- [실행] ----
+def record(upstream, port, directory, mjpeg_url=None, keep_input=False, chunk_records=CHUNK_RECORDS):
+    """Ctrl+C 까지 프록시 실행 -> 트레이스 폴더"""
+    trace = TraceWriter(directory, upstream, chunk_records=chunk_records, keep_input=keep_input)
+    server = _ProxyServer(("127.0.0.1", port), upstream, trace)
+    tap = MjpegTap(mjpeg_url, trace).start() if mjpeg_url else None
+    print(f"🔴 녹화 프록시: http://127.0.0.1:{server.server_address[1]} -> {upstream}")
+    print(f"   저장 폴더: {directory}")
+    print(f"   예) {device_env.ENV_SERVER_URL}=http://127.0.0.1:{server.server_address[1]} python <스크립트>")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⏹ 녹화 종료")
+    finally:
+        server.server_close()
+        if tap:
+            tap.close()
+        trace.close()
+    print(f"✅ 재생 매니페스트: {build_manifest(directory)}")
+    return directory
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="WebDriver 녹화 프록시 / 트레이스 분석")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("record", help="프록시 실행 (Ctrl+C 로 종료)")
+    p.add_argument("--upstream", default=None, help="실제 Appium 서버 (기본: APPIUM_SERVER_URL 또는 127.0.0.1:4723)")
+    p.add_argument("--port", type=int, default=4724, help="프록시 포트 (기본 4724)")
+    p.add_argument("--name", default="trace", help="트레이스 이름 (폴더명 앞부분)")
+    p.add_argument("--out", default=None, help="트레이스 폴더 (기본: results/traces/<name>_<시각>)")
+    p.add_argument("--mjpeg", default=None, help="함께 기록할 MJPEG 주소 (예: http://127.0.0.1:9100)")
+    p.add_argument("--keep-input", action="store_true", help="send_keys 입력값을 가리지 않음")
+    p.add_argument("--chunk", type=int, default=CHUNK_RECORDS, help="청크당 기록 줄 수")
+    p = sub.add_parser("convert", help="트레이스 -> 재생용 session.json 다시 만들기")
+    p.add_argument("trace")
+    p = sub.add_parser("report", help="명령별 / 회차별 시간 분석")
+    p.add_argument("trace")
+    p.add_argument("--split", default=None, help="회차를 나눌 명령 (기본: terminate_app / activate_app)")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        upstream = args.upstream or device_env.server_url()
+        out = args.out or os.path.join(DEFAULT_TRACE_DIR, f"{args.name}_{time.strftime('%Y%m%d_%H%M%S')}")
+        record(upstream, args.port, out, args.mjpeg, args.keep_input, args.chunk)
+    elif args.command == "convert":
+        print(f"✅ 저장 완료: {build_manifest(args.trace)}")
+    elif args.command == "report":
+        report(args.trace, args.split)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,594 @@
+"""
+오프라인 재생 서버 (녹화된 세션을 돌려주는 가짜 Appium / WebDriver 서버)
+
+모든 스크립트가 실기기(Galaxy S25 / iPhone 15)와 Appium 서버를 필요로 해서
+감지 / 매칭 / 리포트 코드를 CI(Linux)에서 돌려 볼 수 없다.
+이 서버는 녹화해 둔 page_source 스냅샷과 스크린샷 프레임(시각 포함)을 시간 순서대로 재생하고,
+요소 찾기는 현재 스냅샷에 대해 로컬로 평가해서(common.page_source, 속성 색인 common.source_index) 응답한다.
+스크립트는 수정 없이 APPIUM_SERVER_URL 만 바꿔서 실행하면 된다.
+
+    python -m common.replay_server recordings/work24_app_start --port 4723
+    APPIUM_SERVER_URL=http://127.0.0.1:4723 python AOS/APP_Start/app_start.py
+
+MJPEG 화면 스트림(기본 9100, MJPEG_SERVER_PORT)도 같은 프레임으로 제공하므로
+이미지 매칭 스크립트(common.frame_source)도 그대로 동작한다.
+
+녹화 폴더 구조 (session.json + 파일)
+
+    {
+      "platform": "android",
+      "capabilities": {"appPackage": "kr.or.keis.mo"},
+      "window": {"width": 1080, "height": 2340},
+      "segments": [
+        {"on": "terminate_app", "frames": [{"t": 0, "source": "home.xml", "screenshot": "home.png"}]},
+        {"on": "activate_app:kr.or.keis.mo", "frames": [
+          {"t": 0.0, "source": "splash.xml", "screenshot": "splash.png"},
+          {"t": 1.234, "source": "main.xml", "screenshot": "main.png",
+           "finds": {"-android uiautomator=new UiSelector().text(\\"전체메뉴\\")": 1}}
+        ]}
+      ]
+    }
+
+- 구간(segment)은 on 에 적은 명령을 받은 순간 시작되고, 프레임은 구간 시작 후 t 초에 화면에 나타난다
+  (마지막 프레임은 다음 구간이 시작될 때까지 유지).
+  명령 이름: activate_app / terminate_app / click / send_keys / clear / actions / back /
+  press_keycode / hide_keyboard / "mobile: clickGesture" 같은 execute_script 이름.
+  ("mobile: source" 는 화면 조회라 구간을 넘기지 않고 현재 스냅샷을 돌려줌, format=json 이면 JSON 으로 변환)
+  "명령:대상" 으로 쓰면 대상까지 같아야 한다 (앱 ID, click 은 요소 텍스트).
+  명령을 받으면 다음 구간부터 순환하며 처음 맞는 구간으로 넘어간다. 첫 구간에 on 이 없으면 세션 시작과 함께 재생.
+- source / screenshot 이 없는 프레임은 앞 프레임 것을 이어 쓴다. source 가 "<" 로 시작하면 XML 본문으로 본다.
+- finds: "방식=값" -> 개수. 녹화된 요소 찾기 응답으로, 스냅샷 평가보다 우선한다.
+- 구간 하나만 재생할 때는 segments 대신 최상위 "frames" 만 적어도 된다.
+"""
+
+import argparse
+import base64
+import json
+import os
+import re
+import threading
+import time
+import traceback
+import uuid
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from common import device_env, page_source, source_index
+from common.detectors import APP_NOT_RUNNING, APP_RUNNING_FOREGROUND
+
+
+SESSION_FILE = "session.json"
+W3C_ELEMENT_KEY = "element-6066-11e4-a52f-4f6b2e1b1c2d"
+MJPEG_BOUNDARY = "--BoundaryString"
+
+# on: 구간을 시작시키는 명령 (None 이면 세션 시작), frames: t 순서로 정렬된 프레임 목록
+Segment = namedtuple("Segment", ["on", "frames"])
+
+# execute_script 로 들어오는 앱 명령 -> 기존 엔드포인트와 같은 명령 이름
+MOBILE_COMMANDS = {
+    "mobile: activateApp": "activate_app",
+    "mobile: terminateApp": "terminate_app",
+    "mobile: queryAppState": "app_state",
+}
+
+
+class WebDriverError(Exception):
+    """W3C 오류 응답 (status, error 코드, 메시지)"""
+
+    def __init__(self, status, error, message):
+        super().__init__(message)
+        self.status = status
+        self.error = error
+
+
+# ---- [녹화] ----
+class Recording:
+    """
+    녹화 폴더(session.json) 로더
+
+    파일 내용 / 파싱한 스냅샷 / JPEG 변환 결과는 처음 쓸 때 한 번만 만들어 둔다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        manifest_path = os.path.join(path, SESSION_FILE) if os.path.isdir(path) else path
+        self.directory = os.path.dirname(os.path.abspath(manifest_path))
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        self.platform = manifest.get("platform", "android").lower()
+        self.capabilities = manifest.get("capabilities", {})
+        self.window = {"x": 0, "y": 0, "width": 1080, "height": 2340, **manifest.get("window", {})}
+        raw = manifest.get("segments") or [{"on": None, "frames": manifest.get("frames", [])}]
+
+        self.segments = []
+        source = screenshot = None
+        for i, seg in enumerate(raw):
+            frames = []
+            for frame in sorted(seg.get("frames", []), key=lambda f: f.get("t", 0)):
+                # 비어 있는 항목은 앞 프레임 것을 이어 씀
+                source = frame.get("source", source)
+                screenshot = frame.get("screenshot", screenshot)
+                frames.append({**frame, "t": float(frame.get("t", 0)), "source": source, "screenshot": screenshot})
+            if not frames:
+                raise ValueError(f"{manifest_path}: {i + 1}번째 구간에 프레임이 없습니다")
+            self.segments.append(Segment(seg.get("on"), frames))
+        if not self.segments:
+            raise ValueError(f"{manifest_path}: 재생할 프레임이 없습니다")
+
+        self._cache = {}
+        self._lock = threading.RLock()
+
+    def _cached(self, key, build):
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = build()
+            return self._cache[key]
+
+    def _read(self, name, mode="rb"):
+        with open(os.path.join(self.directory, name), mode, **({} if "b" in mode else {"encoding": "utf-8"})) as f:
+            return f.read()
+
+    def source(self, frame):
+        name = frame["source"]
+        if name is None:
+            raise WebDriverError(500, "unknown error", "녹화에 page_source 가 없습니다")
+        if name.lstrip().startswith("<"):
+            return name
+        return self._cached(("source", name), lambda: self._read(name, "r"))
+
+    def index(self, frame):
+        """파싱 + 속성 색인한 스냅샷 (프레임마다 1회, common.source_index)"""
+        return self._cached(
+            ("index", frame["source"]), lambda: source_index.SourceIndex.from_source(self.source(frame))
+        )
+
+    def root(self, frame):
+        """파싱한 스냅샷 루트"""
+        return self.index(frame).root
+
+    def screenshot(self, frame):
+        name = frame["screenshot"]
+        if name is None:
+            raise WebDriverError(500, "unknown error", "녹화에 스크린샷이 없습니다")
+        return self._cached(("screenshot", name), lambda: self._read(name))
+
+    def jpeg(self, frame):
+        """MJPEG 스트림용 JPEG (PNG 녹화는 OpenCV 로 변환)"""
+        data = self.screenshot(frame)
+        if data.startswith(b"\xff\xd8"):
+            return data
+
+        def encode():
+            import cv2
+            from common.image_match import decode_screenshot
+
+            ok, buf = cv2.imencode(".jpg", decode_screenshot(data))
+            if not ok:
+                raise ValueError(f"JPEG 변환 실패: {frame['screenshot']}")
+            return buf.tobytes()
+
+        return self._cached(("jpeg", frame["screenshot"]), encode)
+
+
+# ---- [재생 상태] ----
+class Replay:
+    """
+    현재 구간 / 경과 시간 -> 현재 프레임
+
+    speed: 재생 배속 (2.0 이면 녹화보다 2배 빠르게 화면이 바뀜)
+    """
+
+    def __init__(self, recording, speed=1.0, verbose=False):
+        self.recording = recording
+        self.speed = speed
+        self.verbose = verbose
+        self._lock = threading.Lock()
+        self._index = -1
+        self._started = time.monotonic()
+        self.apps = {}
+        app = recording.capabilities.get("appPackage") or recording.capabilities.get("bundleId")
+        if app:
+            self.apps[app] = APP_RUNNING_FOREGROUND
+        if recording.segments[0].on is None:
+            self._index = 0
+
+    def command(self, name, target=None):
+        """명령 수신 -> 맞는 구간이 있으면 그 구간을 처음부터 재생"""
+        keys = {name} if target is None else {name, f"{name}:{target}"}
+        segments = self.recording.segments
+        with self._lock:
+            for step in range(1, len(segments) + 1):
+                index = (self._index + step) % len(segments)
+                if segments[index].on in keys:
+                    self._index = index
+                    self._started = time.monotonic()
+                    if self.verbose:
+                        print(f"   ▶️ 구간 {index + 1}/{len(segments)} 재생 ({segments[index].on})")
+                    return True
+        return False
+
+    def frame(self):
+        """지금 화면에 보여야 할 프레임"""
+        with self._lock:
+            if self._index < 0:
+                return self.recording.segments[0].frames[0]
+            elapsed = (time.monotonic() - self._started) * self.speed
+            frames = self.recording.segments[self._index].frames
+        current = frames[0]
+        for frame in frames:
+            if frame["t"] > elapsed:
+                break
+            current = frame
+        return current
+
+
+# ---- [HTTP] WebDriver 엔드포인트 ----
+class _Session:
+    def __init__(self, capabilities):
+        self.id = uuid.uuid4().hex
+        self.capabilities = capabilities
+        self.elements = {}
+        self.settings = {}
+        self.timeouts = {"implicit": 0, "pageLoad": 300000, "script": 30000}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "ReplayAppium/1.0"
+
+    def log_message(self, fmt, *args):
+        if self.server.replay.verbose:
+            print(f"   🌐 {fmt % args}")
+
+    # -- 요청 / 응답 --
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return {}
+
+    def _send(self, status, value):
+        data = json.dumps({"value": value}, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _dispatch(self, method):
+        body = self._body() if method == "POST" else {}
+        try:
+            if self.server.latency:
+                time.sleep(self.server.latency)
+            value = self.server.dispatch(method, self.path.split("?")[0].rstrip("/"), body)
+            self._send(200, value)
+        except WebDriverError as e:
+            self._send(e.status, {"error": e.error, "message": str(e), "stacktrace": ""})
+        except page_source.SelectorError as e:
+            self._send(400, {"error": "invalid selector", "message": str(e), "stacktrace": ""})
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        except Exception as e:
+            # 잘못된 요청(키 누락 / 인덱스 오류 ...)도 연결을 끊지 않고 W3C 500 으로 응답
+            self._send(500, {"error": "unknown error", "message": f"{e.__class__.__name__}: {e}",
+                             "stacktrace": traceback.format_exc()})
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+
+class _MjpegHandler(BaseHTTPRequestHandler):
+    """현재 프레임을 framerate 에 맞춰 multipart JPEG 로 계속 전송 (WDA MJPEG 서버와 같은 형식)"""
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def do_GET(self):
+        replay = self.server.replay
+        self.send_response(200)
+        self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}")
+        self.end_headers()
+        try:
+            while True:
+                jpeg = replay.recording.jpeg(replay.frame())
+                self.wfile.write(
+                    f"{MJPEG_BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n".encode()
+                    + jpeg + b"\r\n"
+                )
+                self.wfile.flush()
+                time.sleep(1.0 / self.server.framerate)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class _AppiumServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, replay, latency=0.0):
+        super().__init__(address, _Handler)
+        self.replay = replay
+        self.latency = latency
+        self.sessions = {}
+        self._routes = [
+            ("POST", r"/element", self._find_one),
+            ("POST", r"/elements", self._find_many),
+            ("POST", r"/element/([^/]+)/element", self._find_one),
+            ("POST", r"/element/([^/]+)/elements", self._find_many),
+            ("POST", r"/element/([^/]+)/click", self._click),
+            ("POST", r"/element/([^/]+)/value", self._element_command("send_keys")),
+            ("POST", r"/element/([^/]+)/clear", self._element_command("clear")),
+            ("GET", r"/element/([^/]+)/text", lambda s, b, eid: page_source.text(self._element(s, eid))),
+            ("GET", r"/element/([^/]+)/name", lambda s, b, eid: page_source.attribute(self._element(s, eid), "class")),
+            ("GET", r"/element/([^/]+)/rect", lambda s, b, eid: page_source.rect(self._element(s, eid))),
+            ("GET", r"/element/([^/]+)/attribute/([^/]+)", self._attribute),
+            ("GET", r"/element/([^/]+)/(displayed|enabled|selected)", self._state),
+            ("GET", r"/source", lambda s, b: self.replay.recording.source(self.replay.frame())),
+            ("GET", r"/screenshot", self._screenshot),
+            ("GET", r"/window/rect", lambda s, b: self.replay.recording.window),
+            ("GET", r"/window/([^/]+)/size", lambda s, b, handle: self._size()),
+            ("GET", r"/window/size", lambda s, b: self._size()),
+            ("POST", r"/appium/device/activate_app", lambda s, b: self._app("activate_app", b)),
+            ("POST", r"/appium/device/terminate_app", lambda s, b: self._app("terminate_app", b)),
+            ("POST", r"/appium/device/app_state", lambda s, b: self._app("app_state", b)),
+            ("GET", r"/appium/device/is_keyboard_shown", lambda s, b: False),
+            ("POST", r"/appium/device/([^/]+)", lambda s, b, name: self._command(name)),
+            ("POST", r"/appium/settings", self._update_settings),
+            ("GET", r"/appium/settings", lambda s, b: s.settings),
+            ("POST", r"/execute(?:/sync|/async)?", self._execute),
+            ("POST", r"/actions", lambda s, b: self._command("actions")),
+            ("POST", r"/touch/(?:multi/)?perform", lambda s, b: self._command("actions")),
+            ("POST", r"/back", lambda s, b: self._command("back")),
+            ("POST", r"/timeouts", lambda s, b: s.timeouts.update(b)),
+            ("GET", r"/timeouts", lambda s, b: s.timeouts),
+        ]
+
+    # -- 라우팅 --
+    def dispatch(self, method, path, body):
+        if path == "/status":
+            return {"ready": True, "message": "replay server", "build": {"version": "replay"}}
+        if path == "/session" and method == "POST":
+            return self._new_session(body)
+
+        m = re.match(r"/session/([^/]+)(.*)", path)
+        if not m:
+            raise WebDriverError(404, "unknown command", f"{method} {path}")
+        session = self.sessions.get(m.group(1))
+        if session is None:
+            raise WebDriverError(404, "invalid session id", f"세션 없음: {m.group(1)}")
+        rest = m.group(2)
+        if not rest and method == "DELETE":
+            del self.sessions[session.id]
+            return None
+        if not rest and method == "GET":
+            return session.capabilities
+
+        for route_method, pattern, handler in self._routes:
+            route = re.fullmatch(pattern, rest)
+            if route_method == method and route:
+                return handler(session, body, *route.groups())
+        # 화면에 영향이 없는 나머지 명령은 성공으로 응답 (구간 전환 이름으로는 사용 가능)
+        self._command(rest.strip("/").split("/")[-1])
+        return None
+
+    def _new_session(self, body):
+        caps = body.get("capabilities", {})
+        requested = {**caps.get("alwaysMatch", {}), **(caps.get("firstMatch") or [{}])[0]}
+        capabilities = {
+            **{key.split(":", 1)[-1]: value for key, value in requested.items()},
+            **self.replay.recording.capabilities,
+            "platformName": "Android" if self.replay.recording.platform == "android" else "iOS",
+        }
+        session = _Session(capabilities)
+        self.sessions[session.id] = session
+        print(f"   🔌 재생 세션 시작 ({self.replay.recording.path})")
+        return {"sessionId": session.id, "capabilities": capabilities}
+
+    # -- 명령 --
+    def _command(self, name, target=None):
+        self.replay.command(name, target)
+        return None
+
+    def _size(self):
+        window = self.replay.recording.window
+        return {"width": window["width"], "height": window["height"]}
+
+    def _screenshot(self, session, body):
+        return base64.b64encode(self.replay.recording.screenshot(self.replay.frame())).decode("ascii")
+
+    def _update_settings(self, session, body):
+        session.settings.update(body.get("settings", {}))
+        return None
+
+    def _app(self, name, args):
+        app_id = args.get("appId") or args.get("bundleId") or args.get("app_id")
+        if name == "app_state":
+            return self.replay.apps.get(app_id, APP_NOT_RUNNING)
+        running = self.replay.apps.get(app_id) == APP_RUNNING_FOREGROUND
+        self.replay.apps[app_id] = APP_RUNNING_FOREGROUND if name == "activate_app" else APP_NOT_RUNNING
+        self.replay.command(name, app_id)
+        return running if name == "terminate_app" else None
+
+    def _execute(self, session, body):
+        script = body.get("script", "")
+        args = body.get("args") or [{}]
+        if script in MOBILE_COMMANDS:
+            return self._app(MOBILE_COMMANDS[script], args[0] if isinstance(args[0], dict) else {})
+        if script == "mobile: source":
+            return self._mobile_source(args[0] if isinstance(args[0], dict) else {})
+        return self._command(script)
+
+    def _mobile_source(self, args):
+        """현재 프레임 스냅샷 (format=json 이면 XCUITest JSON, 그 밖은 XML)"""
+        source = self.replay.recording.source(self.replay.frame())
+        if args.get("format") == "json":
+            return source_index.to_json(source)
+        return source_index.to_xml(source)
+
+    # -- 요소 --
+    def _find(self, session, body):
+        using, value = body.get("using"), body.get("value")
+        frame = self.replay.frame()
+        found = self.replay.recording.index(frame).find_all(using, value) if frame["source"] else []
+        recorded = frame.get("finds", {}).get(f"{using}={value}")
+        if recorded is not None:
+            # 녹화된 응답 개수에 맞춤 (스냅샷에 없는 요소는 빈 요소로 채움)
+            found = (found + [None] * recorded)[:recorded]
+        results = []
+        for element in found:
+            eid = uuid.uuid4().hex
+            session.elements[eid] = element
+            results.append({W3C_ELEMENT_KEY: eid, "ELEMENT": eid})
+        return results
+
+    # 요소 기준 찾기(/element/<id>/element)도 현재 화면 전체에서 찾음
+    def _find_one(self, session, body, *parent):
+        # implicit wait 가 설정되어 있으면 그 시간 동안 다시 찾음 (Appium 서버와 같은 동작)
+        deadline = time.monotonic() + session.timeouts.get("implicit", 0) / 1000
+        results = self._find(session, body)
+        while not results and time.monotonic() < deadline:
+            time.sleep(0.05)
+            results = self._find(session, body)
+        if not results:
+            raise WebDriverError(404, "no such element", f"요소 없음: {body.get('using')}={body.get('value')}")
+        return results[0]
+
+    def _find_many(self, session, body, *parent):
+        return self._find(session, body)
+
+    def _element(self, session, eid):
+        if eid not in session.elements:
+            raise WebDriverError(404, "no such element", f"알 수 없는 요소: {eid}")
+        element = session.elements[eid]
+        return element if element is not None else page_source.parse("<element/>")
+
+    def _click(self, session, body, eid):
+        self.replay.command("click", page_source.text(self._element(session, eid)))
+        return None
+
+    def _element_command(self, name):
+        def handler(session, body, eid):
+            self._element(session, eid)
+            return self._command(name)
+        return handler
+
+    def _attribute(self, session, body, eid, name):
+        return page_source.attribute(self._element(session, eid), name)
+
+    def _state(self, session, body, eid, name):
+        value = self._element(session, eid).get("visible" if name == "displayed" else name)
+        return value is None or value.lower() in page_source.TRUE_VALUES
+
+
+class _MjpegServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, replay, framerate):
+        super().__init__(address, _MjpegHandler)
+        self.replay = replay
+        self.framerate = framerate
+
+
+# ---- [서버] ----
+class ReplayServer:
+    """
+    재생 서버 묶음 (WebDriver + MJPEG). with 문 / start() 로 백그라운드 실행
+
+    port: WebDriver 포트 (0 이면 빈 포트를 자동 할당, url 로 확인)
+    mjpeg_port: MJPEG 스트림 포트 (None 이면 MJPEG 없이 스크린샷만)
+    latency: 명령마다 넣을 인위적 지연(초) - 실제 서버 왕복 시간 흉내
+    """
+
+    def __init__(self, recording, port=4723, mjpeg_port=None, host="127.0.0.1",
+                 speed=1.0, latency=0.0, framerate=30, verbose=False):
+        if not isinstance(recording, Recording):
+            recording = Recording(recording)
+        self.replay = Replay(recording, speed=speed, verbose=verbose)
+        self.appium = _AppiumServer((host, port), self.replay, latency)
+        self.mjpeg = None
+        if mjpeg_port is not None:
+            try:
+                recording.jpeg(recording.segments[0].frames[0])
+                self.mjpeg = _MjpegServer((host, mjpeg_port), self.replay, framerate)
+            except Exception as e:
+                print(f"   ⚠️ MJPEG 스트림 제공 불가 ({e}) -> 스크린샷만 제공")
+        self._threads = []
+
+    @property
+    def url(self):
+        host, port = self.appium.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def mjpeg_port(self):
+        return self.mjpeg.server_address[1] if self.mjpeg else None
+
+    def start(self):
+        for server in (self.appium, self.mjpeg):
+            if server is not None:
+                thread = threading.Thread(target=server.serve_forever, name="replay-server", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        return self
+
+    def close(self):
+        for server in (self.appium, self.mjpeg):
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="녹화 세션 재생용 가짜 Appium 서버")
+    parser.add_argument("recording", help="녹화 폴더 (session.json) 또는 json 파일 경로")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4723, help="WebDriver 포트 (기본 4723)")
+    parser.add_argument("--mjpeg-port", type=int, default=None,
+                        help="MJPEG 포트 (기본: MJPEG_SERVER_PORT 또는 iOS 9100 / AOS 7810)")
+    parser.add_argument("--no-mjpeg", action="store_true", help="MJPEG 스트림 없이 스크린샷만 제공")
+    parser.add_argument("--speed", type=float, default=1.0, help="재생 배속")
+    parser.add_argument("--latency", type=float, default=0.0, help="명령마다 넣을 지연(초)")
+    parser.add_argument("--framerate", type=int, default=30, help="MJPEG 초당 프레임")
+    parser.add_argument("-v", "--verbose", action="store_true", help="요청 / 구간 전환 출력")
+    args = parser.parse_args(argv)
+
+    recording = Recording(args.recording)
+    mjpeg_port = args.mjpeg_port if args.mjpeg_port is not None else device_env.mjpeg_port(recording.platform)
+    if args.no_mjpeg:
+        mjpeg_port = None
+    server = ReplayServer(
+        recording, port=args.port, mjpeg_port=mjpeg_port, host=args.host,
+        speed=args.speed, latency=args.latency, framerate=args.framerate, verbose=args.verbose,
+    )
+    frames = sum(len(seg.frames) for seg in recording.segments)
+    print(f"🎬 재생 서버: {server.url} ({recording.platform}, 구간 {len(recording.segments)}개 / 프레임 {frames}개)")
+    if server.mjpeg:
+        print(f"🎥 MJPEG: http://{args.host}:{server.mjpeg_port}")
+    print(f"   예) {device_env.ENV_SERVER_URL}={server.url} python <스크립트>")
+    try:
+        server.start()
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\n⏹ 재생 서버 종료")
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
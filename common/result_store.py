@@ -0,0 +1,479 @@
+"""
+통합 결과 저장소 (SQLite)
+
+스크립트마다 헤더 / 통계 행 / 파일명 규칙이 조금씩 다른 CSV 대신,
+회차별 원본 기록(앱 / 플랫폼 / 시나리오 / 기기 / 빌드 / 시각 / 감지기 / 상태)을
+하나의 SQLite 파일(results/results.sqlite3)에 계속 쌓는다.
+기존 형식의 CSV 는 저장소에서 뽑아내는 파생 결과물(export_csv)로만 만든다.
+
+    store = ResultStore()
+    run = store.start_run(app="gov24", platform="ios", scenario="search", metric="검색반응속도(초)")
+    run.add(1, "성공", measured_at, duration, start_time=start_time, end_time=end_time, detector="predicate")
+    store.export_csv(run.run_id, "ios_gov24_search_result.csv")
+
+    python -m common.result_store import AOS iOS             # 기존 CSV 일괄 적재 (1회)
+    python -m common.result_store runs                       # 실행 목록
+    python -m common.result_store query "SELECT app, scenario, avg(duration) FROM results_v GROUP BY 1, 2"
+    python -m common.result_store export 12 out.csv          # 기존 형식 CSV
+    python -m common.result_store parquet results.parquet    # Parquet (pandas + pyarrow 필요)
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import time
+
+from common import device_env, stats
+from common.checkpoint import atomic_open
+
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_DB = os.path.join(REPO_ROOT, "results", "results.sqlite3")
+ENV_DB = "RESULT_DB"
+ENV_BUILD = "APP_BUILD"
+
+STATUS_OK = "성공"
+STATUS_FAIL = "실패"
+
+# 기존 CSV 에서 데이터가 아닌 통계 행의 첫 칸
+STATS_LABELS = ("통계", "요약", "Summary", "통계(기기)")
+
+# 기존 CSV 공통 통계 컬럼
+STATS_COLUMNS = ["평균(초)", "최소(초)", "최대(초)", "표준편차(초)"]
+
+# 폴더 / 파일명 표기 -> 앱 키
+APP_ALIASES = {
+    "gov24": "gov24", "minwon24": "gov24", "정부24": "gov24",
+    "work24": "work24", "고용24": "work24",
+    "jobkorea": "jobkorea", "잡코리아": "jobkorea",
+}
+
+# 폴더 이름(소문자, '_' / '_ios' 제거) -> 시나리오 키
+SCENARIO_ALIASES = {
+    "appstart": "app_start",
+    "idpwlogin": "idpw_login",
+    "certificatelogin": "certificate_login",
+    "search": "search",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id     INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at TEXT NOT NULL,
+    app        TEXT,
+    platform   TEXT,
+    scenario   TEXT,
+    device     TEXT,
+    build      TEXT,
+    script     TEXT,
+    metric     TEXT,
+    source     TEXT,
+    finished_at TEXT,
+    stop_reason TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id      INTEGER NOT NULL REFERENCES runs(run_id),
+    iteration   INTEGER NOT NULL,
+    status      TEXT NOT NULL,
+    measured_at TEXT,
+    start_time  REAL,
+    end_time    REAL,
+    duration    REAL,
+    detector    TEXT,
+    extra       TEXT
+);
+CREATE TABLE IF NOT EXISTS calibrations (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    measured_at TEXT NOT NULL,
+    device      TEXT,
+    platform    TEXT,
+    kind        TEXT,
+    detector    TEXT,
+    samples     INTEGER,
+    found       REAL,
+    cost        REAL,
+    lag         REAL,
+    lag_sd      REAL,
+    period      REAL
+);
+CREATE INDEX IF NOT EXISTS results_run ON results(run_id, iteration);
+CREATE INDEX IF NOT EXISTS runs_key ON runs(app, platform, scenario);
+CREATE INDEX IF NOT EXISTS calibrations_key ON calibrations(device, platform, kind, detector);
+CREATE VIEW IF NOT EXISTS results_v AS
+    SELECT r.run_id, r.started_at, r.app, r.platform, r.scenario, r.device, r.build, r.script, r.metric,
+           x.iteration, x.status, x.measured_at, x.start_time, x.end_time, x.duration, x.detector, x.extra
+    FROM results x JOIN runs r ON r.run_id = x.run_id;
+"""
+
+
+def default_db():
+    return os.environ.get(ENV_DB) or DEFAULT_DB
+
+
+# ---- [클래스] 저장소 ----
+class Run:
+    """실행 1회 (start_run 반환값). add() 할 때마다 바로 커밋 (synchronous=FULL 이라 fsync 까지 완료)"""
+
+    def __init__(self, store, run_id):
+        self.store = store
+        self.run_id = run_id
+
+    def add(self, iteration, status, measured_at, duration, start_time=None, end_time=None,
+            detector=None, **extra):
+        """
+        회차 1개 기록
+
+        duration: 소요 시간(초). 실패면 None / 0
+        extra: 스크립트별 부가 값 (직전 프레임, logcat 기기 측정 등) -> JSON
+        """
+        self.store.conn.execute(
+            "INSERT INTO results (run_id, iteration, status, measured_at, start_time, end_time,"
+            " duration, detector, extra) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (self.run_id, iteration, status, measured_at, start_time, end_time,
+             duration if duration else None, detector,
+             json.dumps(extra, ensure_ascii=False, default=str) if extra else None),
+        )
+        self.store.conn.commit()
+
+    def completed(self):
+        """기록된 마지막 회차 번호 (없으면 0)"""
+        row = self.store.conn.execute(
+            "SELECT max(iteration) FROM results WHERE run_id = ?", (self.run_id,)
+        ).fetchone()
+        return row[0] or 0
+
+    def finish(self, reason=None):
+        """
+        모든 회차가 끝났음을 표시 (끝나지 않은 실행만 resume 대상)
+
+        reason: 반복을 멈춘 이유 (common.stats.AdaptiveRepeat.reason)
+        """
+        self.store.conn.execute(
+            "UPDATE runs SET finished_at = ?, stop_reason = ? WHERE run_id = ?",
+            (time.strftime("%Y-%m-%d %H:%M:%S"), reason, self.run_id),
+        )
+        self.store.conn.commit()
+
+
+class ResultStore:
+    """
+    path: SQLite 파일 (기본: RESULT_DB 환경 변수 또는 results/results.sqlite3)
+
+    병렬 러너로 여러 프로세스가 같은 파일에 동시에 써도 되도록 WAL 모드 + busy timeout 사용
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_db()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # 커밋마다 fsync (회차 기록 직후 프로세스가 죽어도 남도록)
+        self.conn.execute("PRAGMA synchronous=FULL")
+        self.conn.executescript(SCHEMA)
+        columns = [r[1] for r in self.conn.execute("PRAGMA table_info(runs)")]
+        for column in ("finished_at", "stop_reason"):
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE runs ADD COLUMN {column} TEXT")
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start_run(self, app, platform, scenario, metric="반응속도(초)", device=None, build=None,
+                  script=None, started_at=None, source=None, resume=False):
+        """
+        실행 등록 -> Run
+
+        device / build: 기본값은 DEVICE_LABEL / APP_BUILD 환경 변수
+        script: 측정 스크립트 / 시나리오 파일 경로 (저장소 루트 기준 상대 경로로 기록)
+        resume: 같은 앱 / 플랫폼 / 시나리오 / 기기 / 스크립트의 끝나지 않은 실행이 있으면 그 실행을 이어서 사용
+                (Run.completed() 다음 회차부터 측정)
+        """
+        device = device or device_env.device_label("")
+        script = script and os.path.relpath(os.path.abspath(script), REPO_ROOT)
+        if resume:
+            rows = self.query(
+                "SELECT run_id FROM runs WHERE app IS ? AND platform IS ? AND scenario IS ? AND device IS ?"
+                " AND script IS ? AND finished_at IS NULL AND source IS NULL ORDER BY run_id DESC LIMIT 1",
+                (app, platform, scenario, device, script),
+            )
+            if rows:
+                run = Run(self, rows[0]["run_id"])
+                if run.completed():
+                    print(f"♻️ 이전 실행 이어서 측정: run {run.run_id}, {run.completed()}회차까지 완료")
+                    return run
+
+        cur = self.conn.execute(
+            "INSERT INTO runs (started_at, app, platform, scenario, device, build, script, metric, source)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (started_at or time.strftime("%Y-%m-%d %H:%M:%S"), app, platform, scenario,
+             device, build or os.environ.get(ENV_BUILD, ""), script, metric, source),
+        )
+        self.conn.commit()
+        return Run(self, cur.lastrowid)
+
+    def run(self, run_id):
+        cur = self.conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,))
+        row = cur.fetchone()
+        return dict(zip([c[0] for c in cur.description], row)) if row else None
+
+    def rows(self, run_id):
+        """run_id 의 회차 기록 -> [dict] (회차 순)"""
+        return self.query("SELECT * FROM results WHERE run_id = ? ORDER BY iteration, id", (run_id,))
+
+    def query(self, sql, params=()):
+        cur = self.conn.execute(sql, params)
+        columns = [c[0] for c in cur.description]
+        return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+    # -- 감지 비용 보정 (common.calibration) --
+    def add_calibration(self, calibration):
+        """common.calibration.Calibration 1건 저장"""
+        self.conn.execute(
+            "INSERT INTO calibrations (measured_at, device, platform, kind, detector, samples, found, cost, lag,"
+            " lag_sd, period) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (calibration.measured_at, calibration.device, calibration.platform, calibration.kind,
+             calibration.detector, calibration.samples, calibration.found, calibration.cost, calibration.lag,
+             calibration.lag_sd, calibration.period),
+        )
+        self.conn.commit()
+
+    def latest_calibration(self, device, platform, kind, detector):
+        """기기 / 플랫폼 / 감지 방식 / 감지기의 가장 최근 보정값 -> dict (없으면 None)"""
+        rows = self.query(
+            "SELECT * FROM calibrations WHERE device IS ? AND platform IS ? AND kind = ? AND detector = ?"
+            " ORDER BY id DESC LIMIT 1",
+            (device, platform, kind, detector),
+        )
+        return rows[0] if rows else None
+
+    def calibrations(self, device=None, platform=None):
+        """저장된 보정값 목록 (최근 것부터)"""
+        sql = "SELECT * FROM calibrations WHERE 1 = 1"
+        params = []
+        for column, value in (("device", device), ("platform", platform)):
+            if value is not None:
+                sql += f" AND {column} = ?"
+                params.append(value)
+        return self.query(sql + " ORDER BY id DESC", params)
+
+    def durations(self, app=None, platform=None, scenario=None, since=None):
+        """조건에 맞는 성공 회차 소요 시간 목록"""
+        sql = "SELECT duration FROM results_v WHERE status = ? AND duration > 0"
+        params = [STATUS_OK]
+        for column, value in (("app", app), ("platform", platform), ("scenario", scenario)):
+            if value is not None:
+                sql += f" AND {column} = ?"
+                params.append(value)
+        if since is not None:
+            sql += " AND started_at >= ?"
+            params.append(since)
+        return [r["duration"] for r in self.query(sql, params)]
+
+    def summary(self, run_id, rows=None):
+        """실행 1개의 통계 -> common.stats.Summary (워밍업 / 실패 / 이상치 규칙 동일)"""
+        rows = self.rows(run_id) if rows is None else rows
+        return stats.from_rows([(r["iteration"], r["status"], r["measured_at"], r["duration"]) for r in rows])
+
+    # -- 파생 결과물 --
+    def export_csv(self, run_id, path, metric=None, columns=None, summaries=None):
+        """
+        기존 형식 CSV 로 내보내기 (회차 / 상태 / 측정시간 / 측정값 / 부가 컬럼 / 평균~표준편차 / 백분위수 등 + 통계 행)
+
+        통계는 common.stats 규칙 (워밍업 제외, 표본 표준편차, 부트스트랩 신뢰구간, MAD 이상치)
+        columns: 측정값 뒤에 붙일 부가 컬럼 {헤더: Run.add 의 extra 키} (예: speed_index.CSV_FIELDS)
+        summaries: 통계 행 아래에 붙일 통계 행 {첫 칸: common.stats.Summary} (예: app_start 의 "통계(기기)")
+        """
+        run = self.run(run_id)
+        metric = metric or (run and run["metric"]) or "반응속도(초)"
+        columns = columns or {}
+        rows = self.rows(run_id)
+        summary = self.summary(run_id, rows)
+        blank = [""] * (len(STATS_COLUMNS) + len(stats.EXTRA_COLUMNS))
+        no_extra = [""] * len(columns)
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # 다 쓴 다음에만 교체 (저장 도중 중단되어도 이전 CSV 가 반쯤 덮어써지지 않음)
+        with atomic_open(path) as f:
+            writer = csv.writer(f)
+            writer.writerow(["회차", "상태", "측정시간", metric] + list(columns) + STATS_COLUMNS + stats.EXTRA_COLUMNS)
+            for r in rows:
+                duration = f"{r['duration']:.4f}" if r["duration"] else ""
+                extra = json.loads(r["extra"]) if r["extra"] else {}
+                writer.writerow([r["iteration"], r["status"], r["measured_at"] or "", duration]
+                                + [_csv_value(extra.get(key)) for key in columns.values()] + blank)
+            writer.writerow(["통계", "", "", ""] + no_extra + [f"{v:.4f}" for v in summary.legacy()] + summary.extra())
+            for label, other in (summaries or {}).items():
+                if other.count:
+                    writer.writerow([label, "", "", ""] + no_extra + [f"{v:.4f}" for v in other.legacy()]
+                                    + other.extra())
+        return path
+
+    def export_parquet(self, path, sql="SELECT * FROM results_v"):
+        """조회 결과를 Parquet 로 저장 (pandas + pyarrow 필요)"""
+        try:
+            import pandas as pd
+        except ImportError as e:
+            raise RuntimeError("Parquet 내보내기에는 pandas / pyarrow 가 필요합니다") from e
+        df = pd.read_sql_query(sql, self.conn)
+        df.to_parquet(path, index=False)
+        return path
+
+    # -- 기존 CSV 적재 --
+    def import_csv(self, path, app=None, platform=None, scenario=None):
+        """
+        기존 스크립트 CSV 1개 적재 -> run_id (이미 적재된 파일이면 None)
+
+        통계 / 요약 행은 건너뛰고, 앱 / 플랫폼 / 시나리오는 경로에서 추정
+        """
+        source = os.path.relpath(os.path.abspath(path), REPO_ROOT)
+        if self.query("SELECT run_id FROM runs WHERE source = ?", (source,)):
+            return None
+
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            body = [row for row in reader if row and row[0] not in STATS_LABELS]
+        if not header:
+            return None
+
+        metric_idx = next((i for i, h in enumerate(header) if "반응속도" in h), None)
+        status_idx = header.index("상태") if "상태" in header else None
+        time_idx = next((i for i, h in enumerate(header) if h in ("측정시간", "측정시각")), None)
+        if metric_idx is None:
+            return None
+
+        # 실행 시각: 첫 회차의 측정 시각 (날짜가 없는 형식이면 파일 수정 시각)
+        started_at = body[0][time_idx] if body and time_idx is not None else ""
+        if len(started_at) < 16:
+            started_at = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(os.path.getmtime(path)))
+
+        meta = infer_meta(path)
+        run = self.start_run(
+            app=app or meta["app"], platform=platform or meta["platform"],
+            scenario=scenario or meta["scenario"], metric=header[metric_idx],
+            device="", build="", script=None,
+            started_at=started_at, source=source,
+        )
+        for n, row in enumerate(body, 1):
+            row = row + [""] * (len(header) - len(row))
+            duration = _to_float(row[metric_idx])
+            if status_idx is not None:
+                status = STATUS_OK if row[status_idx] in (STATUS_OK, "Success") else STATUS_FAIL
+            else:
+                status = STATUS_OK if duration else STATUS_FAIL
+            iteration = int(row[0]) if row[0].isdigit() else n
+            run.add(iteration, status, row[time_idx] if time_idx is not None else None, duration)
+        run.finish()
+        return run.run_id
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    return f"{value:.4f}" if isinstance(value, float) else str(value)
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def infer_meta(path):
+    """
+    기존 CSV 경로 -> {"app", "platform", "scenario"}
+
+    AOS/Search/gov24/gov24_search_perf_....csv          -> gov24 / android / search
+    iOS/App_Start_iOS/work24/ios_work24_launch_....csv  -> work24 / ios / app_start
+    AOS/APP_Start/android_정부24_launch_result.csv        -> gov24 / android / app_start
+    """
+    parts = os.path.relpath(os.path.abspath(path), REPO_ROOT).split(os.sep)
+    platform = "ios" if parts[0].lower() == "ios" else "android"
+    scenario = None
+    if len(parts) > 1:
+        key = parts[1].lower().replace("_ios", "").replace("_", "")
+        scenario = SCENARIO_ALIASES.get(key, parts[1])
+    app = None
+    for token in parts[2:-1] + os.path.splitext(parts[-1])[0].split("_"):
+        if token.lower() in APP_ALIASES or token in APP_ALIASES:
+            app = APP_ALIASES.get(token.lower(), APP_ALIASES.get(token))
+            break
+    return {"app": app, "platform": platform, "scenario": scenario}
+
+
+def import_paths(store, paths, verbose=True):
+    """파일 / 폴더(하위 CSV 전체) 목록 적재 -> [새 run_id] (이미 적재된 파일은 건너뜀)"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files += [os.path.join(root, n) for n in sorted(names) if n.lower().endswith(".csv")]
+        else:
+            files.append(path)
+    imported = []
+    for path in files:
+        run_id = store.import_csv(path)
+        if run_id:
+            imported.append(run_id)
+        if verbose:
+            print(f"{f'✅ run {run_id}' if run_id else '⏭ 건너뜀'}: {path}")
+    return imported
+
+
+# ---- [함수] 메인 ----
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="통합 결과 저장소")
+    parser.add_argument("--db", default=None, help="SQLite 파일 (기본: results/results.sqlite3)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("import", help="기존 CSV 적재 (폴더를 주면 하위 CSV 전체)")
+    p.add_argument("paths", nargs="+")
+    sub.add_parser("runs", help="실행 목록")
+    p = sub.add_parser("query", help="SQL 조회 (테이블: runs / results / 뷰: results_v)")
+    p.add_argument("sql")
+    p = sub.add_parser("export", help="실행 1개를 기존 형식 CSV 로")
+    p.add_argument("run_id", type=int)
+    p.add_argument("out")
+    p = sub.add_parser("parquet", help="results_v 전체를 Parquet 로")
+    p.add_argument("out")
+    args = parser.parse_args(argv)
+
+    with ResultStore(args.db) as store:
+        if args.command == "import":
+            import_paths(store, args.paths)
+        elif args.command == "runs":
+            for r in store.query(
+                "SELECT r.run_id, r.started_at, r.app, r.platform, r.scenario, r.device, r.stop_reason,"
+                " count(x.id) AS n"
+                " FROM runs r LEFT JOIN results x ON x.run_id = r.run_id GROUP BY r.run_id ORDER BY r.run_id"
+            ):
+                print(f"{r['run_id']:>5}  {r['started_at']}  {r['platform'] or '-':<8} {r['app'] or '-':<9}"
+                      f" {r['scenario'] or '-':<18} {r['device'] or '-':<12} {r['n']}회"
+                      + (f"  ({r['stop_reason']})" if r["stop_reason"] else ""))
+        elif args.command == "query":
+            rows = store.query(args.sql)
+            if rows:
+                writer = csv.DictWriter(sys.stdout, fieldnames=list(rows[0]))
+                writer.writeheader()
+                writer.writerows(rows)
+        elif args.command == "export":
+            print(f"✅ 저장 완료: {store.export_csv(args.run_id, args.out)}")
+        elif args.command == "parquet":
+            print(f"✅ 저장 완료: {store.export_parquet(args.out)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,369 @@
+"""
+다중 기기 병렬 러너
+
+기기 목록(JSON)을 받아 시나리오 스크립트의 반복 회차를 기기별로 나눠(shard) 동시에 실행하고,
+기기별 CSV 를 기존 형식 그대로 합친 뒤 '기기' 컬럼을 붙여 저장한다.
+
+각 shard 는 별도의 파이썬 프로세스로 기존 스크립트(또는 시나리오 파일, common.scenario)를 실행하며,
+기기 / 포트 / 반복 횟수 / 저장 위치는 환경 변수로 넘긴다 (common.device_env 참고).
+한 기기에서는 shard 를 순서대로, 서로 다른 기기끼리는 동시에 실행한다.
+
+    python -m common.runner --devices devices.json --repeat 10 \\
+        AOS/Search/gov24/gov24_search_AOS.py iOS/Search_iOS/work24/work24_search_ios.py
+
+기기 목록 예 (devices.example.json)
+    {"devices": [
+        {"name": "S25-1", "platform": "android", "udid": "R3CX..."},
+        {"name": "iPhone15-1", "platform": "ios", "udid": "00008120-...", "appium_port": 4730}
+    ]}
+
+※ 보안숫자 / 인증서 비밀번호를 콘솔로 입력받는 반자동 스크립트는 병렬 실행 대상에서 제외할 것
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from common import device_env, stats
+from common.result_store import STATS_LABELS
+from common.scenario import is_scenario_file, load_scenario
+
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# 포트 기본값 (기기 순서대로 +1 씩 할당)
+BASE_APPIUM_PORT = 4723
+BASE_SYSTEM_PORT = 8200
+BASE_WDA_PORT = 8100
+BASE_MJPEG_PORT = device_env.MJPEG_DEFAULT_PORTS["ios"]
+BASE_ANDROID_MJPEG_PORT = device_env.MJPEG_DEFAULT_PORTS["android"]
+
+DEVICE_COLUMN = "기기"
+
+Device = namedtuple(
+    "Device",
+    ["name", "platform", "udid", "host", "appium_port", "system_port", "wda_port", "mjpeg_port"],
+)
+Shard = namedtuple("Shard", ["script", "device", "repeat", "index", "out_dir"])
+
+
+# ---- [함수] 기기 목록 / 포트 할당 ----
+def platform_of(script):
+    """스크립트 경로 -> 'android' / 'ios' (시나리오 파일은 파일 안의 platform)"""
+    if is_scenario_file(script):
+        return load_scenario(script).platform
+    top = os.path.relpath(os.path.abspath(script), REPO_ROOT).split(os.sep)[0]
+    return "ios" if top.lower() == "ios" else "android"
+
+
+def _allocate(used, base):
+    port = base
+    while port in used:
+        port += 1
+    used.add(port)
+    return port
+
+
+def load_devices(path):
+    """
+    기기 목록 JSON -> [Device]
+
+    appium_port / system_port / wda_port / mjpeg_port 를 적지 않은 기기는
+    다른 기기와 겹치지 않게 기본값부터 차례로 할당한다 (mjpeg_port 는 iOS 9100 / AOS 7810 부터).
+    """
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)["devices"]
+
+    used = {key: set() for key in ("appium_port", "system_port", "wda_port", "mjpeg_port")}
+    for entry in entries:
+        for key in used:
+            if entry.get(key):
+                used[key].add(int(entry[key]))
+
+    bases = {
+        "appium_port": BASE_APPIUM_PORT,
+        "system_port": BASE_SYSTEM_PORT,
+        "wda_port": BASE_WDA_PORT,
+        "mjpeg_port": BASE_MJPEG_PORT,
+    }
+    devices = []
+    for entry in entries:
+        platform_bases = dict(bases)
+        if entry["platform"].lower() == "android":
+            platform_bases["mjpeg_port"] = BASE_ANDROID_MJPEG_PORT
+        ports = {
+            key: int(entry[key]) if entry.get(key) else _allocate(used[key], platform_bases[key])
+            for key in bases
+        }
+        devices.append(Device(
+            name=entry["name"],
+            platform=entry["platform"].lower(),
+            udid=entry.get("udid", ""),
+            host=entry.get("host", "127.0.0.1"),
+            **ports,
+        ))
+    return devices
+
+
+def server_url(device):
+    return f"http://{device.host}:{device.appium_port}"
+
+
+# ---- [함수] Appium 서버 ----
+def wait_for_server(url, timeout=30.0):
+    """Appium /status 가 응답할 때까지 대기"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"{url}/status", timeout=2) as res:
+                if res.status == 200:
+                    return True
+        except Exception:
+            time.sleep(0.5)
+    return False
+
+
+def start_appium_servers(devices, log_dir, appium="appium"):
+    """기기마다 Appium 서버를 따로 띄움 (로그: log_dir/appium_<포트>.log) -> [Popen]"""
+    os.makedirs(log_dir, exist_ok=True)
+    procs = []
+    for device in devices:
+        with open(os.path.join(log_dir, f"appium_{device.appium_port}.log"), "w", encoding="utf-8") as log:
+            procs.append(subprocess.Popen(
+                [appium, "--port", str(device.appium_port)],
+                stdout=log, stderr=subprocess.STDOUT,
+            ))
+    return procs
+
+
+# ---- [함수] shard 분할 / 실행 ----
+def split_repeat(total, count):
+    """반복 횟수를 기기 수만큼 최대한 고르게 분할 (10, 3 -> [4, 3, 3])"""
+    base, extra = divmod(total, count)
+    return [base + (1 if i < extra else 0) for i in range(count)]
+
+
+def plan_shards(scripts, devices, repeat, out_root):
+    shards = []
+    for script in scripts:
+        candidates = [d for d in devices if d.platform == platform_of(script)]
+        if not candidates:
+            print(f"⚠️ {script}: 실행할 {platform_of(script)} 기기가 없습니다")
+            continue
+        stem = os.path.splitext(os.path.basename(script))[0]
+        for index, (device, count) in enumerate(zip(candidates, split_repeat(repeat, len(candidates)))):
+            if count == 0:
+                continue
+            out_dir = os.path.join(out_root, stem, device.name)
+            shards.append(Shard(script, device, count, index, out_dir))
+    return shards
+
+
+def shard_env(shard):
+    device = shard.device
+    env = dict(os.environ)
+    env.update({
+        device_env.ENV_SERVER_URL: server_url(device),
+        device_env.ENV_UDID: device.udid,
+        device_env.ENV_LABEL: device.name,
+        device_env.ENV_REPEAT: str(shard.repeat),
+        device_env.ENV_RESULT_DIR: shard.out_dir,
+        "PYTHONIOENCODING": "utf-8",
+    })
+    if device.platform == "android":
+        env[device_env.ENV_SYSTEM_PORT] = str(device.system_port)
+    else:
+        env[device_env.ENV_WDA_PORT] = str(device.wda_port)
+    # AOS 는 VISUAL_TIMELINE=1 일 때만 이 포트로 mjpegServerPort 를 켬 (common.device_env.apply_capabilities)
+    env[device_env.ENV_MJPEG_PORT] = str(device.mjpeg_port)
+    return env
+
+
+def shard_command(shard, python=sys.executable):
+    """스크립트는 그대로, 시나리오 파일은 common.scenario 엔진으로 실행"""
+    if is_scenario_file(shard.script):
+        return [python, "-m", "common.scenario", os.path.abspath(shard.script)]
+    return [python, os.path.abspath(shard.script)]
+
+
+def run_shard(shard, python=sys.executable):
+    """shard 1개 실행 (별도 프로세스) -> 종료 코드"""
+    os.makedirs(shard.out_dir, exist_ok=True)
+    log_path = os.path.join(shard.out_dir, "run.log")
+    print(f"▶ [{shard.device.name}] {shard.script} ({shard.repeat}회)")
+    started = time.time()
+    with open(log_path, "w", encoding="utf-8") as log:
+        code = subprocess.call(
+            shard_command(shard, python),
+            cwd=REPO_ROOT, env=shard_env(shard), stdin=subprocess.DEVNULL,
+            stdout=log, stderr=subprocess.STDOUT,
+        )
+    mark = "✅" if code == 0 else "❌"
+    print(f"{mark} [{shard.device.name}] {shard.script} 종료 (코드 {code}, {time.time() - started:.1f}초, 로그: {log_path})")
+    return code
+
+
+def run_shards(shards):
+    """기기별로 shard 를 순서대로, 기기끼리는 동시에 실행 -> {shard: 종료 코드}"""
+    by_device = {}
+    for shard in shards:
+        by_device.setdefault(shard.device.name, []).append(shard)
+
+    results = {}
+    lock = threading.Lock()
+
+    def _device_worker(device_shards):
+        for shard in device_shards:
+            code = run_shard(shard)
+            with lock:
+                results[shard] = code
+
+    with ThreadPoolExecutor(max_workers=max(len(by_device), 1)) as pool:
+        list(pool.map(_device_worker, by_device.values()))
+    return results
+
+
+# ---- [함수] 결과 병합 ----
+def _normalize_name(filename):
+    """파일명의 실행 시각(_20250101_120000)을 제거해 기기별 CSV 를 같은 이름으로 묶음"""
+    return re.sub(r"_\d{8}_\d{6}", "", filename)
+
+
+def merge_csv(sources, out_path):
+    """
+    sources: [(기기 이름, CSV 경로)] -> 기존 스키마 + '기기' 컬럼으로 병합 후 통계 행 재계산
+
+    소요 시간 컬럼은 헤더에 '반응속도'가 들어간 첫 컬럼, 통계 컬럼은 평균/최소/최대/표준편차로 시작하는 헤더
+    통계는 common.stats 규칙 (워밍업은 기기마다 앞쪽 회차 제외), 백분위수 등 확장 통계 컬럼이 없으면 뒤에 추가
+    """
+    header = None
+    rows = []
+    per_device = []
+    for label, path in sources:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.reader(f)
+            file_header = next(reader, None)
+            if file_header is None:
+                continue
+            if header is None:
+                header = file_header + [c for c in stats.EXTRA_COLUMNS if c not in file_header]
+            device_rows = []
+            for row in reader:
+                if not row or row[0] in STATS_LABELS:
+                    continue
+                device_rows.append(row + [""] * (len(header) - len(row)) + [label])
+            rows.extend(device_rows)
+            per_device.append(device_rows)
+    if header is None:
+        return None
+
+    duration_idx = next((i for i, h in enumerate(header) if "반응속도" in h), None)
+    status_idx = header.index("상태") if "상태" in header else None
+    values, iterations, failures, skipped = [], [], 0, 0
+    if duration_idx is not None:
+        for device_rows in per_device:
+            v, it, fail, skip = stats.split_rows(
+                [[int(r[0]) if r[0].isdigit() else r[0]] + r[1:] for r in device_rows],
+                status_idx=status_idx, duration_idx=duration_idx,
+            )
+            values += v
+            iterations += it
+            failures += fail
+            skipped += skip
+    summary = stats.summarize(values, iterations, failures, skipped)
+
+    stats_row = [""] * (len(header) + 1)
+    stats_row[0] = "통계"
+    if values:
+        legacy = dict(zip(("평균", "최소", "최대", "표준편차"), summary.legacy()))
+        extra = dict(zip(stats.EXTRA_COLUMNS, summary.extra()))
+        for i, h in enumerate(header):
+            if h in extra:
+                stats_row[i] = extra[h]
+                continue
+            for prefix, value in legacy.items():
+                if h.startswith(prefix):
+                    stats_row[i] = f"{value:.4f}"
+    stats.report(summary, os.path.basename(out_path))
+
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with open(out_path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(header + [DEVICE_COLUMN])
+        writer.writerows(rows)
+        writer.writerow(stats_row)
+    return out_path
+
+
+def merge_results(shards, out_root):
+    """스크립트별로 기기별 CSV 를 모아 out_root/<스크립트>/<CSV 이름> 으로 병합 -> [경로]"""
+    groups = {}
+    for shard in shards:
+        if not os.path.isdir(shard.out_dir):
+            continue
+        stem = os.path.splitext(os.path.basename(shard.script))[0]
+        for name in sorted(os.listdir(shard.out_dir)):
+            if name.lower().endswith(".csv"):
+                key = (stem, _normalize_name(name))
+                groups.setdefault(key, []).append((shard.device.name, os.path.join(shard.out_dir, name)))
+
+    merged = []
+    for (stem, name), sources in sorted(groups.items()):
+        path = merge_csv(sources, os.path.join(out_root, stem, name))
+        if path:
+            merged.append(path)
+            print(f"📎 병합 저장: {path} ({len(sources)}개 기기)")
+    return merged
+
+
+# ---- [함수] 메인 ----
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="다중 기기 병렬 성능 측정 러너")
+    parser.add_argument("scripts", nargs="+", help="실행할 스크립트 / 시나리오 파일(.yaml / .toml) 경로")
+    parser.add_argument("--devices", required=True, help="기기 목록 JSON")
+    parser.add_argument("--repeat", type=int, default=10, help="스크립트별 전체 반복 횟수 (기기 수만큼 분할)")
+    parser.add_argument("--out", default=None, help="결과 폴더 (기본: results/<실행시각>)")
+    parser.add_argument("--start-appium", action="store_true", help="기기마다 Appium 서버를 직접 띄움")
+    args = parser.parse_args(argv)
+
+    devices = load_devices(args.devices)
+    out_root = args.out or os.path.join(REPO_ROOT, "results", datetime.now().strftime("%Y%m%d_%H%M%S"))
+
+    print(f"📱 기기 {len(devices)}대")
+    for d in devices:
+        ports = f"systemPort {d.system_port}" if d.platform == "android" else f"wdaLocalPort {d.wda_port}"
+        ports += f" / mjpeg {d.mjpeg_port}"
+        print(f"   - {d.name} ({d.platform}, {d.udid or 'UDID 미지정'}) -> {server_url(d)}, {ports}")
+
+    shards = plan_shards(args.scripts, devices, args.repeat, out_root)
+    used = {s.device for s in shards}
+
+    appium_procs = start_appium_servers(used, out_root) if args.start_appium else []
+    try:
+        for device in used:
+            if not wait_for_server(server_url(device)):
+                print(f"⛔ Appium 서버 응답 없음: {server_url(device)} ({device.name})")
+                return 1
+
+        started = time.time()
+        results = run_shards(shards)
+        print(f"\n⏱ 전체 실행 시간: {time.time() - started:.1f}초")
+        merge_results(shards, out_root)
+        return 0 if all(code == 0 for code in results.values()) else 1
+    finally:
+        for proc in appium_procs:
+            proc.terminate()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,720 @@
+"""
+선언형 시나리오 (YAML / TOML) 로더 + 실행 엔진
+
+31개 스크립트는 옵션 / 반복 루프 / try-except / 로그아웃 / CSV 저장 구조가 모두 같고
+로케이터, 좌표, 측정 시작 / 끝 기준만 다르다.
+시나리오 파일에는 이 차이만 적고, 나머지는 이 엔진이 UiAutomator2 / XCUITest 공통으로 처리한다.
+(세션은 common.driver_pool, 완료 감지는 common.detectors + common.waiter 를 그대로 사용)
+
+    python -m common.scenario scenarios/ios/gov24_search.yaml
+    python -m common.scenario scenarios/android/*.yaml --repeat 3 --set login_id=myid
+    python -m common.scenario scenarios/android/gov24_idpw_login.yaml --check   # 문법 검사만
+
+시나리오 파일 구조 (YAML 예)
+
+    name: 정부24 통합검색
+    platform: ios                    # android / ios
+    app: kr.go.dcsc.minwon24         # 패키지 / 번들 ID
+    repeat: 10                       # 또는 {count: 10, ci_target: 3%, metric: p90, min: 5, max: 40}
+    timeout: 20                      # 완료 대기 타임아웃(초)
+    metric: 검색반응속도(초)          # CSV 측정값 컬럼명
+    result: ios_gov24_search_result.csv
+    app_key: gov24                   # 결과 저장소(common.result_store)의 앱 / 시나리오 키
+    scenario_key: search             #   (생략 시 app / 파일 이름)
+    vars:
+      keyword: 청년
+      password: ${env:GOV24_PW}      # 환경 변수 참조
+    setup:   [...]                   # 반복 전 1회
+    steps:   [...]                   # 회차마다. start 단계에서 측정 시작
+    done:    {predicate: "..."}      # 완료 감지기
+    reset:   [...]                   # 성공 후 다음 회차 준비 (로그아웃 / 이전 페이지)
+    recover: [...]                   # 실패 시 복구 (기본: restart_app)
+
+단계(step) 는 `동작: 인자` 한 쌍 또는 인자 없는 동작 이름
+
+    - tap: {uiautomator: 'new UiSelector().text("검색")'}
+    - tap: {predicate: "name == '이전 페이지'", fallback: [30, 70]}
+    - tap: [813, 216]                           # 좌표
+    - swipe: [1041, 1822, 1041, 446, 500]
+    - type: {xpath: '//android.widget.EditText[@resource-id="input_id"]', text: "${login_id}"}
+    - wait: {uiautomator: '...', timeout: 10, optional: true}
+    - wait: {accessibility_id: 전체메뉴, replaces: 4}     # 기존 sleep(4) 대체 (common.readiness 기록)
+    - settle: 2                                          # 기존 sleep(2) 대체: 화면 변화가 멈출 때까지
+    - sleep: 1
+    - prompt: {message: "보안숫자 입력", var: security}   # 콘솔 입력 -> vars
+    - start: {tap: {xpath: '//android.widget.Button[contains(@text, "로그인")]'}}
+    - activate / terminate / restart_app / back
+
+로케이터 키: uiautomator, predicate, class_chain, accessibility_id, xpath, id, class_name
+완료 감지기(done)는 로케이터 1개, {any: [...]}, {all: [...]},
+{image: {template: ..., roi: {x, y, w, h}, threshold: 0.9}} 조합을 쓸 수 있다.
+image 에 multi_scale: true (또는 MULTI_SCALE=1) 를 주면 기기 배율(DPR)에 맞춰 여러 배율 / ROI 주변까지 찾는다
+(common.image_match.MultiScaleMatcher, 설정: reference_dpr / dpr / scales / band / coarse / coarse_margin).
+{snapshot: {done: [로케이터...], fail: [로케이터...], popup: [로케이터...]}} 는 page_source 1회로
+완료 / 실패 화면을 함께 판정하고(common.detectors.SnapshotDetector), 실패 화면이면 타임아웃을 기다리지 않고 회차 실패로 기록한다.
+{visual: {roi: {x, y, w, h}, settle: 1.0}} 는 기준 이미지 없이 ROI 픽셀 변화가 settle 초 동안 멈추면 완료(common.visual),
+until: change 면 첫 화면 변화를 감지한다. done 에 start: first_change 를 주면 탭 시각 대신 첫 화면 변화부터 잰다.
+
+VISUAL_TIMELINE=1 이면 회차마다 시각적 완성도(첫 변화 / Speed Index / 85% / 마지막 변화)를 함께 기록한다 (common.speed_index).
+
+repeat 에 ci_target 을 주면 신뢰구간 반폭이 목표 이하가 될 때까지(최대 max 회) 반복한다 (common.stats.AdaptiveRepeat).
+생략하면 CI_TARGET / CI_METRIC / MIN_REPEAT / MAX_REPEAT 환경 변수, 그것도 없으면 count 회 고정.
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from collections import namedtuple
+
+from common import calibration, device_env, profiler, readiness, speed_index, stats
+from common.result_store import STATUS_FAIL, STATUS_OK, ResultStore
+from common.detectors import (
+    ACCESSIBILITY_ID, ANDROID_UIAUTOMATOR, IOS_CLASS_CHAIN, IOS_PREDICATE,
+    AllOf, AnyOf, ElementDetector, ImageDetector, Snapshot, SnapshotDetector, VisualState, visual_change,
+    visual_stable,
+)
+from common.waiter import DEFAULT_TIMEOUT, wait_until
+
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SCENARIO_EXTENSIONS = (".yaml", ".yml", ".toml")
+
+PLATFORMS = ("android", "ios")
+
+# 로케이터 키 -> find_elements 의 by 값
+LOCATOR_BY = {
+    "uiautomator": ANDROID_UIAUTOMATOR,
+    "predicate": IOS_PREDICATE,
+    "class_chain": IOS_CLASS_CHAIN,
+    "accessibility_id": ACCESSIBILITY_ID,
+    "xpath": "xpath",
+    "id": "id",
+    "class_name": "class name",
+}
+
+ACTIONS = (
+    "tap", "swipe", "type", "wait", "settle", "sleep", "prompt", "start",
+    "activate", "terminate", "restart_app", "back",
+)
+TOP_LEVEL_KEYS = (
+    "name", "platform", "app", "repeat", "timeout", "metric", "result", "vars", "settings",
+    "setup", "steps", "done", "reset", "recover", "app_key", "scenario_key",
+)
+
+# 단계 사이 기본 요소 대기 시간(초)
+STEP_TIMEOUT = 10
+
+# wait 단계에서 감지기 설정이 아닌 키
+WAIT_OPTIONS = ("timeout", "optional", "replaces")
+
+# snapshot 감지기의 로케이터 묶음 (common.detectors.SnapshotDetector)
+SNAPSHOT_GROUPS = ("done", "fail", "popup")
+
+# visual 감지기 설정 키 (common.detectors.VisualStable / VisualChange)
+VISUAL_OPTIONS = ("roi", "settle", "min_frames", "mad_threshold", "hash_distance", "width", "until", "start")
+VISUAL_UNTIL = ("stable", "change")
+
+# image 감지기 설정 키 (common.image_match.RoiMatcher / MultiScaleMatcher)
+MULTI_SCALE_OPTIONS = ("dpr", "reference_dpr", "scales", "band", "coarse", "coarse_margin")
+IMAGE_OPTIONS = ("template", "roi", "threshold", "multi_scale") + MULTI_SCALE_OPTIONS
+ROI_KEYS = ("x", "y", "w", "h")
+
+VAR_RE = re.compile(r"\$\{(env:)?([A-Za-z_][\w]*)\}")
+
+# repeat mapping 키 -> AdaptiveRepeat 인자
+REPEAT_OPTIONS = {"ci_target": "target", "metric": "metric", "min": "min_runs", "max": "max_runs"}
+
+# action: 동작 이름, arg: 인자 (없으면 None), where: 오류 메시지용 위치 ("steps[2]")
+Step = namedtuple("Step", ["action", "arg", "where"])
+
+Scenario = namedtuple(
+    "Scenario",
+    ["name", "platform", "app", "repeat", "timeout", "metric", "result", "vars", "settings",
+     "setup", "steps", "done", "reset", "recover", "path", "app_key", "scenario_key", "adaptive"],
+)
+
+
+class ScenarioError(ValueError):
+    """시나리오 파일 형식 오류 (파일 / 위치를 메시지에 포함)"""
+
+
+# ---- [함수] 로더 ----
+def _read_file(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".toml":
+        import tomllib
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    if ext in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError as e:
+            raise ScenarioError(f"{path}: YAML 시나리오에는 PyYAML 이 필요합니다 (pip install pyyaml)") from e
+        with open(path, encoding="utf-8") as f:
+            return yaml.safe_load(f) or {}
+    raise ScenarioError(f"{path}: 지원하지 않는 시나리오 형식입니다 ({', '.join(SCENARIO_EXTENSIONS)})")
+
+
+def is_scenario_file(path):
+    return os.path.splitext(path)[1].lower() in SCENARIO_EXTENSIONS
+
+
+def _check_locator(spec, where, platform):
+    keys = [k for k in spec if k in LOCATOR_BY]
+    if len(keys) != 1:
+        raise ScenarioError(f"{where}: 로케이터 키를 정확히 하나 지정해야 합니다 ({', '.join(LOCATOR_BY)})")
+    key = keys[0]
+    if key == "uiautomator" and platform != "android":
+        raise ScenarioError(f"{where}: uiautomator 로케이터는 android 에서만 쓸 수 있습니다")
+    if key in ("predicate", "class_chain") and platform != "ios":
+        raise ScenarioError(f"{where}: {key} 로케이터는 ios 에서만 쓸 수 있습니다")
+
+
+def _check_detector(spec, where, platform):
+    if not isinstance(spec, dict):
+        raise ScenarioError(f"{where}: 감지기는 mapping 이어야 합니다")
+    if "any" in spec or "all" in spec:
+        members = spec.get("any", spec.get("all"))
+        if not isinstance(members, list) or not members:
+            raise ScenarioError(f"{where}: any / all 에는 감지기 목록이 필요합니다")
+        for i, member in enumerate(members):
+            _check_detector(member, f"{where}[{i}]", platform)
+    elif "snapshot" in spec:
+        groups = spec["snapshot"]
+        if not isinstance(groups, dict) or not (groups.get("done") or groups.get("fail")):
+            raise ScenarioError(f"{where}: snapshot 에는 done 또는 fail 로케이터 목록이 필요합니다")
+        unknown = [k for k in groups if k not in SNAPSHOT_GROUPS]
+        if unknown:
+            raise ScenarioError(f"{where}: snapshot 에 알 수 없는 키: {', '.join(unknown)}")
+        for group, locators in groups.items():
+            if not isinstance(locators, list):
+                raise ScenarioError(f"{where}: snapshot.{group} 는 로케이터 목록이어야 합니다")
+            for i, locator in enumerate(locators):
+                _check_locator(locator, f"{where}.snapshot.{group}[{i}]", platform)
+    elif "image" in spec:
+        image = spec["image"]
+        if not isinstance(image, dict) or "template" not in image or "roi" not in image:
+            raise ScenarioError(f"{where}: image 감지기에는 template / roi 가 필요합니다")
+        unknown = [k for k in image if k not in IMAGE_OPTIONS]
+        if unknown:
+            raise ScenarioError(f"{where}: image 에 알 수 없는 키: {', '.join(unknown)}")
+        if "scales" in image and (not isinstance(image["scales"], list) or not image["scales"]):
+            raise ScenarioError(f"{where}: image.scales 는 배율 목록입니다 (예: [0.9, 1.0, 1.1])")
+    elif "visual" in spec:
+        visual = spec["visual"] or {}
+        if not isinstance(visual, dict):
+            raise ScenarioError(f"{where}: visual 감지기 설정은 mapping 이어야 합니다")
+        unknown = [k for k in visual if k not in VISUAL_OPTIONS]
+        if unknown:
+            raise ScenarioError(f"{where}: visual 에 알 수 없는 키: {', '.join(unknown)}")
+        if visual.get("until", "stable") not in VISUAL_UNTIL:
+            raise ScenarioError(f"{where}: visual.until 은 {' / '.join(VISUAL_UNTIL)} 중 하나입니다")
+        start = visual.get("start")
+        if start is not None and (start != "first_change" or visual.get("until", "stable") != "stable"):
+            raise ScenarioError(f"{where}: visual.start 는 first_change 만 (until: stable 일 때) 쓸 수 있습니다")
+        roi = visual.get("roi")
+        if roi is not None and (not isinstance(roi, dict) or sorted(roi) != sorted(ROI_KEYS)):
+            raise ScenarioError(f"{where}: visual.roi 는 {{x, y, w, h}} 비율입니다")
+    else:
+        _check_locator(spec, where, platform)
+
+
+def _parse_step(raw, where, platform):
+    if isinstance(raw, str):
+        action, arg = raw, None
+    elif isinstance(raw, dict) and len(raw) == 1:
+        action, arg = next(iter(raw.items()))
+    else:
+        raise ScenarioError(f"{where}: 단계는 '동작: 인자' 한 쌍이어야 합니다 ({raw!r})")
+    if action not in ACTIONS:
+        raise ScenarioError(f"{where}: 알 수 없는 동작 '{action}' ({', '.join(ACTIONS)})")
+
+    if action == "start":
+        # 측정 시작 표시. 인자가 있으면 그 동작 직후를 시작 시각으로 사용
+        arg = _parse_step(arg, f"{where}.start", platform) if arg is not None else None
+    elif action in ("tap", "type", "wait"):
+        if action == "tap" and isinstance(arg, list):
+            if len(arg) != 2:
+                raise ScenarioError(f"{where}: 좌표 탭은 [x, y] 형식입니다")
+        elif not isinstance(arg, dict):
+            raise ScenarioError(f"{where}: {action} 에는 로케이터가 필요합니다")
+        elif action == "wait":
+            _check_detector({k: v for k, v in arg.items() if k not in WAIT_OPTIONS}, where, platform)
+        else:
+            _check_locator(arg, where, platform)
+            if action == "type" and "text" not in arg:
+                raise ScenarioError(f"{where}: type 에는 text 가 필요합니다")
+    elif action == "swipe":
+        if not isinstance(arg, list) or len(arg) not in (4, 5):
+            raise ScenarioError(f"{where}: swipe 는 [x1, y1, x2, y2(, ms)] 형식입니다")
+    elif action in ("sleep", "settle"):
+        if not isinstance(arg, (int, float)):
+            raise ScenarioError(f"{where}: sleep 에는 초 단위 숫자가 필요합니다")
+    elif action == "prompt":
+        if not isinstance(arg, dict) or "var" not in arg:
+            raise ScenarioError(f"{where}: prompt 에는 var 가 필요합니다")
+    return Step(action, arg, where)
+
+
+def _parse_steps(data, key, platform, path):
+    raw = data.get(key) or []
+    if not isinstance(raw, list):
+        raise ScenarioError(f"{path}: {key} 는 단계 목록이어야 합니다")
+    return [_parse_step(item, f"{path}: {key}[{i}]", platform) for i, item in enumerate(raw)]
+
+
+def _parse_repeat(raw, path):
+    """repeat (숫자 또는 mapping) -> (기본 반복 횟수, AdaptiveRepeat 인자)"""
+    if not isinstance(raw, dict):
+        return int(raw), {}
+    unknown = [k for k in raw if k != "count" and k not in REPEAT_OPTIONS]
+    if unknown:
+        raise ScenarioError(f"{path}: repeat 에 알 수 없는 키: {', '.join(unknown)}")
+    adaptive = {REPEAT_OPTIONS[k]: v for k, v in raw.items() if k in REPEAT_OPTIONS}
+    if "target" in adaptive:
+        try:
+            stats.parse_target(adaptive["target"])
+        except ValueError:
+            raise ScenarioError(f"{path}: repeat.ci_target 은 0.05 (초) 또는 3% 형식입니다")
+    if adaptive.get("metric", "mean") not in stats.CI_METRICS:
+        raise ScenarioError(f"{path}: repeat.metric 은 {' / '.join(stats.CI_METRICS)} 중 하나입니다")
+    return int(raw.get("count", 10)), adaptive
+
+
+def load_scenario(path):
+    """시나리오 파일 -> Scenario (형식이 틀리면 ScenarioError)"""
+    data = _read_file(path)
+    if not isinstance(data, dict):
+        raise ScenarioError(f"{path}: 최상위는 mapping 이어야 합니다")
+    unknown = [k for k in data if k not in TOP_LEVEL_KEYS]
+    if unknown:
+        raise ScenarioError(f"{path}: 알 수 없는 항목 {unknown}")
+
+    platform = str(data.get("platform", "")).lower()
+    if platform not in PLATFORMS:
+        raise ScenarioError(f"{path}: platform 은 {PLATFORMS} 중 하나여야 합니다")
+    if not data.get("app"):
+        raise ScenarioError(f"{path}: app (패키지 / 번들 ID) 이 필요합니다")
+
+    steps = _parse_steps(data, "steps", platform, path)
+    if sum(1 for s in steps if s.action == "start") != 1:
+        raise ScenarioError(f"{path}: steps 에 start 단계가 정확히 하나 있어야 합니다")
+    if "done" not in data:
+        raise ScenarioError(f"{path}: done (완료 감지기) 이 필요합니다")
+    _check_detector(data["done"], f"{path}: done", platform)
+
+    stem = os.path.splitext(os.path.basename(path))[0]
+    repeat, adaptive = _parse_repeat(data.get("repeat", 10), path)
+    recover = _parse_steps(data, "recover", platform, path) if "recover" in data else [
+        Step("restart_app", None, f"{path}: recover[기본]"), Step("sleep", 3, f"{path}: recover[기본]"),
+    ]
+    return Scenario(
+        name=data.get("name", stem),
+        platform=platform,
+        app=data["app"],
+        repeat=repeat,
+        timeout=float(data.get("timeout", DEFAULT_TIMEOUT)),
+        metric=data.get("metric", "반응속도(초)"),
+        result=data.get("result", f"{stem}_result.csv"),
+        vars=dict(data.get("vars") or {}),
+        settings=dict(data.get("settings") or {}),
+        setup=_parse_steps(data, "setup", platform, path),
+        steps=steps,
+        done=data["done"],
+        reset=_parse_steps(data, "reset", platform, path),
+        recover=recover,
+        path=os.path.abspath(path),
+        app_key=data.get("app_key", data["app"]),
+        scenario_key=data.get("scenario_key", stem),
+        adaptive=adaptive,
+    )
+
+
+# ---- [함수] 변수 치환 ----
+def expand(value, variables):
+    """'${name}' / '${env:NAME}' 치환 (문자열 / 목록 / mapping 재귀)"""
+    if isinstance(value, str):
+        def _sub(m):
+            if m.group(1):
+                return os.environ.get(m.group(2), "")
+            if m.group(2) not in variables:
+                raise ScenarioError(f"정의되지 않은 변수: {m.group(2)}")
+            return str(variables[m.group(2)])
+        return VAR_RE.sub(_sub, value)
+    if isinstance(value, list):
+        return [expand(v, variables) for v in value]
+    if isinstance(value, dict):
+        return {k: expand(v, variables) for k, v in value.items()}
+    return value
+
+
+def _failed(result):
+    """snapshot 감지기가 실패 화면으로 판정했으면 감지된 실패 로케이터 (아니면 None)"""
+    detail = result.detail
+    if result.matched and isinstance(detail, Snapshot) and detail.outcome == "fail":
+        return ", ".join(detail.fired["fail"])
+    return None
+
+
+# ---- [클래스] 실행 엔진 ----
+class ScenarioRunner:
+    """
+    Scenario 1개를 드라이버 1개로 반복 측정
+
+    driver: 이미 준비된 세션 (앱 전환은 엔진이 activate_app 으로 처리)
+    variables: 시나리오 vars 위에 덮어쓸 값 (--set)
+    calibrator: 감지 비용 보정 (common.calibration.Calibrator, None 이면 보정하지 않음)
+    """
+
+    def __init__(self, scenario, driver, variables=None, calibrator=None):
+        self.scenario = scenario
+        self.driver = driver
+        merged = dict(scenario.vars)
+        merged.update(variables or {})
+        # vars 값 안의 ${env:NAME} / 다른 변수 참조를 미리 풀어 둠
+        self.vars = {k: expand(v, merged) for k, v in merged.items()}
+        self.calibrator = calibrator
+        self._frames = None
+        # 기기 배율 (MultiScaleMatcher 가 처음 잰 값을 다음 감지기에 재사용)
+        self._dpr = None
+        self.timeline = None
+        self.start_time = None
+        self.stop_reason = None
+        self.done_detector = None
+
+    # -- 로케이터 / 감지기 --
+    def _locator(self, spec):
+        key = next(k for k in spec if k in LOCATOR_BY)
+        return LOCATOR_BY[key], expand(spec[key], self.vars)
+
+    def detector(self, spec):
+        """감지기 설정 -> Detector"""
+        if "any" in spec:
+            return AnyOf(*(self.detector(s) for s in spec["any"]))
+        if "all" in spec:
+            return AllOf(*(self.detector(s) for s in spec["all"]))
+        if "snapshot" in spec:
+            groups = {}
+            for group in SNAPSHOT_GROUPS:
+                locators = [self._locator(s) for s in spec["snapshot"].get(group) or []]
+                groups[group] = {value: (by, value) for by, value in locators}
+            return SnapshotDetector(self.driver, **groups)
+        if "image" in spec:
+            from common.image_match import create_matcher
+
+            image = spec["image"]
+            template = os.path.join(os.path.dirname(self.scenario.path), image["template"])
+            options = {k: image[k] for k in MULTI_SCALE_OPTIONS if k in image}
+            multi_scale = image.get("multi_scale", True if options else None)
+            if "dpr" not in options and self._dpr:
+                options["dpr"] = self._dpr
+            matcher = create_matcher(template, image["roi"], threshold=image.get("threshold", 0.8),
+                                     multi_scale=multi_scale, **options)
+            self._dpr = getattr(matcher.attach(self.driver), "dpr", None) or self._dpr
+            return ImageDetector(self._open_frames(), matcher)
+        if "visual" in spec:
+            visual = dict(spec["visual"] or {})
+            visual.pop("start", None)
+            if visual.pop("until", "stable") == "change":
+                visual.pop("settle", None)
+                visual.pop("min_frames", None)
+                return visual_change(self._open_frames(), **visual)
+            return visual_stable(self._open_frames(), **visual)
+        by, value = self._locator(spec)
+        return ElementDetector(self.driver, by, value)
+
+    def _open_frames(self):
+        from common.frame_source import open_frame_source
+
+        if self._frames is None:
+            self._frames = open_frame_source(self.driver)
+        return self._frames
+
+    def find(self, spec, timeout=None):
+        """로케이터 -> 첫 번째 요소 (timeout 안에 못 찾으면 RuntimeError)"""
+        timeout = spec.get("timeout", timeout or STEP_TIMEOUT)
+        result = wait_until(self.detector(spec), time.time(), timeout=timeout)
+        if not result.matched:
+            raise RuntimeError(f"요소를 찾지 못했습니다: {self._locator(spec)[1]}")
+        return result.detail[0]
+
+    # -- 동작 --
+    def tap_point(self, x, y):
+        if self.scenario.platform == "android":
+            # swipe 를 start=end 로 주면 탭처럼 동작 (기존 AOS 스크립트 방식)
+            self.driver.swipe(x, y, x, y, 200)
+        else:
+            self.driver.tap([(x, y)])
+
+    def run_step(self, step):
+        action, arg = step.action, step.arg
+        if action == "tap":
+            if isinstance(arg, list):
+                self.tap_point(*arg)
+                return
+            try:
+                self.find(arg).click()
+            except Exception:
+                if "fallback" not in arg:
+                    raise
+                print(f"   ↪ 요소 탭 실패 -> 좌표 {tuple(arg['fallback'])} 탭")
+                self.tap_point(*arg["fallback"])
+        elif action == "swipe":
+            x1, y1, x2, y2, *rest = arg
+            self.driver.swipe(x1, y1, x2, y2, rest[0] if rest else 500)
+        elif action == "type":
+            element = self.find(arg)
+            element.click()
+            if arg.get("clear", True):
+                element.clear()
+            element.send_keys(expand(arg["text"], self.vars))
+        elif action == "wait":
+            spec = {k: v for k, v in arg.items() if k not in WAIT_OPTIONS}
+            if "replaces" in arg:
+                # 고정 sleep 을 대체한 대기: 예산(timeout)을 넘겨도 기존 sleep 처럼 진행
+                readiness.ready(self.detector(spec), static=arg["replaces"], budget=arg.get("timeout"),
+                                label=f"{self.scenario.name} {step.where.split(': ')[-1]}")
+                return
+            result = wait_until(self.detector(spec), time.time(), timeout=arg.get("timeout", STEP_TIMEOUT))
+            failed = _failed(result)
+            if failed:
+                raise RuntimeError(f"실패 화면 감지 ({step.where}): {failed}")
+            if not result.matched:
+                if not arg.get("optional"):
+                    raise RuntimeError(f"대기 실패 ({step.where})")
+                print(f"   ⚠️ 대기 대상 미확인 (건너뜀): {step.where}")
+        elif action == "settle":
+            readiness.settle(self.driver, static=arg, label=f"{self.scenario.name} {step.where.split(': ')[-1]}")
+        elif action == "sleep":
+            time.sleep(arg)
+        elif action == "prompt":
+            message = expand(arg.get("message", arg["var"]), self.vars)
+            self.vars[arg["var"]] = input(f"👉 {message}: ").strip()
+        elif action == "start":
+            if self.timeline:
+                self.timeline.start()
+            if arg is not None:
+                self.run_step(arg)
+            self.start_time = time.time()
+            print("   ⏱ 측정 시작")
+        elif action == "activate":
+            self.driver.activate_app(arg or self.scenario.app)
+        elif action == "terminate":
+            self.driver.terminate_app(arg or self.scenario.app)
+        elif action == "restart_app":
+            app = arg or self.scenario.app
+            try:
+                self.driver.terminate_app(app)
+            except Exception:
+                pass
+            self.driver.activate_app(app)
+        elif action == "back":
+            self.driver.back()
+
+    def run_steps(self, steps):
+        for step in steps:
+            with profiler.span(f"{step.where} {step.action}", kind="step"):
+                self.run_step(step)
+
+    # -- 1회 / 전체 --
+    def run_once(self):
+        """steps -> done 대기 -> WaitResult"""
+        self.start_time = None
+        self.run_steps(self.scenario.steps)
+        self.done_detector = self.detector(self.scenario.done)
+        result = wait_until(self.done_detector, self.start_time, timeout=self.scenario.timeout)
+        if not result.matched:
+            raise RuntimeError("완료 화면 감지 타임아웃")
+        failed = _failed(result)
+        if failed:
+            raise RuntimeError(f"실패 화면 감지: {failed}")
+        if (self.scenario.done.get("visual") or {}).get("start") == "first_change":
+            self._start_from_change(result)
+        print(f"   📈 샘플링 속도: {result.sample_rate:.1f}Hz")
+        return result
+
+    def _start_from_change(self, result):
+        """visual start: first_change -> 측정 시작을 탭 시각에서 첫 화면 변화 시각으로 옮김"""
+        state = result.detail
+        if isinstance(state, VisualState) and state.first_change is not None:
+            print(f"   ⏱ 측정 시작 -> 첫 화면 변화 (탭 후 {state.first_change - self.start_time:.4f}초)")
+            self.start_time = state.first_change
+
+    def run(self, repeat=None, record=None, first=1, history=None):
+        """
+        반복 측정 -> test_results ([회차, 상태, 측정시각, 소요시간])
+
+        record: result_store.Run (회차가 끝날 때마다 바로 기록)
+        first: 시작 회차 (중단된 실행을 이어서 할 때)
+        history: 이어서 할 때 이전 회차 기록 (적응형 반복의 수렴 판정에 포함)
+        반복을 멈춘 이유는 self.stop_reason (중단되면 None)
+        """
+        detector_name = self.detector(self.scenario.done).name if record else None
+        scenario = self.scenario
+        repeat = repeat or device_env.repeat_count(scenario.repeat)
+        test_results = list(history or [])
+        repeats = stats.AdaptiveRepeat(test_results, repeat, first, **scenario.adaptive)
+        self.stop_reason = None
+
+        print(f"🚀 [{scenario.name}] 시나리오 측정 시작 ({scenario.platform}, 최대 {repeats.limit}회)")
+        with profiler.span(scenario.name, kind="scenario"):
+            return self._run(repeats, test_results, record, detector_name)
+
+    def _run(self, repeats, test_results, record, detector_name):
+        scenario = self.scenario
+        if device_env.visual_timeline():
+            self.timeline = speed_index.from_frames(self._open_frames())
+        try:
+            self.run_steps(scenario.setup)
+            for i in repeats:
+                print(f"\n[{i}/{repeats.limit} 회차]")
+                measured_at = time.strftime("%Y-%m-%d %H:%M:%S")
+                try:
+                    result = self.run_once()
+                    duration = result.end_time - self.start_time
+                    print(f"   🎉 완료! 소요 시간: {duration:.4f}초")
+                    test_results.append([i, STATUS_OK, measured_at, duration])
+                    visual = self.timeline.finish(self.start_time, result.end_time) if self.timeline else None
+                    speed_index.report(visual)
+                    # 완료 화면이 떠 있는 동안 보정 (측정 모드의 첫 성공 회차에서만 실제로 잼)
+                    correction = (self.calibrator.correct(self.done_detector, self.start_time, result)
+                                  if self.calibrator else None)
+                    if record:
+                        record.add(i, STATUS_OK, measured_at, duration, start_time=self.start_time,
+                                   end_time=result.end_time, detector=detector_name,
+                                   prev_time=result.prev_time, sample_rate=round(result.sample_rate, 1),
+                                   **calibration.fields(correction), **speed_index.fields(visual))
+                except Exception as e:
+                    print(f"   ❌ {i}회차 실패: {e}")
+                    test_results.append([i, STATUS_FAIL, measured_at, 0])
+                    if self.timeline:
+                        self.timeline.cancel()
+                    if record:
+                        record.add(i, STATUS_FAIL, measured_at, None, start_time=self.start_time,
+                                   detector=detector_name, error=str(e))
+                    try:
+                        self.run_steps(scenario.recover)
+                    except Exception as re_err:
+                        print(f"   ⚠️ 복구 실패: {re_err}")
+                    continue
+
+                if repeats.has_next(i):
+                    try:
+                        self.run_steps(scenario.reset)
+                    except Exception as e:
+                        print(f"   ⚠️ 다음 회차 준비 실패: {e}")
+                        self.run_steps(scenario.recover)
+            self.stop_reason = repeats.reason
+        finally:
+            if self.timeline:
+                self.timeline.cancel()
+                self.timeline = None
+            if self._frames is not None:
+                self._frames.close()
+                self._frames = None
+        return test_results
+
+
+# ---- [함수] 결과 저장 ----
+def result_path(scenario):
+    """result 가 상대 경로면 저장소 results/ 아래 (RESULT_DIR 이 있으면 그 폴더)"""
+    path = scenario.result
+    if not os.path.isabs(path):
+        path = os.path.join(REPO_ROOT, "results", path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return device_env.result_path(path)
+
+
+# ---- [함수] 실행 ----
+def run_scenario(scenario, pool=None, repeat=None, variables=None, store=None):
+    """
+    세션 풀에서 드라이버를 꺼내 대상 앱으로 전환 후 측정 -> CSV 경로
+
+    회차 기록은 결과 저장소(common.result_store)에 쌓고, 기존 형식 CSV 는 저장소에서 내보냄
+    """
+    from common.driver_pool import pool as default_pool
+
+    pool = pool or default_pool
+    repeat = repeat or device_env.repeat_count(scenario.repeat)
+    own_store = store is None
+    store = store or ResultStore()
+    try:
+        # 같은 시나리오 / 기기의 끝나지 않은 실행이 있으면 이어서 (RESUME=0 이면 새로 시작)
+        record = store.start_run(
+            app=scenario.app_key, platform=scenario.platform, scenario=scenario.scenario_key,
+            metric=scenario.metric, script=scenario.path, resume=device_env.resume_enabled(),
+        )
+        driver = pool.acquire(scenario.platform, settings=scenario.settings)
+        pool.switch_app(driver, scenario.app)
+        runner = ScenarioRunner(scenario, driver, variables, calibration.Calibrator(store, scenario.platform))
+        try:
+            history = [(r["iteration"], r["status"], r["measured_at"], r["duration"])
+                       for r in store.rows(record.run_id)]
+            runner.run(repeat, record=record, first=record.completed() + 1, history=history)
+            record.finish(runner.stop_reason)
+        finally:
+            try:
+                driver.terminate_app(scenario.app)
+            except Exception:
+                pass
+        stats.report(store.summary(record.run_id), scenario.name)
+        output_path = store.export_csv(record.run_id, result_path(scenario))
+        print(f"\n✅ 저장 완료: {output_path} (저장소 run {record.run_id})")
+        return output_path
+    finally:
+        if own_store:
+            store.close()
+
+
+def _parse_sets(pairs):
+    variables = {}
+    for pair in pairs or []:
+        if "=" not in pair:
+            raise SystemExit(f"--set 형식 오류: {pair} (이름=값)")
+        key, value = pair.split("=", 1)
+        variables[key] = value
+    return variables
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="선언형 시나리오 실행")
+    parser.add_argument("scenarios", nargs="+", help="시나리오 파일 (.yaml / .yml / .toml)")
+    parser.add_argument("--repeat", type=int, default=None, help="반복 횟수 (기본: 시나리오 / REPEAT_COUNT)")
+    parser.add_argument("--set", action="append", metavar="이름=값", help="시나리오 변수 덮어쓰기")
+    parser.add_argument("--check", action="store_true", help="파일 형식만 검사")
+    args = parser.parse_args(argv)
+
+    scenarios = []
+    for path in args.scenarios:
+        try:
+            scenarios.append(load_scenario(path))
+        except ScenarioError as e:
+            print(f"❌ {e}")
+            return 1
+    if args.check:
+        for s in scenarios:
+            print(f"✅ {s.path}: {s.name} ({s.platform}, 단계 {len(s.setup) + len(s.steps) + len(s.reset)}개)")
+        return 0
+
+    from common.driver_pool import pool
+
+    variables = _parse_sets(args.set)
+    failed = 0
+    try:
+        # 같은 프로세스 안의 시나리오들은 기기 세션 1개를 이어서 사용
+        for scenario in scenarios:
+            try:
+                run_scenario(scenario, pool, args.repeat, variables)
+            except Exception as e:
+                failed += 1
+                print(f"❌ [{scenario.name}] 실행 실패: {e}")
+    finally:
+        pool.close()
+        readiness.report()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
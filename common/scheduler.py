@@ -0,0 +1,151 @@
+"""
+적응형 폴링 스케줄러
+
+완료 대기 루프(common.waiter.wait_until)의 '다음 확인까지 쉬는 시간'을 정한다.
+
+호출 위치 + 감지기별로((label, detector.name) 기준, common.waiter 가 만듦) 두 가지를 학습한다.
+같은 감지기라도 준비 대기(common.readiness)와 측정 대기는 완료 시간이 달라 따로 학습해야 한다.
+  - 1회 확인 왕복 비용 (find_elements / 스크린샷 응답 시간, 지수 이동 평균)
+  - 이전 회차들의 완료 소요 시간 (예상 완료 구간)
+
+예상 완료 구간 전에는 드문드문 확인해서 UiAutomator2 / WDA 서버와 기기 CPU 를
+덜 괴롭히고, 구간에 들어서면 쉬지 않고 촘촘히 확인해 측정 해상도를 확보한다.
+학습 전(첫 회차들)에는 기존 Raw Loop 와 같이 쉬지 않고 확인한다.
+
+    시작 ── 드문드문(sparse) ──▶ [ 예상 완료 구간: 촘촘히(dense) ] ──▶ 중간 간격
+
+측정 대기의 기본 스케줄러(default_scheduler)도 드문 간격을 쓴다 (기기 간섭을 줄이는 것이 목적).
+드문 간격은 예상 구간 시작을 넘기지 않으므로, 감지가 늦어지는 것은 이전 최소값 x (1-margin) 보다
+빨리 끝난 회차뿐이고 그 지연도 드문 간격 1번(max_gap 이하)을 넘지 않는다.
+해상도가 더 중요한 호출 위치는 wait_until(..., scheduler=dense_scheduler) 로 항상 촘촘히 확인하고,
+DENSE_POLL=1 이면 프로세스 전체의 측정 대기가 촘촘해진다 (학습 / 통계는 그대로).
+준비 대기(common.readiness)는 측정 대기와 학습이 섞이지 않도록 전용 스케줄러를 쓴다.
+"""
+
+import threading
+from collections import deque
+
+from common import device_env
+
+
+class PollScheduler:
+    """
+    min_gap: 촘촘한 구간의 확인 간격(초). 0 이면 쉬지 않음
+    sparse_ratio: 드문 구간의 간격 = 왕복 비용 x sparse_ratio (기기 점유율 ~ 1/(1+ratio))
+    max_gap: 드문 구간 간격 상한(초)
+    margin: 예상 완료 구간 여유 비율 (이전 최소값 x (1-margin) ~ 최대값 x (1+margin))
+    history: 기억할 이전 완료 시간 개수
+    warmup: 이 개수만큼 완료 시간이 쌓이기 전까지는 항상 촘촘히 확인
+    sparse: False 면 학습만 하고 간격은 항상 min_gap (측정 구간용)
+    """
+
+    def __init__(self, min_gap=0.0, sparse_ratio=2.0, max_gap=0.5, margin=0.2,
+                 history=10, warmup=2, cost_alpha=0.3, sparse=True):
+        self.min_gap = min_gap
+        self.sparse = sparse
+        self.sparse_ratio = sparse_ratio
+        self.max_gap = max_gap
+        self.margin = margin
+        self.history = history
+        self.warmup = warmup
+        self.cost_alpha = cost_alpha
+        self._lock = threading.Lock()
+        self._states = {}
+
+    def _state(self, key):
+        state = self._states.get(key)
+        if state is None:
+            state = {
+                "cost": None,
+                "durations": deque(maxlen=self.history),
+                "polls": 0,
+                "busy": 0.0,
+                "elapsed": 0.0,
+            }
+            self._states[key] = state
+        return state
+
+    def window(self, key):
+        """예상 완료 구간 (lo, hi) 초. 학습 전이면 None"""
+        with self._lock:
+            durations = self._state(key)["durations"]
+            if len(durations) < self.warmup:
+                return None
+            return min(durations) * (1 - self.margin), max(durations) * (1 + self.margin)
+
+    def cost(self, key):
+        """학습된 1회 확인 왕복 비용(초)"""
+        with self._lock:
+            return self._state(key)["cost"] or 0.0
+
+    def record_poll(self, key, cost):
+        """poll 1회의 왕복 비용 기록"""
+        with self._lock:
+            state = self._state(key)
+            if state["cost"] is None:
+                state["cost"] = cost
+            else:
+                state["cost"] += self.cost_alpha * (cost - state["cost"])
+            state["polls"] += 1
+            state["busy"] += cost
+
+    def next_delay(self, key, elapsed):
+        """
+        start_time 기준 elapsed 초 시점에서 다음 확인 전에 쉴 시간(초)
+        """
+        if not self.sparse:
+            return self.min_gap
+        window = self.window(key)
+        if window is None:
+            return self.min_gap
+
+        lo, hi = window
+        cost = self.cost(key)
+        if elapsed + cost < lo:
+            # 예상 구간 전: 드문드문. 단, 구간 시작을 넘겨서 쉬지는 않음
+            gap = min(cost * self.sparse_ratio, self.max_gap, lo - elapsed - cost)
+            return max(gap, self.min_gap)
+        if elapsed <= hi:
+            return self.min_gap
+        # 예상보다 늦어짐: 왕복 비용만큼 쉬어 점유율 50% 수준으로
+        return max(min(cost, self.max_gap), self.min_gap)
+
+    def finish(self, key, elapsed, duration=None):
+        """
+        대기 1회 종료 기록
+
+        elapsed: 대기에 쓴 전체 시간(초)
+        duration: 완료 소요 시간(초). 실패면 None (예상 구간 학습에서 제외)
+        """
+        with self._lock:
+            state = self._state(key)
+            state["elapsed"] += elapsed
+            if duration is not None and duration > 0:
+                state["durations"].append(duration)
+
+    def stats(self, key):
+        """
+        감지기별 누적 통계
+        polls: 총 확인 횟수, rate_hz: 평균 샘플링 속도, cost: 왕복 비용(초),
+        busy_ratio: 대기 시간 중 확인 요청이 진행 중이던 비율 (기기 점유율 추정)
+        """
+        with self._lock:
+            state = self._state(key)
+            elapsed = state["elapsed"]
+            return {
+                "polls": state["polls"],
+                "rate_hz": state["polls"] / elapsed if elapsed > 0 else 0.0,
+                "cost": state["cost"] or 0.0,
+                "busy_ratio": state["busy"] / elapsed if elapsed > 0 else 0.0,
+            }
+
+    def reset(self):
+        with self._lock:
+            self._states.clear()
+
+
+# 프로세스 전역 기본 스케줄러 = 측정 대기용 (같은 호출 위치 / 감지기는 회차가 바뀌어도 학습 결과를 이어 씀)
+default_scheduler = PollScheduler(sparse=not device_env.dense_poll())
+
+# 항상 촘촘히 확인하는 스케줄러 (예상보다 빨리 끝나는 회차도 놓치면 안 되는 호출 위치용)
+dense_scheduler = PollScheduler(sparse=False)
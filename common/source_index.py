@@ -0,0 +1,386 @@
+"""
+page_source 고속 파서 + 속성 색인
+
+정부24(kics_browser_webview) / 고용24 는 WebView 앱이라 접근성 트리가 매우 크고,
+`//android.widget.Button[contains(@text, "로그인")]` 같은 XPath 는 기기에서 평가하는 데 오래 걸린다.
+page_source 를 호스트에서 한 번 파싱하면서 text / content-desc / resource-id / class
+(iOS: name / label / value / type) 속성 색인을 만들어 두고,
+같은 스냅샷에 대한 로케이터는 색인으로 후보 요소만 골라 조건을 확인한다.
+    - 같음(==)           : 속성값 -> 요소 목록 dict (O(1))
+    - 포함 / 시작 / 끝(contains, startswith, endswith): 속성값의 2글자 조각(bigram) -> 속성값 목록 색인으로 후보 값만 확인
+                           (첫 포함 질의 때 속성별로 한 번 만듦)
+    - 그 밖(여러 단계 XPath / Class Chain / 대소문자 무시 / 정규식): common.page_source 전체 탐색으로 평가
+결과는 common.page_source.find_all 과 같음 (문서 순서)
+
+UiAutomator2 / XCUITest XML 과 XCUITest JSON 소스(`mobile: source` format=json, WDA /source?format=json)를
+같은 ElementTree 형태로 읽으므로 common.page_source 의 rect / text / attribute 를 그대로 쓸 수 있다.
+
+    index = SourceIndex.from_source(driver.page_source)
+    index.find_all("-android uiautomator", 'new UiSelector().descriptionContains("혜택알림")')
+    index.find_many([(by, value), ...])
+
+    python -m common.source_index bench results/traces/<녹화> recordings/work24_app_start   # 파싱 / 질의 처리량
+    python -m common.source_index bench main.xml --locator 'xpath=//android.widget.Button[contains(@text, "로그인")]'
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+import xml.etree.ElementTree as ET
+
+from common import page_source
+from common.detectors import ACCESSIBILITY_ID, ANDROID_UIAUTOMATOR, IOS_CLASS_CHAIN, IOS_PREDICATE
+
+
+# 색인하는 속성 (type / class / className 은 모두 요소 종류 하나로 색인)
+INDEXED_ATTRIBUTES = ("text", "content-desc", "resource-id", "name", "label", "value")
+TYPE_ATTRIBUTES = ("type", "class", "className")
+TYPE_KEY = "#type"
+
+# 색인으로 후보를 고르는 연산자 (앞쪽이 후보가 적음)
+INDEXED_OPS = ("==", "startswith", "endswith", "contains")
+
+# XCUITest JSON 소스 키 -> XML 소스 속성
+JSON_ATTRIBUTES = {
+    "name": "name", "label": "label", "value": "value", "rawIdentifier": "name",
+    "isEnabled": "enabled", "isVisible": "visible", "isAccessible": "accessible", "isSelected": "selected",
+    "isHittable": "hittable",
+}
+
+# 벤치마크 기본 로케이터 (저장소 스크립트 / 시나리오가 쓰는 형태)
+BENCH_LOCATORS = [
+    (ANDROID_UIAUTOMATOR, 'new UiSelector().text("전체메뉴")'),
+    (ANDROID_UIAUTOMATOR, 'new UiSelector().descriptionContains("혜택알림")'),
+    (ANDROID_UIAUTOMATOR, 'new UiSelector().resourceId("kr.go.minwon.m:id/kics_browser_webview")'),
+    (ANDROID_UIAUTOMATOR, 'new UiSelector().className("android.widget.Button").textContains("확인")'),
+    ("xpath", '//android.widget.Button[contains(@text, "로그인")]'),
+    ("xpath", '//android.widget.EditText[@resource-id="input_id"]'),
+    ("id", "android:id/message"),
+    (ACCESSIBILITY_ID, "로그인을 해 주세요"),
+    (IOS_PREDICATE, "type == 'XCUIElementTypeStaticText' AND name == '검색 결과'"),
+    (IOS_PREDICATE, "label CONTAINS '로그인'"),
+    (IOS_CLASS_CHAIN, '**/XCUIElementTypeButton[`name == "로그인"`]'),
+]
+
+
+# ---- [함수] 파싱 ----
+def _json_element(node, parent=None):
+    """XCUITest JSON 노드 -> Element (XML 소스와 같은 속성 이름)"""
+    tag = node.get("type") or "XCUIElementTypeOther"
+    attrib = {"type": tag}
+    for key, attr in JSON_ATTRIBUTES.items():
+        value = node.get(key)
+        if value is None or value == "" or attr in attrib:
+            continue
+        if isinstance(value, bool):
+            value = "true" if value else "false"
+        attrib[attr] = str(value)
+    rect = node.get("rect") or {}
+    for key in ("x", "y", "width", "height"):
+        if key in rect:
+            attrib[key] = str(int(rect[key]))
+    element = ET.Element(tag, attrib) if parent is None else ET.SubElement(parent, tag, attrib)
+    for child in node.get("children") or ():
+        _json_element(child, element)
+    return element
+
+
+def parse(source):
+    """
+    page_source -> 루트 Element
+
+    source: XML 문자열 / bytes, 또는 XCUITest JSON 소스 (문자열 / dict)
+            JSON 은 XML 소스처럼 AppiumAUT 아래에 앱 요소를 둠 (Class Chain 기준 위치가 같도록)
+    """
+    if isinstance(source, bytes):
+        source = source.decode("utf-8")
+    if isinstance(source, str) and source.lstrip()[:1] in ("{", "["):
+        source = json.loads(source)
+    if isinstance(source, (dict, list)):
+        root = ET.Element("AppiumAUT")
+        for node in source if isinstance(source, list) else [source]:
+            _json_element(node, root)
+        return root
+    return page_source.parse(source)
+
+
+def _json_node(element):
+    """Element -> XCUITest JSON 노드 (_json_element 의 역변환)"""
+    attrib = element.attrib
+    node = {"type": attrib.get("type") or element.tag}
+    for key, attr in JSON_ATTRIBUTES.items():
+        if key == "rawIdentifier" or attr not in attrib:
+            continue
+        value = attrib[attr]
+        node[key] = value.lower() in page_source.TRUE_VALUES if key.startswith("is") else value
+    rect = {key: int(float(attrib[key])) for key in ("x", "y", "width", "height") if key in attrib}
+    if rect:
+        node["rect"] = rect
+    children = [_json_node(child) for child in element]
+    if children:
+        node["children"] = children
+    return node
+
+
+def to_json(source):
+    """page_source (XML / JSON) -> XCUITest JSON 소스 dict (`mobile: source` format=json 응답 형태)"""
+    root = parse(source)
+    # parse 가 씌운 최상위(AppiumAUT / hierarchy) 아래 앱 요소가 1개면 그 요소가 JSON 최상위
+    if root.tag in ("AppiumAUT", "hierarchy") and len(root) == 1:
+        root = root[0]
+    return _json_node(root)
+
+
+def to_xml(source):
+    """page_source (XML / JSON) -> XML 문자열"""
+    if isinstance(source, str) and source.lstrip().startswith("<"):
+        return source
+    return ET.tostring(parse(source), encoding="unicode")
+
+
+def _bigrams(value):
+    return {value[i:i + 2] for i in range(len(value) - 1)}
+
+
+# ---- [클래스] 색인 ----
+class SourceIndex:
+    """
+    스냅샷 1개의 속성 색인
+
+    root: page_source.parse / parse 결과 (from_source 로 바로 만들 수 있음)
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.elements = []
+        self.equal = {attr: {} for attr in INDEXED_ATTRIBUTES + (TYPE_KEY,)}
+        self._grams = {}
+        for n, element in enumerate(root.iter()):
+            self.elements.append(element)
+            attrib = element.attrib
+            for attr in INDEXED_ATTRIBUTES:
+                value = attrib.get(attr)
+                if value is not None:
+                    self.equal[attr].setdefault(value, []).append(n)
+            kind = attrib.get("class") or attrib.get("type") or element.tag
+            self.equal[TYPE_KEY].setdefault(kind, []).append(n)
+
+    @classmethod
+    def from_source(cls, source):
+        return cls(parse(source))
+
+    def __len__(self):
+        return len(self.elements)
+
+    # -- 속성 질의 (요소 번호 = 문서 순서) --
+    def _values(self, attr):
+        return self.equal[TYPE_KEY if attr in TYPE_ATTRIBUTES else attr]
+
+    def _gram_index(self, attr):
+        grams = self._grams.get(attr)
+        if grams is None:
+            grams = self._grams[attr] = {}
+            for value in self._values(attr):
+                for gram in _bigrams(value):
+                    grams.setdefault(gram, []).append(value)
+        return grams
+
+    def lookup(self, attr, op, value):
+        """속성 조건 1개에 맞는 요소 번호 목록 (색인할 수 없으면 None)"""
+        if not self.indexable(attr, op):
+            return None
+        values = self._values(attr)
+        if op == "==":
+            return list(values.get(value, ()))
+        if len(value) < 2:
+            candidates = values
+        else:
+            grams = self._gram_index(attr)
+            postings = sorted((grams.get(g, ()) for g in _bigrams(value)), key=len)
+            candidates = set(postings[0]).intersection(*postings[1:]) if postings else ()
+        if op == "startswith":
+            matched = [v for v in candidates if v.startswith(value)]
+        elif op == "endswith":
+            matched = [v for v in candidates if v.endswith(value)]
+        else:
+            matched = [v for v in candidates if value in v]
+        return sorted(n for v in matched for n in values[v])
+
+    def indexable(self, attr, op):
+        return op in INDEXED_OPS and (attr in INDEXED_ATTRIBUTES or attr in TYPE_ATTRIBUTES)
+
+    def _candidates(self, check):
+        """
+        조건 함수(page_source._any_of / _cond) -> 후보 요소 번호 목록 (색인할 수 없으면 None)
+
+        OR 묶음마다 색인 가능한 조건 1개로 후보를 골라 합침 (하나라도 못 고르면 전체 탐색)
+        """
+        groups = getattr(check, "groups", None)
+        if groups is None:
+            groups = [[check]]
+        found = set()
+        for group in groups:
+            best = None
+            for cond in group:
+                spec = getattr(cond, "spec", None)
+                if spec is None or spec[3]:
+                    continue
+                name, op, value, _ = spec
+                if not self.indexable(name, op):
+                    continue
+                rank = INDEXED_OPS.index(op)
+                if best is None or rank < best[0]:
+                    best = (rank, name, op, value)
+            if best is None:
+                return None
+            found.update(self.lookup(*best[1:]))
+        return sorted(found)
+
+    # -- 로케이터 --
+    def find_all(self, using, value):
+        """로케이터에 맞는 요소 목록 (common.page_source.find_all 과 같은 결과)"""
+        steps = page_source.compile_locator(using, value)
+        plan = page_source._single_pass(steps) if using != IOS_CLASS_CHAIN else None
+        candidates = self._candidates(plan[1][0]) if plan and plan[1] else None
+        if candidates is None:
+            return page_source.find_all(self.root, using, value)
+
+        name, conds, indexes = plan
+        matched = []
+        for n in candidates:
+            element = self.elements[n]
+            if (name == "*" or element.tag == name or page_source._type(element) == name) \
+                    and all(c(element) for c in conds):
+                matched.append(element)
+        for f in indexes:
+            index = f - 1 if f > 0 else len(matched) + f
+            matched = [matched[index]] if 0 <= index < len(matched) else []
+        return matched
+
+    def find_many(self, locators):
+        """[(using, value), ...] -> 같은 순서의 요소 목록들"""
+        return [self.find_all(using, value) for using, value in locators]
+
+
+# ---- [함수] 벤치마크 ----
+def source_files(paths):
+    """파일 / 폴더(녹화 폴더의 sources/*.xml, *.json 포함) -> page_source 파일 목록"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files += [
+                    os.path.join(root, n) for n in sorted(names)
+                    if n.endswith((".xml", ".json")) and n not in ("session.json", "meta.json")
+                ]
+        else:
+            files.append(path)
+    return files
+
+
+def sample_locators(index, count=20, seed=0):
+    """스냅샷에 실제로 있는 속성값으로 같음 / 포함 로케이터를 만듦 (벤치마크용)"""
+    rng = random.Random(seed)
+    locators = []
+    pool = [(attr, value) for attr in ("text", "content-desc", "resource-id", "name", "label")
+            for value in index.equal[attr] if value]
+    for attr, value in rng.sample(pool, min(count, len(pool))):
+        quoted = value.replace("'", "")
+        if not quoted:
+            continue
+        if rng.random() < 0.5:
+            locators.append(("xpath", f"//*[@{attr}='{quoted}']"))
+        else:
+            part = quoted[len(quoted) // 3:len(quoted) // 3 + max(2, len(quoted) // 3)]
+            locators.append(("xpath", f"//*[contains(@{attr}, '{part}')]"))
+    return locators
+
+
+def _timed(func, repeat):
+    best = None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - t
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _supported(root, locators):
+    usable = []
+    for using, value in locators:
+        try:
+            page_source.find_all(root, using, value)
+        except page_source.SelectorError:
+            continue
+        usable.append((using, value))
+    return usable
+
+
+def benchmark(path, locators=None, repeat=5, samples=20):
+    """
+    page_source 파일 1개 -> 결과 dict
+
+    parse: ElementTree 파싱, index: 파싱 + 색인, scan / indexed: 로케이터 전부를 전체 탐색 / 색인으로 평가
+    (각각 repeat 회 중 최소 시간)
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    parse_time, root = _timed(lambda: parse(data), repeat)
+    index_time, index = _timed(lambda: SourceIndex.from_source(data), repeat)
+    queries = _supported(root, (locators or BENCH_LOCATORS) + sample_locators(index, samples))
+    scan_time, scanned = _timed(lambda: [page_source.find_all(root, u, v) for u, v in queries], repeat)
+    indexed_time, found = _timed(lambda: index.find_many(queries), repeat)
+    mismatched = [q for q, a, b in zip(queries, scanned, found) if len(a) != len(b)]
+    return {
+        "path": path, "bytes": len(data), "nodes": len(index), "queries": len(queries),
+        "parse": parse_time, "index": index_time, "scan": scan_time, "indexed": indexed_time,
+        "mismatched": mismatched,
+    }
+
+
+def report(results):
+    print(f"{'파일':<32} {'노드':>7} {'KB':>7} {'파싱MB/s':>9} {'색인MB/s':>9} {'질의':>5}"
+          f" {'탐색q/s':>9} {'색인q/s':>9} {'배율':>6}")
+    for r in results:
+        mb = r["bytes"] / 1e6
+        scan_qps = r["queries"] / r["scan"] if r["scan"] else 0.0
+        indexed_qps = r["queries"] / r["indexed"] if r["indexed"] else 0.0
+        print(f"{os.path.basename(r['path'])[-32:]:<32} {r['nodes']:>7} {r['bytes'] / 1024:>7.0f}"
+              f" {mb / r['parse']:>9.1f} {mb / r['index']:>9.1f} {r['queries']:>5}"
+              f" {scan_qps:>9.0f} {indexed_qps:>9.0f} {indexed_qps / scan_qps if scan_qps else 0:>5.1f}x")
+        for using, value in r["mismatched"]:
+            print(f"   ⚠️ 결과 불일치: {using}={value}")
+
+
+# ---- [함수] 메인 ----
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="page_source 파서 / 속성 색인 벤치마크")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_bench = sub.add_parser("bench", help="녹화된 page_source 의 파싱 / 질의 처리량")
+    p_bench.add_argument("paths", nargs="+", help="page_source 파일 / 녹화 폴더")
+    p_bench.add_argument("--locator", action="append", default=[], metavar="방식=값",
+                         help="질의할 로케이터 (기본: 저장소 로케이터 + 스냅샷 속성값 표본)")
+    p_bench.add_argument("--repeat", type=int, default=5, help="측정 반복 횟수 (최소 시간 사용)")
+    p_bench.add_argument("--samples", type=int, default=20, help="스냅샷에서 뽑을 로케이터 수")
+    args = parser.parse_args(argv)
+
+    locators = [tuple(item.split("=", 1)) for item in args.locator] or None
+    files = source_files(args.paths)
+    if not files:
+        print("page_source 파일이 없습니다")
+        return 1
+    results = []
+    for path in files:
+        try:
+            results.append(benchmark(path, locators, args.repeat, args.samples))
+        except (ET.ParseError, ValueError) as e:
+            print(f"⏭ 건너뜀: {path} ({e})")
+    report(results)
+    return 1 if any(r["mismatched"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
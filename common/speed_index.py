@@ -0,0 +1,290 @@
+"""
+시각적 완성도 타임라인 (Speed Index 방식)
+
+완료 감지기는 '대상 요소가 나타난 시각' 하나만 기록한다.
+고용24 처럼 전체메뉴 버튼이 콘텐츠보다 먼저 뜨거나 그 반대인 화면은 이 시각 하나로 체감 속도를 설명할 수 없어서,
+측정 구간 동안 프레임 공급원(common.frame_source)의 프레임을 백그라운드 스레드로 축소해 모아 두고
+화면이 멈춘 뒤의 마지막 프레임 대비 시각적 완성도(VC) 곡선을 계산한다.
+
+    method="histogram" : VC(t) = 1 - |H(t) - H(끝)| / |H(시작) - H(끝)|   (흑백 히스토그램, WebPageTest 방식)
+    method="pixel"     : VC(t) = 1 - MAD(t, 끝) / MAD(시작, 끝)           (축소 픽셀 차이, 배치 이동까지 반영)
+    프레임 전체를 (N, h, w) 배열로 쌓아 bincount / 뺄셈 한 번에 계산 (프레임별 루프 없음)
+
+기록 값 (측정 시작 기준 초)
+    first_change : 첫 화면 변화 (FVC)
+    speed_index  : ∫ (1 - VC(t)) dt, 시작 ~ 마지막 프레임 (작을수록 화면이 빨리 채워짐)
+    vc85         : 완성도 85% 도달
+    last_change  : 마지막 화면 변화 (LVC, 이후 settle 초 동안 변화 없음)
+
+VISUAL_TIMELINE=1 일 때만 켜진다. MJPEG 스트림(iOS WDA 9100 / AOS UiAutomator2 mjpegServerPort 7810)이 없으면
+스크린샷으로 대신 기록하지 않고 끈다 (감지 폴링과 같은 세션을 번갈아 써서 측정값이 늘어나기 때문).
+
+    timeline = speed_index.from_env(driver)           # 꺼져 있으면 None
+    timeline.start()                                  # 탭 / activate 직전 (그 순간 화면이 VC 0 기준)
+    ...
+    metrics = timeline.finish(start_time, result.end_time)
+    speed_index.report(metrics)
+    record.add(..., **speed_index.fields(metrics))
+"""
+
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from common import device_env, stats
+from common.visual import DEFAULT_MAD, DEFAULT_WIDTH, mad, thumbnail
+
+
+# 마지막 변화 후 이 시간(초) 동안 화면이 그대로면 완성된 것으로 봄
+DEFAULT_SETTLE = 1.0
+# 완료 감지 후 화면이 멈추기를 기다리는 최대 시간(초)
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_BINS = 32
+METHODS = ("histogram", "pixel")
+VC_TARGET = 0.85
+
+# first_change / speed_index / vc85 / last_change: 측정 시작 기준 초 (해당 없으면 None)
+# frames: 계산에 쓴 프레임 수, settled: timeout 전에 화면이 멈췄는지
+# curve: [(시작 기준 초, 완성도 0~1)]
+VisualMetrics = namedtuple(
+    "VisualMetrics", ["first_change", "speed_index", "vc85", "last_change", "frames", "settled", "curve"],
+)
+
+# CSV 추가 컬럼 (columns() 값 순서)
+COLUMNS = ["첫화면변화(초)", "SpeedIndex(초)", "시각완성85(초)", "마지막화면변화(초)"]
+# 결과 저장소 CSV 부가 컬럼 {헤더: fields() 키} (ResultStore.export_csv columns)
+CSV_FIELDS = dict(zip(COLUMNS, ["first_visual_change", "speed_index", "visually_complete_85", "last_visual_change"]))
+
+
+# ---- [함수] 완성도 계산 ----
+def histograms(stack, bins=DEFAULT_BINS):
+    """(N, h, w) uint8 배열 -> (N, bins) 흑백 히스토그램 (np.bincount 1회)"""
+    n = len(stack)
+    index = (stack.reshape(n, -1).astype(np.int64) * bins >> 8) + np.arange(n)[:, None] * bins
+    return np.bincount(index.ravel(), minlength=n * bins).reshape(n, bins)
+
+
+def completeness(stack, method="histogram", bins=DEFAULT_BINS):
+    """(N, h, w) 배열 -> 첫 프레임 0, 마지막 프레임 1 기준 완성도 (N,) (처음과 끝이 같으면 전부 1)"""
+    if method == "histogram":
+        hist = histograms(stack, bins)
+        remaining = np.abs(hist - hist[-1]).sum(axis=1).astype(float)
+    elif method == "pixel":
+        frames = stack.astype(np.int16)
+        remaining = np.abs(frames - frames[-1]).reshape(len(frames), -1).mean(axis=1)
+    else:
+        raise ValueError(f"알 수 없는 완성도 계산 방식: {method} ({' / '.join(METHODS)})")
+    total = remaining[0]
+    if total <= 0:
+        return np.ones(len(stack))
+    return np.clip(1.0 - remaining / total, 0.0, 1.0)
+
+
+def compute(times, thumbs, start_time, method="histogram", mad_threshold=DEFAULT_MAD, settled=True):
+    """
+    프레임 시각 / 축소 프레임 목록 -> VisualMetrics
+
+    첫 프레임은 측정 시작 직전 화면(VC 0 기준), 마지막 프레임은 화면이 멈춘 뒤(VC 1 기준)
+    크기가 다른 프레임(화면 회전)은 마지막 프레임과 같은 크기만 사용
+    """
+    shape = thumbs[-1].shape
+    keep = [i for i, thumb in enumerate(thumbs) if thumb.shape == shape]
+    stack = np.stack([thumbs[i] for i in keep])
+    times = np.maximum(np.asarray([times[i] for i in keep], dtype=float), start_time)
+    if len(stack) < 2:
+        return None
+
+    vc = completeness(stack, method)
+    frames = stack.astype(np.int16)
+    # 첫 화면 변화: 기준 프레임과 처음 달라진 프레임 / 마지막 변화: 직전 프레임과 마지막으로 달라진 프레임
+    moved = np.abs(frames - frames[0]).mean(axis=(1, 2)) > mad_threshold
+    steps = np.abs(np.diff(frames, axis=0)).mean(axis=(1, 2)) > mad_threshold
+    reached = np.flatnonzero(vc >= VC_TARGET)
+
+    def _rel(t):
+        return round(float(t) - start_time, 4)
+
+    return VisualMetrics(
+        first_change=_rel(times[np.argmax(moved)]) if moved.any() else None,
+        # 계단 함수 적분: 각 프레임의 완성도가 다음 프레임까지 유지
+        speed_index=round(float(np.sum((1.0 - vc[:-1]) * np.diff(times))), 4),
+        vc85=_rel(times[reached[0]]) if len(reached) else None,
+        last_change=_rel(times[1:][steps][-1]) if steps.any() else None,
+        frames=len(stack),
+        settled=settled,
+        curve=[(_rel(t), round(float(v), 4)) for t, v in zip(times, vc)],
+    )
+
+
+# ---- [클래스] 타임라인 기록기 ----
+class VisualTimeline:
+    """
+    프레임 공급원의 새 프레임을 백그라운드 스레드로 축소해 쌓고, finish 에서 완성도 지표 계산
+
+    MJPEG 는 next_frame 을 여러 곳에서 기다려도 되므로 ImageDetector 와 같은 공급원을 같이 써도 된다.
+    roi: 비교 영역 (None 이면 상태 표시줄 / 홈 인디케이터를 뺀 화면, common.visual.DEFAULT_ROI)
+    """
+
+    def __init__(self, frames, roi=None, width=DEFAULT_WIDTH, settle=DEFAULT_SETTLE, method="histogram",
+                 mad_threshold=DEFAULT_MAD, owns_frames=False):
+        if method not in METHODS:
+            raise ValueError(f"알 수 없는 완성도 계산 방식: {method} ({' / '.join(METHODS)})")
+        self.frames = frames
+        self.roi = roi
+        self.width = width
+        self.settle = settle
+        self.method = method
+        self.mad_threshold = mad_threshold
+        self.owns_frames = owns_frames
+        self.error = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._samples = []
+        self._changed_at = None
+
+    def start(self):
+        """기록 시작 (탭 / activate 직전에 호출, 이전 기록은 버림)"""
+        self.cancel()
+        if self.frames.kind == "screenshot":
+            print("   ⚠️ 시각적 완성도: MJPEG 스트림이 끊겨 스크린샷으로 기록 (감지 폴링과 세션을 같이 써서 측정값이 늘어날 수 있음)")
+        self.error = None
+        self._samples = []
+        self._changed_at = None
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="visual-timeline", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        # MJPEG: 지금 떠 있는 프레임부터 받음 (탭 이전 화면 = 기준)
+        seq = max(0, self.frames.current_seq() - 1)
+        while not self._stop.is_set():
+            try:
+                frame = self.frames.next_frame(after_seq=seq, timeout=0.5)
+            except TimeoutError:
+                continue
+            except Exception as e:
+                self.error = e
+                return
+            seq = frame.seq
+            thumb = thumbnail(frame.image, self.roi, self.width)
+            with self._lock:
+                if self._samples and mad(thumb, self._samples[-1][1]) > self.mad_threshold:
+                    self._changed_at = frame.captured_at
+                self._samples.append((frame.captured_at, thumb))
+
+    def _settled(self, since):
+        with self._lock:
+            if not self._samples:
+                return False
+            latest = self._samples[-1][0]
+            changed = max(self._changed_at or since, since)
+        return latest >= since and latest - changed >= self.settle
+
+    def cancel(self):
+        """기록 중단 (실패 회차)"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def finish(self, start_time, end_time=None, timeout=DEFAULT_TIMEOUT):
+        """
+        완료 감지 후 화면이 settle 초 동안 멈출 때까지 더 기록하고 -> VisualMetrics (프레임이 부족하면 None)
+
+        end_time: 완료 감지 시각 (감지 이후에도 콘텐츠가 그려지는 경우까지 포함)
+        """
+        if self._thread is None:
+            return None
+        since = max(start_time, end_time or start_time)
+        deadline = time.time() + timeout
+        settled = False
+        while self._thread.is_alive() and time.time() < deadline:
+            if self._settled(since):
+                settled = True
+                break
+            time.sleep(0.05)
+        self.cancel()
+        if self.error is not None:
+            print(f"   ⚠️ 시각적 완성도 기록 중 오류: {self.error}")
+        if not settled:
+            print(f"   ⚠️ 시각적 완성도: {timeout:.0f}초 안에 화면이 멈추지 않음 (마지막 프레임 기준으로 계산)")
+
+        with self._lock:
+            samples = list(self._samples)
+        # 기준 프레임 = 측정 시작 시각 이전의 마지막 프레임 (없으면 첫 프레임)
+        base = max([i for i, (t, _) in enumerate(samples) if t <= start_time], default=0)
+        samples = samples[base:]
+        if len(samples) < 2:
+            return None
+        return compute([t for t, _ in samples], [thumb for _, thumb in samples], start_time, self.method,
+                       self.mad_threshold, settled)
+
+    def close(self):
+        self.cancel()
+        if self.owns_frames:
+            self.frames.close()
+
+
+def from_frames(frames, owns_frames=False, **options):
+    """MJPEG 프레임 공급원 -> VisualTimeline (스크린샷 대체뿐이면 타임라인을 끄고 None)"""
+    if frames.kind == "screenshot":
+        print("   ⚠️ 시각적 완성도: MJPEG 스트림이 없어 기록하지 않음 (mjpegServerPort / MJPEG_SERVER_PORT 확인)")
+        if owns_frames:
+            frames.close()
+        return None
+    return VisualTimeline(frames, owns_frames=owns_frames, **options)
+
+
+def from_env(driver, **options):
+    """VISUAL_TIMELINE=1 이면 프레임 공급원을 열어 VisualTimeline, 아니면 None"""
+    if not device_env.visual_timeline():
+        return None
+    from common.frame_source import open_frame_source
+
+    return from_frames(open_frame_source(driver), owns_frames=True, **options)
+
+
+# ---- [함수] 출력 / 기록 ----
+def _fmt(value):
+    return f"{value:.4f}" if value is not None else ""
+
+
+def report(metrics):
+    if metrics is None:
+        return
+    print(f"   🖼 첫 화면 변화 {_fmt(metrics.first_change) or '-'}초 / Speed Index {metrics.speed_index:.4f}초"
+          f" / 85% 완성 {_fmt(metrics.vc85) or '-'}초 / 마지막 변화 {_fmt(metrics.last_change) or '-'}초"
+          f" (프레임 {metrics.frames}장)")
+
+
+def summarize(metrics, label=""):
+    """회차별 VisualMetrics 목록 -> 지표별 통계 출력 (common.stats.report)"""
+    for name, title in (("first_change", "첫 화면 변화"), ("speed_index", "Speed Index"), ("vc85", "85% 완성"),
+                        ("last_change", "마지막 화면 변화")):
+        values = [getattr(m, name) for m in metrics if m is not None and getattr(m, name) is not None]
+        if values:
+            stats.report(stats.summarize(values), f"{label} {title}".strip())
+
+
+def fields(metrics):
+    """결과 저장소 record.add 부가 값 (지표가 없으면 빈 dict)"""
+    if metrics is None:
+        return {}
+    return {
+        "first_visual_change": metrics.first_change,
+        "speed_index": metrics.speed_index,
+        "visually_complete_85": metrics.vc85,
+        "last_visual_change": metrics.last_change,
+        "visual_frames": metrics.frames,
+    }
+
+
+def columns(metrics):
+    """CSV 추가 컬럼 값 (COLUMNS 순서)"""
+    if metrics is None:
+        return [""] * len(COLUMNS)
+    return [_fmt(metrics.first_change), _fmt(metrics.speed_index), _fmt(metrics.vc85), _fmt(metrics.last_change)]
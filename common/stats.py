@@ -0,0 +1,466 @@
+"""
+측정 결과 통계 (NumPy)
+
+스크립트마다 평균 / 최소 / 최대 / 표준편차 계산이 제각각이었다
+(statistics.pstdev, statistics.stdev, pandas std(ddof=1), 직접 계산한 모표준편차 ...).
+모든 스크립트 / 시나리오 엔진 / 결과 저장소 / 병렬 러너가 이 모듈 하나로 같은 통계를 계산한다.
+
+    - 표준편차: 표본 표준편차 (ddof=1, 1건이면 0)
+    - 백분위수: p50 / p90 / p95 / p99 (선형 보간)
+    - 절사평균: 양쪽 TRIM(10%)씩 잘라낸 평균
+    - 신뢰구간: 평균의 부트스트랩 95% 신뢰구간 (재표본 BOOTSTRAP_SAMPLES 회, 시드 고정)
+    - 이상치: 중앙값 절대편차(MAD) 기반 수정 Z 점수 > OUTLIER_Z 인 회차 (표시만 하고 통계에서 빼지 않음)
+    - 워밍업: 앞쪽 N회차(성공 / 실패 무관)는 통계에서 제외 (WARMUP 환경 변수, 기본 0)
+    - 실패: 성공 회차만 통계에 넣고 실패 횟수 / 성공률은 따로 표시
+    - 적응형 반복: 평균(또는 p90)의 신뢰구간 반폭이 목표 이하가 되거나 최대 횟수에 닿을 때까지 반복
+      (AdaptiveRepeat, CI_TARGET 환경 변수가 없으면 기존처럼 고정 횟수)
+
+    summary = stats.from_rows(test_results)            # [회차, 상태, 측정시간, 소요시간, ...] 목록
+    stats.report(summary, "정부24 검색")
+    avg_val, min_val, max_val, std_val = summary.legacy()
+
+    repeats = stats.AdaptiveRepeat(test_results, REPEAT_COUNT)
+    for i in repeats:                                  # CI_TARGET=3% 면 수렴할 때까지, 아니면 REPEAT_COUNT 회
+        ...
+    print(repeats.reason)                              # 멈춘 이유
+
+    python -m common.stats a.csv [b.csv]               # CSV 통계 / 두 CSV 평균 차이 비교
+"""
+
+import argparse
+import csv
+import math
+from collections import namedtuple
+
+import numpy as np
+
+from common import device_env, profiler
+
+
+STATUS_OK = ("성공", "Success")
+
+PERCENTILES = (50, 90, 95, 99)
+TRIM = 0.1
+CONFIDENCE = 0.95
+BOOTSTRAP_SAMPLES = 10000
+OUTLIER_Z = 3.5
+SEED = 0
+
+# 적응형 반복: 수렴 판정을 시작할 최소 성공 회차 수, 최대 회차 기본값(기본 반복 횟수의 배수)
+MIN_RUNS = 5
+MAX_RATIO = 3
+CI_METRICS = {"mean": "평균", "p90": "p90"}
+
+# CSV 통계 컬럼 (기존 평균~표준편차 뒤에 붙임)
+EXTRA_COLUMNS = [
+    "p50(초)", "p90(초)", "p95(초)", "p99(초)", "절사평균(초)",
+    "95%CI하한(초)", "95%CI상한(초)", "실패(회)", "이상치(회)",
+]
+
+
+class Summary(namedtuple("Summary", [
+    "count",         # 통계에 들어간 성공 회차 수
+    "failures",      # 실패 회차 수 (워밍업 제외)
+    "warmup",        # 워밍업으로 제외한 회차 수
+    "mean", "min", "max", "std",
+    "p50", "p90", "p95", "p99",
+    "trimmed_mean",
+    "ci_low", "ci_high",
+    "outliers",      # 이상치로 표시된 (회차, 값) 목록
+])):
+    __slots__ = ()
+
+    def legacy(self):
+        """기존 CSV 통계 칸 (평균, 최소, 최대, 표준편차)"""
+        return self.mean, self.min, self.max, self.std
+
+    def extra(self):
+        """EXTRA_COLUMNS 순서의 문자열 칸"""
+        values = [self.p50, self.p90, self.p95, self.p99, self.trimmed_mean, self.ci_low, self.ci_high]
+        return [f"{v:.4f}" for v in values] + [str(self.failures), " ".join(str(i) for i, _ in self.outliers)]
+
+
+# 두 그룹 비교 결과 (diff = a 평균 - b 평균)
+Comparison = namedtuple("Comparison", ["diff", "ci_low", "ci_high", "p_value", "significant", "a", "b"])
+
+# Mann-Whitney U 검정 결과 (effect: 순위 이연 상관, 양수면 a 가 b 보다 큰 값(느림) 쪽)
+MannWhitney = namedtuple("MannWhitney", ["u", "p_value", "effect"])
+
+
+def warmup_count():
+    """워밍업으로 제외할 앞쪽 회차 수 (WARMUP 환경 변수)"""
+    return device_env.warmup_count()
+
+
+def _rng(seed):
+    return np.random.default_rng(SEED if seed is None else seed)
+
+
+def trimmed_mean(values, trim=TRIM):
+    """양쪽 trim 비율씩 잘라낸 평균"""
+    x = np.sort(np.asarray(values, dtype=float))
+    if x.size == 0:
+        return 0.0
+    cut = int(x.size * trim)
+    return float(x[cut:x.size - cut].mean()) if x.size > 2 * cut else float(np.median(x))
+
+
+def bootstrap_ci(values, confidence=CONFIDENCE, samples=BOOTSTRAP_SAMPLES, seed=None, percentile=None):
+    """
+    평균의 부트스트랩 (하한, 상한) - 재표본 통계를 한 번에 행렬로 계산
+
+    percentile: 주면 평균 대신 해당 백분위수(예: 90)의 신뢰구간
+    """
+    x = np.asarray(values, dtype=float)
+    if x.size == 0:
+        return 0.0, 0.0
+    if x.size == 1:
+        return float(x[0]), float(x[0])
+    resampled = x[_rng(seed).integers(0, x.size, size=(samples, x.size))]
+    if percentile is None:
+        estimates = resampled.mean(axis=1)
+    else:
+        estimates = np.percentile(resampled, percentile, axis=1)
+    alpha = (1 - confidence) / 2 * 100
+    low, high = np.percentile(estimates, [alpha, 100 - alpha])
+    return float(low), float(high)
+
+
+def mad_outliers(values, threshold=OUTLIER_Z):
+    """
+    MAD 기반 수정 Z 점수(0.6745 * |x - 중앙값| / MAD)가 threshold 를 넘는 값의 위치 -> bool 배열
+
+    절반 이상이 같은 값이라 MAD 가 0 이면 평균 절대편차(* 1.2533)로 대신함
+    """
+    x = np.asarray(values, dtype=float)
+    if x.size < 3:
+        return np.zeros(x.size, dtype=bool)
+    deviation = np.abs(x - np.median(x))
+    mad = np.median(deviation)
+    if mad > 0:
+        z = 0.6745 * deviation / mad
+    else:
+        meanad = deviation.mean()
+        if meanad == 0:
+            return np.zeros(x.size, dtype=bool)
+        z = deviation / (1.2533 * meanad)
+    return z > threshold
+
+
+def summarize(values, iterations=None, failures=0, warmup=0, seed=None):
+    """
+    성공 회차 소요 시간 목록 -> Summary
+
+    iterations: values 와 같은 길이의 회차 번호 (이상치 표시용, 생략 시 1부터)
+    failures / warmup: 표시용 실패 / 워밍업 제외 횟수 (values 에는 이미 빠져 있어야 함)
+    """
+    x = np.asarray(values, dtype=float)
+    iterations = list(iterations) if iterations is not None else list(range(1, x.size + 1))
+    if x.size == 0:
+        return Summary(0, failures, warmup, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, [])
+
+    p50, p90, p95, p99 = (float(v) for v in np.percentile(x, PERCENTILES))
+    ci_low, ci_high = bootstrap_ci(x, seed=seed)
+    flags = mad_outliers(x)
+    return Summary(
+        count=int(x.size),
+        failures=failures,
+        warmup=warmup,
+        mean=float(x.mean()),
+        min=float(x.min()),
+        max=float(x.max()),
+        std=float(x.std(ddof=1)) if x.size > 1 else 0.0,
+        p50=p50, p90=p90, p95=p95, p99=p99,
+        trimmed_mean=trimmed_mean(x),
+        ci_low=ci_low,
+        ci_high=ci_high,
+        outliers=[(iterations[i], float(x[i])) for i in np.flatnonzero(flags)],
+    )
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def split_rows(rows, status_idx=1, duration_idx=3, warmup=None, ok=STATUS_OK):
+    """
+    test_results 목록 -> (성공 소요 시간, 회차 번호, 실패 횟수, 워밍업 제외 횟수)
+
+    rows: [회차, 상태, 측정시간, 소요시간, ...] (리스트) 또는 dict 행 (status_idx / duration_idx 에 키 이름)
+    status_idx 가 None 이면 (상태 컬럼이 없는 스크립트) 소요 시간이 있는 회차를 성공으로 봄
+    앞쪽 warmup 개 행(기본: WARMUP 환경 변수)은 성공 / 실패와 관계없이 제외,
+    나머지 중 상태가 ok 이고 소요 시간이 0 보다 큰 회차만 통계에 넣고 그 밖은 실패로 셈
+    """
+    warmup = warmup_count() if warmup is None else warmup
+    rows = list(rows)
+    skipped = min(warmup, len(rows))
+    values, iterations, failures = [], [], 0
+    for n, row in enumerate(rows[skipped:], start=skipped + 1):
+        duration = _to_float(row[duration_idx])
+        if (status_idx is None or row[status_idx] in ok) and duration and duration > 0:
+            iteration = next(iter(row.values())) if isinstance(row, dict) else row[0]
+            values.append(duration)
+            iterations.append(iteration if isinstance(iteration, int) else n)
+        else:
+            failures += 1
+    return values, iterations, failures, skipped
+
+
+def from_rows(rows, status_idx=1, duration_idx=3, warmup=None, ok=STATUS_OK, seed=None):
+    """스크립트의 test_results 목록 -> Summary (split_rows 규칙)"""
+    values, iterations, failures, skipped = split_rows(rows, status_idx, duration_idx, warmup, ok)
+    return summarize(values, iterations, failures, skipped, seed=seed)
+
+
+def parse_target(value):
+    """CI 반폭 목표 -> (값, 추정값 대비 비율 여부). "0.05" -> (0.05, False), "3%" -> (0.03, True), 없으면 None"""
+    if value is None or str(value).strip() == "":
+        return None
+    text = str(value).strip()
+    if text.endswith("%"):
+        return float(text[:-1]) / 100, True
+    return float(text), False
+
+
+def ci_half_width(values, metric="mean", seed=None):
+    """(추정값, 부트스트랩 95% 신뢰구간 반폭) - metric: mean / p90"""
+    x = np.asarray(values, dtype=float)
+    percentile = None if metric == "mean" else float(metric.lstrip("p"))
+    estimate = float(x.mean()) if percentile is None else float(np.percentile(x, percentile))
+    low, high = bootstrap_ci(x, seed=seed, percentile=percentile)
+    return estimate, (high - low) / 2
+
+
+class AdaptiveRepeat:
+    """
+    반복 회차 번호를 내주는 반복자 (고정 횟수 / 신뢰구간이 목표 이하로 좁혀질 때까지)
+
+    rows: 스크립트의 test_results (회차가 끝날 때마다 append 되는 바로 그 리스트, split_rows 규칙으로 읽음)
+    repeat: 기본 반복 횟수. 목표(target)가 없으면 이 횟수만큼 고정 반복 (기존 동작)
+    first: 시작 회차 (중단된 실행을 이어서 할 때)
+    target: CI 반폭 목표 ("0.05" = 초, "3%" = 추정값 대비). 생략 시 CI_TARGET 환경 변수
+    metric: "mean" / "p90" (생략 시 CI_METRIC 환경 변수, 기본 mean)
+    min_runs / max_runs: 수렴 판정을 시작할 최소 성공 회차 / 최대 회차 (생략 시 MIN_REPEAT / MAX_REPEAT)
+
+    루프가 끝나면 reason(멈춘 이유), total(끝난 회차 번호)을 남긴다.
+    회차 사이 준비(로그아웃 / 이전 화면)는 has_next(i) 로 다음 회차가 있을 때만 한다 (수렴해서 일찍 멈추는 경우 포함)
+    루프 안에서 break / 예외로 빠져나오면 reason 은 None, total 은 limit 그대로 (중단)
+    """
+
+    def __init__(self, rows, repeat, first=1, target=None, metric=None, min_runs=None, max_runs=None,
+                 status_idx=1, duration_idx=3, ok=STATUS_OK):
+        self.rows = rows
+        self.first = first
+        self.target = parse_target(device_env.ci_target() if target is None else target)
+        self.metric = (metric or device_env.ci_metric()).lower()
+        if self.metric not in CI_METRICS:
+            raise ValueError(f"CI_METRIC 은 {' / '.join(CI_METRICS)} 중 하나여야 합니다: {self.metric}")
+        self.min_runs = max(device_env.min_repeat(MIN_RUNS) if min_runs is None else min_runs, 2)
+        if self.target:
+            self.limit = max_runs or device_env.max_repeat(repeat * MAX_RATIO)
+        else:
+            self.limit = repeat
+        self.status_idx = status_idx
+        self.duration_idx = duration_idx
+        self.ok = ok
+        self.total = self.limit
+        self.reason = None
+        self.half_width = None
+        self.goal = None
+        # (판정한 rows 개수, 멈출 이유) - 같은 결과로 has_next / 반복이 판정을 다시 계산하지 않도록
+        self._checked = None
+        if self.target:
+            amount, relative = self.target
+            goal = f"{amount * 100:g}%" if relative else f"{amount:g}초"
+            print(f"🎯 적응형 반복: {CI_METRICS[self.metric]} 95% CI 반폭 ≤ {goal} 까지 "
+                  f"(최소 {self.min_runs}회 성공 ~ 최대 {self.limit}회)")
+
+    @property
+    def adaptive(self):
+        return self.target is not None
+
+    def converged(self):
+        """지금까지의 성공 회차로 수렴 판정 -> 멈출 이유 (아직이면 None)"""
+        if self._checked is not None and self._checked[0] == len(self.rows):
+            return self._checked[1]
+        reason = None
+        values, _, _, _ = split_rows(self.rows, self.status_idx, self.duration_idx, ok=self.ok)
+        if len(values) >= self.min_runs:
+            estimate, self.half_width = ci_half_width(values, self.metric)
+            amount, relative = self.target
+            self.goal = amount * estimate if relative else amount
+            if self.half_width <= self.goal:
+                reason = (f"수렴 - {CI_METRICS[self.metric]} 95% CI 반폭 {self.half_width:.4f}초 ≤ "
+                          f"목표 {self.goal:.4f}초 (성공 {len(values)}회)")
+        self._checked = (len(self.rows), reason)
+        return reason
+
+    def has_next(self, i):
+        """회차 i 가 끝난 뒤 다음 회차가 있는지 (마지막 회차 뒤에는 로그아웃 등 다음 회차 준비를 하지 않음)"""
+        if i >= self.limit:
+            return False
+        return not (self.adaptive and self.converged())
+
+    def __iter__(self):
+        i = self.first
+        while i <= self.limit:
+            reason = self.converged() if self.adaptive else None
+            if reason:
+                self._stop(i - 1, reason)
+                return
+            with profiler.span(f"회차 {i}", kind="iteration"):
+                yield i
+            i += 1
+        if not self.adaptive:
+            self._stop(self.limit, f"고정 횟수 ({self.limit}회)")
+            return
+        reason = self.converged()
+        if reason is None:
+            width = (f", {CI_METRICS[self.metric]} CI 반폭 {self.half_width:.4f}초 > 목표 {self.goal:.4f}초"
+                     if self.half_width is not None else ", 성공 회차 부족")
+            reason = f"최대 횟수 도달 ({self.limit}회{width})"
+        self._stop(self.limit, reason)
+
+    def _stop(self, total, reason):
+        self.total = total
+        self.reason = reason
+        print(f"⏹ 반복 종료: {reason}")
+
+
+def report(summary, label=""):
+    """콘솔 요약 출력"""
+    title = f" [{label}]" if label else ""
+    total = summary.count + summary.failures
+    if summary.count == 0:
+        print(f"📊 통계{title}: 성공한 회차 없음 (실패 {summary.failures}회)")
+        return
+    rate = summary.count / total * 100 if total else 0.0
+    print(f"📊 통계{title}: 성공 {summary.count}/{total}회 ({rate:.0f}%)"
+          + (f", 워밍업 {summary.warmup}회 제외" if summary.warmup else ""))
+    print(f"   평균 {summary.mean:.4f}초 (95% CI {summary.ci_low:.4f} ~ {summary.ci_high:.4f}), "
+          f"절사평균 {summary.trimmed_mean:.4f}초, 표준편차 {summary.std:.4f}초")
+    print(f"   최소 {summary.min:.4f} / p50 {summary.p50:.4f} / p90 {summary.p90:.4f} / "
+          f"p95 {summary.p95:.4f} / p99 {summary.p99:.4f} / 최대 {summary.max:.4f}초")
+    if summary.outliers:
+        listed = ", ".join(f"{i}회차 {v:.4f}초" for i, v in summary.outliers)
+        print(f"   ⚠️ 이상치 {len(summary.outliers)}건: {listed}")
+
+
+def compare(a, b, confidence=CONFIDENCE, samples=BOOTSTRAP_SAMPLES, seed=None):
+    """
+    두 그룹(성공 회차 소요 시간) 평균 차이 -> Comparison
+
+    diff: a 평균 - b 평균, ci: 차이의 부트스트랩 신뢰구간 (그룹별로 따로 재표본)
+    p_value: 순열 검정(양측). 신뢰구간이 0 을 포함하지 않으면 significant
+    """
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    if a.size < 2 or b.size < 2:
+        raise ValueError("비교하려면 그룹마다 성공 회차가 2개 이상 필요합니다")
+    rng = _rng(seed)
+    diff = float(a.mean() - b.mean())
+
+    boot = (a[rng.integers(0, a.size, size=(samples, a.size))].mean(axis=1)
+            - b[rng.integers(0, b.size, size=(samples, b.size))].mean(axis=1))
+    alpha = (1 - confidence) / 2 * 100
+    ci_low, ci_high = (float(v) for v in np.percentile(boot, [alpha, 100 - alpha]))
+
+    pooled = np.concatenate([a, b])
+    perm = rng.permuted(np.tile(pooled, (samples, 1)), axis=1)
+    perm_diff = perm[:, :a.size].mean(axis=1) - perm[:, a.size:].mean(axis=1)
+    p_value = float((np.count_nonzero(np.abs(perm_diff) >= abs(diff)) + 1) / (samples + 1))
+
+    return Comparison(diff, ci_low, ci_high, p_value, not (ci_low <= 0 <= ci_high), summarize(a), summarize(b))
+
+
+def rankdata(values):
+    """평균 순위 (동률은 같은 순위의 평균, 1부터)"""
+    x = np.asarray(values, dtype=float)
+    ranks = np.empty(x.size)
+    ranks[np.argsort(x, kind="mergesort")] = np.arange(1, x.size + 1)
+    _, inverse, counts = np.unique(x, return_inverse=True, return_counts=True)
+    return (np.bincount(inverse, weights=ranks) / counts)[inverse]
+
+
+def mann_whitney(a, b):
+    """
+    Mann-Whitney U 검정 (양측, 정규 근사 + 동률 / 연속성 보정) -> MannWhitney
+
+    평균 대신 순위로 비교하므로 한두 번 튄 회차(이상치)에 덜 흔들림
+    """
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    n1, n2 = a.size, b.size
+    if n1 == 0 or n2 == 0:
+        raise ValueError("비교하려면 그룹마다 성공 회차가 1개 이상 필요합니다")
+    pooled = np.concatenate([a, b])
+    ranks = rankdata(pooled)
+    u = float(ranks[:n1].sum() - n1 * (n1 + 1) / 2)
+    mean_u = n1 * n2 / 2
+    _, counts = np.unique(pooled, return_counts=True)
+    n = n1 + n2
+    var_u = n1 * n2 / 12 * ((n + 1) - (counts ** 3 - counts).sum() / (n * (n - 1)))
+    if var_u <= 0:
+        p_value = 1.0
+    else:
+        z = max(abs(u - mean_u) - 0.5, 0.0) / math.sqrt(var_u)
+        p_value = math.erfc(z / math.sqrt(2))
+    return MannWhitney(u, min(p_value, 1.0), 2 * u / (n1 * n2) - 1)
+
+
+def report_comparison(result, label_a="A", label_b="B"):
+    faster, slower = (label_a, label_b) if result.diff < 0 else (label_b, label_a)
+    print(f"⚖️ {label_a} 평균 {result.a.mean:.4f}초 vs {label_b} 평균 {result.b.mean:.4f}초")
+    print(f"   차이 {result.diff:+.4f}초 (95% CI {result.ci_low:+.4f} ~ {result.ci_high:+.4f}, p={result.p_value:.4f})")
+    if result.significant:
+        print(f"   ✅ {faster} 이(가) {slower} 보다 빠름 (통계적으로 유의)")
+    else:
+        print("   ➖ 차이가 신뢰구간 안에서 0 을 포함 -> 이 횟수로는 차이가 있다고 보기 어려움")
+
+
+def read_csv(path):
+    """
+    기존 형식 CSV -> (rows, 측정값 헤더)
+
+    소요 시간 컬럼은 헤더에 '반응속도'가 들어간 첫 컬럼, 통계 행은 건너뜀
+    """
+    from common.result_store import STATS_LABELS
+
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = next(reader, None) or []
+        body = [row for row in reader if row and row[0] not in STATS_LABELS]
+    metric_idx = next((i for i, h in enumerate(header) if "반응속도" in h), None)
+    if metric_idx is None:
+        raise ValueError(f"측정값 컬럼(반응속도)을 찾을 수 없습니다: {path}")
+    status_idx = header.index("상태") if "상태" in header else None
+    rows = []
+    for n, row in enumerate(body, start=1):
+        row = row + [""] * (len(header) - len(row))
+        status = row[status_idx] if status_idx is not None else STATUS_OK[0]
+        rows.append([int(row[0]) if row[0].isdigit() else n, status, "", row[metric_idx]])
+    return rows, header[metric_idx]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="측정 결과 CSV 통계 / 비교")
+    parser.add_argument("csv", nargs="+", help="기존 형식 CSV (2개면 평균 차이 비교)")
+    parser.add_argument("--warmup", type=int, default=None, help="제외할 앞쪽 회차 수 (기본: WARMUP 환경 변수)")
+    args = parser.parse_args(argv)
+
+    samples = []
+    for path in args.csv:
+        rows, metric = read_csv(path)
+        values, iterations, failures, skipped = split_rows(rows, warmup=args.warmup)
+        report(summarize(values, iterations, failures, skipped), f"{path} / {metric}")
+        samples.append(values)
+
+    if len(samples) == 2:
+        print()
+        report_comparison(compare(*samples), *args.csv)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+기준(템플릿) 이미지 캐시
+
+`*_test.png` 같은 기준 이미지를 프로세스당 한 번만 읽고(cv2.imread),
+ROI 크기별로 리사이즈한 결과도 함께 캐시한다.
+파일 수정 시각(mtime)을 주기적으로 확인해서, IMG_capture_*.py 로
+기준 이미지를 다시 캡처하면 다음 조회 때 자동으로 새로 읽는다.
+"""
+
+import os
+import threading
+import time
+
+import cv2
+
+
+class TemplateRegistry:
+    """
+    (경로, 색상모드, 목표 크기) -> 매칭 준비가 끝난 numpy 배열
+
+    check_interval: mtime 확인 주기(초). 폴링 루프에서 매번 stat 을 부르지 않도록
+                    이 간격 안에서는 캐시를 그대로 돌려준다.
+    """
+
+    def __init__(self, check_interval=1.0):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        # path -> {"mtime", "checked_at", "images": {(flag, size): ndarray}}
+        self._entries = {}
+
+    def _load(self, path, flag):
+        image = cv2.imread(path, flag)
+        if image is None:
+            raise FileNotFoundError(f"기준 이미지를 읽을 수 없습니다: {path}")
+        return image
+
+    def _entry(self, path):
+        """mtime 이 바뀌었으면 해당 경로의 캐시를 비운다"""
+        now = time.monotonic()
+        entry = self._entries.get(path)
+        if entry is not None and now - entry["checked_at"] < self.check_interval:
+            return entry
+
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            raise FileNotFoundError(f"기준 이미지가 없습니다: {path}")
+
+        if entry is None or entry["mtime"] != mtime:
+            if entry is not None:
+                print(f"   🔄 기준 이미지 변경 감지 -> 다시 로드: {os.path.basename(path)}")
+            entry = {"mtime": mtime, "checked_at": now, "images": {}}
+            self._entries[path] = entry
+        else:
+            entry["checked_at"] = now
+        return entry
+
+    def get(self, path, size=None, flag=cv2.IMREAD_COLOR):
+        """
+        path: 기준 이미지 경로
+        size: (width, height) 목표 크기. None 이면 원본 크기 그대로
+        flag: cv2.IMREAD_COLOR / cv2.IMREAD_GRAYSCALE
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            images = self._entry(path)["images"]
+
+            original = images.get((flag, None))
+            if original is None:
+                original = self._load(path, flag)
+                images[(flag, None)] = original
+
+            if size is None or (original.shape[1], original.shape[0]) == tuple(size):
+                return original
+
+            key = (flag, tuple(size))
+            resized = images.get(key)
+            if resized is None:
+                resized = cv2.resize(original, tuple(size))
+                images[key] = resized
+            return resized
+
+    def mtime(self, path):
+        """현재 캐시된 기준 이미지의 mtime (변경 감지용)"""
+        path = os.path.abspath(path)
+        with self._lock:
+            return self._entry(path)["mtime"]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# 프로세스 전역 기본 레지스트리
+registry = TemplateRegistry()
+
+
+def get_template(path, size=None, flag=cv2.IMREAD_COLOR):
+    return registry.get(path, size=size, flag=flag)
@@ -0,0 +1,109 @@
+"""
+화면 변화 / 안정 판정 (픽셀 차이, 기준 이미지 불필요)
+
+iOS 실행 / 검색 스크립트는 손으로 잘라 둔 기준 이미지(gov24_test.png, jobkorea_test.png ...)에 의존해서
+앱 UI 가 바뀔 때마다 다시 캡처해야 한다.
+여기서는 연속 프레임의 ROI 가 더 이상 바뀌지 않으면 렌더링이 끝난 것으로 본다.
+
+프레임 1장 -> 서명(Signature)
+    ROI 를 가로 width 픽셀(기본 64)로 축소(INTER_AREA) 후 흑백 변환
+    + 차이 해시(dHash 8x8 = 64비트)
+두 서명 비교 (둘 중 하나라도 넘으면 변화)
+    해시 해밍 거리 > hash_distance                        : 밝기 차이는 작아도 배치가 바뀐 경우 (스켈레톤 -> 콘텐츠)
+    축소 이미지 평균 절대 차이(MAD, 0~255) > mad_threshold : 해시에 안 잡히는 작은 영역 변화 (cv2.absdiff 벡터 연산)
+
+전체 해상도 matchTemplate 대신 64px 축소본끼리 비교하므로 프레임당 비용이 훨씬 작다.
+감지기는 common.detectors.VisualStable(화면 안정) / VisualChange(첫 화면 변화) 가 이 비교기를 사용한다.
+
+    diff = VisualDiff()                                # 기본 ROI: 상태 표시줄 / 홈 인디케이터 제외
+    a, b = diff.signature(frame1), diff.signature(frame2)
+    changed, distance = diff.compare(a, b)
+"""
+
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from common.image_match import crop_roi
+
+
+# 상태 표시줄(시계 / 배터리)과 홈 인디케이터를 뺀 화면 (iPhone 15 기준 위 7% / 아래 5%)
+DEFAULT_ROI = {"x": 0.0, "y": 0.07, "w": 1.0, "h": 0.88}
+
+# 축소 폭(px). 높이는 ROI 비율대로
+DEFAULT_WIDTH = 64
+
+# 변화로 볼 최소 평균 절대 차이 (0~255 흑백 단계, MJPEG 압축 잡음은 축소 후 0.3 안팎)
+DEFAULT_MAD = 1.0
+
+# 이 비트 수보다 해시가 많이 다르면 변화 (64비트 중)
+DEFAULT_HASH_DISTANCE = 10
+
+HASH_SIZE = 8
+
+# 이웃 픽셀 밝기 차이가 이 값 이하면 0 비트 (단색 화면에서 반올림 / 압축 잡음으로 해시가 흔들리지 않게)
+HASH_MARGIN = 2
+
+# thumb: 축소 흑백 ROI (uint8 2차원 배열), hash: dHash (64비트 정수)
+Signature = namedtuple("Signature", ["thumb", "hash"])
+
+
+def thumbnail(frame, roi=None, width=DEFAULT_WIDTH):
+    """프레임(BGR / 흑백 배열) -> ROI 축소 흑백 배열 (축소를 먼저 해서 색 변환 비용을 줄임)"""
+    image = crop_roi(frame, roi or DEFAULT_ROI)
+    h, w = image.shape[:2]
+    if not h or not w:
+        raise ValueError("ROI 가 비어 있습니다")
+    size = (min(width, w), max(1, round(h * min(width, w) / w)))
+    # 축소 폭의 4배 이상이면 먼저 건너뛰기 샘플링 (view, 복사 없음) -> INTER_AREA 가 볼 픽셀 수를 줄임
+    step = w // (4 * width)
+    if step > 1:
+        image = image[::step, ::step]
+    small = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    return small
+
+
+def dhash(thumb):
+    """차이 해시: (HASH_SIZE+1) x HASH_SIZE 로 줄여 가로로 이웃한 픽셀의 밝기 증감을 비트로"""
+    small = cv2.resize(thumb, (HASH_SIZE + 1, HASH_SIZE), interpolation=cv2.INTER_AREA)
+    small = small.astype(np.int16)
+    bits = small[:, 1:] - small[:, :-1] > HASH_MARGIN
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def mad(a, b):
+    """축소 이미지 평균 절대 차이 (크기가 다르면 = 화면 회전, 최대값)"""
+    if a.shape != b.shape:
+        return 255.0
+    return float(cv2.absdiff(a, b).mean())
+
+
+class VisualDiff:
+    """
+    ROI / 임계값을 가진 프레임 비교기 (RoiMatcher 의 기준 이미지 없는 버전)
+
+    roi: 비율 설정 {'x', 'y', 'w', 'h'} (None 이면 DEFAULT_ROI)
+    """
+
+    def __init__(self, roi=None, width=DEFAULT_WIDTH, mad_threshold=DEFAULT_MAD,
+                 hash_distance=DEFAULT_HASH_DISTANCE):
+        self.roi = dict(roi or DEFAULT_ROI)
+        self.width = width
+        self.mad_threshold = mad_threshold
+        self.hash_distance = hash_distance
+
+    def signature(self, frame):
+        thumb = thumbnail(frame, self.roi, self.width)
+        return Signature(thumb, dhash(thumb))
+
+    def compare(self, a, b):
+        """두 서명 -> (변화 여부, 평균 절대 차이)"""
+        distance = mad(a.thumb, b.thumb)
+        return distance > self.mad_threshold or hamming(a.hash, b.hash) > self.hash_distance, distance
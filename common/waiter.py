@@ -0,0 +1,105 @@
+"""
+완료 대기 엔진
+
+모든 측정 스크립트의 '완료 화면이 나올 때까지 기다리기'를 한 곳에서 처리한다.
+감지기(common.detectors)는 '한 번 확인'만 하고,
+폴링 주기 / 타임아웃 / 시각 기록은 여기서 일괄 관리한다.
+확인 간격은 common.scheduler 가 호출 위치 + 감지기별 왕복 비용과 예상 완료 시간을 학습해서 정한다.
+
+    result = wait_until(uiautomator(driver, selector), start_time, timeout=20)
+    if result.matched:
+        duration = result.end_time - start_time
+"""
+
+import os
+import sys
+import time
+from collections import namedtuple
+
+from common import profiler
+from common.scheduler import default_scheduler
+
+
+# 스크립트 공통 기본 타임아웃(초)
+DEFAULT_TIMEOUT = 20
+
+# 호출 위치를 찾을 때 건너뛸 래퍼 모듈 (wait_for_match 등은 이를 부른 스크립트 위치로 학습)
+_WRAPPER_MODULES = ("common.waiter", "common.frame_source")
+
+# matched: 성공 여부
+# end_time: 처음 감지된 화면의 확인 시각 (실패 시 None)
+# prev_time: 직전 미감지 확인 시각 (없으면 start_time)
+# detected_at: 대기 루프가 감지를 판정한 시각
+# polls: 확인 횟수 (새 화면이 없었던 poll 은 제외)
+# detail: 마지막 확인 결과의 부가 정보 (요소 목록 / 일치율 등)
+# sample_rate: 이번 대기에서 실제로 달성한 샘플링 속도 (Hz)
+WaitResult = namedtuple(
+    "WaitResult",
+    ["matched", "end_time", "prev_time", "detected_at", "polls", "detail", "sample_rate"],
+)
+
+
+def _call_site():
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_globals.get("__name__") in _WRAPPER_MODULES:
+        frame = frame.f_back
+    if frame is None:
+        return "?"
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno}"
+
+
+def wait_until(detector, start_time, timeout=DEFAULT_TIMEOUT, interval=0.0, scheduler=None, label=None):
+    """
+    detector 가 감지될 때까지 대기 -> WaitResult
+
+    start_time: 측정 시작 시각 (time.time()). 타임아웃도 이 시각 기준
+    interval: 확인 사이 최소 간격(초)
+    scheduler: 확인 간격을 정하는 PollScheduler (None 이면 프로세스 기본 스케줄러)
+               스스로 새 화면을 기다리는 감지기(MJPEG)는 스케줄러와 상관없이 쉬지 않음
+    label: 스케줄러 학습 구분 이름 (None 이면 호출 위치 "파일:줄"). 학습은 (label, detector.name) 별로 따로
+    대기 전체는 common.profiler 의 "detect" 구간으로 기록 (PROFILE 이 켜진 경우)
+    """
+    with profiler.span(f"감지 {detector.name}", kind="detect"):
+        return _wait(detector, start_time, timeout, interval, scheduler, label or _call_site())
+
+
+def _wait(detector, start_time, timeout, interval, scheduler, label):
+    scheduler = scheduler or default_scheduler
+    key = (label, detector.name)
+    detector.reset(start_time)
+    prev_time = start_time
+    polls = 0
+    detail = None
+
+    def _result(matched, end_time):
+        detected_at = time.time()
+        elapsed = detected_at - start_time
+        scheduler.finish(key, elapsed, end_time - start_time if matched else None)
+        rate = polls / elapsed if elapsed > 0 else 0.0
+        return WaitResult(matched, end_time, prev_time, detected_at, polls, detail, rate)
+
+    while time.time() - start_time < timeout:
+        blocking = detector.blocking
+        requested_at = time.time()
+        try:
+            detection = detector.poll()
+        except Exception as e:
+            print(f"   ⚠️ 감지 중 오류 ({detector.name}): {e}")
+            time.sleep(interval or 0.01)
+            continue
+        if not blocking:
+            scheduler.record_poll(key, time.time() - requested_at)
+
+        if detection is not None:
+            polls += 1
+            detail = detection.detail
+            if detection.found:
+                return _result(True, detection.observed_at)
+            prev_time = detection.observed_at
+
+        if not blocking:
+            delay = max(interval, scheduler.next_delay(key, time.time() - start_time))
+            if delay > 0:
+                time.sleep(delay)
+
+    return _result(False, None)
@@ -3,22 +3,25 @@
 
 import time
 import os
-import csv
-import base64
-import io
-import cv2
-import numpy as np
-import statistics
-from PIL import Image
+import sys
 from appium import webdriver
 from datetime import datetime
 from appium.options.ios import XCUITestOptions
 from appium.webdriver.common.appiumby import AppiumBy
 
+# 공통 모듈(common) 경로 추가 (저장소 루트)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from common import calibration, device_env, frame_source, profiler, stats
+from common.checkpoint import ResultLog
+from common.detectors import ImageDetector, visual_stable
+from common.image_match import create_matcher
+from common.frame_source import open_frame_source, wait_for
+from common.result_store import STATUS_FAIL, STATUS_OK, ResultStore
+
 # ==========================================
 # 1. 설정
 # ==========================================
-ITERATIONS = 10
+ITERATIONS = device_env.repeat_count(10)
 BUNDLE_ID = "kr.go.dcsc.minwon24"  # 정부24 번들 ID
 APP_ICON_NAME = "정부24"            # 홈 화면 앱 이름
 UDID = "----------------" # 테스트 디바이스 UDID
@@ -38,11 +41,19 @@ ROI_Y_PCT = 0.88   # 세로
 ROI_W_PCT = 1      # 너비
 ROI_H_PCT = 0.1    # 높이
 
-if not os.path.exists(TARGET_IMAGE_PATH):
+# 기준 이미지가 없거나 VISUAL_STABLE=1 이면 화면 안정(ROI 픽셀 변화가 멈춤)으로 완료 판정 (common.visual)
+VISUAL = device_env.visual_stable()
+if not VISUAL and not os.path.exists(TARGET_IMAGE_PATH):
     print(f"❌ 타겟 이미지 파일이 없습니다: {TARGET_IMAGE_PATH}")
-    exit()
+    print("   ↪ 기준 이미지 없이 화면 안정 감지로 측정합니다 (VISUAL_STABLE=1 과 같음)")
+    VISUAL = True
 
-target_img_cv = cv2.imread(TARGET_IMAGE_PATH)
+# 기준 이미지는 여기서 한 번만 로드 (폴링 중에는 디코딩/매칭만 수행)
+matcher = None if VISUAL else create_matcher(
+    TARGET_IMAGE_PATH,
+    {'x': ROI_X_PCT, 'y': ROI_Y_PCT, 'w': ROI_W_PCT, 'h': ROI_H_PCT},
+    threshold=0.8,
+)
 
 options = XCUITestOptions()
 options.platform_name = "iOS"
@@ -52,43 +63,36 @@ options.set_capability("autoLaunch", False)
 options.set_capability("waitForQuiescence", False)
 
 # ==========================================
-# 2. 이미지 매칭 함수
-# ==========================================
-def check_loading_complete(driver):
-    try:
-        screenshot_base64 = driver.get_screenshot_as_base64()
-        image = Image.open(io.BytesIO(base64.b64decode(screenshot_base64)))
-
-        img_w, img_h = image.size
-        left = int(img_w * ROI_X_PCT)
-        top = int(img_h * ROI_Y_PCT)
-        right = int(left + (img_w * ROI_W_PCT))
-        bottom = int(top + (img_h * ROI_H_PCT))
-
-        roi_image = image.crop((left, top, right, bottom))
-        roi_cv = cv2.cvtColor(np.array(roi_image), cv2.COLOR_RGB2BGR)
-
-        if target_img_cv.shape != roi_cv.shape:
-            roi_cv = cv2.resize(roi_cv, (target_img_cv.shape[1], target_img_cv.shape[0]))
-
-        res = cv2.matchTemplate(roi_cv, target_img_cv, cv2.TM_CCOEFF_NORMED)
-        _, max_val, _, _ = cv2.minMaxLoc(res)
-        return max_val
-    except:
-        return 0.0
-
-# ==========================================
-# 3. 테스트 루프
+# 2. 테스트 루프
 # ==========================================
 driver = None
-test_results = []
+frames = None
+# 회차마다 체크포인트에 바로 기록 (중단 후 다시 실행하면 이어서 측정)
+checkpoint = ResultLog("ios_gov24_launch_result", SAVE_DIR)
+test_results = checkpoint.rows
+repeats = stats.AdaptiveRepeat(test_results, ITERATIONS, checkpoint.next_iteration)
+# 회차별 원본 기록은 통합 결과 저장소에도 적재 (CSV 는 저장소에서 내보냄)
+store = ResultStore()
+# 감지 비용 보정 (CALIBRATE=1 이면 첫 성공 회차 직후 측정, common.calibration)
+calibrator = calibration.Calibrator(store, "ios")
+record = store.start_run(app="gov24", platform="ios", scenario="app_start", metric="앱실행반응속도(초)",
+                         script=__file__, resume=bool(test_results))
+DETECTOR = "화면 안정" if VISUAL else os.path.basename(TARGET_IMAGE_PATH)
 
 try:
     print(f"🚀 [정부24 실행 속도 테스트] 터치 실행 방식 ({ITERATIONS}회)")
-    driver = webdriver.Remote("http://127.0.0.1:4723", options=options)
-
-    for i in range(1, ITERATIONS + 1):
-        print(f"\n--- [Iter {i}/{ITERATIONS}] ---")
+    device_env.apply_capabilities(options)
+    driver = profiler.instrument(webdriver.Remote(device_env.server_url("http://127.0.0.1:4723"), options=options))
+    # MULTI_SCALE=1 이면 기기 배율(DPR)에 맞춰 기준 이미지 크기 조정 (common.image_match)
+    if matcher:
+        matcher.attach(driver)
+    # 화면 프레임: MJPEG 스트림 (불가 시 스크린샷)
+    frames = open_frame_source(driver)
+    # 완료 감지기 (감지 비용 보정도 같은 감지기 기준으로 측정 / 적용)
+    done_detector = visual_stable(frames) if VISUAL else ImageDetector(frames, matcher)
+
+    for i in repeats:
+        print(f"\n--- [Iter {i}/{repeats.limit}] ---")
         measured_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
         try:
@@ -110,70 +114,47 @@ try:
             icon.click()
             start_time = time.time()
 
-            is_loaded = False
-            while (time.time() - start_time) < 20:
-                score = check_loading_complete(driver)
-
-                if score > 0.8:
-                    end_time = time.time()
-                    duration = end_time - start_time
-                    print(f"⚡ 로딩 완료: {duration:.4f}초 (일치율: {score*100:.1f}%)")
-                    test_results.append([i, "성공", measured_at, duration])
-                    is_loaded = True
-                    break
-                time.sleep(0.01)
-
-            if not is_loaded:
+            result = wait_for(done_detector, start_time, timeout=20)
+
+            if result.matched:
+                # 완료 시각 = 첫 일치 프레임 캡처 시각 (캡처/전송/매칭 지연 제외)
+                end_time = result.end_time
+                duration = end_time - start_time
+                prev_duration = result.prev_time - start_time
+                print(f"⚡ 로딩 완료: {duration:.4f}초 (직전 프레임 {prev_duration:.4f}초, 일치율: {result.score*100:.1f}%)")
+                print(f"   📈 샘플링 속도: {result.sample_rate:.1f}Hz")
+                checkpoint.append([i, "성공", measured_at, duration, prev_duration])
+                correction = calibrator.correct(done_detector, start_time, result)
+                record.add(i, STATUS_OK, measured_at, duration, start_time=start_time, end_time=end_time,
+                           detector=DETECTOR, prev_duration=prev_duration, **calibration.fields(correction))
+            else:
                 print("❌ 실패: 시간 초과")
-                test_results.append([i, "실패", measured_at, 0])
+                checkpoint.append([i, "실패", measured_at, 0, 0])
+                record.add(i, STATUS_FAIL, measured_at, None, detector=DETECTOR)
 
         except Exception as e:
             print(f"❌ 오류: {e}")
-            test_results.append([i, "실패", measured_at, 0])
+            checkpoint.append([i, "실패", measured_at, 0, 0])
+            record.add(i, STATUS_FAIL, measured_at, None, detector=DETECTOR, error=str(e))
 
 finally:
+    if frames:
+        frames.close()
     if driver:
         driver.quit()
 
-# ==========================================
-# 4. 저장 (✅ .py 파일과 같은 폴더에 저장)
-# ==========================================
-durations = [row[3] for row in test_results if row[1] == "성공" and row[3] > 0]
-
-if durations:
-    avg_val = statistics.mean(durations)
-    max_val = max(durations)
-    min_val = min(durations)
-    std_val = statistics.pstdev(durations) if len(durations) > 1 else 0.0
-else:
-    avg_val = max_val = min_val = std_val = 0.0
-
-# ✅ 결과 파일을 .py 파일과 같은 위치에 저장
-output_path = os.path.join(SAVE_DIR, "ios_gov24_launch_result.csv")
-print(f"\n📁 CSV 저장 경로: {output_path}")
-
-with open(output_path, mode='w', newline='', encoding='utf-8-sig') as file:
-    writer = csv.writer(file)
-    writer.writerow([
-        "회차", "상태", "측정시간", "앱실행반응속도(초)",
-        "평균(초)", "최소(초)", "최대(초)", "표준편차(초)"
-    ])
-
-    for iteration, status, measured_at, duration in test_results:
-        writer.writerow([
-            iteration,
-            status,
-            measured_at,
-            f"{duration:.4f}" if duration > 0 else "",
-            "", "", "", ""
-        ])
-
-    writer.writerow([
-        "통계", "", "", "",
-        f"{avg_val:.4f}" if durations else "",
-        f"{min_val:.4f}" if durations else "",
-        f"{max_val:.4f}" if durations else "",
-        f"{std_val:.4f}" if durations else ""
-    ])
-
-print("✅ 저장 완료")
+    # ==========================================
+    # 3. 저장 (✅ .py 파일과 같은 폴더에 저장)
+    # ==========================================
+    result_stats = stats.from_rows(test_results)
+    stats.report(result_stats, "정부24 앱 실행")
+
+    # ✅ 결과 파일을 .py 파일과 같은 위치에 저장
+    output_path = device_env.result_path(os.path.join(SAVE_DIR, "ios_gov24_launch_result.csv"))
+    print(f"\n📁 CSV 저장 경로: {output_path}")
+
+    store.export_csv(record.run_id, output_path, columns=frame_source.CSV_FIELDS)
+    if checkpoint.finish(repeats.total):
+        record.finish(repeats.reason)
+    store.close()
+    print("✅ 저장 완료")
@@ -1,14 +1,21 @@
 import time
-import csv
 import warnings
 import os  # ★ 추가: 파일 저장 경로용
+import sys
 from urllib3.exceptions import NotOpenSSLWarning
 from appium import webdriver
 from appium.options.ios import XCUITestOptions
 from appium.webdriver.common.appiumby import AppiumBy
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import statistics  # ★ 통계 계산용
+
+# 공통 모듈(common) 경로 추가 (저장소 루트)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from common import device_env, profiler, stats
+from common.checkpoint import ResultLog
+from common.detectors import accessibility_id
+from common.result_store import STATUS_FAIL, STATUS_OK, ResultStore
+from common.waiter import wait_until
 
 warnings.simplefilter('ignore', NotOpenSSLWarning)
 
@@ -16,7 +23,7 @@ warnings.simplefilter('ignore', NotOpenSSLWarning)
 # [설정] 정부24 계정 및 테스트 설정
 # ---------------------------------------------------------
 CERTI_PASSWORD = "123456"  # 금융인증서 6자리 비밀번호 입력
-REPEAT_COUNT = 10
+REPEAT_COUNT = device_env.repeat_count(10)
 
 options = XCUITestOptions()
 options.platform_name = "iOS"
@@ -31,7 +38,8 @@ options.set_capability("wdaLaunchTimeout", 60000)
 options.set_capability("wdaConnectionTimeout", 60000)
 options.set_capability("waitForQuiescence", False)
 
-driver = webdriver.Remote('http://127.0.0.1:4723', options=options)
+device_env.apply_capabilities(options)
+driver = profiler.instrument(webdriver.Remote(device_env.server_url('http://127.0.0.1:4723'), options=options))
 wait = WebDriverWait(driver, 20)
 
 # ★ 이 파일이 있는 폴더 (CSV를 여기에 저장)
@@ -79,14 +87,22 @@ def blind_scroll_to_bottom():
 # [메인 루프]
 # ---------------------------------------------------------
 # test_results: [회차, 상태, 측정시간(문자열), 로그인반응속도(초)]
-test_results = []
+# 회차마다 체크포인트에 바로 기록 (중단 후 다시 실행하면 이어서 측정)
+checkpoint = ResultLog("UI_gov24_result_ios", BASE_DIR)
+test_results = checkpoint.rows
+repeats = stats.AdaptiveRepeat(test_results, REPEAT_COUNT, checkpoint.next_iteration)
+# 회차별 원본 기록은 통합 결과 저장소에도 적재 (CSV 는 저장소에서 내보냄)
+store = ResultStore()
+record = store.start_run(app="gov24", platform="ios", scenario="certificate_login", metric="로그인반응속도(초)",
+                         script=__file__, resume=bool(test_results))
+DETECTOR = "accessibility_id:전체메뉴"
 
 try:
     print("🚀 정부24 금융인증서 로그인 테스트 시작 (UI 인식)")
     time.sleep(5)
 
-    for i in range(1, REPEAT_COUNT + 1):
-        print(f"\n[{i}/{REPEAT_COUNT} 회차] 진행 중...")
+    for i in repeats:
+        print(f"\n[{i}/{repeats.limit} 회차] 진행 중...")
         # ★ 이 회차 측정 시간 기록 (CSV '측정시간' 컬럼용)
         measured_at = time.strftime("%Y-%m-%d %H:%M:%S")
 
@@ -124,15 +140,18 @@ try:
             print("   👀 [5단계] 메인화면 로딩 대기 (UI 인식)")
             
             # 여기서 찾은 element는 '검증용' (클릭 X)
-            wait.until(EC.presence_of_element_located((
-                AppiumBy.ACCESSIBILITY_ID, "전체메뉴"
-            )))
-            
-            end_time = time.time()
+            result = wait_until(accessibility_id(driver, "전체메뉴"), start_time, timeout=20)
+            if not result.matched:
+                raise Exception("Timeout: '전체메뉴' 버튼 미표시")
+
+            end_time = result.end_time
             duration = end_time - start_time
             print(f"   🎉 로그인 성공! ('전체메뉴' 버튼 활성화) | 소요 시간: {duration:.4f}초")
+            print(f"   📈 샘플링 속도: {result.sample_rate:.1f}Hz")
             # ★ 성공 기록 (상태: '성공', 측정시간, 소요시간)
-            test_results.append([i, "성공", measured_at, duration])
+            checkpoint.append([i, "성공", measured_at, duration])
+            record.add(i, STATUS_OK, measured_at, duration, start_time=start_time, end_time=end_time,
+                       detector=DETECTOR)
 
             # -------------------------------------------------------
             # 6. [메뉴 진입] 전체메뉴 클릭 (재탐색 + 확인사살)
@@ -182,7 +201,8 @@ try:
         except Exception as e:
             print(f"   ❌ {i}회차 실패: {str(e)}")
             # ★ 실패도 한글 상태 + 측정시간 기록, 시간은 0
-            test_results.append([i, "실패", measured_at, 0])
+            checkpoint.append([i, "실패", measured_at, 0])
+            record.add(i, STATUS_FAIL, measured_at, None, detector=DETECTOR, error=str(e))
             print("   ⚠️ 앱 재실행")
             driver.terminate_app(driver.capabilities['bundleId'])
             time.sleep(2)
@@ -193,49 +213,18 @@ finally:
     # -----------------------------------------------------
     # ★ 통계 계산 (성공 케이스 기준)
     # -----------------------------------------------------
-    durations = [row[3] for row in test_results if row[1] == "성공" and row[3] > 0]
-
-    if durations:
-        avg_val = statistics.mean(durations)
-        min_val = min(durations)
-        max_val = max(durations)
-        std_val = statistics.pstdev(durations) if len(durations) > 1 else 0.0
-    else:
-        avg_val = min_val = max_val = std_val = 0.0
+    result_stats = stats.from_rows(test_results)
+    stats.report(result_stats, "정부24 인증서 로그인 (UI)")
 
     # ★ 스크립트와 동일한 폴더에 저장되도록 경로 지정
-    output_path = os.path.join(BASE_DIR, 'UI_gov24_result_ios.csv')
+    output_path = device_env.result_path(os.path.join(BASE_DIR, 'UI_gov24_result_ios.csv'))
     print(f"📁 CSV 저장 경로: {output_path}")
 
-    # CSV 저장 (Excel 호환 위해 utf-8-sig)
-    with open(output_path, 'w', newline='', encoding='utf-8-sig') as f:
-        writer = csv.writer(f)
-        writer.writerow(['회차', '상태', '측정시간', '로그인반응속도(초)', '평균(초)', '최소(초)', '최대(초)', '표준편차(초)'])
-        
-        # 1) 각 회차 기록 (통계 칸은 비워둠)
-        for iteration, status, measured_at, duration in test_results:
-            writer.writerow([
-                iteration,
-                status,
-                measured_at,
-                f"{duration:.4f}" if duration > 0 else "",
-                "",  # 평균(초)
-                "",  # 최소(초)
-                "",  # 최대(초)
-                ""   # 표준편차(초)
-            ])
-
-        # 2) 마지막에 통계 요약 행 한 줄만 추가
-        writer.writerow([
-            "통계",      # 회차 자리 대신 '통계' 표기
-            "",          # 상태
-            "",          # 측정시간
-            "",          # 로그인반응속도(초)
-            f"{avg_val:.4f}" if durations else "",
-            f"{min_val:.4f}" if durations else "",
-            f"{max_val:.4f}" if durations else "",
-            f"{std_val:.4f}" if durations else ""
-        ])
+    # 결과 저장소에서 기존 형식으로 내보냄 (Excel 호환 위해 utf-8-sig)
+    store.export_csv(record.run_id, output_path)
+    if checkpoint.finish(repeats.total):
+        record.finish(repeats.reason)
+    store.close()
 
     if driver:
         driver.quit()
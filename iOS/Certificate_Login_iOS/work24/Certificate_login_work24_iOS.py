@@ -1,13 +1,7 @@
 import time
-import csv
 import warnings
-import statistics
 import os
-import base64
-import io
-import cv2
-import numpy as np
-from PIL import Image
+import sys
 from datetime import datetime
 from urllib3.exceptions import NotOpenSSLWarning
 from appium import webdriver
@@ -16,13 +10,22 @@ from appium.webdriver.common.appiumby import AppiumBy
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+# 공통 모듈(common) 경로 추가 (저장소 루트)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from common import calibration, device_env, frame_source, profiler, stats
+from common.checkpoint import ResultLog
+from common.detectors import ImageDetector
+from common.image_match import create_matcher
+from common.frame_source import open_frame_source, wait_for
+from common.result_store import STATUS_FAIL, STATUS_OK, ResultStore
+
 warnings.simplefilter('ignore', NotOpenSSLWarning)
 
 # ---------------------------------------------------------
 # [설정] 
 # ---------------------------------------------------------
 CERTI_PASSWORD = "123456"  # 금융인증서 비밀번호
-REPEAT_COUNT = 10 
+REPEAT_COUNT = device_env.repeat_count(10) 
 
 options = XCUITestOptions()
 options.platform_name = "iOS"
@@ -40,7 +43,8 @@ options.set_capability("waitForQuiescence", False)
 options.set_capability("waitForIdleTimeout", 0)
 options.set_capability("mjpegServerScreenshotQuality", 20)
 
-driver = webdriver.Remote('http://127.0.0.1:4723', options=options)
+device_env.apply_capabilities(options)
+driver = profiler.instrument(webdriver.Remote(device_env.server_url('http://127.0.0.1:4723'), options=options))
 # 강제 설정
 driver.update_settings({"waitForIdleTimeout": 0})
 wait = WebDriverWait(driver, 20)
@@ -62,42 +66,18 @@ if not os.path.exists(TARGET_IMAGE_PATH):
     print("   👉 로그인 완료 화면을 캡처해서 같은 폴더에 넣어주세요.")
     exit()
 
-template_img = cv2.imread(TARGET_IMAGE_PATH)
-
-# ---------------------------------------------------------
-# [함수] 이미지 매칭 (성공 판단)
-# ---------------------------------------------------------
-def wait_for_image_match(driver, start_time, timeout=20):
-    while True:
-        try:
-            screenshot_base64 = driver.get_screenshot_as_base64()
-            image = Image.open(io.BytesIO(base64.b64decode(screenshot_base64)))
-
-            img_w, img_h = image.size
-            left = int(img_w * ROI_X_PCT)
-            top = int(img_h * ROI_Y_PCT)
-            right = int(left + (img_w * ROI_W_PCT))
-            bottom = int(top + (img_h * ROI_H_PCT))
-            
-            roi_image = image.crop((left, top, right, bottom))
-            roi_cv = cv2.cvtColor(np.array(roi_image), cv2.COLOR_RGB2BGR)
-
-            if template_img.shape != roi_cv.shape:
-                roi_cv = cv2.resize(roi_cv, (template_img.shape[1], template_img.shape[0]))
+matcher = create_matcher(
+    TARGET_IMAGE_PATH,
+    {'x': ROI_X_PCT, 'y': ROI_Y_PCT, 'w': ROI_W_PCT, 'h': ROI_H_PCT},
+    threshold=0.8,  # 일치율 80% 이상 시 성공
+)
 
-            res = cv2.matchTemplate(roi_cv, template_img, cv2.TM_CCOEFF_NORMED)
-            _, max_val, _, _ = cv2.minMaxLoc(res)
-
-            if max_val > 0.8:
-                return True
-
-            if time.time() - start_time > timeout:
-                return False
-            
-            time.sleep(0.01)
-
-        except Exception:
-            pass
+# MULTI_SCALE=1 이면 기기 배율(DPR)에 맞춰 기준 이미지 크기 조정 (common.image_match)
+matcher.attach(driver)
+# 화면 프레임: MJPEG 스트림 (불가 시 스크린샷)
+frames = open_frame_source(driver)
+# 완료 감지기 (감지 비용 보정도 같은 감지기 기준으로 측정 / 적용)
+done_detector = ImageDetector(frames, matcher)
 
 # ---------------------------------------------------------
 # [함수] 금융인증서 핀번호 입력 (기존 로직 유지)
@@ -131,14 +111,24 @@ def type_certi_password_with_timer(driver, password):
 # ---------------------------------------------------------
 # [메인 테스트 루프]
 # ---------------------------------------------------------
-test_results = []
+# 회차마다 체크포인트에 바로 기록 (중단 후 다시 실행하면 이어서 측정)
+checkpoint = ResultLog("ios_login_certificate_image_result", SCRIPT_DIR)
+test_results = checkpoint.rows
+repeats = stats.AdaptiveRepeat(test_results, REPEAT_COUNT, checkpoint.next_iteration, ok=("Success",))
+# 회차별 원본 기록은 통합 결과 저장소에도 적재 (CSV 는 저장소에서 내보냄)
+store = ResultStore()
+# 감지 비용 보정 (CALIBRATE=1 이면 첫 성공 회차 직후 측정, common.calibration)
+calibrator = calibration.Calibrator(store, "ios")
+record = store.start_run(app="work24", platform="ios", scenario="certificate_login", metric="로그인반응속도(초)",
+                         script=__file__, resume=bool(test_results))
+DETECTOR = TARGET_IMAGE_NAME
 
 try:
     print("🚀 금융인증서 로그인 테스트 (이미지 매칭 Ver)")
     time.sleep(5)
 
-    for i in range(1, REPEAT_COUNT + 1):
-        print(f"\n[{i}/{REPEAT_COUNT} 회차] 진행 중...")
+    for i in repeats:
+        print(f"\n[{i}/{repeats.limit} 회차] 진행 중...")
         
         try:
             # 1. 메인 -> 로그인
@@ -173,11 +163,17 @@ try:
 
             # 5. [수정됨] 이미지 매칭으로 완료 확인
             print("   👀 [5단계] 로그인 완료 대기 (이미지 매칭)")
-            if wait_for_image_match(driver, start_time):
-                end_time = time.time()
+            result = wait_for(done_detector, start_time, timeout=20)
+            if result.matched:
+                end_time = result.end_time
                 duration = end_time - start_time
-                print(f"   🎉 로그인 성공! 소요 시간: {duration:.4f}초")
-                test_results.append([i, "Success", start_time_str, duration])
+                prev_duration = result.prev_time - start_time
+                print(f"   🎉 로그인 성공! 소요 시간: {duration:.4f}초 (직전 프레임 {prev_duration:.4f}초)")
+                print(f"   📈 샘플링 속도: {result.sample_rate:.1f}Hz")
+                checkpoint.append([i, "Success", start_time_str, duration, prev_duration])
+                correction = calibrator.correct(done_detector, start_time, result)
+                record.add(i, STATUS_OK, start_time_str, duration, start_time=start_time, end_time=end_time,
+                           detector=DETECTOR, prev_duration=prev_duration, **calibration.fields(correction))
                 
                 # 측정 완료 후 팝업(Cancel/Ok) 처리
                 try: driver.find_element(AppiumBy.ACCESSIBILITY_ID, "Cancel").click()
@@ -189,7 +185,8 @@ try:
                 except: pass
             else:
                 print("   ❌ 실패: 타임아웃 (이미지 매칭 실패)")
-                test_results.append([i, "Fail", start_time_str, 0])
+                checkpoint.append([i, "Fail", start_time_str, 0, 0])
+                record.add(i, STATUS_FAIL, start_time_str, None, detector=DETECTOR)
 
             print("   ⏳ 메인화면 복귀 대기 (4초)")
             time.sleep(4) 
@@ -224,7 +221,8 @@ try:
             
         except Exception as e:
             print(f"   ❌ {i}회차 실패: {str(e)}")
-            test_results.append([i, "Fail", "", 0])
+            checkpoint.append([i, "Fail", "", 0, 0])
+            record.add(i, STATUS_FAIL, None, None, detector=DETECTOR, error=str(e))
             driver.terminate_app(driver.capabilities['bundleId'])
             time.sleep(2)
             driver.activate_app(driver.capabilities['bundleId'])
@@ -234,23 +232,16 @@ finally:
     # -------------------------------
     # 통계 및 저장
     # -------------------------------
-    durations = [row[3] for row in test_results if row[1] == "Success" and row[3] > 0]
-    
-    avg = min_v = max_v = std = 0.0
-    if durations:
-        avg = sum(durations) / len(durations)
-        min_v = min(durations)
-        max_v = max(durations)
-        std = statistics.stdev(durations) if len(durations) > 1 else 0.0
+    result_stats = stats.from_rows(test_results, ok=("Success",))
+    stats.report(result_stats, "고용24 인증서 로그인")
+
+    output_filename = device_env.result_path(os.path.join(SCRIPT_DIR, 'ios_login_certificate_image_result.csv'))
+    store.export_csv(record.run_id, output_filename, columns=frame_source.CSV_FIELDS)
+    if checkpoint.finish(repeats.total):
+        record.finish(repeats.reason)
+    store.close()
 
-    output_filename = os.path.join(SCRIPT_DIR, 'ios_login_certificate_image_result.csv')
-    with open(output_filename, 'w', newline='', encoding='utf-8-sig') as f:
-        writer = csv.writer(f)
-        writer.writerow(['회차', '상태', '측정시간', '로그인반응속도(초)', '평균(초)', '최소(초)', '최대(초)', '표준편차(초)'])
-        for row in test_results:
-            writer.writerow(row + ["", "", "", ""])
-        writer.writerow(["Summary", "Stats", "", "", f"{avg:.4f}", f"{min_v:.4f}", f"{max_v:.4f}", f"{std:.4f}"])
-    
     print(f"\n테스트 종료 및 저장 완료: {output_filename}")
+    frames.close()
     if driver:
         driver.quit()
@@ -1,13 +1,7 @@
 import time
-import csv
-import base64
-import io
-import cv2
-import numpy as np
+import sys
 import warnings
 import os
-import statistics  # ✅ 통계 계산용 추가
-from PIL import Image
 from urllib3.exceptions import NotOpenSSLWarning
 from appium import webdriver
 from appium.options.ios import XCUITestOptions
@@ -15,6 +9,15 @@ from appium.webdriver.common.appiumby import AppiumBy
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+# 공통 모듈(common) 경로 추가 (저장소 루트)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from common import calibration, device_env, frame_source, profiler, stats
+from common.checkpoint import ResultLog
+from common.detectors import ImageDetector
+from common.image_match import create_matcher, RESIZE_TEMPLATE
+from common.frame_source import open_frame_source, wait_for
+from common.result_store import STATUS_FAIL, STATUS_OK, ResultStore
+
 warnings.simplefilter('ignore', NotOpenSSLWarning)
 
 # ---------------------------------------------------------
@@ -23,7 +26,7 @@ warnings.simplefilter('ignore', NotOpenSSLWarning)
 # 정부24 아이디 비밀번호 입력
 GOV_ID = "-------" 
 GOV_PW = "-------"
-REPEAT_COUNT = 10
+REPEAT_COUNT = device_env.repeat_count(10)
 
 # ✅ 캡쳐 스크립트에서 저장한 이미지 위치 (현재 .py 파일이 있는 폴더 기준)
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -34,6 +37,9 @@ MATCH_THRESHOLD = 0.90
 # [ROI 좌표 설정] (화면 하단 10% 영역)
 ROI_CONFIG = {'x': 0, 'y': 0.88, 'w': 1, 'h': 0.1}
 
+# 참조 이미지는 한 번만 로드 (없으면 여기서 바로 에러)
+matcher = create_matcher(TARGET_IMAGE_PATH, ROI_CONFIG, threshold=MATCH_THRESHOLD, resize=RESIZE_TEMPLATE)
+
 options = XCUITestOptions()
 options.platform_name = "iOS"
 options.automation_name = "XCUITest"
@@ -46,47 +52,16 @@ options.set_capability("wdaLaunchTimeout", 60000)
 options.set_capability("wdaConnectionTimeout", 60000)
 options.set_capability("waitForQuiescence", False) 
 
-driver = webdriver.Remote('http://127.0.0.1:4723', options=options)
+device_env.apply_capabilities(options)
+driver = profiler.instrument(webdriver.Remote(device_env.server_url('http://127.0.0.1:4723'), options=options))
 wait = WebDriverWait(driver, 20)
 
-# ---------------------------------------------------------
-# [함수] 이미지 비교 (ROI 영역 크롭 -> 매칭)
-# ---------------------------------------------------------
-def check_login_success_by_roi(driver, ref_image_path, roi):
-    try:
-        # 디버그용: 참조 이미지 존재 여부 체크
-        if not os.path.exists(ref_image_path):
-            print(f"   ⚠️ 참조 이미지 없음: {ref_image_path}")
-            return False
-
-        screenshot_base64 = driver.get_screenshot_as_base64()
-        image = Image.open(io.BytesIO(base64.b64decode(screenshot_base64)))
-        img_w, img_h = image.size
-        
-        left = int(img_w * roi['x'])
-        top = int(img_h * roi['y'])
-        width = int(img_w * roi['w'])
-        height = int(img_h * roi['h'])
-        
-        current_crop = image.crop((left, top, left + width, top + height))
-        current_cv = cv2.cvtColor(np.array(current_crop), cv2.COLOR_RGB2BGR)
-        
-        ref_cv = cv2.imread(ref_image_path)
-        if ref_cv is None:
-            print(f"   ⚠️ cv2.imread 실패: {ref_image_path}")
-            return False
-
-        # 크기 맞추기
-        if current_cv.shape != ref_cv.shape:
-            ref_cv = cv2.resize(ref_cv, (current_cv.shape[1], current_cv.shape[0]))
-
-        res = cv2.matchTemplate(current_cv, ref_cv, cv2.TM_CCOEFF_NORMED)
-        min_val, max_val, _, _ = cv2.minMaxLoc(res)
-        # print(f"   🔍 match score: {max_val:.4f}")  # 필요하면 주석 해제
-        return max_val >= MATCH_THRESHOLD
-    except Exception as e:
-        print(f"   ⚠️ 이미지 비교 중 예외: {e}")
-        return False
+# MULTI_SCALE=1 이면 기기 배율(DPR)에 맞춰 기준 이미지 크기 조정 (common.image_match)
+matcher.attach(driver)
+# 화면 프레임: MJPEG 스트림 (불가 시 스크린샷)
+frames = open_frame_source(driver)
+# 완료 감지기 (감지 비용 보정도 같은 감지기 기준으로 측정 / 적용)
+done_detector = ImageDetector(frames, matcher)
 
 # ---------------------------------------------------------
 # [함수] 광속 스크롤 (로그아웃 찾기용)
@@ -111,15 +86,25 @@ def blind_scroll_to_bottom():
 # [메인 루프]
 # ---------------------------------------------------------
 # test_results: [회차, 상태, 측정시간(문자열), 로그인반응속도(초)]
-test_results = []
+# 회차마다 체크포인트에 바로 기록 (중단 후 다시 실행하면 이어서 측정)
+checkpoint = ResultLog("ios_gov24_idpw_result", SCRIPT_DIR)
+test_results = checkpoint.rows
+repeats = stats.AdaptiveRepeat(test_results, REPEAT_COUNT, checkpoint.next_iteration)
+# 회차별 원본 기록은 통합 결과 저장소에도 적재 (CSV 는 저장소에서 내보냄)
+store = ResultStore()
+# 감지 비용 보정 (CALIBRATE=1 이면 첫 성공 회차 직후 측정, common.calibration)
+calibrator = calibration.Calibrator(store, "ios")
+record = store.start_run(app="gov24", platform="ios", scenario="idpw_login", metric="로그인반응속도(초)",
+                         script=__file__, resume=bool(test_results))
+DETECTOR = os.path.basename(TARGET_IMAGE_PATH)
 
 try:
     print("🚀 정부24 ID/PW 로그인 테스트 시작")
     print(f"   🎯 사용 참조 이미지: {TARGET_IMAGE_PATH}")
     time.sleep(5)
 
-    for i in range(1, REPEAT_COUNT + 1):
-        print(f"\n[{i}/{REPEAT_COUNT} 회차] 진행 중...")
+    for i in repeats:
+        print(f"\n[{i}/{repeats.limit} 회차] 진행 중...")
         # 각 회차 측정 시간
         measured_at = time.strftime("%Y-%m-%d %H:%M:%S")
         
@@ -207,20 +192,22 @@ try:
 
             # 6. [성공 검증] 이미지 비교
             print("   📸 [11~12단계] 메인화면 로딩 대기 (이미지 비교)")
-            success = False
-            for _ in range(100):  # 20초 대기 (0.01 * 100 * 2 근사)
-                if check_login_success_by_roi(driver, TARGET_IMAGE_PATH, ROI_CONFIG):
-                    end_time = time.time()
-                    duration = end_time - start_time
-                    print(f"   🎉 로그인 성공! (이미지 매칭) | 소요 시간: {duration:.4f}초")
-                    test_results.append([i, "성공", measured_at, duration])
-                    success = True
-                    break
-                time.sleep(0.01)
-            
-            if not success:
+            result = wait_for(done_detector, start_time, timeout=20)  # 최대 20초 대기
+            if result.matched:
+                # 완료 시각 = 첫 일치 프레임 캡처 시각 (캡처/전송/매칭 지연 제외)
+                end_time = result.end_time
+                duration = end_time - start_time
+                prev_duration = result.prev_time - start_time
+                print(f"   🎉 로그인 성공! (이미지 매칭) | 소요 시간: {duration:.4f}초 (직전 프레임 {prev_duration:.4f}초)")
+                print(f"   📈 샘플링 속도: {result.sample_rate:.1f}Hz")
+                checkpoint.append([i, "성공", measured_at, duration, prev_duration])
+                correction = calibrator.correct(done_detector, start_time, result)
+                record.add(i, STATUS_OK, measured_at, duration, start_time=start_time, end_time=end_time,
+                           detector=DETECTOR, prev_duration=prev_duration, **calibration.fields(correction))
+            else:
                 print("   ❌ 이미지 매칭 실패 (시간 초과)")
-                test_results.append([i, "실패", measured_at, 0])
+                checkpoint.append([i, "실패", measured_at, 0, 0])
+                record.add(i, STATUS_FAIL, measured_at, None, detector=DETECTOR)
                 raise Exception("로그인 검증 실패")
 
             # 7. [메뉴 진입]
@@ -259,7 +246,8 @@ try:
         except Exception as e:
             print(f"   ❌ {i}회차 실패: {str(e)}")
             # 실패도 타임스탬프 포함해서 기록
-            test_results.append([i, "실패", measured_at, 0])
+            checkpoint.append([i, "실패", measured_at, 0, 0])
+            record.add(i, STATUS_FAIL, measured_at, None, detector=DETECTOR)
             print("   ⚠️ 앱 재실행")
             driver.terminate_app(driver.capabilities['bundleId'])
             time.sleep(2)
@@ -270,49 +258,18 @@ finally:
     # -----------------------------------------------------
     # ★ 통계 계산 (성공 케이스 기준)
     # -----------------------------------------------------
-    durations = [row[3] for row in test_results if row[1] == "성공" and row[3] > 0]
-
-    if durations:
-        avg_val = statistics.mean(durations)
-        min_val = min(durations)
-        max_val = max(durations)
-        std_val = statistics.pstdev(durations) if len(durations) > 1 else 0.0
-    else:
-        avg_val = min_val = max_val = std_val = 0.0
+    result_stats = stats.from_rows(test_results)
+    stats.report(result_stats, "정부24 ID/PW 로그인")
 
     # ✅ 이 스크립트와 같은 폴더에 저장
-    output_path = os.path.join(SCRIPT_DIR, 'ios_gov24_idpw_result.csv')
+    output_path = device_env.result_path(os.path.join(SCRIPT_DIR, 'ios_gov24_idpw_result.csv'))
     print(f"📁 CSV 저장 경로: {output_path}")
 
-    with open(output_path, 'w', newline='', encoding='utf-8-sig') as f:
-        writer = csv.writer(f)
-        # 한글 헤더 + 통계 칸
-        writer.writerow(['회차', '상태', '측정시간', '로그인반응속도(초)', '평균(초)', '최소(초)', '최대(초)', '표준편차(초)'])
-        
-        # 1) 각 회차 기록 (통계 칸은 비워둠)
-        for iteration, status, measured_at, duration in test_results:
-            writer.writerow([
-                iteration,
-                status,
-                measured_at,
-                f"{duration:.4f}" if duration > 0 else "",
-                "",  # 평균(초)
-                "",  # 최소(초)
-                "",  # 최대(초)
-                ""   # 표준편차(초)
-            ])
-
-        # 2) 마지막에 통계 요약 행 한 줄만 추가
-        writer.writerow([
-            "통계",
-            "",
-            "",
-            "",
-            f"{avg_val:.4f}" if durations else "",
-            f"{min_val:.4f}" if durations else "",
-            f"{max_val:.4f}" if durations else "",
-            f"{std_val:.4f}" if durations else ""
-        ])
+    store.export_csv(record.run_id, output_path, columns=frame_source.CSV_FIELDS)
+    if checkpoint.finish(repeats.total):
+        record.finish(repeats.reason)
+    store.close()
 
+    frames.close()
     if driver:
         driver.quit()
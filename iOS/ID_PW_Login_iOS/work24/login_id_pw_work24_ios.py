@@ -1,13 +1,7 @@
 import time
-import csv
 import warnings
 import os
-import base64
-import io
-import cv2
-import numpy as np
-import statistics
-from PIL import Image
+import sys
 from urllib3.exceptions import NotOpenSSLWarning
 from appium import webdriver
 from appium.options.ios import XCUITestOptions
@@ -15,6 +9,15 @@ from appium.webdriver.common.appiumby import AppiumBy
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+# 공통 모듈(common) 경로 추가 (저장소 루트)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from common import calibration, device_env, frame_source, profiler, readiness, stats
+from common.checkpoint import ResultLog
+from common.detectors import AnyOf, ImageDetector, accessibility_id, app_state, ios_class_chain
+from common.image_match import create_matcher
+from common.frame_source import open_frame_source, wait_for
+from common.result_store import STATUS_FAIL, STATUS_OK, ResultStore
+
 warnings.simplefilter('ignore', NotOpenSSLWarning)
 
 # ---------------------------------------------------------
@@ -22,7 +25,7 @@ warnings.simplefilter('ignore', NotOpenSSLWarning)
 # ---------------------------------------------------------
 LOGIN_ID = "------" 
 LOGIN_PW = "------"
-REPEAT_COUNT = 10
+REPEAT_COUNT = device_env.repeat_count(10)
 
 # ✅ [이미지 설정] 로그인 성공 팝업(Ok 버튼 등) 캡처 파일명
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -51,7 +54,8 @@ options.set_capability("waitForQuiescence", False)
 options.set_capability("waitForIdleTimeout", 0)
 options.set_capability("mjpegServerScreenshotQuality", 20)
 
-driver = webdriver.Remote('http://127.0.0.1:4723', options=options)
+device_env.apply_capabilities(options)
+driver = profiler.instrument(webdriver.Remote(device_env.server_url('http://127.0.0.1:4723'), options=options))
 # 강제 설정
 driver.update_settings({"waitForIdleTimeout": 0}) 
 wait = WebDriverWait(driver, 20)
@@ -63,42 +67,21 @@ if not os.path.exists(TARGET_IMAGE_PATH):
     exit()
 
 # 템플릿 이미지 로드
-template_img = cv2.imread(TARGET_IMAGE_PATH)
-
-# ---------------------------------------------------------
-# [함수] 이미지 매칭 (성공 판단)
-# ---------------------------------------------------------
-def wait_for_image_match(driver, start_time, timeout=20):
-    while True:
-        try:
-            screenshot_base64 = driver.get_screenshot_as_base64()
-            image = Image.open(io.BytesIO(base64.b64decode(screenshot_base64)))
-
-            img_w, img_h = image.size
-            left = int(img_w * ROI_X_PCT)
-            top = int(img_h * ROI_Y_PCT)
-            right = int(left + (img_w * ROI_W_PCT))
-            bottom = int(top + (img_h * ROI_H_PCT))
-            
-            roi_image = image.crop((left, top, right, bottom))
-            roi_cv = cv2.cvtColor(np.array(roi_image), cv2.COLOR_RGB2BGR)
-
-            if template_img.shape != roi_cv.shape:
-                roi_cv = cv2.resize(roi_cv, (template_img.shape[1], template_img.shape[0]))
-
-            res = cv2.matchTemplate(roi_cv, template_img, cv2.TM_CCOEFF_NORMED)
-            _, max_val, _, _ = cv2.minMaxLoc(res)
-
-            if max_val > 0.8:  # 일치율 80% 이상 시 성공
-                return True
-
-            if time.time() - start_time > timeout:
-                return False
-            
-            time.sleep(0.01) # CPU 과부하 방지
-
-        except Exception:
-            pass
+matcher = create_matcher(
+    TARGET_IMAGE_PATH,
+    {'x': ROI_X_PCT, 'y': ROI_Y_PCT, 'w': ROI_W_PCT, 'h': ROI_H_PCT},
+    threshold=0.8,  # 일치율 80% 이상 시 성공
+)
+
+# MULTI_SCALE=1 이면 기기 배율(DPR)에 맞춰 기준 이미지 크기 조정 (common.image_match)
+matcher.attach(driver)
+# 화면 프레임: MJPEG 스트림 (불가 시 스크린샷)
+frames = open_frame_source(driver)
+# 완료 감지기 (감지 비용 보정도 같은 감지기 기준으로 측정 / 적용)
+done_detector = ImageDetector(frames, matcher)
+
+# 메인 화면 '로그인' 탭 (앱 초기 화면 / 로그아웃 후 복귀 확인용)
+LOGIN_TAB_CHAIN = '**/XCUIElementTypeLink/XCUIElementTypeStaticText[`name == "로그인"`]'
 
 # ---------------------------------------------------------
 # [매핑] 보안 키패드 특수문자
@@ -135,7 +118,7 @@ def type_secure_password(driver, password):
                     driver.find_element(AppiumBy.ACCESSIBILITY_ID, t_id).click()
                     break
                 except: continue
-            time.sleep(1.0)
+            readiness.ready(accessibility_id(driver, target_id), static=1.0, label="특수문자 키패드 전환")
             current_mode = "special"
         elif not is_special and current_mode == "special":
             for t_id in TOGGLE_IDS:
@@ -143,7 +126,7 @@ def type_secure_password(driver, password):
                     driver.find_element(AppiumBy.ACCESSIBILITY_ID, t_id).click()
                     break
                 except: continue
-            time.sleep(0.5)
+            readiness.ready(accessibility_id(driver, target_id), static=0.5, label="일반 키패드 전환")
             current_mode = "normal"
 
         try:
@@ -156,29 +139,38 @@ def type_secure_password(driver, password):
 # ---------------------------------------------------------
 # [메인 루프]
 # ---------------------------------------------------------
-test_results = []
+# 회차마다 체크포인트에 바로 기록 (중단 후 다시 실행하면 이어서 측정)
+checkpoint = ResultLog("work24_idpw_image_result", SCRIPT_DIR)
+test_results = checkpoint.rows
+repeats = stats.AdaptiveRepeat(test_results, REPEAT_COUNT, checkpoint.next_iteration)
+# 회차별 원본 기록은 통합 결과 저장소에도 적재 (CSV 는 저장소에서 내보냄)
+store = ResultStore()
+# 감지 비용 보정 (CALIBRATE=1 이면 첫 성공 회차 직후 측정, common.calibration)
+calibrator = calibration.Calibrator(store, "ios")
+record = store.start_run(app="work24", platform="ios", scenario="idpw_login", metric="로그인반응속도(초)",
+                         script=__file__, resume=bool(test_results))
+DETECTOR = os.path.basename(TARGET_IMAGE_PATH)
 
 try:
     print("🚀 테스트 시작 (이미지 매칭 Ver)")
-    time.sleep(8)
+    readiness.ready(ios_class_chain(driver, LOGIN_TAB_CHAIN), static=8, label="앱 초기 화면")
 
-    for i in range(1, REPEAT_COUNT + 1):
-        print(f"\n[{i}/{REPEAT_COUNT} 회차] 진행 중...")
+    for i in repeats:
+        print(f"\n[{i}/{repeats.limit} 회차] 진행 중...")
         measured_at = time.strftime("%Y-%m-%d %H:%M:%S")
         
         try:
             # 1. 로그인 진입
             print("   📲 [1단계] 로그인 탭 클릭")
             login_tab_text = wait.until(EC.element_to_be_clickable((
-                AppiumBy.IOS_CLASS_CHAIN, 
-                '**/XCUIElementTypeLink/XCUIElementTypeStaticText[`name == "로그인"`]'
+                AppiumBy.IOS_CLASS_CHAIN, LOGIN_TAB_CHAIN
             )))
             login_tab_text.click()
-            time.sleep(1)
+            readiness.settle(driver, static=1, label="로그인 화면 전환")
 
             # 2. HRD 버튼
             driver.execute_script("mobile: swipe", {"direction": "up"})
-            time.sleep(1)
+            readiness.settle(driver, static=1, label="로그인 화면 스크롤")
             print("   📲 [2단계] HRD 버튼 클릭")
             hrd_btn = wait.until(EC.element_to_be_clickable((
                 AppiumBy.ACCESSIBILITY_ID, "아이디/비밀번호(HRD 출결용)"
@@ -191,7 +183,10 @@ try:
                 AppiumBy.IOS_CLASS_CHAIN, '**/XCUIElementTypeSecureTextField[`value == "개인회원 비밀번호를 입력해주세요."`]'
             )))
             pw_input.click()
-            time.sleep(2)
+            readiness.ready(
+                AnyOf(accessibility_id(driver, "특수키"), accessibility_id(driver, "입력완료")),
+                static=2, label="보안 키패드",
+            )
             type_secure_password(driver, LOGIN_PW)
             
             try: driver.find_element(AppiumBy.ACCESSIBILITY_ID, "입력완료").click()
@@ -209,11 +204,17 @@ try:
 
             # 5. [수정됨] 이미지 매칭으로 성공 판단
             print("   👀 [5단계] 로그인 성공 확인 (이미지 매칭)")
-            if wait_for_image_match(driver, start_time):
-                end_time = time.time()
+            result = wait_for(done_detector, start_time, timeout=20)
+            if result.matched:
+                end_time = result.end_time
                 duration = end_time - start_time
-                print(f"   🎉 로그인 성공! 소요 시간: {duration:.4f}초")
-                test_results.append([i, "성공", measured_at, duration])
+                prev_duration = result.prev_time - start_time
+                print(f"   🎉 로그인 성공! 소요 시간: {duration:.4f}초 (직전 프레임 {prev_duration:.4f}초)")
+                print(f"   📈 샘플링 속도: {result.sample_rate:.1f}Hz")
+                checkpoint.append([i, "성공", measured_at, duration, prev_duration])
+                correction = calibrator.correct(done_detector, start_time, result)
+                record.add(i, STATUS_OK, measured_at, duration, start_time=start_time, end_time=end_time,
+                           detector=DETECTOR, prev_duration=prev_duration, **calibration.fields(correction))
                 
                 # 측정 끝났으니 로그아웃을 위해 팝업 닫기 (Ok 버튼 클릭)
                 try:
@@ -222,9 +223,10 @@ try:
                     pass
             else:
                 print("   ❌ 실패: 타임아웃 (이미지 매칭 실패)")
-                test_results.append([i, "실패", measured_at, 0])
+                checkpoint.append([i, "실패", measured_at, 0, 0])
+                record.add(i, STATUS_FAIL, measured_at, None, detector=DETECTOR)
 
-            time.sleep(4)
+            readiness.ready(accessibility_id(driver, "전체메뉴"), static=4, label="로그인 후 메인 화면")
 
             # 6. 로그아웃 (기존 유지)
             print("   🚪 [6단계] 로그아웃")
@@ -232,7 +234,7 @@ try:
                 AppiumBy.ACCESSIBILITY_ID, "전체메뉴"
             )))
             menu_btn.click()
-            time.sleep(2)
+            readiness.ready(accessibility_id(driver, "로그아웃"), static=2, label="전체메뉴 열림")
 
             logout_btn = wait.until(EC.element_to_be_clickable((
                 AppiumBy.ACCESSIBILITY_ID, "로그아웃"
@@ -240,54 +242,40 @@ try:
             logout_btn.click()
 
             try:
-                time.sleep(1)
-                driver.find_element(AppiumBy.ACCESSIBILITY_ID, "확인").click()
+                # 확인 팝업이 없는 경우도 있으므로 기존 대기 시간(1초)만큼만 기다림
+                confirm = readiness.ready(accessibility_id(driver, "확인"), static=1, budget=1, label="로그아웃 확인 팝업")
+                if confirm.matched:
+                    confirm.detail[0].click()
             except: pass
 
             print("   ✅ 초기 화면 복귀...")
-            time.sleep(3)
+            readiness.ready(ios_class_chain(driver, LOGIN_TAB_CHAIN), static=3, label="로그아웃 후 초기 화면")
             
         except Exception as e:
             print(f"   ❌ {i}회차 실패: {str(e)}")
-            test_results.append([i, "실패", measured_at, 0])
+            checkpoint.append([i, "실패", measured_at, 0, 0])
+            record.add(i, STATUS_FAIL, measured_at, None, detector=DETECTOR)
             driver.terminate_app(driver.capabilities['bundleId'])
-            time.sleep(2)
+            readiness.ready(app_state(driver, driver.capabilities['bundleId']), static=2, label="앱 종료 확인")
             driver.activate_app(driver.capabilities['bundleId'])
-            time.sleep(5)
+            readiness.ready(ios_class_chain(driver, LOGIN_TAB_CHAIN), static=5, label="앱 재실행 초기 화면")
 
 finally:
     # -----------------------------------------------------
     # 결과 저장 (기존 포맷 유지)
     # -----------------------------------------------------
-    durations = [row[3] for row in test_results if row[1] == "성공" and row[3] > 0]
-
-    if durations:
-        avg_val = statistics.mean(durations)
-        min_val = min(durations)
-        max_val = max(durations)
-        std_val = statistics.pstdev(durations) if len(durations) > 1 else 0.0
-    else:
-        avg_val = min_val = max_val = std_val = 0.0
+    result_stats = stats.from_rows(test_results)
+    stats.report(result_stats, "고용24 ID/PW 로그인")
 
-    output_path = os.path.join(SCRIPT_DIR, 'work24_idpw_image_result.csv')
+    output_path = device_env.result_path(os.path.join(SCRIPT_DIR, 'work24_idpw_image_result.csv'))
     print(f"📁 CSV 저장 경로: {output_path}")
 
-    with open(output_path, 'w', newline='', encoding='utf-8-sig') as f:
-        writer = csv.writer(f)
-        writer.writerow(['회차', '상태', '측정시간', '로그인반응속도(초)', '평균(초)', '최소(초)', '최대(초)', '표준편차(초)'])
-        for iteration, status, measured_at, duration in test_results:
-            writer.writerow([
-                iteration, status, measured_at,
-                f"{duration:.4f}" if duration > 0 else "",
-                "", "", "", ""
-            ])
-        writer.writerow([
-            "통계", "", "", "",
-            f"{avg_val:.4f}" if durations else "",
-            f"{min_val:.4f}" if durations else "",
-            f"{max_val:.4f}" if durations else "",
-            f"{std_val:.4f}" if durations else ""
-        ])
+    store.export_csv(record.run_id, output_path, columns=frame_source.CSV_FIELDS)
+    if checkpoint.finish(repeats.total):
+        record.finish(repeats.reason)
+    store.close()
 
+    frames.close()
+    readiness.report()
     if driver:
         driver.quit()
@@ -1,16 +1,23 @@
 import time
-import csv
 import os
-import statistics
+import sys
 from appium import webdriver
 from appium.options.ios import XCUITestOptions
 from appium.webdriver.common.appiumby import AppiumBy
 
+# 공통 모듈(common) 경로 추가 (저장소 루트)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from common import device_env, profiler, speed_index, stats
+from common.checkpoint import ResultLog
+from common.result_store import STATUS_FAIL, STATUS_OK, ResultStore
+from common.detectors import ios_predicate
+from common.waiter import wait_until
+
 # ---------------------------------------------------------
 # [설정]
 # ---------------------------------------------------------
 SEARCH_KEYWORD = "청년"
-REPEAT_COUNT = 10
+REPEAT_COUNT = device_env.repeat_count(10)
 
 options = XCUITestOptions()
 options.platform_name = "iOS"
@@ -27,35 +34,43 @@ options.set_capability("useJSONSource", True)
 # 스크린샷 퀄리티를 낮춰서 네트워크 대역폭 확보 (이미지 안쓰지만 혹시 모를 오버헤드 방지)
 options.set_capability("mjpegServerScreenshotQuality", 0) 
 
-driver = webdriver.Remote('http://127.0.0.1:4723', options=options)
+device_env.apply_capabilities(options)
+driver = profiler.instrument(webdriver.Remote(device_env.server_url('http://127.0.0.1:4723'), options=options))
 # 드라이버 설정으로 한 번 더 강제 (확실하게)
 driver.update_settings({"waitForIdleTimeout": 0})
+# VISUAL_TIMELINE=1 이면 시각적 완성도(Speed Index) 함께 기록 (WDA MJPEG 스트림이 없으면 끔)
+timeline = speed_index.from_env(driver)
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-test_results = []
+# 회차마다 체크포인트에 바로 기록 (중단 후 다시 실행하면 이어서 측정)
+checkpoint = ResultLog("ios_gov24_search_result", SCRIPT_DIR)
+test_results = checkpoint.rows
+repeats = stats.AdaptiveRepeat(test_results, REPEAT_COUNT, checkpoint.next_iteration)
+# 회차 -> 시각적 완성도 (VISUAL_TIMELINE=1 일 때만)
+visual_rows = {}
+# 회차별 원본 기록은 통합 결과 저장소에도 적재 (CSV 는 저장소에서 내보냄)
+store = ResultStore()
+record = store.start_run(app="gov24", platform="ios", scenario="search", metric="검색반응속도(초)",
+                         script=__file__, resume=bool(test_results))
+DETECTOR = "ios_predicate:검색 결과"
 
 try:
     print("🚀 정부24 검색 성능 테스트 (NSPredicate Mode)")
 
-    for i in range(1, REPEAT_COUNT + 1):
-        print(f"\n[{i}/{REPEAT_COUNT} 회차]")
+    for i in repeats:
+        print(f"\n[{i}/{repeats.limit} 회차]")
         measured_at = time.strftime("%Y-%m-%d %H:%M:%S")
 
         try:
             # 1. 검색어 입력 (입력창 찾기)
-            # 안전하게 루프로 찾음
-            while True:
-                # Predicate: 접근성 ID가 '검색어 입력'인 요소
-                elems = driver.find_elements(
-                    AppiumBy.IOS_PREDICATE, 
-                    "name == '검색어 입력'"
-                )
-                if elems:
-                    search_input = elems[0]
-                    search_input.click()
-                    search_input.clear()
-                    search_input.send_keys(SEARCH_KEYWORD)
-                    break
+            # Predicate: 접근성 ID가 '검색어 입력'인 요소
+            found = wait_until(ios_predicate(driver, "name == '검색어 입력'"), time.time())
+            if not found.matched:
+                raise Exception("검색어 입력창 못 찾음")
+            search_input = found.detail[0]
+            search_input.click()
+            search_input.clear()
+            search_input.send_keys(SEARCH_KEYWORD)
             
             # 2. 검색 버튼 찾기 (미리 찾아둠)
             # Predicate: 접근성 ID가 '검색'인 요소
@@ -68,7 +83,9 @@ try:
             # -----------------------------------------------------------
             # ✅ [Time Start]
             # -----------------------------------------------------------
-            
+            if timeline:
+                timeline.start()
+
             search_btn.click()
             start_time = time.time()
 
@@ -77,23 +94,22 @@ try:
             # 이 문자열은 iOS 시스템에 그대로 전달되어 번역 딜레이가 '0'입니다.
             predicate_string = "type == 'XCUIElementTypeStaticText' AND name == '검색 결과'"
             
-            while True:
-                # find_elements는 에러를 안 뱉으므로 try-catch 오버헤드 없음
-                res = driver.find_elements(AppiumBy.IOS_PREDICATE, predicate_string)
-                
-                if res:
-                    break
-                
-                # 안전장치: 20초 지나면 타임아웃
-                if time.time() - start_time > 20:
-                    raise Exception("Timeout")
+            result = wait_until(ios_predicate(driver, predicate_string), start_time, timeout=20)
+            if not result.matched:
+                raise Exception("Timeout")
 
-            end_time = time.time()
+            end_time = result.end_time
             # -----------------------------------------------------------
             
             duration = end_time - start_time
             print(f"   🎉 검색 완료! 소요 시간: {duration:.4f}초")
-            test_results.append([i, "성공", measured_at, duration])
+            print(f"   📈 샘플링 속도: {result.sample_rate:.1f}Hz")
+            checkpoint.append([i, "성공", measured_at, duration])
+            # 검색 결과가 다 그려져 화면이 멈출 때까지 기록
+            visual_rows[i] = timeline.finish(start_time, end_time) if timeline else None
+            speed_index.report(visual_rows[i])
+            record.add(i, STATUS_OK, measured_at, duration, start_time=start_time, end_time=end_time,
+                       detector=DETECTOR, **speed_index.fields(visual_rows[i]))
 
             # 4. [복귀] 이전 페이지
             # Predicate: Link 타입이면서 이름이 '이전 페이지'
@@ -113,7 +129,10 @@ try:
 
         except Exception as e:
             print(f"   ❌ {i}회차 실패: {e}")
-            test_results.append([i, "실패", measured_at, 0])
+            checkpoint.append([i, "실패", measured_at, 0])
+            record.add(i, STATUS_FAIL, measured_at, None, detector=DETECTOR, error=str(e))
+            if timeline:
+                timeline.cancel()
             driver.terminate_app("kr.go.dcsc.minwon24")
             time.sleep(1)
             driver.activate_app("kr.go.dcsc.minwon24")
@@ -121,23 +140,19 @@ try:
 
 finally:
     # 저장 로직
-    durations = [row[3] for row in test_results if row[1] == "성공" and row[3] > 0]
-    if durations:
-        avg = statistics.mean(durations)
-        mn = min(durations)
-        mx = max(durations)
-        sd = statistics.pstdev(durations) if len(durations) > 1 else 0.0
-    else:
-        avg=mn=mx=sd=0.0
-
-    output_path = os.path.join(SCRIPT_DIR, 'ios_gov24_search_result.csv')
-    with open(output_path, 'w', newline='', encoding='utf-8-sig') as f:
-        writer = csv.writer(f)
-        writer.writerow(['회차','상태','측정시간','검색반응속도(초)','평균','최소','최대','표준편차'])
-        for r in test_results:
-            writer.writerow([r[0], r[1], r[2], f"{r[3]:.4f}" if r[3]>0 else "","","","",""])
-        writer.writerow(["통계","","",f"{avg:.4f}",f"{avg:.4f}",f"{mn:.4f}",f"{mx:.4f}",f"{sd:.4f}"])
-    
+    result_stats = stats.from_rows(test_results)
+    stats.report(result_stats, "정부24 검색")
+    if timeline:
+        speed_index.summarize(visual_rows.values(), "정부24 검색")
+
+    output_path = device_env.result_path(os.path.join(SCRIPT_DIR, 'ios_gov24_search_result.csv'))
+    store.export_csv(record.run_id, output_path, columns=speed_index.CSV_FIELDS if timeline else None)
+    if checkpoint.finish(repeats.total):
+        record.finish(repeats.reason)
+    store.close()
+
     print(f"\n✅ 저장 완료: {output_path}")
+    if timeline:
+        timeline.close()
     if driver:
         driver.quit()
@@ -1,12 +1,6 @@
 import time
-import csv
 import os
-import base64
-import io
-import cv2
-import numpy as np
-import statistics
-from PIL import Image
+import sys
 from datetime import datetime
 from appium import webdriver
 from appium.options.ios import XCUITestOptions
@@ -14,13 +8,22 @@ from appium.webdriver.common.appiumby import AppiumBy
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+# 공통 모듈(common) 경로 추가 (저장소 루트)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from common import calibration, device_env, frame_source, profiler, speed_index, stats
+from common.checkpoint import ResultLog
+from common.detectors import ImageDetector, visual_stable
+from common.image_match import create_matcher
+from common.frame_source import open_frame_source, wait_for
+from common.result_store import STATUS_FAIL, STATUS_OK, ResultStore
+
 # ===================== [설정 영역] =====================
 UDID = "---------------------"
 BUNDLE_ID = "kr.co.jobkorea.jobkorea1"
 DEVICE_NAME = "iPhone"
-APPIUM_SERVER_URL = "http://127.0.0.1:4723"
+APPIUM_SERVER_URL = device_env.server_url("http://127.0.0.1:4723")
 
-REPEAT_COUNT = 10
+REPEAT_COUNT = device_env.repeat_count(10)
 KEYWORD = "청년"
 
 # ✅ 경로 설정 (.py 파일과 같은 위치)
@@ -40,13 +43,20 @@ ROI_H_PCT = 0.10    # 높이
 # =======================================================
 
 # 이미지 파일 확인
-if not os.path.exists(TARGET_IMAGE_PATH):
+# 기준 이미지가 없거나 VISUAL_STABLE=1 이면 화면 안정(ROI 픽셀 변화가 멈춤)으로 완료 판정 (common.visual)
+VISUAL = device_env.visual_stable()
+if not VISUAL and not os.path.exists(TARGET_IMAGE_PATH):
     print(f"❌ [오류] 타겟 이미지 파일이 없습니다: {TARGET_IMAGE_PATH}")
     print("   👉 검색 결과 화면 상단을 캡처해서 'jobkorea_search_done.png'로 저장해주세요.")
-    exit()
+    print("   ↪ 기준 이미지 없이 화면 안정 감지로 측정합니다 (VISUAL_STABLE=1 과 같음)")
+    VISUAL = True
 
 # 타겟 이미지 미리 로드
-target_img_cv = cv2.imread(TARGET_IMAGE_PATH)
+matcher = None if VISUAL else create_matcher(
+    TARGET_IMAGE_PATH,
+    {'x': ROI_X_PCT, 'y': ROI_Y_PCT, 'w': ROI_W_PCT, 'h': ROI_H_PCT},
+    threshold=0.85,
+)
 
 options = XCUITestOptions()
 options.platform_name = "iOS"
@@ -59,37 +69,6 @@ options.new_command_timeout = 300
 options.auto_accept_alerts = True
 options.set_capability("waitForQuiescence", False) # UI 안정화 대기 끄기 (속도 향상)
 
-# ---------------------------------------------------------
-# [함수] 이미지 매칭 (로딩 완료 판단)
-# ---------------------------------------------------------
-def check_search_complete(driver):
-    try:
-        # 1. 스크린샷 캡처 (메모리)
-        screenshot_base64 = driver.get_screenshot_as_base64()
-        image = Image.open(io.BytesIO(base64.b64decode(screenshot_base64)))
-
-        # 2. ROI 잘라내기
-        img_w, img_h = image.size
-        left = int(img_w * ROI_X_PCT)
-        top = int(img_h * ROI_Y_PCT)
-        right = int(left + (img_w * ROI_W_PCT))
-        bottom = int(top + (img_h * ROI_H_PCT))
-
-        roi_image = image.crop((left, top, right, bottom))
-        roi_cv = cv2.cvtColor(np.array(roi_image), cv2.COLOR_RGB2BGR)
-
-        # 3. 크기 보정
-        if target_img_cv.shape != roi_cv.shape:
-            roi_cv = cv2.resize(roi_cv, (target_img_cv.shape[1], target_img_cv.shape[0]))
-
-        # 4. 매칭
-        res = cv2.matchTemplate(roi_cv, target_img_cv, cv2.TM_CCOEFF_NORMED)
-        _, max_val, _, _ = cv2.minMaxLoc(res)
-        
-        return max_val # 일치율 리턴
-    except:
-        return 0.0
-
 # ---------------------------------------------------------
 # [메인 실행]
 # ---------------------------------------------------------
@@ -97,11 +76,36 @@ def run_ios_jobkorea_search_image_match():
     print(f"--- [iOS] 잡코리아 검색 속도 (이미지 매칭) {REPEAT_COUNT}회 시작 ---")
     
     driver = None
-    test_results = []
+    frames = None
+    timeline = None
+    # 회차마다 체크포인트에 바로 기록 (중단 후 다시 실행하면 이어서 측정)
+    checkpoint = ResultLog("ios_jobkorea_search_image_result", SCRIPT_DIR)
+    test_results = checkpoint.rows
+    repeats = stats.AdaptiveRepeat(test_results, REPEAT_COUNT, checkpoint.next_iteration)
+    # 회차 -> 시각적 완성도 (VISUAL_TIMELINE=1 일 때만)
+    visual_rows = {}
+    # 회차별 원본 기록은 통합 결과 저장소에도 적재 (CSV 는 저장소에서 내보냄)
+    store = ResultStore()
+    # 감지 비용 보정 (CALIBRATE=1 이면 첫 성공 회차 직후 측정, common.calibration)
+    calibrator = calibration.Calibrator(store, "ios")
+    record = store.start_run(app="jobkorea", platform="ios", scenario="search", metric="검색반응속도(초)",
+                             script=__file__, resume=bool(test_results))
+    detector = "화면 안정" if VISUAL else os.path.basename(TARGET_IMAGE_PATH)
 
     try:
-        driver = webdriver.Remote(APPIUM_SERVER_URL, options=options)
+        device_env.apply_capabilities(options)
+        driver = profiler.instrument(webdriver.Remote(APPIUM_SERVER_URL, options=options))
         wait = WebDriverWait(driver, 20)
+        # MULTI_SCALE=1 이면 기기 배율(DPR)에 맞춰 기준 이미지 크기 조정 (common.image_match)
+        if matcher:
+            matcher.attach(driver)
+        # 화면 프레임: MJPEG 스트림 (불가 시 스크린샷)
+        frames = open_frame_source(driver)
+        # 완료 감지기 (감지 비용 보정도 같은 감지기 기준으로 측정 / 적용)
+        done_detector = visual_stable(frames) if VISUAL else ImageDetector(frames, matcher)
+        # VISUAL_TIMELINE=1 이면 같은 MJPEG 스트림으로 시각적 완성도(Speed Index) 함께 기록
+        if device_env.visual_timeline():
+            timeline = speed_index.from_frames(frames)
 
         print("📱 앱 실행 및 메인 화면 진입...")
         driver.activate_app(BUNDLE_ID)
@@ -110,10 +114,10 @@ def run_ios_jobkorea_search_image_match():
         # 메인 검색 버튼(돋보기) 요소 미리 찾기용 Locator
         search_btn_locator = (AppiumBy.ACCESSIBILITY_ID, "new_main_search_blue")
 
-        for i in range(1, REPEAT_COUNT + 1):
+        for i in repeats:
             measured_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             try:
-                print(f"\n[Iter {i}/{REPEAT_COUNT}] 측정 시작...")
+                print(f"\n[Iter {i}/{repeats.limit}] 측정 시작...")
 
                 # 1. 메인 검색 버튼 클릭 (좌표 타격 권장, 실패시 요소 검색)
                 # 잡코리아 메인 상단 돋보기 좌표 (iPhone 기종따라 확인 필요, 예: 340, 125)
@@ -139,29 +143,36 @@ def run_ios_jobkorea_search_image_match():
 
                 # 3. ★ 측정 시작 ★ (엔터 누르는 순간부터)
                 
+                if timeline:
+                    timeline.start()
+
                 # 엔터 입력 (검색 실행)
                 search_input.send_keys("\n")
                 start_time = time.time()
                 
-                # 4. 이미지 매칭 루프 (최대 20초)
-                is_loaded = False
-                while (time.time() - start_time) < 20:
-                    score = check_search_complete(driver)
-                    
-                    # 일치율 85% 이상이면 로딩 끝
-                    if score > 0.85:
-                        end_time = time.time()
-                        duration = end_time - start_time
-                        print(f"   ⚡ 검색 완료! 소요시간: {duration:.4f}초 (일치율: {score*100:.1f}%)")
-                        test_results.append([i, "성공", measured_at, duration])
-                        is_loaded = True
-                        break
-                    
-                    time.sleep(0.01) # 부하 조절
-
-                if not is_loaded:
+                # 4. 이미지 매칭 (최대 20초, 일치율 85% 이상이면 로딩 끝)
+                result = wait_for(done_detector, start_time, timeout=20)
+
+                if result.matched:
+                    end_time = result.end_time
+                    duration = end_time - start_time
+                    prev_duration = result.prev_time - start_time
+                    print(f"   ⚡ 검색 완료! 소요시간: {duration:.4f}초 (직전 프레임 {prev_duration:.4f}초, 일치율: {result.score*100:.1f}%)")
+                    print(f"   📈 샘플링 속도: {result.sample_rate:.1f}Hz")
+                    checkpoint.append([i, "성공", measured_at, duration, prev_duration])
+                    # 검색 결과가 다 그려져 화면이 멈출 때까지 기록
+                    visual_rows[i] = timeline.finish(start_time, end_time) if timeline else None
+                    speed_index.report(visual_rows[i])
+                    correction = calibrator.correct(done_detector, start_time, result)
+                    record.add(i, STATUS_OK, measured_at, duration, start_time=start_time, end_time=end_time,
+                               detector=detector, prev_duration=prev_duration,
+                               **calibration.fields(correction), **speed_index.fields(visual_rows[i]))
+                else:
                     print("   ❌ 실패: 로딩 시간 초과 (이미지 매칭 실패)")
-                    test_results.append([i, "실패", measured_at, 0])
+                    checkpoint.append([i, "실패", measured_at, 0, 0])
+                    record.add(i, STATUS_FAIL, measured_at, None, detector=detector)
+                    if timeline:
+                        timeline.cancel()
 
                 # 5. 메인 화면 복귀 (다음 회차 준비)
                 print("   🔙 메인으로 복귀")
@@ -190,41 +201,45 @@ def run_ios_jobkorea_search_image_match():
 
             except Exception as e:
                 print(f"❌ {i}회차 에러: {e}")
-                test_results.append([i, "실패", measured_at, 0])
+                checkpoint.append([i, "실패", measured_at, 0, 0])
+                record.add(i, STATUS_FAIL, measured_at, None, detector=detector, error=str(e))
+                if timeline:
+                    timeline.cancel()
                 # 앱 재기동
                 driver.terminate_app(BUNDLE_ID)
                 time.sleep(1)
                 driver.activate_app(BUNDLE_ID)
                 time.sleep(3)
 
-        # ===================== CSV 저장 =====================
-        if test_results:
-            durations = [row[3] for row in test_results if row[1] == "성공" and row[3] > 0]
-            if durations:
-                avg_val = statistics.mean(durations)
-                min_val = min(durations)
-                max_val = max(durations)
-                std_val = statistics.pstdev(durations) if len(durations) > 1 else 0.0
-            else:
-                avg_val = min_val = max_val = std_val = 0.0
-            
-            file_path = os.path.join(SCRIPT_DIR, "ios_jobkorea_search_image_result.csv")
-
-            with open(file_path, "w", newline="", encoding="utf-8-sig") as f:
-                writer = csv.writer(f)
-                writer.writerow(["회차", "상태", "측정시간", "검색반응속도(초)", "평균(초)", "최소(초)", "최대(초)", "표준편차(초)"])
-                for it, st, tm, dur in test_results:
-                    writer.writerow([it, st, tm, f"{dur:.4f}" if dur > 0 else "", "", "", "", ""])
-                writer.writerow(["통계", "", "", "", f"{avg_val:.4f}", f"{min_val:.4f}", f"{max_val:.4f}", f"{std_val:.4f}"])
-
-            print(f"\n✅ 저장 완료: {file_path}")
-
     except Exception as e:
         print(f"⛔ 치명적 오류: {e}")
 
     finally:
+        if timeline:
+            timeline.close()
+        if frames:
+            frames.close()
         if driver:
             driver.quit()
 
+        # ===================== CSV 저장 =====================
+        if test_results:
+            result_stats = stats.from_rows(test_results)
+            stats.report(result_stats, "잡코리아 검색")
+            if timeline:
+                speed_index.summarize(visual_rows.values(), "잡코리아 검색")
+            
+            file_path = device_env.result_path(os.path.join(SCRIPT_DIR, "ios_jobkorea_search_image_result.csv"))
+
+            columns = dict(frame_source.CSV_FIELDS)
+            if timeline:
+                columns.update(speed_index.CSV_FIELDS)
+            store.export_csv(record.run_id, file_path, columns=columns)
+            if checkpoint.finish(repeats.total):
+                record.finish(repeats.reason)
+
+            print(f"\n✅ 저장 완료: {file_path}")
+        store.close()
+
 if __name__ == "__main__":
     run_ios_jobkorea_search_image_match()
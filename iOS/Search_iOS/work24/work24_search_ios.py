@@ -1,12 +1,6 @@
 import time
 import os
-import csv
-import base64
-import io
-import cv2
-import numpy as np
-import statistics
-from PIL import Image
+import sys
 from datetime import datetime
 from appium import webdriver
 from appium.options.ios import XCUITestOptions
@@ -14,10 +8,19 @@ from appium.webdriver.common.appiumby import AppiumBy
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+# 공통 모듈(common) 경로 추가 (저장소 루트)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from common import calibration, device_env, frame_source, profiler, speed_index, stats
+from common.checkpoint import ResultLog
+from common.detectors import ImageDetector, visual_stable
+from common.image_match import create_matcher
+from common.frame_source import open_frame_source, wait_for
+from common.result_store import STATUS_FAIL, STATUS_OK, ResultStore
+
 # ==========================================
 # 1. 설정 (Configuration)
 # ==========================================
-ITERATIONS = 10
+ITERATIONS = device_env.repeat_count(10)
 keyword = "청년"
 
 options = XCUITestOptions()
@@ -46,74 +49,63 @@ ROI_W_PCT = 1      # 너비
 ROI_H_PCT = 0.05    # 높이
 
 # 이미지 로드 확인
-if not os.path.exists(TARGET_IMAGE_PATH):
+# 기준 이미지가 없거나 VISUAL_STABLE=1 이면 화면 안정(ROI 픽셀 변화가 멈춤)으로 완료 판정 (common.visual)
+VISUAL = device_env.visual_stable()
+if not VISUAL and not os.path.exists(TARGET_IMAGE_PATH):
     print(f"❌ 오류: '{TARGET_IMAGE_NAME}' 파일이 없습니다.")
     print("   👉 검색 결과 화면의 특징적인 부분(예: 상단 탭, 총 건수 등)을 캡처해서 넣어주세요.")
-    exit()
-
-# 템플릿 이미지 로드 (컬러)
-template_img = cv2.imread(TARGET_IMAGE_PATH)
-
-
-# ---------------------------------------------------------
-# [함수] 이미지 매칭 로직
-# ---------------------------------------------------------
-def wait_for_image_match(driver, start_time, timeout=20):
-    while True:
-        try:
-            # 1. 스크린샷 (메모리 로드)
-            screenshot_base64 = driver.get_screenshot_as_base64()
-            image = Image.open(io.BytesIO(base64.b64decode(screenshot_base64)))
-
-            # 2. ROI 잘라내기 (속도 향상 및 오탐지 방지)
-            img_w, img_h = image.size
-            left = int(img_w * ROI_X_PCT)
-            top = int(img_h * ROI_Y_PCT)
-            right = int(left + (img_w * ROI_W_PCT))
-            bottom = int(top + (img_h * ROI_H_PCT))
-            
-            roi_image = image.crop((left, top, right, bottom))
-            roi_cv = cv2.cvtColor(np.array(roi_image), cv2.COLOR_RGB2BGR)
+    print("   ↪ 기준 이미지 없이 화면 안정 감지로 측정합니다 (VISUAL_STABLE=1 과 같음)")
+    VISUAL = True
 
-            # 3. 크기 보정 (템플릿과 스크린샷 해상도가 다를 경우 대비)
-            if template_img.shape != roi_cv.shape:
-                roi_cv = cv2.resize(roi_cv, (template_img.shape[1], template_img.shape[0]))
+# 템플릿 이미지 로드 (컬러, 한 번만)
+matcher = None if VISUAL else create_matcher(
+    TARGET_IMAGE_PATH,
+    {'x': ROI_X_PCT, 'y': ROI_Y_PCT, 'w': ROI_W_PCT, 'h': ROI_H_PCT},
+    threshold=0.8,  # 일치율 80% 이상이면 성공
+)
 
-            # 4. 매칭 수행
-            res = cv2.matchTemplate(roi_cv, template_img, cv2.TM_CCOEFF_NORMED)
-            _, max_val, _, _ = cv2.minMaxLoc(res)
-
-            # 일치율 80% 이상이면 성공
-            if max_val > 0.8:
-                return True
-
-            # 타임아웃 체크
-            if time.time() - start_time > timeout:
-                return False
-            
-            # 0.05초 대기 (CPU 과부하 방지)
-            time.sleep(0.01)
-
-        except Exception as e:
-            print(f"   ⚠️ 이미지 분석 중 에러: {e}")
-            pass
 
 # ==========================================
 # 2. 테스트 실행
 # ==========================================
 driver = None
-test_results = []
+frames = None
+timeline = None
+# 회차마다 체크포인트에 바로 기록 (중단 후 다시 실행하면 이어서 측정)
+checkpoint = ResultLog("ios_work24_search_image_result", SCRIPT_DIR)
+test_results = checkpoint.rows
+repeats = stats.AdaptiveRepeat(test_results, ITERATIONS, checkpoint.next_iteration)
+# 회차 -> 시각적 완성도 (VISUAL_TIMELINE=1 일 때만)
+visual_rows = {}
+# 회차별 원본 기록은 통합 결과 저장소에도 적재 (CSV 는 저장소에서 내보냄)
+store = ResultStore()
+# 감지 비용 보정 (CALIBRATE=1 이면 첫 성공 회차 직후 측정, common.calibration)
+calibrator = calibration.Calibrator(store, "ios")
+record = store.start_run(app="work24", platform="ios", scenario="search", metric="검색반응속도(초)",
+                         script=__file__, resume=bool(test_results))
+DETECTOR = "화면 안정" if VISUAL else TARGET_IMAGE_NAME
 
 try:
     print(f"🚀 [고용24] 성능 테스트 (이미지 매칭 Ver) 시작")
     print(f"   🎯 타겟 이미지: {TARGET_IMAGE_NAME}")
     
-    driver = webdriver.Remote("http://127.0.0.1:4723", options=options)
+    device_env.apply_capabilities(options)
+    driver = profiler.instrument(webdriver.Remote(device_env.server_url("http://127.0.0.1:4723"), options=options))
     driver.update_settings({"waitForIdleTimeout": 0})
     wait = WebDriverWait(driver, 20)
-
-    for i in range(1, ITERATIONS + 1):
-        print(f"\n--- [Iter {i}/{ITERATIONS}] ---")
+    # MULTI_SCALE=1 이면 기기 배율(DPR)에 맞춰 기준 이미지 크기 조정 (common.image_match)
+    if matcher:
+        matcher.attach(driver)
+    # 화면 프레임: MJPEG 스트림 (불가 시 스크린샷)
+    frames = open_frame_source(driver)
+    # 완료 감지기 (감지 비용 보정도 같은 감지기 기준으로 측정 / 적용)
+    done_detector = visual_stable(frames) if VISUAL else ImageDetector(frames, matcher)
+    # VISUAL_TIMELINE=1 이면 같은 MJPEG 스트림으로 시각적 완성도(Speed Index) 함께 기록
+    if device_env.visual_timeline():
+        timeline = speed_index.from_frames(frames)
+
+    for i in repeats:
+        print(f"\n--- [Iter {i}/{repeats.limit}] ---")
         measured_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
         try:
@@ -129,18 +121,34 @@ try:
             # -----------------------------------------------------------
             # ✅ [Time Start] 클릭 -> 측정 시작
             # -----------------------------------------------------------
+            if timeline:
+                timeline.start()
+
             search_button.click()
             start_time = time.time()
 
             # [Step 3] 이미지 매칭으로 로딩 완료 확인
-            if wait_for_image_match(driver, start_time):
-                end_time = time.time()
+            result = wait_for(done_detector, start_time, timeout=20)
+            if result.matched:
+                end_time = result.end_time
                 duration = end_time - start_time
-                print(f"✅ {i}회차 소요 시간: {duration:.4f}초")
-                test_results.append([i, "성공", measured_at, duration])
+                prev_duration = result.prev_time - start_time
+                print(f"✅ {i}회차 소요 시간: {duration:.4f}초 (직전 프레임 {prev_duration:.4f}초)")
+                print(f"   📈 샘플링 속도: {result.sample_rate:.1f}Hz")
+                checkpoint.append([i, "성공", measured_at, duration, prev_duration])
+                # 검색 결과가 다 그려져 화면이 멈출 때까지 기록
+                visual_rows[i] = timeline.finish(start_time, end_time) if timeline else None
+                speed_index.report(visual_rows[i])
+                correction = calibrator.correct(done_detector, start_time, result)
+                record.add(i, STATUS_OK, measured_at, duration, start_time=start_time, end_time=end_time,
+                           detector=DETECTOR, prev_duration=prev_duration,
+                           **calibration.fields(correction), **speed_index.fields(visual_rows[i]))
             else:
                 print(f"❌ {i}회차 실패: 타임아웃 (이미지 매칭 실패)")
-                test_results.append([i, "실패", measured_at, 0])
+                checkpoint.append([i, "실패", measured_at, 0, 0])
+                record.add(i, STATUS_FAIL, measured_at, None, detector=DETECTOR)
+                if timeline:
+                    timeline.cancel()
                 # 실패 시 스크린샷 저장해보기 (디버깅용)
                 driver.save_screenshot(os.path.join(SCRIPT_DIR, f"fail_{i}.png"))
 
@@ -160,7 +168,10 @@ try:
 
         except Exception as e:
             print(f"❌ {i}회차 에러: {e}")
-            test_results.append([i, "실패", measured_at, 0])
+            checkpoint.append([i, "실패", measured_at, 0, 0])
+            record.add(i, STATUS_FAIL, measured_at, None, detector=DETECTOR, error=str(e))
+            if timeline:
+                timeline.cancel()
             try:
                 # 홈 버튼 강제 클릭 시도
                 driver.find_element(AppiumBy.XPATH, '//XCUIElementTypeStaticText[@name="홈"]').click()
@@ -172,29 +183,29 @@ except Exception as e:
     print(f"❌ 전체 오류: {e}")
 
 finally:
+    if timeline:
+        timeline.close()
+    if frames:
+        frames.close()
     if driver:
         driver.quit()
 
-# ==========================================
-# 3. 결과 저장
-# ==========================================
-durations = [row[3] for row in test_results if row[1] == "성공" and row[3] > 0]
-
-if durations:
-    avg_val = statistics.mean(durations)
-    max_val = max(durations)
-    min_val = min(durations)
-    stdev_val = statistics.pstdev(durations) if len(durations) > 1 else 0.0
-else:
-    avg_val = min_val = max_val = stdev_val = 0.0
-
-output_path = os.path.join(SCRIPT_DIR, "ios_work24_search_image_result.csv")
-
-with open(output_path, mode='w', newline='', encoding='utf-8-sig') as file:
-    writer = csv.writer(file)
-    writer.writerow(["회차", "상태", "측정시간", "검색반응속도(초)", "평균(초)", "최소(초)", "최대(초)", "표준편차(초)"])
-    for r in test_results:
-        writer.writerow([r[0], r[1], r[2], f"{r[3]:.4f}" if r[3] > 0 else "", "", "", "", ""])
-    writer.writerow(["통계", "", "", "", f"{avg_val:.4f}", f"{min_val:.4f}", f"{max_val:.4f}", f"{stdev_val:.4f}"])
-
-print(f"\n💾 저장 완료: {output_path}")
+    # ==========================================
+    # 3. 결과 저장
+    # ==========================================
+    result_stats = stats.from_rows(test_results)
+    stats.report(result_stats, "고용24 검색")
+    if timeline:
+        speed_index.summarize(visual_rows.values(), "고용24 검색")
+
+    output_path = device_env.result_path(os.path.join(SCRIPT_DIR, "ios_work24_search_image_result.csv"))
+
+    columns = dict(frame_source.CSV_FIELDS)
+    if timeline:
+        columns.update(speed_index.CSV_FIELDS)
+    store.export_csv(record.run_id, output_path, columns=columns)
+    if checkpoint.finish(repeats.total):
+        record.finish(repeats.reason)
+    store.close()
+
+    print(f"\n💾 저장 완료: {output_path}")
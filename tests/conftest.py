@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 공통 모듈(common) 경로 추가 (저장소 루트) - 측정 스크립트와 같은 방식
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
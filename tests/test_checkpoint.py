@@ -0,0 +1,42 @@
+"""common.checkpoint: 끊긴 마지막 줄을 버리고 이어서 측정"""
+
+import json
+
+from common import device_env
+from common.checkpoint import ResultLog
+
+
+def test_resume_drops_torn_line(tmp_path, monkeypatch):
+    monkeypatch.delenv(device_env.ENV_RESULT_DIR, raising=False)
+    log = ResultLog("launch", str(tmp_path), resume=True)
+    assert log.next_iteration == 1
+    log.append([1, "성공", "2026-01-01 10:00:00", 1.23])
+    log.append([2, "성공", "2026-01-01 10:00:05", 1.31])
+    with open(log.path, "a", encoding="utf-8") as f:
+        f.write('[3, "성공", "2026-01-01 1')
+
+    resumed = ResultLog("launch", str(tmp_path), resume=True)
+    assert resumed.rows == log.rows
+    assert resumed.next_iteration == 3
+    with open(resumed.path, encoding="utf-8") as f:
+        assert [json.loads(line) for line in f] == log.rows
+
+    resumed.append([3, "성공", "2026-01-01 10:00:10", 1.27])
+    assert ResultLog("launch", str(tmp_path), resume=True).next_iteration == 4
+
+
+def test_finish_keeps_checkpoint_until_complete(tmp_path, monkeypatch):
+    monkeypatch.delenv(device_env.ENV_RESULT_DIR, raising=False)
+    log = ResultLog("launch", str(tmp_path), resume=True)
+    log.append({"회차": 1, "소요 시간": 1.1})
+    log.finish(2)
+    assert ResultLog("launch", str(tmp_path), resume=True).next_iteration == 2
+
+    fresh = ResultLog("launch", str(tmp_path), resume=False)
+    assert fresh.rows == []
+    assert fresh.next_iteration == 1
+
+    fresh.append({"회차": 1, "소요 시간": 1.0})
+    fresh.append({"회차": 2, "소요 시간": 1.2})
+    assert fresh.finish(2)
+    assert ResultLog("launch", str(tmp_path), resume=True).rows == []
@@ -0,0 +1,120 @@
+"""common.image_match: 실제 기준 이미지(gov24_test.png)를 다른 해상도 화면에서 찾기"""
+
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from common.image_match import MultiScaleMatcher, RoiMatcher, benchmark, ccoeff_normed
+from common.templates import TemplateRegistry
+
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+TEMPLATE = os.path.join(REPO_ROOT, "iOS", "App_Start_iOS", "gov24", "gov24_test.png")
+ROI = {'x': 0, 'y': 0.88, 'w': 1, 'h': 0.1}
+
+# 기준 기기(iPhone 15) 화면 = 1178 x 2556 (기준 이미지 폭)
+REFERENCE = (1178, 2556)
+
+# (폭, 높이, DPR)
+DEVICES = [(1290, 2796, 3.0), (828, 1792, 2.0), (1179, 2556, 3.0)]
+
+
+def reference_frame():
+    """기준 이미지를 ROI 위치에 붙인 기준 기기 화면 (나머지는 무늬)"""
+    template = cv2.imread(TEMPLATE)
+    w, h = REFERENCE
+    yy, xx = np.mgrid[0:h, 0:w]
+    frame = np.dstack([(xx * 7 + yy * 3) % 256, (xx * 2 + yy * 5) % 256, (xx ^ yy) % 256]).astype(np.uint8)
+    top = int(h * ROI['y'])
+    frame[top:top + template.shape[0], :template.shape[1]] = template
+    return frame
+
+
+def scaled_frame(width, height):
+    return cv2.resize(reference_frame(), (width, height), interpolation=cv2.INTER_AREA)
+
+
+@pytest.fixture
+def registry():
+    return TemplateRegistry()
+
+
+@pytest.mark.parametrize("dpr_known", [True, False])
+@pytest.mark.parametrize("width,height,dpr", DEVICES)
+def test_multi_scale_not_below_roi_matcher(registry, width, height, dpr, dpr_known):
+    frame = scaled_frame(width, height)
+    baseline = RoiMatcher(TEMPLATE, ROI, threshold=0.8, registry=registry).score(frame)
+    matcher = MultiScaleMatcher(TEMPLATE, ROI, threshold=0.8, dpr=dpr if dpr_known else None, registry=registry)
+    score = matcher.score(frame)
+    assert score >= baseline - 1e-5
+    assert score >= 0.8
+
+
+def test_wider_device_tries_clamped_fit_scale(registry):
+    """화면 폭 전체 템플릿: 정규화 배율 1.095 가 영역(1290px)을 넘어도 후보에서 빠지지 않음"""
+    frame = scaled_frame(1290, 2796)
+    matcher = MultiScaleMatcher(TEMPLATE, ROI, dpr=3.0, registry=registry)
+    sizes = [size for _, size in matcher.candidate_sizes(frame.shape, matcher.template.shape, (475, 1290))]
+    assert sizes[0] == matcher.fit_size(frame.shape)
+    assert all(w <= 1290 and h <= 475 for w, h in sizes)
+    assert (1290, 279) in sizes
+
+
+def test_blank_frame_exits_early(registry):
+    frame = np.full((2796, 1290, 3), 245, np.uint8)
+    matcher = MultiScaleMatcher(TEMPLATE, ROI, dpr=3.0, registry=registry)
+    assert matcher.score(frame) < 0.5
+    assert matcher.last.loc is None
+
+
+def test_ccoeff_normed_matches_match_template():
+    template = cv2.imread(TEMPLATE)
+    rng = np.random.default_rng(0)
+    noisy = np.clip(template.astype(int) + rng.integers(-30, 30, template.shape), 0, 255).astype(np.uint8)
+    expected = cv2.matchTemplate(noisy, template, cv2.TM_CCOEFF_NORMED)[0, 0]
+    assert ccoeff_normed(noisy, template) == pytest.approx(expected, abs=1e-4)
+
+
+def device_frame(width, height, scale, top):
+    """기준 이미지를 scale 배로 (가로세로 같은 비율) 줄여 top 위치에 붙인 화면 - 화면 비율이 기준 기기와 다른 경우"""
+    template = cv2.imread(TEMPLATE)
+    banner = cv2.resize(template, (round(template.shape[1] * scale), round(template.shape[0] * scale)),
+                        interpolation=cv2.INTER_AREA)
+    yy, xx = np.mgrid[0:height, 0:width]
+    frame = np.dstack([(xx * 7 + yy * 3) % 256, (xx * 2 + yy * 5) % 256, (xx ^ yy) % 256]).astype(np.uint8)
+    top = min(top, height - banner.shape[0])
+    frame[top:top + banner.shape[0], :banner.shape[1]] = banner
+    return frame
+
+
+def test_changed_aspect_ratio(registry):
+    """iPhone SE (750 x 1334, 16:9): 배너가 화면 폭에 맞춰 가로세로 같은 비율로 줄어듦 -> ROI 높이와 비율이 다름"""
+    width, height = 750, 1334
+    frame = device_frame(width, height, width / REFERENCE[0], int(height * ROI['y']))
+    baseline = RoiMatcher(TEMPLATE, ROI, threshold=0.8, registry=registry).score(frame)
+    matcher = MultiScaleMatcher(TEMPLATE, ROI, threshold=0.8, registry=registry)
+    score = matcher.score(frame)
+    assert score >= 0.8
+    assert score > baseline
+
+
+def test_dpr_scaled_layout(registry):
+    """iPad (1640 x 2360, DPR 2): 배너가 화면 폭이 아니라 기기 배율(2/3)만큼만 커짐 -> DPR 을 알아야 찾음"""
+    width, height = 1640, 2360
+    frame = device_frame(width, height, 2.0 / 3.0, int(height * ROI['y']))
+    baseline = RoiMatcher(TEMPLATE, ROI, threshold=0.8, registry=registry).score(frame)
+    matcher = MultiScaleMatcher(TEMPLATE, ROI, threshold=0.8, dpr=2.0, registry=registry)
+    score = matcher.score(frame)
+    assert score >= 0.8
+    assert score > baseline
+    assert matcher.last.scale == pytest.approx(2.0 / 3.0, rel=0.1)
+
+
+def test_benchmark_reports_both_matchers(registry):
+    frame = scaled_frame(1290, 2796)
+    results = benchmark(TEMPLATE, frame, ROI, dpr=3.0, repeat=1, registry=registry)
+    assert set(results) == {"roi", "multi"}
+    assert results["multi"][0] >= results["roi"][0] - 1e-5
+    assert all(seconds > 0 for _, seconds in results.values())
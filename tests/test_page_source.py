@@ -0,0 +1,81 @@
+"""common.source_index: 속성 색인 결과가 common.page_source 전체 탐색과 같은지"""
+
+import pytest
+
+from common import page_source, source_index
+from common.source_index import BENCH_LOCATORS, SourceIndex
+
+
+ANDROID_SOURCE = """<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>
+<hierarchy index="0" class="hierarchy" rotation="0" width="1080" height="2340">
+  <android.widget.FrameLayout index="0" package="kr.go.minwon.m" class="android.widget.FrameLayout" text="" bounds="[0,0][1080,2340]">
+    <android.widget.TextView index="0" package="kr.go.minwon.m" class="android.widget.TextView" text="전체메뉴" resource-id="kr.go.minwon.m:id/menu" content-desc="" bounds="[0,0][200,100]" />
+    <android.widget.ImageView index="1" package="kr.go.minwon.m" class="android.widget.ImageView" text="" content-desc="혜택알림 3건" bounds="[900,0][1080,100]" />
+    <android.webkit.WebView index="2" package="kr.go.minwon.m" class="android.webkit.WebView" text="" resource-id="kr.go.minwon.m:id/kics_browser_webview" bounds="[0,100][1080,2200]">
+      <android.widget.EditText index="0" package="kr.go.minwon.m" class="android.widget.EditText" text="" resource-id="input_id" bounds="[40,300][1040,400]" />
+      <android.widget.Button index="1" package="kr.go.minwon.m" class="android.widget.Button" text="로그인" content-desc="로그인을 해 주세요" bounds="[40,500][1040,600]" />
+      <android.widget.Button index="2" package="kr.go.minwon.m" class="android.widget.Button" text="아이디 로그인" bounds="[40,650][1040,750]" />
+      <android.widget.Button index="3" package="kr.go.minwon.m" class="android.widget.Button" text="확인" bounds="[40,800][520,900]" />
+    </android.webkit.WebView>
+    <android.widget.TextView index="3" package="android" class="android.widget.TextView" text="아이디 또는 비밀번호가 일치하지 않습니다" resource-id="android:id/message" bounds="[40,2200][1040,2300]" />
+  </android.widget.FrameLayout>
+</hierarchy>"""
+
+IOS_SOURCE = """<?xml version="1.0" encoding="UTF-8"?>
+<AppiumAUT>
+  <XCUIElementTypeApplication type="XCUIElementTypeApplication" name="정부24" label="정부24" enabled="true" visible="true" x="0" y="0" width="393" height="852">
+    <XCUIElementTypeWindow type="XCUIElementTypeWindow" enabled="true" visible="true" x="0" y="0" width="393" height="852">
+      <XCUIElementTypeStaticText type="XCUIElementTypeStaticText" name="검색 결과" label="검색 결과" enabled="true" visible="true" x="0" y="60" width="393" height="40"/>
+      <XCUIElementTypeButton type="XCUIElementTypeButton" name="로그인" label="로그인" enabled="true" visible="true" x="20" y="400" width="353" height="50"/>
+      <XCUIElementTypeButton type="XCUIElementTypeButton" name="간편 로그인" label="간편 로그인" enabled="true" visible="true" x="20" y="470" width="353" height="50"/>
+      <XCUIElementTypeStaticText type="XCUIElementTypeStaticText" name="로그인을 해 주세요" label="로그인을 해 주세요" enabled="true" visible="false" x="0" y="120" width="393" height="30"/>
+    </XCUIElementTypeWindow>
+  </XCUIElementTypeApplication>
+</AppiumAUT>"""
+
+EXTRA_LOCATORS = [
+    ("xpath", "//android.widget.Button"),
+    ("xpath", "//*[@text='확인']"),
+    ("id", "input_id"),
+    (source_index.ANDROID_UIAUTOMATOR, 'new UiSelector().textContains("로그인")'),
+    (source_index.ANDROID_UIAUTOMATOR, 'new UiSelector().textMatches("(아이디|비밀번호).*(일치|오류)")'),
+    (source_index.IOS_PREDICATE, "type == 'XCUIElementTypeButton' AND label BEGINSWITH '간편'"),
+    (source_index.IOS_PREDICATE, "name == '로그인' AND visible == 1"),
+    (source_index.IOS_CLASS_CHAIN, "**/XCUIElementTypeStaticText"),
+]
+
+
+def _supported(root, locators):
+    """이 소스에서 평가할 수 있는 로케이터만 (지원하지 않는 방식은 page_source.SelectorError)"""
+    usable = []
+    for using, value in locators:
+        try:
+            page_source.find_all(root, using, value)
+        except page_source.SelectorError:
+            continue
+        usable.append((using, value))
+    return usable
+
+
+@pytest.mark.parametrize("source", [ANDROID_SOURCE, IOS_SOURCE, source_index.to_json(IOS_SOURCE)],
+                         ids=["android", "ios-xml", "ios-json"])
+def test_index_matches_full_scan(source):
+    index = SourceIndex.from_source(source)
+    locators = _supported(index.root, BENCH_LOCATORS + EXTRA_LOCATORS)
+    assert len(locators) >= 5
+    for using, value in locators:
+        expected = page_source.find_all(index.root, using, value)
+        assert index.find_all(using, value) == expected, (using, value)
+    assert index.find_many(locators) == [page_source.find_all(index.root, u, v) for u, v in locators]
+
+
+def test_expected_matches():
+    android = SourceIndex.from_source(ANDROID_SOURCE)
+    assert len(android.find_all(source_index.ANDROID_UIAUTOMATOR, 'new UiSelector().text("전체메뉴")')) == 1
+    assert len(android.find_all(source_index.ANDROID_UIAUTOMATOR, 'new UiSelector().textContains("로그인")')) == 2
+    assert len(android.find_all("xpath", '//android.widget.EditText[@resource-id="input_id"]')) == 1
+    assert android.find_all("id", "android:id/missing") == []
+
+    ios = SourceIndex.from_source(source_index.to_json(IOS_SOURCE))
+    assert len(ios.find_all(source_index.IOS_PREDICATE, "label CONTAINS '로그인'")) == 3
+    assert len(ios.find_all(source_index.IOS_CLASS_CHAIN, '**/XCUIElementTypeButton[`name == "로그인"`]')) == 1
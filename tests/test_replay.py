@@ -0,0 +1,90 @@
+"""common.replay_server: 녹화 재생 서버 + wait_until 왕복 (기기 / Appium 클라이언트 없이)"""
+
+import json
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from common.detectors import ANDROID_UIAUTOMATOR, ElementDetector
+from common.replay_server import ReplayServer
+from common.waiter import wait_until
+
+
+SPLASH = """<hierarchy rotation="0">
+  <android.widget.FrameLayout class="android.widget.FrameLayout" text="" bounds="[0,0][1080,2340]">
+    <android.widget.ProgressBar class="android.widget.ProgressBar" text="" bounds="[500,1100][580,1180]" />
+  </android.widget.FrameLayout>
+</hierarchy>"""
+
+MAIN = """<hierarchy rotation="0">
+  <android.widget.FrameLayout class="android.widget.FrameLayout" text="" bounds="[0,0][1080,2340]">
+    <android.widget.TextView class="android.widget.TextView" text="전체메뉴" bounds="[0,0][200,100]" />
+  </android.widget.FrameLayout>
+</hierarchy>"""
+
+APPEAR = 0.3
+DONE = (ANDROID_UIAUTOMATOR, 'new UiSelector().text("전체메뉴")')
+
+
+class WebDriverClient:
+    """find_elements / execute_script 만 있는 최소 W3C 클라이언트 (ElementDetector 가 쓰는 부분)"""
+
+    def __init__(self, url):
+        self.url = url
+        self.session_id = self._request("POST", "/session", {"capabilities": {}})["sessionId"]
+
+    def _request(self, method, path, body=None):
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        request = urllib.request.Request(self.url + path, data=data, method=method,
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return json.loads(response.read())["value"]
+
+    def find_elements(self, by, value):
+        return self._request("POST", f"/session/{self.session_id}/elements", {"using": by, "value": value})
+
+    def execute_script(self, script, *args):
+        return self._request("POST", f"/session/{self.session_id}/execute/sync", {"script": script, "args": list(args)})
+
+
+@pytest.fixture
+def server(tmp_path):
+    manifest = {
+        "platform": "android",
+        "window": {"width": 1080, "height": 2340},
+        "frames": [{"t": 0.0, "source": SPLASH}, {"t": APPEAR, "source": MAIN}],
+    }
+    (tmp_path / "session.json").write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+    with ReplayServer(str(tmp_path), port=0) as replay:
+        yield replay
+
+
+def test_wait_until_round_trip(server):
+    start = time.time()
+    driver = WebDriverClient(server.url)
+    assert driver.find_elements(*DONE) == []
+
+    result = wait_until(ElementDetector(driver, *DONE), start, timeout=3, label="재생 왕복")
+    assert result.matched
+    # 재생 서버가 프레임을 바꾼 시각(세션 시작 + APPEAR) 직후에 감지
+    assert APPEAR - 0.05 <= result.end_time - start <= APPEAR + 0.25
+
+
+def test_wait_until_times_out_on_missing_element(server):
+    driver = WebDriverClient(server.url)
+    detector = ElementDetector(driver, ANDROID_UIAUTOMATOR, 'new UiSelector().text("없는 요소")')
+    result = wait_until(detector, time.time(), timeout=0.5, label="재생 시간 초과")
+    assert not result.matched
+
+
+def test_mobile_source_and_invalid_selector(server):
+    driver = WebDriverClient(server.url)
+    time.sleep(APPEAR)
+    assert "전체메뉴" in driver.execute_script("mobile: source", {})
+
+    with pytest.raises(urllib.error.HTTPError) as error:
+        driver.find_elements("xpath", "//*[")
+    assert error.value.code == 400
+    assert json.loads(error.value.read())["value"]["error"] == "invalid selector"
@@ -0,0 +1,28 @@
+"""common.result_store: 측정 스크립트가 쓰는 기존 형식 CSV 내보내기"""
+
+import csv
+
+from common import frame_source, stats
+from common.result_store import STATUS_FAIL, STATUS_OK, ResultStore
+
+
+def test_export_csv_columns_and_summaries(tmp_path):
+    store = ResultStore(str(tmp_path / "results.sqlite3"))
+    record = store.start_run(app="work24", platform="ios", scenario="search", metric="검색반응속도(초)")
+    for i, duration in enumerate([1.2, 1.1, 1.3, 1.25], start=1):
+        record.add(i, STATUS_OK, f"2026-01-01 10:00:0{i}", duration, prev_duration=duration - 0.05)
+    record.add(5, STATUS_FAIL, None, None, error="Timeout")
+
+    path = store.export_csv(record.run_id, str(tmp_path / "out" / "result.csv"), columns=frame_source.CSV_FIELDS,
+                            summaries={"통계(기기)": stats.summarize([1.0, 1.1, 1.2]), "비어있음": stats.summarize([])})
+    store.close()
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.reader(f))
+
+    assert rows[0][:5] == ["회차", "상태", "측정시간", "검색반응속도(초)", "직전프레임(초)"]
+    assert rows[1][:5] == ["1", STATUS_OK, "2026-01-01 10:00:01", "1.2000", "1.1500"]
+    # 실패 회차: 측정값 / 부가 컬럼은 빈 칸
+    assert rows[5][:5] == ["5", STATUS_FAIL, "", "", ""]
+    # 통계 행 + 값이 있는 추가 통계 행만 (빈 Summary 는 건너뜀)
+    assert [r[0] for r in rows[6:]] == ["통계", "통계(기기)"]
+    assert all(len(r) == len(rows[0]) for r in rows)
@@ -0,0 +1,167 @@
+"""common.runner: 재생 서버 2대(가짜 Appium)에 shard 를 나눠 실행하고 CSV 병합"""
+
+import csv
+import json
+import os
+import textwrap
+
+import pytest
+
+from common import device_env, runner
+from common.replay_server import ReplayServer
+
+
+SPLASH = '<hierarchy><android.widget.ProgressBar class="android.widget.ProgressBar" text="" /></hierarchy>'
+MAIN = '<hierarchy><android.widget.TextView class="android.widget.TextView" text="전체메뉴" /></hierarchy>'
+APPEAR = 0.2
+
+# 실행할 때마다 activate_app 1회 -> APPEAR 초 뒤 전체메뉴가 뜨는 것을 기다리는 측정 스크립트
+SCRIPT = textwrap.dedent('''
+    import json, os, sys, time, urllib.request
+    from datetime import datetime
+    sys.path.insert(0, {root!r})
+    from common import device_env
+    from common.detectors import ANDROID_UIAUTOMATOR, ElementDetector
+    from common.result_store import STATUS_FAIL, STATUS_OK, ResultStore
+    from common.waiter import wait_until
+
+    URL = device_env.server_url("http://127.0.0.1:4723")
+
+    class Driver:
+        def __init__(self):
+            self.sid = self._post("/session", {{"capabilities": {{}}}})["sessionId"]
+
+        def _post(self, path, body):
+            request = urllib.request.Request(URL + path, data=json.dumps(body).encode("utf-8"), method="POST",
+                                             headers={{"Content-Type": "application/json"}})
+            with urllib.request.urlopen(request, timeout=5) as response:
+                return json.loads(response.read())["value"]
+
+        def activate_app(self, app_id):
+            self._post(f"/session/{{self.sid}}/appium/device/activate_app", {{"appId": app_id}})
+
+        def find_elements(self, by, value):
+            return self._post(f"/session/{{self.sid}}/elements", {{"using": by, "value": value}})
+
+    driver = Driver()
+    store = ResultStore()
+    record = store.start_run(app="work24", platform="android", scenario="app_start", metric="앱실행반응속도(초)")
+    for i in range(1, device_env.repeat_count(10) + 1):
+        measured_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        driver.activate_app("kr.or.keis.mo")
+        start_time = time.time()
+        result = wait_until(ElementDetector(driver, ANDROID_UIAUTOMATOR, 'new UiSelector().text("전체메뉴")'),
+                            start_time, timeout=3)
+        if result.matched:
+            record.add(i, STATUS_OK, measured_at, result.end_time - start_time)
+        else:
+            record.add(i, STATUS_FAIL, measured_at, None)
+    record.finish()
+    name = f"fake_launch_{{datetime.now():%Y%m%d_%H%M%S}}.csv"
+    store.export_csv(record.run_id, device_env.result_path(os.path.join(os.path.dirname(__file__), name)))
+''')
+
+
+def _recording(path):
+    path.mkdir()
+    manifest = {
+        "platform": "android",
+        "segments": [
+            {"on": None, "frames": [{"t": 0, "source": SPLASH}]},
+            {"on": "activate_app", "frames": [{"t": 0, "source": SPLASH}, {"t": APPEAR, "source": MAIN}]},
+        ],
+    }
+    (path / "session.json").write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+def _devices(path, entries):
+    path.write_text(json.dumps({"devices": entries}), encoding="utf-8")
+    return runner.load_devices(str(path))
+
+
+def test_port_allocation(tmp_path):
+    devices = _devices(tmp_path / "devices.json", [
+        {"name": "S25-1", "platform": "android", "udid": "A1"},
+        {"name": "S25-2", "platform": "android", "udid": "A2", "appium_port": 4723, "system_port": 8201},
+        {"name": "iPhone15-1", "platform": "ios", "udid": "I1"},
+    ])
+    # 직접 적은 포트는 그대로, 나머지는 기본값부터 겹치지 않게
+    assert [d.appium_port for d in devices] == [4724, 4723, 4725]
+    assert [d.system_port for d in devices] == [8200, 8201, 8202]
+    assert len({d.wda_port for d in devices}) == 3
+    # MJPEG 는 플랫폼별 기본 포트부터 (AOS UiAutomator2 7810 / iOS WDA 9100)
+    assert [d.mjpeg_port for d in devices] == [7810, 7811, 9100]
+
+    shard = runner.Shard("x.py", devices[0], 3, 0, str(tmp_path))
+    env = runner.shard_env(shard)
+    assert env[device_env.ENV_SERVER_URL] == "http://127.0.0.1:4724"
+    assert env[device_env.ENV_SYSTEM_PORT] == "8200"
+    assert env[device_env.ENV_UDID] == "A1"
+    assert env[device_env.ENV_REPEAT] == "3"
+    assert env[device_env.ENV_MJPEG_PORT] == "7810"
+
+
+class _Options:
+    def __init__(self, caps):
+        self.caps = dict(caps)
+
+    def to_capabilities(self):
+        return dict(self.caps)
+
+    def set_capability(self, name, value):
+        self.caps[name] = value
+
+
+def test_android_mjpeg_capability_only_with_timeline(monkeypatch):
+    monkeypatch.setenv(device_env.ENV_MJPEG_PORT, "7811")
+    monkeypatch.delenv(device_env.ENV_VISUAL_TIMELINE, raising=False)
+    android = device_env.apply_capabilities(_Options({"platformName": "Android"}))
+    ios = device_env.apply_capabilities(_Options({"platformName": "iOS"}))
+    assert "mjpegServerPort" not in android.caps
+    assert ios.caps["mjpegServerPort"] == 7811
+
+    monkeypatch.setenv(device_env.ENV_VISUAL_TIMELINE, "1")
+    monkeypatch.delenv(device_env.ENV_MJPEG_PORT)
+    android = device_env.apply_capabilities(_Options({"appium:automationName": "UiAutomator2"}))
+    assert android.caps["mjpegServerPort"] == 7810
+
+
+@pytest.fixture
+def servers(tmp_path):
+    with ReplayServer(_recording(tmp_path / "rec1"), port=0) as first, \
+            ReplayServer(_recording(tmp_path / "rec2"), port=0) as second:
+        yield first, second
+
+
+def test_two_shards_against_replay_servers(tmp_path, servers, monkeypatch):
+    monkeypatch.setenv("RESULT_DB", str(tmp_path / "results.sqlite3"))
+    script = tmp_path / "fake_launch.py"
+    script.write_text(SCRIPT.format(root=runner.REPO_ROOT), encoding="utf-8")
+    devices = _devices(tmp_path / "devices.json", [
+        {"name": f"S25-{n}", "platform": "android", "udid": f"A{n}",
+         "appium_port": int(server.url.rsplit(":", 1)[1])}
+        for n, server in enumerate(servers, 1)
+    ])
+    assert all(runner.wait_for_server(runner.server_url(d), timeout=5) for d in devices)
+
+    out_root = str(tmp_path / "out")
+    shards = runner.plan_shards([str(script)], devices, 5, out_root)
+    assert [(s.device.name, s.repeat) for s in shards] == [("S25-1", 3), ("S25-2", 2)]
+    codes = runner.run_shards(shards)
+    logs = {s.device.name: open(os.path.join(s.out_dir, "run.log"), encoding="utf-8").read() for s in shards}
+    assert all(code == 0 for code in codes.values()), logs
+
+    merged = runner.merge_results(shards, out_root)
+    assert len(merged) == 1
+    assert os.path.basename(merged[0]) == "fake_launch.csv"
+    with open(merged[0], newline="", encoding="utf-8-sig") as f:
+        header, *rows = list(csv.reader(f))
+    assert header[-1] == runner.DEVICE_COLUMN
+    data, stats_row = rows[:-1], rows[-1]
+    assert sorted((r[-1], r[0]) for r in data) == [("S25-1", "1"), ("S25-1", "2"), ("S25-1", "3"),
+                                                   ("S25-2", "1"), ("S25-2", "2")]
+    assert all(r[1] == "성공" for r in data)
+    assert stats_row[0] == "통계"
+    mean = float(stats_row[header.index("평균(초)")])
+    assert APPEAR - 0.05 <= mean <= APPEAR + 0.25
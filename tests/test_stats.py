@@ -0,0 +1,63 @@
+"""common.stats: 부트스트랩 신뢰구간 / Mann-Whitney U 검정"""
+
+import math
+
+import numpy as np
+import pytest
+
+from common.stats import bootstrap_ci, mann_whitney
+
+
+def test_bootstrap_ci_contains_mean_and_is_seeded():
+    values = np.random.default_rng(1).normal(1.2, 0.1, 40)
+    low, high = bootstrap_ci(values, seed=7)
+    assert low < values.mean() < high
+    assert (low, high) == bootstrap_ci(values, seed=7)
+    # 표본 평균의 표준오차(약 0.016) 기준 95% 구간 폭
+    assert 0.03 < high - low < 0.09
+
+
+def test_bootstrap_ci_percentile():
+    values = np.arange(1, 101, dtype=float)
+    low, high = bootstrap_ci(values, seed=3, percentile=90)
+    assert low <= np.percentile(values, 90) <= high
+    assert low > bootstrap_ci(values, seed=3)[1]
+
+
+def test_bootstrap_ci_degenerate():
+    assert bootstrap_ci([]) == (0.0, 0.0)
+    assert bootstrap_ci([1.5]) == (1.5, 1.5)
+    assert bootstrap_ci([2.0, 2.0, 2.0], seed=0) == (2.0, 2.0)
+
+
+def test_mann_whitney_separated_groups():
+    # U=0, 평균 4.5, 분산 5.25 -> z=(4.5-0.5)/sqrt(5.25), p = erfc(z/sqrt2) ≈ 0.0809 (scipy 연속성 보정과 같음)
+    result = mann_whitney([1, 2, 3], [4, 5, 6])
+    assert result.u == 0
+    assert result.effect == -1
+    assert result.p_value == pytest.approx(math.erfc(4 / math.sqrt(5.25) / math.sqrt(2)))
+    assert result.p_value == pytest.approx(0.0809, abs=1e-4)
+
+    reverse = mann_whitney([4, 5, 6], [1, 2, 3])
+    assert reverse.effect == 1
+    assert reverse.p_value == pytest.approx(result.p_value)
+
+
+def test_mann_whitney_ties_and_identical_groups():
+    assert mann_whitney([1, 2, 3], [1, 2, 3]).p_value == 1.0
+    # 모두 같은 값이면 분산 0 -> p=1
+    tied = mann_whitney([2, 2, 2], [2, 2])
+    assert tied.p_value == 1.0
+    assert tied.effect == 0
+
+
+def test_mann_whitney_large_shift_is_significant():
+    rng = np.random.default_rng(0)
+    result = mann_whitney(rng.normal(1.0, 0.05, 30), rng.normal(1.2, 0.05, 30))
+    assert result.p_value < 1e-6
+    assert result.effect < -0.9
+
+
+def test_mann_whitney_empty_group():
+    with pytest.raises(ValueError):
+        mann_whitney([], [1.0])
@@ -0,0 +1,81 @@
+"""common.waiter / common.scheduler: 호출 위치별 학습, 예상 구간 전 드문 확인과 그 지연 상한"""
+
+import time
+
+from common import device_env
+from common.detectors import Detection, Detector
+from common.scheduler import PollScheduler, default_scheduler, dense_scheduler
+from common.waiter import wait_until
+
+
+class AfterDetector(Detector):
+    """start_time 기준 delay 초 뒤부터 감지"""
+
+    name = "after"
+
+    def __init__(self, delay, cost=0.002):
+        self.delay = delay
+        self.cost = cost
+        self.polls = []
+
+    def poll(self):
+        time.sleep(self.cost)
+        now = time.time()
+        self.polls.append(now)
+        return Detection(now - self.start_time >= self.delay, now, None)
+
+
+def _learn(scheduler, label, delay, count=3):
+    for _ in range(count):
+        wait_until(AfterDetector(delay), time.time(), timeout=2, scheduler=scheduler, label=label)
+
+
+def test_history_is_keyed_by_label_and_detector():
+    scheduler = PollScheduler()
+    _learn(scheduler, "준비", 0.3)
+    assert scheduler.window(("준비", "after")) is not None
+    assert scheduler.window(("측정", "after")) is None
+
+
+def test_default_label_is_call_site():
+    scheduler = PollScheduler()
+    wait_until(AfterDetector(0.0), time.time(), timeout=1, scheduler=scheduler)
+    keys = list(scheduler._states)
+    assert len(keys) == 1
+    assert keys[0][0].startswith("test_waiter.py:")
+
+
+def test_default_scheduler_is_sparse():
+    assert default_scheduler.sparse == (not device_env.dense_poll())
+    assert not dense_scheduler.sparse
+
+
+def test_dense_scheduler_never_sleeps_before_window():
+    scheduler = PollScheduler(sparse=False)
+    _learn(scheduler, "측정", 0.3)
+    assert scheduler.window(("측정", "after")) is not None
+    assert scheduler.next_delay(("측정", "after"), 0.0) == scheduler.min_gap
+
+    # 학습한 완료 시간보다 훨씬 빨리 끝나도 감지가 늦어지지 않음
+    detector = AfterDetector(0.05)
+    start = time.time()
+    result = wait_until(detector, start, timeout=2, scheduler=scheduler, label="측정")
+    assert result.matched
+    assert result.end_time - start < 0.05 + 0.02
+
+
+def test_sparse_scheduler_spaces_polls_before_window():
+    scheduler = PollScheduler(sparse_ratio=4.0)
+    _learn(scheduler, "준비", 0.4)
+    assert scheduler.next_delay(("준비", "after"), 0.0) > 0
+
+
+def test_sparse_delay_on_early_finish_is_bounded():
+    scheduler = PollScheduler(sparse_ratio=4.0, max_gap=0.1)
+    _learn(scheduler, "측정", 0.5, count=3)
+
+    # 학습한 구간보다 훨씬 빨리 끝나면 드문 간격 1번만큼 늦게 감지될 수 있음 (max_gap 이하)
+    start = time.time()
+    result = wait_until(AfterDetector(0.05), start, timeout=2, scheduler=scheduler, label="측정")
+    assert result.matched
+    assert result.end_time - start < 0.05 + scheduler.max_gap + 0.03